@@ -1,5 +1,6 @@
+import asyncio
 import contextlib
-import io
+import hashlib
 import json
 import logging
 import os
@@ -8,33 +9,104 @@ import shutil
 import subprocess
 import wave
 import uuid
-from datetime import datetime, timezone
-import time
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
 
 import httpx
 from fastapi import APIRouter, HTTPException, Query, Request, UploadFile, File
-from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel, Field
-
+from starlette.background import BackgroundTask
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+
+from app.core.analysis import (
+    AnalysisError,
+    get_analysis_proxy,
+    get_waveform_peaks,
+    invalidate_analysis_proxy,
+)
+from app.core.app_config import (
+    AppConfig,
+    app_config_revision,
+    load_app_config,
+    save_app_config,
+)
 from app.core.cache import (
+    SEQUENTIAL_FORMAT,
     build_config_fingerprint,
+    cache_revision,
+    cache_stats,
+    delete_recording_cache,
     get_cache_entry,
-    upsert_cache_entry,
+    load_transcript,
+    source_changed,
+    verified_full_fingerprint,
 )
+from app.core.cancellation import CancelToken, OperationCancelled
 from app.core.config import settings
+from app.core.events import events as event_bus
+from app.core.fingerprint import memoized_quick_fingerprint
 from app.core.storage import (
     get_local_root,
     ensure_recording_row,
     ensure_local_copy,
     get_storage_state,
+    index_revision,
+    refresh_index,
     list_unified_recordings,
     resolve_recording_path,
+    scan_filesystem,
     update_keep_local,
 )
+from app.core.jobs import (
+    ACTIVE_STATUSES,
+    KIND_FULL,
+    KIND_SEQUENTIAL,
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    STATUS_CANCELLED,
+    STATUS_FAILED,
+    transcription_queue,
+)
+from app.core.pipeline import PRIORITY_BACKFILL, pipeline as processing_pipeline
+from app.core.speech import (
+    SPEECH_FORMATS,
+    SpeechPlan,
+    SpeechRenditionError,
+    build_wav_rendition,
+    cached_rendition,
+    opus_available,
+    plan_speech_rendition,
+    stream_opus_rendition,
+)
+from app.core.singleflight import SingleFlight, single_flight_stats
 from app.core.status import get_status
+from app.core.transcript import RENDER_FORMATS, render_transcript
+from app.core.transcription import (
+    WhisperError,
+    attach_sequential_job,
+    store_sequential_segment,
+    transcribe_segment,
+)
+from app.core.vad import (
+    VadBusyError,
+    VadError,
+    get_cached_vad_segments,
+    get_cached_vad_segments_bulk,
+    iter_vad_segments,
+    run_vad_segments,
+)
+from app.core.whisper_backends import backend_pool, configured_backends
+from app.core.whisper_client import whisper_client
 from app.core.recording import (
     RecordingBusyError,
     RecordingDeviceError,
@@ -54,107 +126,10 @@ templates = Jinja2Templates(directory="app/templates")
 logger = logging.getLogger(__name__)
 
 
-CONFIG_FILE_PATH = Path(os.getenv("RECORDER_CONFIG_PATH", "config.json"))
-
-
-VAD_LOCK_PATH = Path(os.getenv("RECORDER_VAD_LOCK_PATH", settings.cache_db_path + ".vad.lock"))
-
-
-class VadBusyError(Exception):
-    pass
-
-
-class RecordingLightConfig(BaseModel):
-    enabled: bool = True
-    brightness: int = Field(20, ge=4, le=50)
-    color: str = "#ff0000"
-
-
-class WhisperConfig(BaseModel):
-    enabled: bool = False
-    api_url: str = "http://127.0.0.1:8093"
-    response_format: str = "json"
-    temperature: float = Field(0.0, ge=0.0, le=2.0)
-    temperature_inc: float = Field(0.2, ge=0.0, le=2.0)
-    model_path: str = ""
-
-
-class VadConfig(BaseModel):
-    threshold: float = Field(0.5, ge=0.0, le=1.0)
-    min_silence_duration_ms: int = Field(300, ge=0)
-    max_speech_duration_s: float = Field(60.0, ge=0.0)
-    speech_pad_ms: int = Field(100, ge=0)
-    samples_overlap_s: float = Field(0.10, ge=0.0, le=1.0)
-
-
-class ButtonConfig(BaseModel):
-    min_interval_sec: float = Field(0.8, ge=0.0)
-
-
-class VadBinaryConfig(BaseModel):
-    binary_path: str = Field(settings.vad_binary)
-    model_path: str = Field(settings.vad_model_path)
-    whisper_cpp_root: str = ""
-
-
-class StorageConfig(BaseModel):
-    local_root: str = Field(settings.recording_dir)
-    secondary_root: str = Field(settings.recordings_secondary_root)
-    secondary_enabled: bool = Field(settings.secondary_storage_enabled)
-    keep_local_after_sync: bool = Field(settings.keep_local_after_sync)
-
-
-class DebugConfig(BaseModel):
-    vad_segments: bool = Field(settings.debug_vad_segments)
-
-
-class ThemeConfig(BaseModel):
-    base: str = "#1e1e2e"
-    surface0: str = "#313244"
-    surface1: str = "#45475a"
-    surface2: str = "#585b70"
-    text: str = "#cdd6f4"
-    subtext1: str = "#bac2de"
-    overlay2: str = "#9399b2"
-    accent_start: str = "#c86b23"
-    accent_end: str = "#f39237"
-
-
-class AppConfig(BaseModel):
-    recording_light: RecordingLightConfig = Field(
-        default_factory=RecordingLightConfig
-    )
-    default_max_duration_seconds: int = Field(
-        settings.max_single_recording_seconds, ge=1
-    )
-    whisper: WhisperConfig = Field(default_factory=WhisperConfig)
-    vad: VadConfig = Field(default_factory=VadConfig)
-    theme: ThemeConfig = Field(default_factory=ThemeConfig)
-    button: ButtonConfig = Field(default_factory=ButtonConfig)
-    vad_binary: VadBinaryConfig = Field(default_factory=VadBinaryConfig)
-    storage: StorageConfig = Field(default_factory=StorageConfig)
-    debug: DebugConfig = Field(default_factory=DebugConfig)
-
-
-def _load_app_config() -> AppConfig:
-    if not CONFIG_FILE_PATH.exists():
-        return AppConfig()
-    try:
-        raw = CONFIG_FILE_PATH.read_text(encoding="utf-8")
-        data = json.loads(raw)
-        return AppConfig(**data)
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.warning("Failed to load config from %s: %s", CONFIG_FILE_PATH, exc)
-        return AppConfig()
-
-
 def _save_app_config(cfg: AppConfig) -> None:
     try:
-        CONFIG_FILE_PATH.write_text(
-            json.dumps(cfg.model_dump(), indent=2), encoding="utf-8"
-        )
+        save_app_config(cfg)
     except Exception as exc:  # pragma: no cover - defensive
-        logger.error("Failed to save config to %s: %s", CONFIG_FILE_PATH, exc)
         raise HTTPException(
             status_code=500, detail="Failed to save configuration"
         ) from exc
@@ -169,375 +144,105 @@ def _expand_user_path(path_str: str) -> Optional[Path]:
         return None
 
 
-def _pid_exists(pid: int) -> bool:
-    if pid <= 0:
-        return False
-    if os.name == "posix":
-        try:
-            os.kill(pid, 0)
-        except ProcessLookupError:
-            return False
-        except PermissionError:
-            return True
-        else:
-            return True
-    return True
-
-
-def _acquire_vad_lock(timeout: float = 600.0, poll_interval: float = 0.5) -> None:
-    start = time.monotonic()
-    pid_str = str(os.getpid()).encode("ascii", errors="ignore")
-    while True:
-        try:
-            fd = os.open(str(VAD_LOCK_PATH), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-        except FileExistsError:
-            try:
-                raw = VAD_LOCK_PATH.read_text(encoding="utf-8").strip()
-                existing_pid = int(raw.split()[0]) if raw else -1
-            except Exception:
-                existing_pid = -1
-
-            stale = existing_pid > 0 and not _pid_exists(existing_pid)
-            if stale:
-                with contextlib.suppress(Exception):
-                    VAD_LOCK_PATH.unlink()
-                continue
-
-            if time.monotonic() - start >= timeout:
-                raise VadBusyError("Timed out waiting for VAD segmentation lock")
-
-            time.sleep(poll_interval)
-            continue
-
-        try:
-            os.write(fd, pid_str)
-        finally:
-            os.close(fd)
-        return
-
-
-def _release_vad_lock() -> None:
-    with contextlib.suppress(FileNotFoundError):
-        VAD_LOCK_PATH.unlink()
-
-
-def _parse_vad_segments_output(output: str) -> List[dict]:
-    vad_segments: List[dict] = []
-    speech_segments: List[dict] = []
-
-    pattern_vad = re.compile(
-        r"VAD segment\s+\d+:\s*start\s*=\s*([0-9.]+),\s*end\s*=\s*([0-9.]+)"
-    )
-    pattern_speech = re.compile(
-        r"Speech segment\s+\d+:\s*start\s*=\s*([0-9.]+),\s*end\s*=\s*([0-9.]+)"
-    )
+T = TypeVar("T")
 
-    for line in output.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+# How often a request doing blocking work checks whether its client is gone.
+DISCONNECT_POLL_SECONDS = 0.5
 
-        m_vad = pattern_vad.search(line)
-        if m_vad:
-            start = float(m_vad.group(1))
-            end = float(m_vad.group(2))
-            if end > start:
-                vad_segments.append({"start": start, "end": end})
-            continue
+# nginx's "client closed request"; nobody reads it, but it shows up in logs.
+CLIENT_CLOSED_STATUS = 499
 
-        m_speech = pattern_speech.search(line)
-        if m_speech:
-            # In some builds, "Speech segment" times are centiseconds;
-            # convert to seconds by dividing by 100.
-            start_raw = float(m_speech.group(1))
-            end_raw = float(m_speech.group(2))
-            start = start_raw / 100.0
-            end = end_raw / 100.0
-            if end > start:
-                speech_segments.append({"start": start, "end": end})
-
-    if vad_segments:
-        return vad_segments
-    return speech_segments
-
-
-def _run_vad_segments(audio_path: Path, force: bool = False) -> List[dict]:
-    if not settings.vad_binary:
-        raise HTTPException(status_code=500, detail="VAD binary is not configured")
-    if not settings.vad_model_path:
-        raise HTTPException(status_code=500, detail="VAD model path is not configured")
-
-    cfg = _load_app_config()
-    vad_cfg = getattr(cfg, "vad", None)
 
-    config_hash, config_json = build_config_fingerprint(
-        whisper_cfg=cfg.whisper, vad_cfg=vad_cfg
-    )
+async def _run_until_disconnect(request: Request, fn: Callable[[CancelToken], T]) -> T:
+    """Run fn(cancel) in the thread pool; cancel it if the client disconnects.
 
-    if not force:
-        cached = get_cache_entry(audio_path.stem.split("_", 2)[1], "vad_sequential")
-        if cached is not None:
-            raw = cached.get("vad_segments_json")
-            if raw:
-                try:
-                    segments = json.loads(raw)
-                    logger.info(
-                        "Using cached VAD segments (%d) for %s",
-                        len(segments),
-                        audio_path.name,
-                    )
-                    return segments
-                except Exception:  # pragma: no cover - defensive
-                    pass
+    Subprocesses and Whisper calls made with the token are stopped as soon
+    as the browser navigates away or aborts the fetch.
+    """
 
+    cancel = CancelToken()
+    task = asyncio.ensure_future(run_in_threadpool(fn, cancel))
     try:
-        _acquire_vad_lock()
-    except VadBusyError as exc:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if not cancel.cancelled and await request.is_disconnected():
+                logger.info("Client left %s; cancelling its work", request.url.path)
+                cancel.cancel()
+    except OperationCancelled as exc:
         raise HTTPException(
-            status_code=503,
-            detail="VAD segmentation is currently busy; please retry this request later",
+            status_code=CLIENT_CLOSED_STATUS, detail="Request cancelled"
         ) from exc
-
-    try:
-        cmd = [
-            settings.vad_binary,
-            "--vad-model",
-            settings.vad_model_path,
-            "--file",
-            str(audio_path),
-            "--threads",
-            str(settings.vad_threads),
-            "--no-prints",
-        ]
-
-        if vad_cfg is not None:
-            cmd.extend(
-                [
-                    "--vad-threshold",
-                    f"{vad_cfg.threshold:.3f}",
-                    "--vad-min-silence-duration-ms",
-                    str(vad_cfg.min_silence_duration_ms),
-                    "--vad-max-speech-duration-s",
-                    f"{vad_cfg.max_speech_duration_s:.3f}",
-                    "--vad-speech-pad-ms",
-                    str(vad_cfg.speech_pad_ms),
-                    "--vad-samples-overlap",
-                    f"{vad_cfg.samples_overlap_s:.3f}",
-                ]
-            )
-
-        try:
-            proc = subprocess.run(
-                cmd,
-                check=False,
-                capture_output=True,
-                text=True,
-            )
-        except FileNotFoundError as exc:  # pragma: no cover - environment specific
-            logger.error("VAD binary not found: %s", settings.vad_binary)
-            raise HTTPException(
-                status_code=500, detail="VAD binary is not available on this server"
-            ) from exc
-        except OSError as exc:  # pragma: no cover - environment specific
-            logger.error("Failed to start VAD process %s: %s", cmd, exc)
-            raise HTTPException(
-                status_code=500, detail="Failed to start VAD process"
-            ) from exc
-
-        if proc.returncode != 0:
-            logger.error(
-                "VAD process failed (%s): stdout=%s stderr=%s",
-                proc.returncode,
-                proc.stdout,
-                proc.stderr,
-            )
-            raise HTTPException(
-                status_code=500, detail="VAD segmentation failed for this recording"
-            )
-
-        segments = _parse_vad_segments_output(proc.stdout)
-        logger.info(
-            "VAD detected %d speech segments for %s", len(segments), audio_path.name
-        )
-
-        recording_id = audio_path.stem.split("_", 2)[1]
-        upsert_cache_entry(
-            recording_id=recording_id,
-            response_format="vad_sequential",
-            config_hash=config_hash,
-            config_json=config_json,
-            vad_segments_json=json.dumps(segments),
-        )
     finally:
-        _release_vad_lock()
-
-    return segments
+        if not task.done():
+            cancel.cancel()
 
 
-def _extract_wav_segment_bytes(path: Path, start: float, end: float) -> bytes:
-    if end <= start:
-        raise ValueError("end must be greater than start")
+# Change counters restart from zero with the process; this keeps an ETag
+# handed out before a restart from matching a different payload after it.
+_ETAG_BOOT = uuid.uuid4().hex[:8]
 
-    start_sec = max(0.0, float(start))
-    end_sec = float(end)
-
-    cmd = [
-        "ffmpeg",
-        "-nostdin",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-ss",
-        f"{start_sec:.3f}",
-        "-to",
-        f"{end_sec:.3f}",
-        "-i",
-        str(path),
-        "-acodec",
-        "pcm_s16le",
-        "-ac",
-        "1",
-        "-ar",
-        str(settings.sample_rate),
-        "-f",
-        "wav",
-        "-",
-    ]
-
-    try:
-        proc = subprocess.run(
-            cmd,
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-    except FileNotFoundError as exc:  # pragma: no cover - environment specific
-        logger.error("ffmpeg not found while slicing segments")
-        raise RuntimeError("ffmpeg is required for VAD segment extraction") from exc
-    except OSError as exc:  # pragma: no cover - environment specific
-        logger.error("Failed to start ffmpeg for segment extraction: %s", exc)
-        raise RuntimeError("Failed to start ffmpeg for segment extraction") from exc
-
-    if proc.returncode != 0 or not proc.stdout:
-        logger.error(
-            "ffmpeg segment extraction failed (%s): %s",
-            proc.returncode,
-            proc.stderr.decode("utf-8", errors="ignore"),
-        )
-        raise RuntimeError("Failed to extract audio segment with ffmpeg")
-
-    return proc.stdout
 
+def _validators(revisions: Sequence[Tuple[int, float]], *parts: Any) -> Dict[str, str]:
+    """Weak ETag and Last-Modified headers for a payload built from state
+    whose (counter, changed_at) revisions are given.
+    """
 
-def _debug_save_segment_wav(
-    recording_path: Path,
-    segment_index: Optional[int],
-    start: float,
-    end: float,
-    data: bytes,
-) -> None:
-    if not getattr(settings, "debug_vad_segments", False):
-        return
+    tag = ".".join([_ETAG_BOOT, *(str(rev) for rev, _ in revisions), *map(str, parts)])
+    last_modified = max(changed_at for _, changed_at in revisions)
+    return {
+        "ETag": f'W/"{tag}"',
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # Cacheable, but always revalidated: the payloads change in place.
+        "Cache-Control": "no-cache",
+    }
 
-    try:
-        out_dir = recording_path.parent / "vad_segments"
-        out_dir.mkdir(parents=True, exist_ok=True)
 
-        idx = segment_index if segment_index is not None and segment_index >= 0 else 0
-        fname = (
-            f"{recording_path.stem}_seg_{idx:03d}_"
-            f"{start:.2f}s_{end:.2f}s.wav"
-        )
-        out_path = out_dir / fname
-        out_path.write_bytes(data)
-        logger.info("Saved VAD debug segment to %s", out_path)
-    except Exception as exc:  # pragma: no cover - debug only
-        logger.warning("Failed to save VAD debug segment: %s", exc)
-
-
-def _call_whisper_inference(
-    whisper_cfg: WhisperConfig,
-    file_name: str,
-    file_obj,
-    response_format_override: Optional[str] = None,
-) -> Tuple[str, str]:
-    if not whisper_cfg.enabled:
-        raise HTTPException(
-            status_code=400, detail="Whisper integration is disabled in configuration"
-        )
+def _not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """A 304 response when the client's copy is current, else None."""
 
-    api_base = whisper_cfg.api_url.rstrip("/")
-    if not api_base:
-        raise HTTPException(
-            status_code=400, detail="Whisper API URL is not configured"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison (RFC 9110, 8.8.3.2): ignore the W/ prefixes.
+        etag = headers["ETag"]
+        etag = etag[2:] if etag.startswith("W/") else etag
+        tags = [t.strip() for t in if_none_match.split(",")]
+        current = any(
+            t == "*" or (t[2:] if t.startswith("W/") else t) == etag for t in tags
         )
-
-    inference_url = f"{api_base}/inference"
-
-    mode_raw = (response_format_override or whisper_cfg.response_format or "json")
-    mode = str(mode_raw).strip().lower()
-
-    # "vad_sequential" is a UI mode, not a Whisper response_format.
-    # When configured, fall back to a real format (json) for the server call.
-    if mode == "vad_sequential":
-        requested_fmt = "json"
     else:
-        requested_fmt = mode
-
-    data = {
-        "response_format": requested_fmt,
-        "temperature": whisper_cfg.temperature,
-        "temperature_inc": whisper_cfg.temperature_inc,
-    }
-    if whisper_cfg.model_path:
-        data["model_path"] = whisper_cfg.model_path
-
-    try:
-        # Allow very long-running transcription requests (large files, slow models)
-        # by disabling the HTTP client timeout for the Whisper call. Connection
-        # setup still relies on the underlying OS/socket timeouts.
-        with httpx.Client(timeout=None) as client:
-            files = {"file": (file_name, file_obj, "audio/wav")}
-            response = client.post(inference_url, data=data, files=files)
-    except Exception as exc:  # pragma: no cover - network/service specific
-        logger.error("Failed to call Whisper API at %s: %s", inference_url, exc)
-        raise HTTPException(
-            status_code=502, detail="Failed to reach Whisper transcription service"
-        ) from exc
-
-    if response.status_code != 200:
-        # Try to surface any error details from the Whisper server
-        detail: str
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None:
+            return None
         try:
-            body = response.json()
-            detail = body.get("detail") or body.get("error") or response.text
-        except Exception:  # pragma: no cover - defensive
-            detail = response.text
-        logger.warning(
-            "Whisper transcription failed (%s): %s",
-            response.status_code,
-            detail,
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return None
+        modified = parsedate_to_datetime(headers["Last-Modified"]).timestamp()
+        current = modified <= since
+    return Response(status_code=304, headers=headers) if current else None
+
+
+def _run_vad_segments(
+    audio_path: Path, force: bool = False, cancel: Optional[CancelToken] = None
+) -> List[dict]:
+    cfg = load_app_config()
+    try:
+        return run_vad_segments(
+            audio_path,
+            vad_cfg=getattr(cfg, "vad", None),
+            whisper_cfg=cfg.whisper,
+            force=force,
+            cancel=cancel,
         )
+    except VadBusyError as exc:
         raise HTTPException(
-            status_code=502,
-            detail=f"Whisper transcription failed ({response.status_code})",
-        )
-
-    fmt = requested_fmt
-    if fmt == "json":
-        try:
-            payload = response.json()
-        except Exception:  # pragma: no cover - defensive
-            payload = response.text
-        if isinstance(payload, (dict, list)):
-            text_content = json.dumps(payload, indent=2, ensure_ascii=False)
-        else:
-            text_content = str(payload)
-    else:
-        # For text, srt, vtt, etc. treat as plain text content.
-        text_content = response.text
-
-    return fmt, text_content
+            status_code=503,
+            detail="VAD segmentation is currently busy; please retry this request later",
+        ) from exc
+    except VadError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
 @router.get("/healthz")
@@ -550,6 +255,45 @@ def status() -> dict:
     return get_status()
 
 
+# An SSE comment is sent this often so dead connections are noticed.
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/events")
+async def stream_events(
+    topics: Optional[str] = Query(
+        None, description="Comma-separated topics (recording, config, storage)"
+    ),
+):
+    """Push recording, config and storage state changes as Server-Sent Events.
+
+    The current state of every topic is sent first, then each change as it
+    happens (event name = topic, data = JSON state). Meant for the button
+    and pixel ring services so they do not have to poll.
+    """
+
+    wanted = {t.strip() for t in (topics or "").split(",") if t.strip()}
+
+    async def stream():
+        seq = 0
+        while True:
+            seq, changed = await event_bus.wait_async(seq, EVENTS_KEEPALIVE_SECONDS)
+            sent = False
+            for topic, data in changed:
+                if wanted and topic not in wanted:
+                    continue
+                sent = True
+                yield f"id: {seq}\nevent: {topic}\ndata: {json.dumps(data)}\n\n"
+            if not sent:
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
 @router.get("/config")
 def config() -> dict:
     return {
@@ -640,7 +384,7 @@ def _get_whisper_cpp_root(cfg: AppConfig) -> Optional[Path]:
 
 @router.get("/ui/whisper-models")
 def list_whisper_models() -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config()
     vad_cfg = getattr(cfg, "vad_binary", None)
     root_str = getattr(vad_cfg, "whisper_cpp_root", "") if vad_cfg is not None else ""
 
@@ -704,7 +448,7 @@ class WhisperLoadModelRequest(BaseModel):
 
 @router.post("/ui/whisper-load-model")
 def load_whisper_model(payload: WhisperLoadModelRequest) -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config().model_copy(deep=True)
     whisper_cfg = getattr(cfg, "whisper", None)
 
     if whisper_cfg is None or not whisper_cfg.enabled:
@@ -713,8 +457,8 @@ def load_whisper_model(payload: WhisperLoadModelRequest) -> dict:
             detail="Whisper integration is disabled in configuration",
         )
 
-    api_base = whisper_cfg.api_url.rstrip("/")
-    if not api_base:
+    backends = configured_backends(whisper_cfg)
+    if not backends:
         raise HTTPException(
             status_code=400,
             detail="Whisper API URL is not configured",
@@ -727,34 +471,37 @@ def load_whisper_model(payload: WhisperLoadModelRequest) -> dict:
             detail="Model path is required",
         )
 
-    load_url = f"{api_base}/load"
+    # Every backend must serve the same model, so load it on all of them.
+    for backend in backends:
+        load_url = f"{backend['url']}/load"
 
-    try:
-        with httpx.Client(timeout=30.0) as client:
-            files = {"model": (None, model_path)}
-            response = client.post(load_url, files=files)
-    except Exception as exc:
-        logger.error("Failed to call Whisper model load at %s: %s", load_url, exc)
-        raise HTTPException(
-            status_code=502,
-            detail="Failed to reach Whisper model loader service",
-        ) from exc
-
-    if response.status_code != 200:
         try:
-            body = response.json()
-            detail = body.get("detail") or body.get("error") or response.text
-        except Exception:
-            detail = response.text
-        logger.warning(
-            "Whisper model load failed (%s): %s",
-            response.status_code,
-            detail,
-        )
-        raise HTTPException(
-            status_code=502,
-            detail=f"Whisper model load failed ({response.status_code})",
-        )
+            response, _ = whisper_client.post(
+                load_url, files={"model": (None, model_path)}, timeout=30.0
+            )
+        except Exception as exc:
+            logger.error("Failed to call Whisper model load at %s: %s", load_url, exc)
+            raise HTTPException(
+                status_code=502,
+                detail="Failed to reach Whisper model loader service",
+            ) from exc
+
+        if response.status_code != 200:
+            try:
+                body = response.json()
+                detail = body.get("detail") or body.get("error") or response.text
+            except Exception:
+                detail = response.text
+            logger.warning(
+                "Whisper model load failed on %s (%s): %s",
+                backend["url"],
+                response.status_code,
+                detail,
+            )
+            raise HTTPException(
+                status_code=502,
+                detail=f"Whisper model load failed ({response.status_code})",
+            )
 
     whisper_cfg.model_path = model_path
     cfg.whisper = whisper_cfg
@@ -763,9 +510,33 @@ def load_whisper_model(payload: WhisperLoadModelRequest) -> dict:
     return {"ok": True, "model_path": model_path}
 
 
+@router.get("/ui/whisper-stats")
+def get_whisper_stats() -> dict:
+    """Connection reuse, latency totals and per-backend throughput."""
+
+    backend_pool.sync(load_app_config().whisper)
+    stats = whisper_client.stats()
+    stats["backends"] = backend_pool.stats()
+    return stats
+
+
+@router.get("/ui/single-flight-stats")
+def get_single_flight_stats() -> dict:
+    """Per operation: computations run, and duplicates that shared one instead."""
+
+    return single_flight_stats()
+
+
+@router.get("/ui/cache-stats")
+def get_cache_stats() -> dict:
+    """Transcription cache size and hit rates per response format."""
+
+    return cache_stats()
+
+
 @router.get("/ui/vad-status")
 def get_vad_status() -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config()
     vad_cfg = getattr(cfg, "vad_binary", None)
 
     root_str = getattr(vad_cfg, "whisper_cpp_root", "") if vad_cfg is not None else ""
@@ -853,7 +624,7 @@ def get_vad_status() -> dict:
 
 @router.get("/ui/config")
 def get_ui_config() -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config()
     return cfg.model_dump()
 
 
@@ -871,6 +642,20 @@ class RecordingStorageUpdate(BaseModel):
     keep_local: Optional[bool] = None
 
 
+class VadBatchLookup(BaseModel):
+    ids: List[str] = Field(default_factory=list, max_length=1000)
+    enqueue_missing: bool = False
+
+
+class TranscriptionBatchRequest(BaseModel):
+    ids: List[str] = Field(default_factory=list, max_length=1000)
+    # Local calendar day (YYYY-MM-DD); adds every recording made that day.
+    date: Optional[str] = None
+    response_format: str = "vad_sequential"
+    # Local "HH:MM" (next occurrence) or an ISO timestamp; jobs wait until then.
+    start_after: Optional[str] = None
+
+
 def _display_name(path) -> str:
     stem = path.stem
     parts = stem.split("_", 2)
@@ -901,12 +686,13 @@ def _display_name(path) -> str:
 
 @router.get("/", response_class=HTMLResponse)
 def home(request: Request):
-    cfg = _load_app_config()
+    cfg = load_app_config()
     return templates.TemplateResponse(
         "home.html",
         {
             "request": request,
-            "default_max_duration_seconds": cfg.default_max_duration_seconds,
+            "default_max_duration_seconds": cfg.default_max_duration_seconds
+            or settings.max_single_recording_seconds,
         },
     )
 
@@ -957,6 +743,7 @@ def stop_recording() -> dict:
         rel_path = Path(info.path).name
 
     ensure_recording_row(info.id, rel_path)
+    processing_pipeline.enqueue([info.id])
 
     return {
         "stopped": True,
@@ -1040,6 +827,7 @@ async def upload_recording(file: UploadFile = File(...)) -> dict:
         rel_path = out_path.name
 
     ensure_recording_row(recording_id, rel_path)
+    processing_pipeline.enqueue([recording_id])
 
     meta = get_recording(recording_id)
     if meta is None:
@@ -1056,17 +844,29 @@ async def upload_recording(file: UploadFile = File(...)) -> dict:
 
 
 @router.get("/recordings")
-def list_recordings_endpoint(limit: int = 50, offset: int = 0) -> dict:
+def list_recordings_endpoint(
+    request: Request, response: Response, limit: int = 50, offset: int = 0
+) -> dict:
     """List recordings, preferring the unified storage index.
 
     If the unified index or its SQLite backing store is broken (for example due
     to an old schema from a previous version), fall back to the legacy
     filesystem-only listing so the UI can still function.
+
+    Answers If-None-Match / If-Modified-Since with 304 while the index is
+    unchanged, without building the listing. The filesystem is only
+    rescanned when the last scan is older than SCAN_MAX_AGE_SECONDS.
     """
 
     use_legacy = False
     try:
-        items = list_unified_recordings()
+        refresh_index()
+        headers = _validators([index_revision()])
+        not_modified = _not_modified(request, headers)
+        if not_modified is not None:
+            return not_modified
+        response.headers.update(headers)
+        items = list_unified_recordings(scan=False)
     except Exception as exc:  # pragma: no cover - defensive fallback
         logger.error(
             "list_unified_recordings() failed; falling back to legacy list_recordings(): %s",
@@ -1133,9 +933,48 @@ def list_recordings_endpoint(limit: int = 50, offset: int = 0) -> dict:
     }
 
 
+@router.post("/recordings/vad_segments/batch")
+def batch_cached_vad_segments_endpoint(payload: VadBatchLookup) -> dict:
+    """Return already-cached VAD segments for many recordings at once.
+
+    This never runs VAD inline and never rescans storage. Ids without cached
+    segments are listed under "missing" and, when requested, queued in the
+    processing pipeline at backfill priority.
+    """
+
+    ids = [
+        raw.lower()
+        for raw in dict.fromkeys(payload.ids)
+        if re.fullmatch(r"[0-9a-fA-F]{32}", raw)
+    ]
+
+    found = get_cached_vad_segments_bulk(ids)
+    missing = [rid for rid in ids if rid not in found]
+    enqueued: List[str] = []
+    if payload.enqueue_missing and missing:
+        enqueued = processing_pipeline.enqueue(missing, priority=PRIORITY_BACKFILL)
+
+    return {
+        "items": {
+            rid: {"count": len(segments), "segments": segments}
+            for rid, segments in found.items()
+        },
+        "missing": missing,
+        "enqueued": enqueued,
+    }
+
+
 @router.get("/recordings/{recording_id}")
-def get_recording_endpoint(recording_id: str) -> dict:
-    meta = get_recording(recording_id)
+def get_recording_endpoint(
+    recording_id: str, request: Request, response: Response
+) -> dict:
+    refresh_index()
+    headers = _validators([index_revision()])
+    not_modified = _not_modified(request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    meta = get_recording(recording_id, scan=False)
     if meta is None:
         raise HTTPException(status_code=404, detail="Recording not found")
 
@@ -1143,6 +982,7 @@ def get_recording_endpoint(recording_id: str) -> dict:
     storage_location = state.storage_location if state is not None else "none"
     accessible = resolve_recording_path(recording_id) is not None
 
+    response.headers.update(headers)
     return {
         "id": meta.id,
         "path": str(meta.path),
@@ -1155,19 +995,264 @@ def get_recording_endpoint(recording_id: str) -> dict:
     }
 
 
-@router.get("/recordings/{recording_id}/stream")
-def stream_recording(recording_id: str):
-    meta = get_recording(recording_id)
-    if meta is None:
+def _resolve_indexed_recording(recording_id: str) -> Tuple[Path, os.stat_result]:
+    """Path and stat() of a recording, found through the storage index.
+
+    Only scans storage when the index does not know the recording yet.
+    """
+
+    if not re.fullmatch(r"[0-9a-fA-F]{32}", recording_id):
         raise HTTPException(status_code=404, detail="Recording not found")
+    recording_id = recording_id.lower()
+
+    path = resolve_recording_path(recording_id)
+    if path is None:
+        scan_filesystem()
+        path = resolve_recording_path(recording_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    try:
+        return path, path.stat()
+    except OSError as exc:
+        raise HTTPException(status_code=404, detail="Recording not found") from exc
+
+
+def _audio_tag(recording_id: str, path: Path, stat: os.stat_result) -> Tuple[str, bool]:
+    """Strong validator of a recording's audio, and whether it is a content hash.
+
+    Once the pipeline has hashed the whole file, the tag is that hash: it
+    follows the audio, not its location, so renaming or migrating a
+    recording keeps browser caches valid. Until then the quick fingerprint
+    only samples the file, so the tag also covers its size and mtime.
+    """
+
+    full = verified_full_fingerprint(recording_id, stat.st_size, stat.st_mtime_ns)
+    if full is not None:
+        return full[2:34], True
+    quick = memoized_quick_fingerprint(path, stat)
+    key = f"{stat.st_size}:{stat.st_mtime_ns}:{quick}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32], False
+
+
+# Cache-Control for /stream?v=<tag> URLs whose tag is a content hash.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/recordings/{recording_id}/stream")
+def stream_recording(
+    recording_id: str,
+    request: Request,
+    v: Optional[str] = Query(
+        None,
+        description=(
+            "Audio tag (the ETag value) of the expected content; a matching "
+            "tag makes the response cacheable forever"
+        ),
+    ),
+):
+    """Serve a recording's WAV file with HTTP Range support.
+
+    Players can start and seek after fetching a few KB. The strong ETag
+    identifies the audio (see _audio_tag); once the recording is fully
+    hashed, If-None-Match and If-Range keep working across renames and
+    migration to secondary storage.
+    """
+
+    path, stat = _resolve_indexed_recording(recording_id)
+
+    current = recording_manager.current()
+    if current is not None and current.id == recording_id.lower():
+        # Still being written: never reuse a cached copy.
+        return FileResponse(
+            path=str(path),
+            media_type="audio/wav",
+            filename=path.name,
+            headers={"Cache-Control": "no-store"},
+        )
+
+    tag, content_hash = _audio_tag(recording_id.lower(), path, stat)
+    headers = {
+        "ETag": f'"{tag}"',
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL if content_hash and v == tag else "no-cache"
+        ),
+    }
+    not_modified = _not_modified(request, headers)
+    if not_modified is not None:
+        return not_modified
 
     return FileResponse(
-        path=str(meta.path),
+        path=str(path),
         media_type="audio/wav",
-        filename=meta.path.name,
+        filename=path.name,
+        stat_result=stat,
+        headers=headers,
     )
 
 
+@router.get("/recordings/{recording_id}/analysis_audio")
+def analysis_audio(recording_id: str):
+    """Serve the mono 16 kHz analysis proxy, e.g. for card waveforms."""
+
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    try:
+        proxy = get_analysis_proxy(meta.id, meta.path)
+    except AnalysisError as exc:
+        logger.error("Failed to build analysis proxy for %s: %s", meta.path.name, exc)
+        raise HTTPException(
+            status_code=500, detail="Failed to prepare analysis audio"
+        ) from exc
+
+    return FileResponse(path=str(proxy.path), media_type="audio/wav")
+
+
+@router.get("/recordings/{recording_id}/peaks")
+def waveform_peaks(recording_id: str) -> dict:
+    """Return precomputed waveform peaks so cards can draw without audio."""
+
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    try:
+        data = get_waveform_peaks(meta.id, meta.path)
+    except AnalysisError as exc:
+        logger.error("Failed to compute waveform peaks for %s: %s", meta.path.name, exc)
+        raise HTTPException(
+            status_code=500, detail="Failed to prepare waveform peaks"
+        ) from exc
+
+    try:
+        tag, _ = _audio_tag(meta.id, meta.path, meta.path.stat())
+        stream_url = f"/recordings/{meta.id}/stream?v={tag}"
+    except OSError:
+        stream_url = f"/recordings/{meta.id}/stream"
+
+    return {
+        "id": meta.id,
+        "duration_seconds": data["duration_seconds"],
+        "peaks": data["peaks"],
+        # Versioned, so the browser may cache the audio for good.
+        "stream_url": stream_url,
+    }
+
+
+def _speech_plan(recording_id: str) -> SpeechPlan:
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    segments = get_cached_vad_segments(meta.id)
+    if not segments:
+        raise HTTPException(
+            status_code=409,
+            detail="VAD segments are not available for this recording yet",
+        )
+
+    try:
+        return plan_speech_rendition(meta.id, meta.path, segments)
+    except SpeechRenditionError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except AnalysisError as exc:
+        logger.error("Failed to plan speech rendition for %s: %s", meta.path.name, exc)
+        raise HTTPException(
+            status_code=500, detail="Failed to prepare speech-only audio"
+        ) from exc
+
+
+def _speech_format(requested: str) -> str:
+    fmt = (requested or "opus").strip().lower()
+    if fmt not in SPEECH_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported speech format")
+    if fmt == "opus" and not opus_available():
+        return "wav"
+    return fmt
+
+
+@router.get("/recordings/{recording_id}/speech/map")
+def speech_rendition_map(
+    recording_id: str, fmt: str = Query("opus", alias="format")
+) -> dict:
+    """Describe the speech-only rendition and map it to original timestamps.
+
+    Each time_map entry covers [start, end) of the rendition and the
+    [source_start, source_end) span of the recording it was cut from.
+    """
+
+    plan = _speech_plan(recording_id)
+    effective = _speech_format(fmt)
+    return {
+        "id": plan.recording_id,
+        "format": effective,
+        "url": f"/recordings/{plan.recording_id}/speech?format={effective}",
+        "duration_seconds": plan.duration_seconds,
+        "source_duration_seconds": plan.proxy.duration_seconds,
+        "time_map": plan.time_map,
+    }
+
+
+@router.get("/recordings/{recording_id}/speech")
+def speech_rendition_audio(
+    recording_id: str, fmt: str = Query("opus", alias="format")
+):
+    """Stream the recording with silence removed (see /speech/map)."""
+
+    plan = _speech_plan(recording_id)
+    effective = _speech_format(fmt)
+    _, media_type = SPEECH_FORMATS[effective]
+
+    cached = cached_rendition(plan, effective)
+    if cached is not None:
+        return FileResponse(path=str(cached), media_type=media_type)
+
+    if effective == "opus":
+        try:
+            chunks = stream_opus_rendition(plan)
+        except SpeechRenditionError as exc:
+            logger.error("Failed to encode speech rendition: %s", exc)
+            raise HTTPException(
+                status_code=500, detail="Failed to encode speech-only audio"
+            ) from exc
+        return StreamingResponse(chunks, media_type=media_type)
+
+    try:
+        path = build_wav_rendition(plan)
+    except OSError as exc:
+        logger.error("Failed to build speech rendition: %s", exc)
+        raise HTTPException(
+            status_code=500, detail="Failed to prepare speech-only audio"
+        ) from exc
+    return FileResponse(path=str(path), media_type=media_type)
+
+
+@router.get("/recordings/{recording_id}/pipeline")
+def get_pipeline_status_endpoint(recording_id: str) -> dict:
+    stages = processing_pipeline.status(recording_id.lower())
+    if not stages and get_recording(recording_id) is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    return {"id": recording_id, "stages": stages}
+
+
+@router.post("/recordings/{recording_id}/pipeline")
+def enqueue_pipeline_endpoint(
+    recording_id: str,
+    force: bool = Query(
+        False,
+        description="Re-run every stage even if it already completed",
+    ),
+) -> dict:
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    processing_pipeline.enqueue([meta.id], force=force)
+    return {"id": meta.id, "stages": processing_pipeline.status(meta.id)}
+
+
 @router.patch("/recordings/{recording_id}")
 def rename_recording_endpoint(recording_id: str, payload: RecordingUpdate) -> dict:
     try:
@@ -1193,6 +1278,12 @@ def delete_recording_endpoint(recording_id: str) -> dict:
     deleted = delete_recording(recording_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Recording not found")
+    invalidate_analysis_proxy(recording_id.lower())
+    delete_recording_cache(recording_id.lower())
+    processing_pipeline.remove(recording_id.lower())
+    for job in transcription_queue.list(recording_id=recording_id.lower()):
+        if job["status"] in ACTIVE_STATUSES:
+            transcription_queue.cancel(job["id"])
     return {"deleted": True, "id": recording_id}
 
 
@@ -1238,6 +1329,14 @@ def update_recording_storage_endpoint(
     }
 
 
+_full_transcription_flight = SingleFlight("full_transcription")
+
+# How long POST /recordings/{id}/transcribe holds its request thread waiting
+# for the job. Longer recordings get 202 with the job id instead; the client
+# polls the job and asks again once it is done, which reads the cache.
+TRANSCRIBE_WAIT_SECONDS = 30.0
+
+
 @router.post("/recordings/{recording_id}/transcribe")
 def transcribe_recording_endpoint(
     recording_id: str,
@@ -1247,17 +1346,13 @@ def transcribe_recording_endpoint(
         description="Force recomputing transcription even if a cached result exists",
     ),
 ) -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config()
     whisper_cfg = cfg.whisper
 
     meta = get_recording(recording_id)
     if meta is None:
         raise HTTPException(status_code=404, detail="Recording not found")
 
-    config_hash, config_json = build_config_fingerprint(
-        whisper_cfg=whisper_cfg, vad_cfg=None
-    )
-
     effective_fmt = (
         (response_format or whisper_cfg.response_format or "json").strip().lower()
     )
@@ -1274,31 +1369,58 @@ def transcribe_recording_endpoint(
                 "cached": True,
             }
 
-    with open(meta.path, "rb") as f:
-        fmt, text_content = _call_whisper_inference(
-            whisper_cfg=whisper_cfg,
-            file_name=meta.path.name,
-            file_obj=f,
-            response_format_override=response_format,
+    if not whisper_cfg.enabled:
+        raise HTTPException(
+            status_code=400, detail="Whisper integration is disabled in configuration"
         )
 
-    upsert_cache_entry(
-        recording_id=recording_id,
-        response_format=fmt,
-        config_hash=config_hash,
-        config_json=config_json,
-        aggregated_text=text_content,
-    )
+    # The transcription runs as a queued job so it survives this request
+    # going away; the result is cached for the next request in that case.
+    # "vad_sequential" is a UI mode; a single call is made (and cached) as json.
+    # The transcript does not depend on the format, so concurrent requests
+    # for any format share one job and render their own format afterwards.
+    fmt = "json" if effective_fmt == "vad_sequential" else effective_fmt
+
+    def run_job() -> Optional[dict]:
+        job = transcription_queue.submit(
+            recording_id,
+            KIND_FULL,
+            fmt,
+            priority=PRIORITY_INTERACTIVE,
+            force=force,
+        )
+        return transcription_queue.wait(job["id"], timeout=TRANSCRIBE_WAIT_SECONDS)
 
+    job = _full_transcription_flight.do((recording_id, force), run_job)
+    if job is not None and job["status"] in ACTIVE_STATUSES:
+        return JSONResponse(
+            status_code=202,
+            content={
+                "id": recording_id,
+                "format": fmt,
+                "job_id": job["id"],
+                "status": job["status"],
+            },
+        )
+    if job is None or job["status"] == STATUS_CANCELLED:
+        raise HTTPException(status_code=409, detail="Transcription was cancelled")
+    if job["status"] == STATUS_FAILED:
+        raise HTTPException(
+            status_code=job["error_status"] or 502,
+            detail=job["error"] or "Transcription failed",
+        )
+
+    cached = get_cache_entry(recording_id, fmt) or {}
     return {
         "id": recording_id,
         "format": fmt,
-        "content": text_content,
+        "content": cached.get("aggregated_text") or "",
     }
 
 
 @router.post("/recordings/{recording_id}/vad_segments")
-def detect_vad_segments_endpoint(
+async def detect_vad_segments_endpoint(
+    request: Request,
     recording_id: str,
     force: bool = Query(
         False,
@@ -1309,18 +1431,306 @@ def detect_vad_segments_endpoint(
     if meta is None:
         raise HTTPException(status_code=404, detail="Recording not found")
 
-    segments = _run_vad_segments(meta.path, force=force)
+    segments = await _run_until_disconnect(
+        request, lambda cancel: _run_vad_segments(meta.path, force=force, cancel=cancel)
+    )
     return {
         "id": recording_id,
         "segments": segments,
     }
 
 
+@router.post("/recordings/{recording_id}/vad_segments/stream")
+def stream_vad_segments_endpoint(
+    recording_id: str,
+    force: bool = Query(
+        False,
+        description="Force recomputing VAD segments even if cached results exist",
+    ),
+):
+    """Stream VAD segments as NDJSON while the detector is still running.
+
+    Each line is a JSON object: ``{"type": "segment", ...}`` per speech
+    segment, followed by ``{"type": "done"}`` or ``{"type": "error"}``.
+    Clients can start transcribing the first segment immediately instead of
+    waiting for the whole recording to be analysed.
+    """
+
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    cfg = load_app_config()
+    cancel = CancelToken()
+    try:
+        segments = iter_vad_segments(
+            meta.path,
+            vad_cfg=getattr(cfg, "vad", None),
+            whisper_cfg=cfg.whisper,
+            force=force,
+            cancel=cancel,
+        )
+    except VadBusyError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="VAD segmentation is currently busy; please retry this request later",
+        ) from exc
+    except VadError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    def iter_lines():
+        count = 0
+        try:
+            for segment in segments:
+                yield json.dumps(
+                    {
+                        "type": "segment",
+                        "index": count,
+                        "start": segment["start"],
+                        "end": segment["end"],
+                    }
+                ) + "\n"
+                count += 1
+        except VadError as exc:
+            yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+            return
+        finally:
+            close_segments()
+        yield json.dumps({"type": "done", "count": count}) + "\n"
+
+    def close_segments() -> None:
+        close = getattr(segments, "close", None)
+        if close is not None:
+            close()
+
+    async def stream():
+        # Starlette cancels this generator when the client disconnects; the
+        # VAD process is then killed instead of running to completion.
+        try:
+            async for line in iterate_in_threadpool(iter_lines()):
+                yield line
+        finally:
+            cancel.cancel()
+
+    # Also closes the VAD process when the stream was never iterated.
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(close_segments),
+    )
+
+
+@router.post("/recordings/{recording_id}/transcribe_sequential")
+def transcribe_sequential_endpoint(
+    recording_id: str,
+    response_format: str = Query(
+        "text", description="Whisper response format used for each segment"
+    ),
+    force: bool = Query(
+        False, description="Re-transcribe segments that are already cached"
+    ),
+    force_vad: bool = Query(
+        False, description="Recompute VAD segments even if cached results exist"
+    ),
+    stream: str = Query("ndjson", description="'ndjson' or 'sse'"),
+    after: int = Query(
+        0, ge=0, description="Skip this many events (to resume a dropped stream)"
+    ),
+):
+    """Queue VAD + Sequential transcription and stream its progress.
+
+    The work is a durable job (its id is in the ``X-Transcription-Job``
+    header) that caches every segment as soon as it is transcribed, so
+    disconnecting does not lose work. Posting again while the job is queued
+    or running attaches to it; posting after it stopped resumes from the
+    cached segments. Events are ``vad_segment``, ``segment``, ``done``,
+    ``error`` and ``cancelled`` objects, plus ``ping`` heartbeats.
+    """
+
+    fmt = (stream or "").strip().lower()
+    if fmt not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="stream must be 'ndjson' or 'sse'")
+
+    meta = get_recording(recording_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+
+    cfg = load_app_config()
+    if not cfg.whisper.enabled:
+        raise HTTPException(
+            status_code=400, detail="Whisper integration is disabled in configuration"
+        )
+
+    # Attach first so a worker that picks the job up right away reports
+    # through the same channel this stream follows.
+    live = attach_sequential_job(recording_id)
+    job = transcription_queue.submit(
+        recording_id,
+        KIND_SEQUENTIAL,
+        (response_format or "text").strip().lower(),
+        priority=PRIORITY_INTERACTIVE,
+        force=force,
+        force_vad=force_vad,
+    )
+
+    def orphaned_outcome() -> Optional[dict]:
+        # A channel nobody runs: the job ended without picking it up (e.g.
+        # it was cancelled while queued). Report the job's own outcome.
+        current = transcription_queue.get(job["id"])
+        if current is None or current["status"] in ACTIVE_STATUSES:
+            return None
+        live.cancel()
+        if current["status"] == STATUS_FAILED:
+            return {
+                "type": "error",
+                "status_code": current["error_status"] or 502,
+                "detail": current["error"] or "Transcription failed",
+            }
+        if current["status"] == STATUS_CANCELLED:
+            return {"type": "cancelled"}
+        cached = get_cache_entry(recording_id, "vad_sequential") or {}
+        return {
+            "type": "done",
+            "count": current["total_segments"] or 0,
+            "transcribed": 0,
+            "content": cached.get("aggregated_text") or "",
+        }
+
+    def events():
+        for event in live.follow(after=after):
+            if event["type"] == "ping" and not live.started:
+                final = orphaned_outcome()
+                if final is not None:
+                    yield final
+                    return
+            yield event
+
+    def iter_ndjson():
+        for event in events():
+            yield json.dumps(event) + "\n"
+
+    def iter_sse():
+        event_id = after
+        for event in events():
+            if event["type"] == "ping":
+                yield ": ping\n\n"
+                continue
+            event_id += 1
+            yield (
+                f"id: {event_id}\n"
+                f"event: {event['type']}\n"
+                f"data: {json.dumps(event)}\n\n"
+            )
+
+    headers = {"X-Transcription-Job": job["id"]}
+    if fmt == "sse":
+        headers["Cache-Control"] = "no-cache"
+        return StreamingResponse(
+            iter_sse(), media_type="text/event-stream", headers=headers
+        )
+    return StreamingResponse(
+        iter_ndjson(), media_type="application/x-ndjson", headers=headers
+    )
+
+
+def _parse_start_after(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    value = value.strip()
+    try:
+        if re.fullmatch(r"\d{1,2}:\d{2}", value):
+            hour, minute = (int(part) for part in value.split(":"))
+            now = datetime.now().astimezone()
+            start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if start <= now:
+                start += timedelta(days=1)
+            return start.timestamp()
+        start = datetime.fromisoformat(value)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=400, detail="start_after must be HH:MM or an ISO timestamp"
+        ) from exc
+    if start.tzinfo is None:
+        start = start.astimezone()
+    return start.timestamp()
+
+
+@router.post("/transcription/jobs/batch")
+def create_transcription_batch(payload: TranscriptionBatchRequest) -> dict:
+    """Queue low-priority transcriptions, e.g. a whole day's recordings overnight."""
+
+    fmt = (payload.response_format or "vad_sequential").strip().lower()
+    kind = KIND_SEQUENTIAL if fmt == "vad_sequential" else KIND_FULL
+    segment_format = "text" if kind == KIND_SEQUENTIAL else fmt
+
+    ids = [i.lower() for i in payload.ids if re.fullmatch(r"[0-9a-fA-F]{32}", i)]
+    if payload.date:
+        try:
+            day = datetime.strptime(payload.date, "%Y-%m-%d").date()
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=400, detail="date must be YYYY-MM-DD"
+            ) from exc
+        ids.extend(
+            item.id
+            for item in list_unified_recordings()
+            if item.accessible and item.created_at.astimezone().date() == day
+        )
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No recordings selected")
+
+    not_before = _parse_start_after(payload.start_after)
+    batch = uuid.uuid4().hex[:12]
+    jobs = [
+        transcription_queue.submit(
+            recording_id,
+            kind,
+            segment_format,
+            priority=PRIORITY_BATCH,
+            batch=batch,
+            not_before=not_before,
+        )
+        for recording_id in ids
+    ]
+    return {"batch": batch, "jobs": jobs}
+
+
+@router.get("/transcription/jobs")
+def list_transcription_jobs(
+    status: Optional[str] = None,
+    batch: Optional[str] = None,
+    recording_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+) -> dict:
+    return {
+        "jobs": transcription_queue.list(
+            status=status, batch=batch, recording_id=recording_id, limit=limit
+        )
+    }
+
+
+@router.get("/transcription/jobs/{job_id}")
+def get_transcription_job(job_id: str) -> dict:
+    job = transcription_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/transcription/jobs/{job_id}/cancel")
+def cancel_transcription_job(job_id: str) -> dict:
+    job = transcription_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @router.get("/recordings/{recording_id}/transcription_cached")
 def get_cached_transcription_endpoint(
-    recording_id: str, response_format: str
+    recording_id: str, response_format: str, request: Request, response: Response
 ) -> dict:
-    cfg = _load_app_config()
+    cfg = load_app_config()
     whisper_cfg = cfg.whisper
     vad_cfg = getattr(cfg, "vad", None)
 
@@ -1341,7 +1751,20 @@ def get_cached_transcription_endpoint(
             whisper_cfg=whisper_cfg, vad_cfg=None
         )
 
-    cached = get_cache_entry(recording_id, fmt)
+    # Results of audio that changed since are no longer served (they are
+    # dropped by cache maintenance), so neither is a 304 for them.
+    if source_changed(recording_id):
+        return {"cached": False}
+
+    # The payload depends on the configuration: the response format can come
+    # from it, and config_hash selects the cached result.
+    headers = _validators([cache_revision(), app_config_revision()], fmt)
+    not_modified = _not_modified(request, headers)
+    if not_modified is not None:
+        return not_modified
+    response.headers.update(headers)
+
+    cached = get_cache_entry(recording_id, fmt, config_hash=config_hash)
     if cached is None:
         return {"cached": False}
 
@@ -1368,8 +1791,62 @@ def get_cached_transcription_endpoint(
     }
 
 
+_TRANSCRIPT_MEDIA_TYPES = {
+    "text": "text/plain; charset=utf-8",
+    "json": "application/json",
+    "verbose_json": "application/json",
+    "srt": "application/x-subrip; charset=utf-8",
+    "vtt": "text/vtt; charset=utf-8",
+}
+
+
+@router.get("/recordings/{recording_id}/transcript")
+def get_transcript_endpoint(
+    recording_id: str,
+    request: Request,
+    response_format: str = Query(
+        "text", description="One of text, json, verbose_json, srt or vtt"
+    ),
+    source: Optional[str] = Query(
+        None,
+        description=(
+            "'full' or 'vad_sequential'; by default the full transcript is "
+            "used when there is one"
+        ),
+    ),
+) -> Response:
+    """Render a cached transcript in any format without running Whisper."""
+
+    fmt = (response_format or "").strip().lower()
+    if fmt not in RENDER_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"response_format must be one of {', '.join(RENDER_FORMATS)}",
+        )
+    src = (source or "").strip().lower() or None
+    if src not in (None, "full", SEQUENTIAL_FORMAT):
+        raise HTTPException(
+            status_code=400, detail="source must be 'full' or 'vad_sequential'"
+        )
+
+    headers = _validators([cache_revision()])
+    not_modified = _not_modified(request, headers)
+    if not_modified is not None:
+        return not_modified
+
+    transcript = load_transcript(recording_id, src)
+    if transcript is None:
+        raise HTTPException(status_code=404, detail="No cached transcript")
+    return Response(
+        content=render_transcript(transcript, fmt),
+        media_type=_TRANSCRIPT_MEDIA_TYPES[fmt],
+        headers=headers,
+    )
+
+
 @router.post("/recordings/{recording_id}/transcribe_segment")
-def transcribe_recording_segment_endpoint(
+async def transcribe_recording_segment_endpoint(
+    request: Request,
     recording_id: str,
     start: float = Query(..., description="Segment start time in seconds"),
     end: float = Query(..., description="Segment end time in seconds"),
@@ -1380,7 +1857,30 @@ def transcribe_recording_segment_endpoint(
         description="UI-level response format (e.g. 'vad_sequential') for caching",
     ),
 ) -> dict:
-    cfg = _load_app_config()
+    return await _run_until_disconnect(
+        request,
+        lambda cancel: _transcribe_recording_segment(
+            recording_id,
+            start,
+            end,
+            segment_index,
+            response_format,
+            ui_format,
+            cancel,
+        ),
+    )
+
+
+def _transcribe_recording_segment(
+    recording_id: str,
+    start: float,
+    end: float,
+    segment_index: Optional[int],
+    response_format: Optional[str],
+    ui_format: Optional[str],
+    cancel: CancelToken,
+) -> dict:
+    cfg = load_app_config()
     whisper_cfg = cfg.whisper
 
     meta = get_recording(recording_id)
@@ -1388,9 +1888,21 @@ def transcribe_recording_segment_endpoint(
         raise HTTPException(status_code=404, detail="Recording not found")
 
     try:
-        segment_bytes = _extract_wav_segment_bytes(meta.path, start, end)
+        fmt, text_content = transcribe_segment(
+            meta.path,
+            whisper_cfg,
+            start,
+            end,
+            segment_index=segment_index,
+            response_format=response_format,
+            cancel=cancel,
+        )
+    except OperationCancelled:
+        raise
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except WhisperError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
     except Exception as exc:  # pragma: no cover - defensive
         logger.error(
             "Failed to extract audio segment for %s: %s", meta.path.name, exc
@@ -1399,77 +1911,20 @@ def transcribe_recording_segment_endpoint(
             status_code=500, detail="Failed to create audio segment"
         ) from exc
 
-    _debug_save_segment_wav(
-        recording_path=meta.path,
-        segment_index=segment_index,
-        start=start,
-        end=end,
-        data=segment_bytes,
-    )
-
-    file_like = io.BytesIO(segment_bytes)
-    file_like.seek(0)
-
-    if segment_index is not None and segment_index >= 0:
-        file_name = f"segment_{segment_index:03d}.wav"
-    else:
-        file_name = meta.path.name
-
-    fmt, text_content = _call_whisper_inference(
-        whisper_cfg=whisper_cfg,
-        file_name=file_name,
-        file_obj=file_like,
-        response_format_override=response_format,
-    )
-
     # Update cache for VAD + Sequential runs.
-    vad_cfg = getattr(cfg, "vad", None)
-    config_hash, config_json = build_config_fingerprint(
-        whisper_cfg=whisper_cfg, vad_cfg=vad_cfg
-    )
-
     cache_format = (ui_format or response_format or fmt or "").strip().lower()
     if cache_format == "vad_sequential":
-        existing = get_cache_entry(recording_id, cache_format)
-        segments: List[dict]
-        if existing and existing.get("segments_json"):
-            try:
-                segments = json.loads(existing["segments_json"])
-            except Exception:  # pragma: no cover - defensive
-                segments = []
-        else:
-            segments = []
-
-        entry = {
-            "index": segment_index,
-            "start": start,
-            "end": end,
-            "format": fmt,
-            "content": text_content,
-        }
-        segments = [s for s in segments if s.get("index") != segment_index]
-        segments.append(entry)
-        segments.sort(key=lambda s: (s.get("index") is None, s.get("index")))
-
-        # Build a simple aggregated paragraph-style text for quick reuse.
-        parts: List[str] = []
-        for s in segments:
-            c = str(s.get("content") or "").strip()
-            if not c:
-                continue
-            c = " ".join(c.split())
-            if not c:
-                continue
-            parts.append(c)
-        aggregated = " ".join(parts)
-
-        upsert_cache_entry(
-            recording_id=recording_id,
-            response_format=cache_format,
-            config_hash=config_hash,
-            config_json=config_json,
-            segments_json=json.dumps(segments),
-            aggregated_text=aggregated,
+        store_sequential_segment(
+            recording_id,
+            whisper_cfg,
+            getattr(cfg, "vad", None),
+            {
+                "index": segment_index,
+                "start": start,
+                "end": end,
+                "format": fmt,
+                "content": text_content,
+            },
         )
 
     return {
@@ -0,0 +1,486 @@
+"""Per-recording analysis proxies.
+
+VAD, segment slicing and the waveform UI all want the same signal: mono,
+16 kHz, signed 16-bit PCM. Instead of downmixing the original (usually
+stereo) recording separately for each of them, a proxy WAV is generated once
+per recording under the analysis cache directory and memory-mapped by every
+consumer. Proxies are validated against the source file's size and mtime and
+the cache directory is kept under a size budget with LRU eviction.
+
+Waveform peaks for the recordings grid are derived from the proxy and stored
+next to it, so cards can draw without downloading any audio.
+"""
+
+import contextlib
+import json
+import logging
+import mmap
+import os
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.pcm import PcmConversionError, can_convert, convert_to_mono
+from app.core.wav import WavFormatError, build_wav_header, read_wav_info
+
+
+logger = logging.getLogger(__name__)
+
+
+ANALYSIS_SAMPLE_RATE = 16000
+ANALYSIS_SAMPLE_WIDTH = 2
+
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+WAVEFORM_PEAKS = 1000
+# Upper bound on samples inspected per peak bucket; longer buckets are
+# strided, which is plenty for a thumbnail waveform.
+_PEAK_SAMPLES_PER_BUCKET = 4096
+
+_locks_guard = threading.Lock()
+_locks: Dict[str, threading.Lock] = {}
+
+
+class AnalysisError(Exception):
+    pass
+
+
+@dataclass
+class AnalysisProxy:
+    recording_id: str
+    path: Path
+    sample_rate: int
+    data_offset: int
+    num_samples: int
+
+    @property
+    def duration_seconds(self) -> float:
+        if self.sample_rate <= 0:
+            return 0.0
+        return float(self.num_samples) / self.sample_rate
+
+
+def get_analysis_dir() -> Path:
+    raw = (settings.analysis_cache_dir or "").strip()
+    if raw:
+        return Path(raw)
+    return Path(settings.cache_db_path).parent / "analysis"
+
+
+def _proxy_paths(recording_id: str) -> Tuple[Path, Path]:
+    base = get_analysis_dir()
+    return base / f"{recording_id}.wav", base / f"{recording_id}.json"
+
+
+def _source_signature(source_path: Path) -> Tuple[int, int]:
+    stat = source_path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _lock_for(recording_id: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(recording_id)
+        if lock is None:
+            lock = threading.Lock()
+            _locks[recording_id] = lock
+        return lock
+
+
+def _load_valid_proxy(
+    recording_id: str, signature: Tuple[int, int]
+) -> Optional[AnalysisProxy]:
+    wav_path, meta_path = _proxy_paths(recording_id)
+    if not wav_path.is_file() or not meta_path.is_file():
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+    if (meta.get("source_size"), meta.get("source_mtime_ns")) != signature:
+        return None
+
+    try:
+        expected_size = meta["data_offset"] + meta["num_samples"] * ANALYSIS_SAMPLE_WIDTH
+        if wav_path.stat().st_size != expected_size:
+            return None
+    except (KeyError, OSError):
+        return None
+
+    return AnalysisProxy(
+        recording_id=recording_id,
+        path=wav_path,
+        sample_rate=int(meta.get("sample_rate", ANALYSIS_SAMPLE_RATE)),
+        data_offset=int(meta["data_offset"]),
+        num_samples=int(meta["num_samples"]),
+    )
+
+
+def _copy_mono_pcm(source_path: Path, dest_path: Path) -> bool:
+    """Copy samples directly when the source already matches the proxy format."""
+
+    try:
+        info = read_wav_info(source_path)
+    except (WavFormatError, OSError):
+        return False
+
+    if not (
+        info.is_pcm
+        and info.channels == 1
+        and info.bits_per_sample == 16
+        and info.sample_rate == ANALYSIS_SAMPLE_RATE
+    ):
+        return False
+
+    _write_canonical(source_path, info.data_offset, info.data_size, dest_path)
+    return True
+
+
+def _write_canonical(
+    source_path: Path, data_offset: int, data_size: int, dest_path: Path
+) -> None:
+    """Write mono 16-bit samples from source_path behind a 44-byte header."""
+
+    data_size -= data_size % ANALYSIS_SAMPLE_WIDTH
+    with source_path.open("rb") as f_src, dest_path.open("wb") as f_dst:
+        f_dst.write(build_wav_header(data_size, ANALYSIS_SAMPLE_RATE))
+        f_src.seek(data_offset)
+        remaining = data_size
+        while remaining > 0:
+            chunk = f_src.read(min(_COPY_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            f_dst.write(chunk)
+            remaining -= len(chunk)
+
+
+def _convert_natively(source_path: Path, dest_path: Path) -> bool:
+    """Downmix/resample PCM sources with NumPy instead of spawning ffmpeg."""
+
+    try:
+        info = read_wav_info(source_path)
+    except (WavFormatError, OSError):
+        return False
+    if not can_convert(info):
+        return False
+
+    try:
+        with dest_path.open("wb") as f_dst:
+            convert_to_mono(source_path, f_dst, ANALYSIS_SAMPLE_RATE)
+    except PcmConversionError:
+        return False
+    return True
+
+
+def _transcode_with_ffmpeg(source_path: Path, dest_path: Path) -> None:
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-y",
+        "-i",
+        str(source_path),
+        "-acodec",
+        "pcm_s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(ANALYSIS_SAMPLE_RATE),
+        "-f",
+        "wav",
+        str(dest_path),
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as exc:  # pragma: no cover - environment specific
+        raise AnalysisError("ffmpeg is required to build analysis proxies") from exc
+    except OSError as exc:  # pragma: no cover - environment specific
+        raise AnalysisError(f"Failed to start ffmpeg: {exc}") from exc
+
+    if proc.returncode != 0 or not dest_path.exists():
+        raise AnalysisError(
+            "ffmpeg failed to build analysis proxy: "
+            + proc.stderr.decode("utf-8", errors="ignore").strip()
+        )
+
+
+def _build_proxy(
+    recording_id: str, source_path: Path, signature: Tuple[int, int]
+) -> AnalysisProxy:
+    wav_path, meta_path = _proxy_paths(recording_id)
+    wav_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = wav_path.with_name(wav_path.name + ".tmp")
+
+    try:
+        if not _copy_mono_pcm(source_path, tmp_path) and not _convert_natively(
+            source_path, tmp_path
+        ):
+            _transcode_with_ffmpeg(source_path, tmp_path)
+        info = read_wav_info(tmp_path)
+        # Normalise to a canonical 44-byte header so readers can rely on a
+        # fixed layout regardless of which tool produced the samples.
+        if info.data_offset != 44:
+            _rewrite_canonical(tmp_path, info.data_offset, info.data_size)
+            info = read_wav_info(tmp_path)
+        os.replace(tmp_path, wav_path)
+    except (WavFormatError, OSError) as exc:
+        raise AnalysisError(f"Failed to build analysis proxy: {exc}") from exc
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp_path.unlink()
+
+    meta = {
+        "source_size": signature[0],
+        "source_mtime_ns": signature[1],
+        "sample_rate": ANALYSIS_SAMPLE_RATE,
+        "data_offset": info.data_offset,
+        "num_samples": info.data_size // ANALYSIS_SAMPLE_WIDTH,
+    }
+    _write_json(meta_path, meta)
+
+    logger.info(
+        "Built analysis proxy for %s (%.1fs of audio)",
+        recording_id,
+        meta["num_samples"] / float(ANALYSIS_SAMPLE_RATE),
+    )
+
+    return AnalysisProxy(
+        recording_id=recording_id,
+        path=wav_path,
+        sample_rate=ANALYSIS_SAMPLE_RATE,
+        data_offset=info.data_offset,
+        num_samples=meta["num_samples"],
+    )
+
+
+def _write_json(path: Path, data: dict) -> None:
+    # Replaced atomically: a reader never sees a partly written file.
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+def _rewrite_canonical(path: Path, data_offset: int, data_size: int) -> None:
+    out_path = path.with_name(path.name + ".canon")
+    try:
+        _write_canonical(path, data_offset, data_size, out_path)
+        os.replace(out_path, path)
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            out_path.unlink()
+
+
+def _touch(path: Path) -> None:
+    with contextlib.suppress(OSError):
+        os.utime(path, None)
+
+
+def get_analysis_proxy(recording_id: str, source_path: Path) -> AnalysisProxy:
+    """Return an up-to-date analysis proxy for a recording, building it if needed.
+
+    Concurrent callers for the same recording wait for a single build. Each
+    access refreshes the proxy's mtime, which drives LRU eviction.
+    """
+
+    try:
+        signature = _source_signature(source_path)
+    except OSError as exc:
+        raise AnalysisError(f"Recording file is not accessible: {exc}") from exc
+
+    with _lock_for(recording_id):
+        proxy = _load_valid_proxy(recording_id, signature)
+        if proxy is None:
+            proxy = _build_proxy(recording_id, source_path, signature)
+            built = True
+        else:
+            built = False
+        _touch(proxy.path)
+
+    if built:
+        evict_analysis_cache(keep={recording_id})
+
+    return proxy
+
+
+def find_analysis_proxy(
+    recording_id: str, source_path: Path
+) -> Optional[AnalysisProxy]:
+    """Return the proxy only if an up-to-date one already exists."""
+
+    try:
+        signature = _source_signature(source_path)
+    except OSError:
+        return None
+
+    with _lock_for(recording_id):
+        proxy = _load_valid_proxy(recording_id, signature)
+        if proxy is not None:
+            _touch(proxy.path)
+    return proxy
+
+
+def invalidate_analysis_proxy(recording_id: str) -> None:
+    """Remove the proxy and everything derived from it (peaks, renditions)."""
+
+    with _lock_for(recording_id):
+        base = get_analysis_dir()
+        if not base.is_dir():
+            return
+        for path in base.glob(f"{recording_id}.*"):
+            with contextlib.suppress(FileNotFoundError):
+                path.unlink()
+
+
+def _cached_proxies() -> List[Tuple[float, int, str]]:
+    base = get_analysis_dir()
+    if not base.is_dir():
+        return []
+    entries: List[Tuple[float, int, str]] = []
+    for path in base.glob("*.wav"):
+        if "." in path.stem:
+            # Derived files such as speech renditions live and die with
+            # their proxy rather than being budgeted separately.
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path.stem))
+    return entries
+
+
+def evict_analysis_cache(
+    max_bytes: Optional[int] = None, keep: Optional[set] = None
+) -> int:
+    """Delete least recently used proxies until the cache fits max_bytes.
+
+    Returns the number of bytes freed.
+    """
+
+    budget = settings.analysis_cache_max_bytes if max_bytes is None else max_bytes
+    if budget <= 0:
+        return 0
+
+    entries = sorted(_cached_proxies())
+    total = sum(size for _, size, _ in entries)
+    freed = 0
+    for _, size, recording_id in entries:
+        if total <= budget:
+            break
+        if keep and recording_id in keep:
+            continue
+        invalidate_analysis_proxy(recording_id)
+        total -= size
+        freed += size
+        logger.info("Evicted analysis proxy for %s (%d bytes)", recording_id, size)
+    return freed
+
+
+@contextlib.contextmanager
+def open_proxy_samples(proxy: AnalysisProxy) -> Iterator[memoryview]:
+    """Memory-map a proxy and yield a read-only view of its sample bytes."""
+
+    with proxy.path.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        base = memoryview(mm)
+        end = proxy.data_offset + proxy.num_samples * ANALYSIS_SAMPLE_WIDTH
+        view = base[proxy.data_offset : end]
+        try:
+            yield view
+        finally:
+            view.release()
+            base.release()
+            mm.close()
+
+
+def read_segment_pcm(proxy: AnalysisProxy, start: float, end: float) -> bytes:
+    if end <= start:
+        raise ValueError("end must be greater than start")
+
+    first = max(0, int(round(max(0.0, float(start)) * proxy.sample_rate)))
+    last = min(proxy.num_samples, int(round(float(end) * proxy.sample_rate)))
+    if last <= first:
+        return b""
+
+    with open_proxy_samples(proxy) as samples:
+        return bytes(
+            samples[first * ANALYSIS_SAMPLE_WIDTH : last * ANALYSIS_SAMPLE_WIDTH]
+        )
+
+
+def read_segment_wav(proxy: AnalysisProxy, start: float, end: float) -> bytes:
+    """Return a standalone mono WAV for [start, end) of the recording."""
+
+    pcm = read_segment_pcm(proxy, start, end)
+    return build_wav_header(len(pcm), proxy.sample_rate) + pcm
+
+
+def _peaks_path(recording_id: str) -> Path:
+    return get_analysis_dir() / f"{recording_id}.peaks.json"
+
+
+def compute_peaks(proxy: AnalysisProxy, buckets: int = WAVEFORM_PEAKS) -> List[float]:
+    """Return normalised absolute peak values (0..1) for evenly sized buckets."""
+
+    if proxy.num_samples <= 0:
+        return []
+    buckets = max(1, min(buckets, proxy.num_samples))
+
+    peaks: List[float] = []
+    with open_proxy_samples(proxy) as raw:
+        samples = raw.cast("h")
+        try:
+            for bucket in range(buckets):
+                first = bucket * proxy.num_samples // buckets
+                last = (bucket + 1) * proxy.num_samples // buckets
+                step = max(1, (last - first) // _PEAK_SAMPLES_PER_BUCKET)
+                window = samples[first:last:step]
+                try:
+                    peak = max(max(window), -min(window))
+                finally:
+                    window.release()
+                peaks.append(round(min(peak, 32767) / 32767.0, 4))
+        finally:
+            samples.release()
+    return peaks
+
+
+def get_waveform_peaks(recording_id: str, source_path: Path) -> dict:
+    """Return cached waveform peaks for a recording, computing them if needed."""
+
+    proxy = get_analysis_proxy(recording_id, source_path)
+    signature = list(_source_signature(source_path))
+    peaks_path = _peaks_path(recording_id)
+
+    with _lock_for(recording_id):
+        try:
+            cached = json.loads(peaks_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = None
+        if cached is not None and cached.get("source") == signature:
+            return cached
+
+        data = {
+            "source": signature,
+            "duration_seconds": proxy.duration_seconds,
+            "peaks": compute_peaks(proxy),
+        }
+        _write_json(peaks_path, data)
+        return data
@@ -1,12 +1,17 @@
+import contextlib
 import json
 import logging
 import os
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from pydantic import BaseModel, Field, validator
 
 from app.core.config import settings
+from app.core.events import TOPIC_CONFIG, events
 
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,12 @@ class RecordingLightConfig(BaseModel):
     color: str = "#ff0000"
 
 
+class WhisperBackend(BaseModel):
+    url: str
+    weight: float = Field(1.0, gt=0.0)
+    max_concurrency: int = Field(1, ge=1)
+
+
 class WhisperConfig(BaseModel):
     enabled: bool = False
     api_url: str = "http://127.0.0.1:8093"
@@ -28,6 +39,19 @@ class WhisperConfig(BaseModel):
     temperature: float = Field(0.0, ge=0.0, le=2.0)
     temperature_inc: float = Field(0.2, ge=0.0, le=2.0)
     model_path: str = ""
+    # Optional list of Whisper servers to balance segments across. When
+    # empty, api_url is the only backend.
+    backends: List[WhisperBackend] = Field(default_factory=list)
+    # VAD + Sequential: adjacent short segments are joined (separated by
+    # pack_gap_ms of silence) into requests of up to this many seconds.
+    # 0 sends every segment on its own.
+    pack_max_seconds: float = Field(25.0, ge=0.0, le=600.0)
+    pack_gap_ms: int = Field(500, ge=0, le=5000)
+    # Whole-file transcription of recordings longer than chunk_seconds is
+    # split into windows overlapping by chunk_overlap_seconds, transcribed
+    # in parallel. 0 always uploads the whole file in one request.
+    chunk_seconds: float = Field(300.0, ge=0.0)
+    chunk_overlap_seconds: float = Field(5.0, ge=0.0, le=60.0)
 
 
 class VadConfig(BaseModel):
@@ -71,6 +95,12 @@ class ThemeConfig(BaseModel):
     accent_end: str = "#f39237"
 
 
+class PipelineConfig(BaseModel):
+    # Transcribe new recordings in the background once VAD has finished,
+    # using the configured Whisper response format.
+    auto_transcribe: bool = False
+
+
 class ArecordInputConfig(BaseModel):
     selected_device_id: Optional[str] = settings.alsa_device
     priority_order: List[str] = Field(default_factory=lambda: [settings.alsa_device])
@@ -137,15 +167,27 @@ class AppConfig(BaseModel):
     vad_binary: VadBinaryConfig = Field(default_factory=VadBinaryConfig)
     storage: StorageConfig = Field(default_factory=StorageConfig)
     debug: DebugConfig = Field(default_factory=DebugConfig)
+    pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
 
 
-def load_app_config() -> AppConfig:
-    """Load the UI/feature configuration from the JSON file.
+# The parsed configuration is kept in memory and only re-read when the file
+# is replaced or modified: (inode, mtime, size) of the file it came from.
+_config_lock = threading.Lock()
+_config: Optional[AppConfig] = None
+_config_stamp: Optional[Tuple[int, int, int]] = None
+_config_version = 0
+_config_changed_at = time.time()
 
-    If the file does not exist or cannot be parsed, return an AppConfig
-    instance populated with defaults.
-    """
 
+def _file_stamp() -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = CONFIG_FILE_PATH.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _read_app_config() -> AppConfig:
     if not CONFIG_FILE_PATH.exists():
         return AppConfig()
     try:
@@ -157,13 +199,81 @@ def load_app_config() -> AppConfig:
         return AppConfig()
 
 
+def _remember(cfg: AppConfig, stamp: Optional[Tuple[int, int, int]]) -> None:
+    global _config, _config_stamp, _config_version, _config_changed_at
+    _config = cfg
+    _config_stamp = stamp
+    _config_version += 1
+    _config_changed_at = time.time()
+    # What the hardware services need; they get it pushed over GET /events.
+    events.publish(
+        TOPIC_CONFIG,
+        {
+            "version": _config_version,
+            "recording_light": cfg.recording_light.model_dump(),
+            "button": cfg.button.model_dump(),
+        },
+    )
+
+
+def load_app_config() -> AppConfig:
+    """Load the UI/feature configuration from the JSON file.
+
+    If the file does not exist or cannot be parsed, return an AppConfig
+    instance populated with defaults. The result is cached until the file
+    changes and is shared between callers: treat it as read-only, and
+    model_copy(deep=True) it before making changes to save.
+    """
+
+    stamp = _file_stamp()
+    with _config_lock:
+        if _config is None or stamp != _config_stamp:
+            _remember(_read_app_config(), stamp)
+        return _config
+
+
+def app_config_version() -> int:
+    """A number that changes whenever the configuration does."""
+
+    load_app_config()
+    return _config_version
+
+
+def app_config_revision() -> Tuple[int, float]:
+    """(app_config_version(), time of the last change), for HTTP validators."""
+
+    load_app_config()
+    with _config_lock:
+        return _config_version, _config_changed_at
+
+
 def save_app_config(cfg: AppConfig) -> None:
-    """Persist the given AppConfig to the JSON config file."""
+    """Persist the given AppConfig to the JSON config file.
 
-    try:
-        CONFIG_FILE_PATH.write_text(
-            json.dumps(cfg.model_dump(), indent=2), encoding="utf-8"
-        )
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.error("Failed to save config to %s: %s", CONFIG_FILE_PATH, exc)
-        raise
+    The file is replaced atomically, so readers in other processes (the
+    pixel ring and button services) never see a partly written file.
+    """
+
+    payload = json.dumps(cfg.model_dump(), indent=2)
+    directory = CONFIG_FILE_PATH.parent
+    with _config_lock:
+        try:
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{CONFIG_FILE_PATH.name}.", dir=str(directory)
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if CONFIG_FILE_PATH.exists():
+                    os.chmod(tmp_name, CONFIG_FILE_PATH.stat().st_mode & 0o777)
+                os.replace(tmp_name, CONFIG_FILE_PATH)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_name)
+                raise
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.error("Failed to save config to %s: %s", CONFIG_FILE_PATH, exc)
+            raise
+        _remember(cfg.model_copy(deep=True), _file_stamp())
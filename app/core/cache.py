@@ -1,21 +1,230 @@
 import hashlib
 import json
+import logging
+import os
 import sqlite3
-from datetime import datetime
+import threading
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from app.core.config import settings
+from app.core.fingerprint import full_fingerprint, quick_fingerprint
+from app.core.storage import resolve_recording_paths
+from app.core.transcript import (
+    RENDER_FORMATS,
+    render_transcript,
+    sequential_transcript,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+# VAD + Sequential transcripts are stored one row per segment in
+# transcription_segments rather than as a JSON array on the cache entry, so
+# finishing a segment is a single-row write instead of rewriting every
+# segment transcribed so far.
+SEQUENTIAL_FORMAT = "vad_sequential"
+
+# Whole-recording transcripts are stored once, in structured form, in the
+# transcripts table; entries for text/json/verbose_json/srt/vtt are rendered
+# from it when read (see app.core.transcript).
+
+# Transcripts, segment lists and VAD results at least this large are stored
+# zlib-compressed (as BLOBs in their TEXT columns); smaller values, and rows
+# written before compression existed, are plain text. Reads handle both.
+COMPRESS_MIN_BYTES = 1024
+
+_StoredText = Union[str, bytes]
+
+
+def _pack(text: Optional[str]) -> Optional[_StoredText]:
+    if text is None:
+        return None
+    data = text.encode("utf-8")
+    if len(data) < COMPRESS_MIN_BYTES:
+        return text
+    return zlib.compress(data)
+
+
+def _unpack(value: Optional[_StoredText]) -> Optional[str]:
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode("utf-8")
+    return value
+
+
+class _EntryCache:
+    """Bounded LRU of cache entries (hits and misses) in front of SQLite.
+
+    Keyed on (database, recording, format). Every write for a recording
+    drops its entries; a generation counter keeps a read that raced with
+    such a write from storing what it read.
+    """
+
+    _MISSING = object()
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Any]" = OrderedDict()
+        self._generation = 0
+        self._changed_at = time.time()
+        # Per response format: memory_hits, hits (from the database), misses.
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "hits": 0, "misses": 0}
+        )
+        # Last read of each recording's entries, per database; written to
+        # the cache_access table by maintain_cache() rather than on every read.
+        self._accessed: Dict[str, Dict[str, str]] = defaultdict(dict)
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def revision(self) -> Tuple[int, float]:
+        with self._lock:
+            return self._generation, self._changed_at
+
+    def get(self, key: Tuple[str, str, str]) -> Any:
+        """Return a copy of the cached entry, None for a cached miss, or _MISSING."""
+
+        with self._lock:
+            if key not in self._entries:
+                return self._MISSING
+            self._entries.move_to_end(key)
+            entry = self._entries[key]
+            self._counted(key, entry, "memory_hits")
+        return dict(entry) if entry is not None else None
+
+    def record(self, key: Tuple[str, str, str], entry: Optional[Dict[str, Any]]) -> None:
+        """Count a lookup that had to go to the database."""
+
+        with self._lock:
+            self._counted(key, entry, "hits")
+
+    def _counted(
+        self, key: Tuple[str, str, str], entry: Optional[Dict[str, Any]], kind: str
+    ) -> None:
+        db, recording_id, response_format = key
+        if entry is None:
+            self._counts[response_format]["misses"] += 1
+            return
+        self._counts[response_format][kind] += 1
+        self._accessed[db][recording_id] = datetime.utcnow().isoformat()
+
+    def take_accessed(self, db: str) -> Dict[str, str]:
+        with self._lock:
+            return self._accessed.pop(db, {})
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {fmt: dict(c) for fmt, c in self._counts.items()}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def put(
+        self, key: Tuple[str, str, str], entry: Optional[Dict[str, Any]], generation: int
+    ) -> None:
+        limit = settings.cache_memory_entries
+        with self._lock:
+            if generation != self._generation or limit <= 0:
+                return
+            self._entries[key] = dict(entry) if entry is not None else None
+            self._entries.move_to_end(key)
+            while len(self._entries) > limit:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, recording_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._changed_at = time.time()
+            for key in [k for k in self._entries if k[1] == recording_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._changed_at = time.time()
+            self._entries.clear()
+
+
+_entry_cache = _EntryCache()
+
+
+def cache_revision() -> Tuple[int, float]:
+    """(counter, time of the last change) of the cached results.
+
+    Every write of a recording's results bumps the counter; it starts from
+    zero in every process.
+    """
+
+    return _entry_cache.revision()
 
 
 def _db_path() -> Path:
     return Path(settings.cache_db_path)
 
 
+# Each thread keeps a connection per database file, and the schema is set
+# up once per database: opening a connection and running the CREATE
+# statements on every lookup cost more than the lookups themselves.
+_thread_state = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready: Set[str] = set()
+
+
 def _get_connection() -> sqlite3.Connection:
-    path = _db_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(path))
+    """This thread's connection to the cache database.
+
+    Hand it back with _release() instead of closing it.
+    """
+
+    path = str(_db_path())
+    connections: Dict[str, sqlite3.Connection] = getattr(
+        _thread_state, "connections", None
+    ) or {}
+    _thread_state.connections = connections
+    conn = connections.get(path)
+    if conn is not None and not os.path.exists(path):
+        # The database was deleted; start a new one.
+        conn.close()
+        conn = None
+        with _schema_lock:
+            _schema_ready.discard(path)
+    if conn is None:
+        _ensure_schema(path)
+        conn = connections[path] = sqlite3.connect(path)
+    return conn
+
+
+def _release(conn: sqlite3.Connection) -> None:
+    # As closing would: whatever was not committed is dropped.
+    if conn.in_transaction:
+        conn.rollback()
+
+
+def _ensure_schema(path: str) -> None:
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        try:
+            _create_schema(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        _schema_ready.add(path)
+
+
+def _create_schema(conn: sqlite3.Connection) -> None:
+    # Only takes effect on a new database; maintain_cache() converts old ones.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS transcription_cache (
@@ -31,7 +240,89 @@ def _get_connection() -> sqlite3.Connection:
         )
         """
     )
-    return conn
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcription_segments (
+            recording_id TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            start_ms INTEGER NOT NULL,
+            end_ms INTEGER NOT NULL,
+            segment_index INTEGER,
+            format TEXT,
+            content TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (recording_id, config_hash, start_ms, end_ms)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_transcription_segments_index
+        ON transcription_segments (recording_id, segment_index)
+        """
+    )
+    # Windows of long recordings transcribed without VAD (see
+    # transcription.transcribe_recording); stitched into the cache entry.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcription_chunks (
+            recording_id TEXT NOT NULL,
+            response_format TEXT NOT NULL,
+            config_hash TEXT NOT NULL,
+            start_ms INTEGER NOT NULL,
+            end_ms INTEGER NOT NULL,
+            content TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (recording_id, response_format, config_hash, start_ms, end_ms)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS transcripts (
+            recording_id TEXT PRIMARY KEY,
+            config_hash TEXT NOT NULL,
+            config_json TEXT NOT NULL,
+            transcript_json TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        """
+    )
+    # Fingerprint of the audio each recording's results were computed from
+    # (see _check_sources), with the file size and mtime it was taken at.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_sources (
+            recording_id TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            quick_hash TEXT NOT NULL,
+            full_hash TEXT,
+            checked_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_cache_sources_full_hash
+        ON cache_sources (full_hash)
+        """
+    )
+    # When each recording's entries were last read (see maintain_cache).
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_access (
+            recording_id TEXT PRIMARY KEY,
+            accessed_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def aggregate_segment_text(segments: List[dict]) -> str:
+    """Build a simple paragraph-style text from per-segment transcripts."""
+
+    return render_transcript(sequential_transcript(segments), "text")
 
 
 def build_config_fingerprint(whisper_cfg: Any, vad_cfg: Optional[Any]) -> Tuple[str, str]:
@@ -41,8 +332,15 @@ def build_config_fingerprint(whisper_cfg: Any, vad_cfg: Optional[Any]) -> Tuple[
     The snapshot is stored for introspection, while the hash is used to
     quickly determine if a cache entry is still valid.
     """
+    # Which servers do the work, and which format the transcript is
+    # rendered in, do not change the transcript itself, so the backend list
+    # and response format are left out of the fingerprint.
     payload: Dict[str, Any] = {
-        "whisper": whisper_cfg.model_dump() if whisper_cfg is not None else None,
+        "whisper": (
+            whisper_cfg.model_dump(exclude={"backends", "response_format"})
+            if whisper_cfg is not None
+            else None
+        ),
         "vad": vad_cfg.model_dump() if vad_cfg is not None else None,
         "settings": {
             "vad_binary": settings.vad_binary,
@@ -56,11 +354,50 @@ def build_config_fingerprint(whisper_cfg: Any, vad_cfg: Optional[Any]) -> Tuple[
     return config_hash, config_json
 
 
+def _entry_from_row(row: Iterable[Any]) -> Dict[str, Any]:
+    config_hash, config_json, vad_segments, segments, text, updated_at = row
+    return {
+        "config_hash": config_hash,
+        "config_json": config_json,
+        "vad_segments_json": _unpack(vad_segments),
+        "segments_json": _unpack(segments),
+        "aggregated_text": _unpack(text),
+        "updated_at": updated_at,
+    }
+
+
 def get_cache_entry(
+    recording_id: str, response_format: str, config_hash: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Return a recording's cache entry for a response format, if any.
+
+    With config_hash, an entry computed under another configuration counts
+    as missing.
+    """
+
+    key = (str(_db_path()), recording_id, response_format)
+    entry = _entry_cache.get(key)
+    if entry is _EntryCache._MISSING:
+        generation = _entry_cache.generation()
+        entry = _read_cache_entry(recording_id, response_format)
+        _entry_cache.record(key, entry)
+        _entry_cache.put(key, entry, generation)
+    if entry is None or config_hash not in (None, entry["config_hash"]):
+        return None
+    if _stale_sources([recording_id]):
+        return None
+    return entry
+
+
+def _read_cache_entry(
     recording_id: str, response_format: str
 ) -> Optional[Dict[str, Any]]:
     conn = _get_connection()
     try:
+        if response_format in RENDER_FORMATS:
+            rendered = _rendered_entries(conn, [recording_id], response_format)
+            if recording_id in rendered:
+                return rendered[recording_id]
         cur = conn.execute(
             """
             SELECT config_hash, config_json, vad_segments_json, segments_json,
@@ -73,16 +410,75 @@ def get_cache_entry(
         row = cur.fetchone()
         if row is None:
             return None
-        return {
-            "config_hash": row[0],
-            "config_json": row[1],
-            "vad_segments_json": row[2],
-            "segments_json": row[3],
-            "aggregated_text": row[4],
-            "updated_at": row[5],
-        }
+        entry = _entry_from_row(row)
+        if response_format == SEQUENTIAL_FORMAT:
+            _attach_segments(conn, {recording_id: entry})
+        return entry
     finally:
-        conn.close()
+        _release(conn)
+
+
+def get_cache_entries(
+    recording_ids: Iterable[str], response_format: str
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch cache entries for many recordings with a single connection.
+
+    Recordings without an entry, or whose audio changed since it was
+    computed, are simply absent from the result. Entries (and misses) held
+    in memory are not read again.
+    """
+    db = str(_db_path())
+    results: Dict[str, Dict[str, Any]] = {}
+    ids: List[str] = []
+    for recording_id in dict.fromkeys(recording_ids):
+        cached = _entry_cache.get((db, recording_id, response_format))
+        if cached is _EntryCache._MISSING:
+            ids.append(recording_id)
+        elif cached is not None:
+            results[recording_id] = cached
+
+    if ids:
+        generation = _entry_cache.generation()
+        found = _read_cache_entries(ids, response_format)
+        for recording_id in ids:
+            entry = found.get(recording_id)
+            _entry_cache.record((db, recording_id, response_format), entry)
+            _entry_cache.put((db, recording_id, response_format), entry, generation)
+            if entry is not None:
+                results[recording_id] = entry
+    for recording_id in _stale_sources(list(results)):
+        del results[recording_id]
+    return results
+
+
+def _read_cache_entries(
+    ids: List[str], response_format: str
+) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    conn = _get_connection()
+    try:
+        # Stay well below SQLite's default limit on bound parameters.
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset : offset + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = conn.execute(
+                f"""
+                SELECT recording_id, config_hash, config_json, vad_segments_json,
+                       segments_json, aggregated_text, updated_at
+                FROM transcription_cache
+                WHERE response_format = ? AND recording_id IN ({placeholders})
+                """,
+                (response_format, *chunk),
+            )
+            for row in cur.fetchall():
+                results[row[0]] = _entry_from_row(row[1:])
+        if response_format == SEQUENTIAL_FORMAT:
+            _attach_segments(conn, results)
+        elif response_format in RENDER_FORMATS:
+            results.update(_rendered_entries(conn, ids, response_format))
+        return results
+    finally:
+        _release(conn)
 
 
 def upsert_cache_entry(
@@ -98,18 +494,9 @@ def upsert_cache_entry(
     Insert or update a cache entry. Any of the JSON/text fields can be
     left as None to preserve existing values.
     """
+    _check_sources([recording_id], adopt=True)
     conn = _get_connection()
     try:
-        existing = get_cache_entry(recording_id, response_format)
-        if existing is not None:
-            if vad_segments_json is None:
-                vad_segments_json = existing["vad_segments_json"]
-            if segments_json is None:
-                segments_json = existing["segments_json"]
-            if aggregated_text is None:
-                aggregated_text = existing["aggregated_text"]
-
-        updated_at = datetime.utcnow().isoformat()
         conn.execute(
             """
             INSERT INTO transcription_cache (
@@ -126,9 +513,9 @@ def upsert_cache_entry(
             ON CONFLICT(recording_id, response_format) DO UPDATE SET
                 config_hash=excluded.config_hash,
                 config_json=excluded.config_json,
-                vad_segments_json=excluded.vad_segments_json,
-                segments_json=excluded.segments_json,
-                aggregated_text=excluded.aggregated_text,
+                vad_segments_json=COALESCE(excluded.vad_segments_json, vad_segments_json),
+                segments_json=COALESCE(excluded.segments_json, segments_json),
+                aggregated_text=COALESCE(excluded.aggregated_text, aggregated_text),
                 updated_at=excluded.updated_at
             """,
             (
@@ -136,13 +523,1091 @@ def upsert_cache_entry(
                 response_format,
                 config_hash,
                 config_json,
-                vad_segments_json,
-                segments_json,
-                aggregated_text,
-                updated_at,
+                _pack(vad_segments_json),
+                _pack(segments_json),
+                _pack(aggregated_text),
+                datetime.utcnow().isoformat(),
             ),
         )
         conn.commit()
     finally:
-        conn.close()
+        _release(conn)
+        _entry_cache.invalidate(recording_id)
+
+
+def _rendered_entries(
+    conn: sqlite3.Connection, recording_ids: List[str], response_format: str
+) -> Dict[str, Dict[str, Any]]:
+    """Cache entries rendered from stored structured transcripts."""
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    for offset in range(0, len(recording_ids), 500):
+        chunk = recording_ids[offset : offset + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        cur = conn.execute(
+            f"""
+            SELECT recording_id, config_hash, config_json, transcript_json,
+                   updated_at
+            FROM transcripts
+            WHERE recording_id IN ({placeholders})
+            """,
+            chunk,
+        )
+        for row in cur.fetchall():
+            entries[row[0]] = {
+                "config_hash": row[1],
+                "config_json": row[2],
+                "vad_segments_json": None,
+                "segments_json": None,
+                "aggregated_text": render_transcript(
+                    json.loads(_unpack(row[3])), response_format
+                ),
+                "updated_at": row[4],
+            }
+    return entries
+
+
+def get_transcript(recording_id: str) -> Optional[Dict[str, Any]]:
+    """Return the stored structured transcript of a whole recording.
+
+    The result has config_hash, config_json, transcript and updated_at.
+    When there is none, the transcript of an identical recording (same
+    full fingerprint) is returned; record_full_fingerprint() stores the
+    copy.
+    """
+
+    conn = _get_connection()
+    try:
+        row = _select_transcript(conn, recording_id)
+    finally:
+        _release(conn)
+    if row is None:
+        twin = _twin_transcript(recording_id)
+        row = twin[1] if twin is not None else None
+    if row is None or _stale_sources([recording_id]):
+        return None
+    return {
+        "config_hash": row[0],
+        "config_json": row[1],
+        "transcript": json.loads(_unpack(row[2])),
+        "updated_at": row[3],
+    }
+
+
+def _twin_transcript(recording_id: str) -> Optional[Tuple[str, Tuple[Any, ...]]]:
+    """(twin id, transcript row) of an identical recording, if any."""
+
+    conn = _get_connection()
+    try:
+        twins = _content_twins(conn, recording_id)
+    finally:
+        _release(conn)
+    stale = _stale_sources(twins)
+    for twin in twins:
+        if twin in stale:
+            continue
+        conn = _get_connection()
+        try:
+            row = _select_transcript(conn, twin)
+        finally:
+            _release(conn)
+        if row is not None:
+            return twin, row
+    return None
+
+
+def _select_transcript(
+    conn: sqlite3.Connection, recording_id: str
+) -> Optional[Tuple[Any, ...]]:
+    return conn.execute(
+        """
+        SELECT config_hash, config_json, transcript_json, updated_at
+        FROM transcripts WHERE recording_id = ?
+        """,
+        (recording_id,),
+    ).fetchone()
+
+
+def _content_twins(conn: sqlite3.Connection, recording_id: str) -> List[str]:
+    """Other recordings whose audio has the same full fingerprint."""
+
+    rows = conn.execute(
+        """
+        SELECT other.recording_id
+        FROM cache_sources AS this
+        JOIN cache_sources AS other ON other.full_hash = this.full_hash
+        WHERE this.recording_id = ? AND other.recording_id != ?
+        """,
+        (recording_id, recording_id),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def upsert_transcript(
+    recording_id: str,
+    config_hash: str,
+    config_json: str,
+    transcript: Dict[str, Any],
+) -> None:
+    """Store the structured transcript of a whole recording.
+
+    Older per-format copies of the transcript are dropped so they cannot
+    shadow it.
+    """
+
+    _check_sources([recording_id], adopt=True)
+    conn = _get_connection()
+    try:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO transcripts (
+                recording_id, config_hash, config_json, transcript_json, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                recording_id,
+                config_hash,
+                config_json,
+                _pack(json.dumps(transcript, ensure_ascii=False)),
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        placeholders = ",".join("?" for _ in RENDER_FORMATS)
+        conn.execute(
+            f"""
+            DELETE FROM transcription_cache
+            WHERE recording_id = ? AND response_format IN ({placeholders})
+            """,
+            (recording_id, *RENDER_FORMATS),
+        )
+        conn.commit()
+    finally:
+        _release(conn)
+        _entry_cache.invalidate(recording_id)
+
+
+def load_transcript(
+    recording_id: str, source: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Return a recording's transcript in structured form.
+
+    source is "full" (whole-recording transcription) or SEQUENTIAL_FORMAT
+    (built from the cached VAD-sequential segments); by default the full
+    transcript is preferred when both exist.
+    """
+
+    if source in (None, "full"):
+        stored = get_transcript(recording_id)
+        if stored is not None:
+            return stored["transcript"]
+        if source == "full":
+            return None
+    segments = get_transcript_segments(recording_id)
+    if not segments:
+        return None
+    return sequential_transcript(segments)
+
+
+def _segment_from_row(row: Iterable[Any]) -> Dict[str, Any]:
+    start_ms, end_ms, index, fmt, content = row
+    return {
+        "index": index,
+        "start": start_ms / 1000.0,
+        "end": end_ms / 1000.0,
+        "format": fmt,
+        "content": _unpack(content),
+    }
+
+
+def _select_segments(
+    conn: sqlite3.Connection, config_hashes: Dict[str, str]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Segment transcripts of each recording made under the given config."""
+
+    found: Dict[str, List[Dict[str, Any]]] = {}
+    keys = list(config_hashes.items())
+    for offset in range(0, len(keys), 250):
+        chunk = keys[offset : offset + 250]
+        matches = " OR ".join("(recording_id = ? AND config_hash = ?)" for _ in chunk)
+        cur = conn.execute(
+            f"""
+            SELECT recording_id, start_ms, end_ms, segment_index, format, content
+            FROM transcription_segments
+            WHERE {matches}
+            ORDER BY recording_id, segment_index IS NULL, segment_index, start_ms
+            """,
+            [value for key in chunk for value in key],
+        )
+        for row in cur.fetchall():
+            found.setdefault(row[0], []).append(_segment_from_row(row[1:]))
+    return found
+
+
+def _attach_segments(
+    conn: sqlite3.Connection, entries: Dict[str, Dict[str, Any]]
+) -> None:
+    """Derive segments_json and aggregated_text of VAD-sequential entries.
+
+    Only segments transcribed under the entry's configuration are used.
+    Entries written before the segments table existed keep their stored
+    values.
+    """
+
+    if not entries:
+        return
+    config_hashes = {
+        recording_id: entry["config_hash"] for recording_id, entry in entries.items()
+    }
+    for recording_id, segments in _select_segments(conn, config_hashes).items():
+        entry = entries[recording_id]
+        entry["segments_json"] = json.dumps(segments)
+        entry["aggregated_text"] = aggregate_segment_text(segments)
+
+
+def _legacy_segments(
+    conn: sqlite3.Connection, recording_id: str
+) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """(config_hash, segments) stored on a VAD-sequential entry written
+    before the segments table existed."""
+
+    row = conn.execute(
+        """
+        SELECT config_hash, segments_json FROM transcription_cache
+        WHERE recording_id = ? AND response_format = ?
+        """,
+        (recording_id, SEQUENTIAL_FORMAT),
+    ).fetchone()
+    if row is None or not row[1]:
+        return None
+    try:
+        segments = json.loads(_unpack(row[1]))
+    except Exception:  # pragma: no cover - defensive
+        segments = []
+    return row[0], [
+        s for s in segments if isinstance(s, dict) and s.get("start") is not None
+    ]
+
+
+def _migrate_legacy_segments(conn: sqlite3.Connection, recording_id: str) -> bool:
+    legacy = _legacy_segments(conn, recording_id)
+    if legacy is None:
+        return False
+    config_hash, segments = legacy
+    now = datetime.utcnow().isoformat()
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO transcription_segments (
+            recording_id, config_hash, start_ms, end_ms, segment_index,
+            format, content, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                recording_id,
+                config_hash,
+                _to_ms(s.get("start")),
+                _to_ms(s.get("end")),
+                s.get("index"),
+                s.get("format"),
+                _pack(s.get("content")),
+                now,
+            )
+            for s in segments
+        ],
+    )
+    conn.execute(
+        """
+        UPDATE transcription_cache SET segments_json = NULL, aggregated_text = NULL
+        WHERE recording_id = ? AND response_format = ?
+        """,
+        (recording_id, SEQUENTIAL_FORMAT),
+    )
+    return True
+
+
+def migrate_legacy_segments(recording_id: str) -> bool:
+    """Move segment transcripts stored on the VAD-sequential entry (before
+    the segments table existed) into transcription_segments.
 
+    Run once per recording by the processing pipeline; reads serve such
+    entries as they are, and writes migrate them first. Returns whether
+    there was anything to move.
+    """
+
+    conn = _get_connection()
+    try:
+        migrated = _migrate_legacy_segments(conn, recording_id)
+        conn.commit()
+        return migrated
+    finally:
+        _release(conn)
+        _entry_cache.invalidate(recording_id)
+
+
+def _segment_order(segment: Dict[str, Any]) -> Tuple[bool, int, float]:
+    # As ORDER BY segment_index IS NULL, segment_index, start_ms.
+    index = segment.get("index")
+    return index is None, index or 0, float(segment.get("start") or 0.0)
+
+
+def _to_ms(seconds: Any) -> int:
+    return int(round(float(seconds or 0.0) * 1000))
+
+
+def get_transcript_segments(
+    recording_id: str, config_hash: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Return the cached VAD-sequential segment transcripts in segment order.
+
+    With config_hash, only segments transcribed under that configuration are
+    returned. Works while a transcription is still running.
+    """
+
+    conn = _get_connection()
+    try:
+        params: Tuple[Any, ...] = (recording_id,)
+        where = "recording_id = ?"
+        if config_hash is not None:
+            where += " AND config_hash = ?"
+            params += (config_hash,)
+        cur = conn.execute(
+            f"""
+            SELECT start_ms, end_ms, segment_index, format, content
+            FROM transcription_segments
+            WHERE {where}
+            ORDER BY segment_index IS NULL, segment_index, start_ms
+            """,
+            params,
+        )
+        segments = [_segment_from_row(row) for row in cur.fetchall()]
+        if not segments:
+            legacy = _legacy_segments(conn, recording_id)
+            if legacy is not None and config_hash in (None, legacy[0]):
+                segments = sorted(legacy[1], key=_segment_order)
+    finally:
+        _release(conn)
+    if segments and _stale_sources([recording_id]):
+        return []
+    return segments
+
+
+def upsert_transcript_segment(
+    recording_id: str, config_hash: str, config_json: str, entry: Dict[str, Any]
+) -> None:
+    """Store one VAD-sequential segment transcript.
+
+    The segment replaces any transcript with the same index (an older
+    segmentation) and transcripts made under a different configuration.
+    """
+
+    _check_sources([recording_id], adopt=True)
+    start_ms, end_ms = _to_ms(entry.get("start")), _to_ms(entry.get("end"))
+    index = entry.get("index")
+    now = datetime.utcnow().isoformat()
+    conn = _get_connection()
+    try:
+        _migrate_legacy_segments(conn, recording_id)
+        conn.execute(
+            """
+            DELETE FROM transcription_segments
+            WHERE recording_id = ?
+              AND (
+                  config_hash != ?
+                  OR (segment_index = ? AND (start_ms != ? OR end_ms != ?))
+              )
+            """,
+            (recording_id, config_hash, index, start_ms, end_ms),
+        )
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO transcription_segments (
+                recording_id, config_hash, start_ms, end_ms, segment_index,
+                format, content, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                recording_id,
+                config_hash,
+                start_ms,
+                end_ms,
+                index,
+                entry.get("format"),
+                _pack(entry.get("content")),
+                now,
+            ),
+        )
+        # Keep a (small) cache entry so lookups by format find the transcript;
+        # its segments and text are derived from the rows above when read.
+        conn.execute(
+            """
+            INSERT INTO transcription_cache (
+                recording_id, response_format, config_hash, config_json, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(recording_id, response_format) DO UPDATE SET
+                config_hash=excluded.config_hash,
+                config_json=excluded.config_json,
+                updated_at=excluded.updated_at
+            """,
+            (recording_id, SEQUENTIAL_FORMAT, config_hash, config_json, now),
+        )
+        conn.commit()
+    finally:
+        _release(conn)
+        _entry_cache.invalidate(recording_id)
+
+
+def delete_transcript_segments(
+    recording_id: str, indexes: Optional[Iterable[int]] = None
+) -> int:
+    """Drop cached segment transcripts (all of them when indexes is None)."""
+
+    conn = _get_connection()
+    try:
+        _migrate_legacy_segments(conn, recording_id)
+        if indexes is None:
+            cur = conn.execute(
+                "DELETE FROM transcription_segments WHERE recording_id = ?",
+                (recording_id,),
+            )
+        else:
+            cur = conn.executemany(
+                "DELETE FROM transcription_segments "
+                "WHERE recording_id = ? AND segment_index = ?",
+                [(recording_id, index) for index in indexes],
+            )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        _release(conn)
+        _entry_cache.invalidate(recording_id)
+
+
+def get_transcript_chunks(
+    recording_id: str, response_format: str, config_hash: str
+) -> Dict[Tuple[int, int], str]:
+    """Return cached window transcripts keyed by (start_ms, end_ms)."""
+
+    conn = _get_connection()
+    try:
+        cur = conn.execute(
+            """
+            SELECT start_ms, end_ms, content FROM transcription_chunks
+            WHERE recording_id = ? AND response_format = ? AND config_hash = ?
+            """,
+            (recording_id, response_format, config_hash),
+        )
+        rows = cur.fetchall()
+    finally:
+        _release(conn)
+    if rows and _stale_sources([recording_id]):
+        return {}
+    return {(row[0], row[1]): _unpack(row[2]) for row in rows}
+
+
+def upsert_transcript_chunk(
+    recording_id: str,
+    response_format: str,
+    config_hash: str,
+    start_ms: int,
+    end_ms: int,
+    content: str,
+) -> None:
+    _check_sources([recording_id], adopt=True)
+    conn = _get_connection()
+    try:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO transcription_chunks (
+                recording_id, response_format, config_hash, start_ms, end_ms,
+                content, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                recording_id,
+                response_format,
+                config_hash,
+                start_ms,
+                end_ms,
+                _pack(content),
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        conn.commit()
+    finally:
+        _release(conn)
+
+
+def delete_transcript_chunks(
+    recording_id: str, response_format: Optional[str] = None
+) -> int:
+    conn = _get_connection()
+    try:
+        if response_format is None:
+            cur = conn.execute(
+                "DELETE FROM transcription_chunks WHERE recording_id = ?",
+                (recording_id,),
+            )
+        else:
+            cur = conn.execute(
+                "DELETE FROM transcription_chunks "
+                "WHERE recording_id = ? AND response_format = ?",
+                (recording_id, response_format),
+            )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        _release(conn)
+
+
+# Bytes held for each recording, across every table, and when its entries
+# were last written or read. Sizes are those of the stored (possibly
+# compressed) values.
+_RECORDING_USAGE_SQL = """
+    SELECT u.recording_id, SUM(u.bytes),
+           MAX(MAX(u.updated_at), COALESCE(a.accessed_at, ''))
+    FROM (
+        SELECT recording_id, updated_at,
+               length(CAST(config_json AS BLOB))
+               + COALESCE(length(CAST(vad_segments_json AS BLOB)), 0)
+               + COALESCE(length(CAST(segments_json AS BLOB)), 0)
+               + COALESCE(length(CAST(aggregated_text AS BLOB)), 0) AS bytes
+        FROM transcription_cache
+        UNION ALL
+        SELECT recording_id, updated_at,
+               COALESCE(length(CAST(content AS BLOB)), 0)
+        FROM transcription_segments
+        UNION ALL
+        SELECT recording_id, updated_at,
+               COALESCE(length(CAST(content AS BLOB)), 0)
+        FROM transcription_chunks
+        UNION ALL
+        SELECT recording_id, updated_at,
+               length(CAST(config_json AS BLOB))
+               + length(CAST(transcript_json AS BLOB))
+        FROM transcripts
+        UNION ALL
+        SELECT recording_id, checked_at, 0 FROM cache_sources
+    ) AS u
+    LEFT JOIN cache_access AS a ON a.recording_id = u.recording_id
+    GROUP BY u.recording_id
+"""
+
+_RECORDING_TABLES = (
+    "transcription_cache",
+    "transcription_segments",
+    "transcription_chunks",
+    "transcripts",
+    "cache_sources",
+    "cache_access",
+)
+
+_last_maintenance: Dict[str, Any] = {}
+
+
+def _delete_recordings(conn: sqlite3.Connection, recording_ids: List[str]) -> None:
+    for offset in range(0, len(recording_ids), 500):
+        chunk = recording_ids[offset : offset + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        for table in _RECORDING_TABLES:
+            conn.execute(
+                f"DELETE FROM {table} WHERE recording_id IN ({placeholders})", chunk
+            )
+
+
+def delete_recording_cache(recording_id: str) -> None:
+    """Drop everything cached for a recording (it was deleted)."""
+
+    conn = _get_connection()
+    try:
+        _delete_recordings(conn, [recording_id])
+        conn.commit()
+    finally:
+        _release(conn)
+        _forget_source_checks([recording_id])
+        _entry_cache.invalidate(recording_id)
+
+
+def _flush_access_times(conn: sqlite3.Connection) -> None:
+    accessed = _entry_cache.take_accessed(str(_db_path()))
+    conn.executemany(
+        """
+        INSERT INTO cache_access (recording_id, accessed_at) VALUES (?, ?)
+        ON CONFLICT(recording_id) DO UPDATE SET
+            accessed_at=MAX(accessed_at, excluded.accessed_at)
+        """,
+        list(accessed.items()),
+    )
+
+
+def _incremental_vacuum(conn: sqlite3.Connection) -> int:
+    """Return free pages to the filesystem; returns how many were released."""
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Databases created before incremental vacuum was enabled need one
+        # full VACUUM to switch modes.
+        logger.info("Converting %s to incremental vacuum", _db_path())
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return 0
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if free:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    return free
+
+
+def maintain_cache(
+    present_ids: Optional[Collection[str]] = None,
+    max_bytes: Optional[int] = None,
+    max_idle_days: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Evict cache entries and give the space back to the filesystem.
+
+    A recording's entries are dropped as a unit: when present_ids is given
+    and the recording is not in it (its audio is gone), when they have not
+    been read or written for max_idle_days, and, least recently used first,
+    while the cache is larger than max_bytes. Budgets default to the
+    cache_max_bytes and cache_max_idle_days settings; zero disables them.
+    Results of recordings whose audio changed are dropped too ("changed"),
+    and recordings cached before content fingerprints existed get one.
+    Returns a summary, also reported by cache_stats().
+    """
+
+    budget = settings.cache_max_bytes if max_bytes is None else max_bytes
+    idle_days = settings.cache_max_idle_days if max_idle_days is None else max_idle_days
+    cutoff = (
+        (datetime.utcnow() - timedelta(days=idle_days)).isoformat()
+        if idle_days > 0
+        else None
+    )
+    present = set(present_ids) if present_ids is not None else None
+    reasons: Dict[str, int] = {"orphaned": 0, "idle": 0, "over_budget": 0}
+    evict: List[str] = []
+    freed = 0
+
+    conn = _get_connection()
+    try:
+        _flush_access_times(conn)
+        usage = conn.execute(_RECORDING_USAGE_SQL + " ORDER BY 3").fetchall()
+        total = sum(size or 0 for _, size, _ in usage)
+        for recording_id, size, last_used in usage:
+            size = size or 0
+            if present is not None and recording_id not in present:
+                reason = "orphaned"
+            elif cutoff is not None and last_used < cutoff:
+                reason = "idle"
+            elif budget > 0 and total > budget:
+                reason = "over_budget"
+            else:
+                continue
+            reasons[reason] += 1
+            evict.append(recording_id)
+            total -= size
+            freed += size
+        if evict:
+            _delete_recordings(conn, evict)
+        conn.commit()
+        released = _incremental_vacuum(conn)
+        fingerprinted = [
+            row[0] for row in conn.execute("SELECT recording_id FROM cache_sources")
+        ]
+        unfingerprinted = [
+            row[0]
+            for row in conn.execute(
+                """
+                SELECT recording_id FROM transcription_cache
+                UNION SELECT recording_id FROM transcripts
+                EXCEPT SELECT recording_id FROM cache_sources
+                """
+            )
+        ]
+    finally:
+        _release(conn)
+        _forget_source_checks(evict)
+        for recording_id in evict:
+            _entry_cache.invalidate(recording_id)
+
+    # Reads only hide the results of recordings whose audio changed; they
+    # are dropped here. Results cached before fingerprints existed are tied
+    # to the audio as it is now.
+    changed = _check_sources(fingerprinted)
+    _check_sources(unfingerprinted, adopt=True)
+
+    if evict:
+        logger.info(
+            "Evicted cached transcripts of %d recording(s), %d bytes (%s)",
+            len(evict),
+            freed,
+            ", ".join(f"{k} {v}" for k, v in reasons.items() if v),
+        )
+    summary = dict(
+        reasons,
+        at=datetime.utcnow().isoformat(),
+        changed=len(changed),
+        evicted_bytes=freed,
+        released_pages=released,
+        bytes=total,
+    )
+    _last_maintenance.clear()
+    _last_maintenance.update(summary)
+    return summary
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Entries, stored bytes and hit/miss counts per response format.
+
+    Hits served from memory are counted separately from those read from
+    the database. Whole-recording transcripts are stored once (format
+    "transcript") and counted under the format they were rendered in;
+    VAD-sequential segment rows and long-recording chunks are included in
+    vad_sequential and "chunks".
+    """
+
+    formats: Dict[str, Dict[str, Any]] = defaultdict(
+        lambda: {"entries": 0, "bytes": 0, "memory_hits": 0, "hits": 0, "misses": 0}
+    )
+    conn = _get_connection()
+    try:
+        rows = conn.execute(
+            """
+            SELECT response_format, COUNT(*),
+                   SUM(length(CAST(config_json AS BLOB))
+                       + COALESCE(length(CAST(vad_segments_json AS BLOB)), 0)
+                       + COALESCE(length(CAST(segments_json AS BLOB)), 0)
+                       + COALESCE(length(CAST(aggregated_text AS BLOB)), 0))
+            FROM transcription_cache GROUP BY response_format
+            UNION ALL
+            SELECT 'transcript', COUNT(*),
+                   SUM(length(CAST(config_json AS BLOB))
+                       + length(CAST(transcript_json AS BLOB)))
+            FROM transcripts
+            UNION ALL
+            SELECT ?, 0, SUM(COALESCE(length(CAST(content AS BLOB)), 0))
+            FROM transcription_segments
+            UNION ALL
+            SELECT 'chunks', COUNT(*), SUM(COALESCE(length(CAST(content AS BLOB)), 0))
+            FROM transcription_chunks
+            """,
+            (SEQUENTIAL_FORMAT,),
+        ).fetchall()
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        recordings = conn.execute(
+            "SELECT COUNT(*) FROM (" + _RECORDING_USAGE_SQL + ")"
+        ).fetchone()[0]
+    finally:
+        _release(conn)
+
+    for fmt, count, size in rows:
+        if not count and not size:
+            continue
+        formats[fmt]["entries"] += count
+        formats[fmt]["bytes"] += size or 0
+    for fmt, counts in _entry_cache.counts().items():
+        formats[fmt].update(counts)
+    for counts in formats.values():
+        lookups = counts["memory_hits"] + counts["hits"] + counts["misses"]
+        counts["hit_rate"] = (
+            (counts["memory_hits"] + counts["hits"]) / lookups if lookups else None
+        )
+
+    return {
+        "recordings": recordings,
+        "bytes": sum(c["bytes"] for c in formats.values()),
+        "max_bytes": settings.cache_max_bytes,
+        "max_idle_days": settings.cache_max_idle_days,
+        "file_bytes": page_size * pages,
+        "free_bytes": page_size * free_pages,
+        "memory_entries": len(_entry_cache),
+        "max_memory_entries": settings.cache_memory_entries,
+        "formats": dict(formats),
+        "last_maintenance": dict(_last_maintenance) or None,
+    }
+
+
+# A recording's fingerprint is checked at most this often; the file is only
+# hashed again when its size or modification time changed.
+SOURCE_CHECK_SECONDS = 30.0
+
+# Outcome of the last check of a recording's audio against its fingerprint.
+_SOURCE_MATCHES = "matches"
+_SOURCE_CHANGED = "changed"
+_SOURCE_UNFINGERPRINTED = "unfingerprinted"
+
+# (database, recording) -> (when it was checked, outcome)
+_source_checks: Dict[Tuple[str, str], Tuple[float, str]] = {}
+_source_checks_lock = threading.Lock()
+
+
+def _forget_source_checks(recording_ids: Iterable[str]) -> None:
+    db = str(_db_path())
+    with _source_checks_lock:
+        for recording_id in recording_ids:
+            _source_checks.pop((db, recording_id), None)
+
+
+def _remember_source_checks(checked_at: float, outcomes: Dict[str, str]) -> None:
+    db = str(_db_path())
+    with _source_checks_lock:
+        for recording_id, outcome in outcomes.items():
+            _source_checks[(db, recording_id)] = (checked_at, outcome)
+
+
+def _audio_states(recording_ids: List[str]) -> Dict[str, Tuple[Path, int, int]]:
+    """(path, size, mtime_ns) of the recordings whose audio can be found."""
+
+    states: Dict[str, Tuple[Path, int, int]] = {}
+    for recording_id, path in resolve_recording_paths(recording_ids).items():
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        states[recording_id] = (path, stat.st_size, stat.st_mtime_ns)
+    return states
+
+
+def _audio_state(recording_id: str) -> Optional[Tuple[Path, int, int]]:
+    return _audio_states([recording_id]).get(recording_id)
+
+
+def _select_sources(
+    conn: sqlite3.Connection, recording_ids: List[str]
+) -> Dict[str, Tuple[int, int, str, Optional[str]]]:
+    """(size, mtime_ns, quick_hash, full_hash) of fingerprinted recordings."""
+
+    known: Dict[str, Tuple[int, int, str, Optional[str]]] = {}
+    for offset in range(0, len(recording_ids), 500):
+        chunk = recording_ids[offset : offset + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        for row in conn.execute(
+            f"""
+            SELECT recording_id, size, mtime_ns, quick_hash, full_hash
+            FROM cache_sources
+            WHERE recording_id IN ({placeholders})
+            """,
+            chunk,
+        ):
+            known[row[0]] = (row[1], row[2], row[3], row[4])
+    return known
+
+
+def _stale_sources(recording_ids: List[str]) -> Set[str]:
+    """The recordings whose audio no longer matches their fingerprint.
+
+    Called with the recordings a read found results for; their results
+    are not served. Nothing is written: the results are dropped by
+    maintain_cache() or when new results are written (see _check_sources).
+    """
+
+    now = time.monotonic()
+    db = str(_db_path())
+    stale: Set[str] = set()
+    due: List[str] = []
+    with _source_checks_lock:
+        for recording_id in recording_ids:
+            last = _source_checks.get((db, recording_id))
+            if last is None or now - last[0] >= SOURCE_CHECK_SECONDS:
+                due.append(recording_id)
+            elif last[1] == _SOURCE_CHANGED:
+                stale.add(recording_id)
+    if not due:
+        return stale
+
+    conn = _get_connection()
+    try:
+        known = _select_sources(conn, due)
+    finally:
+        _release(conn)
+    states = _audio_states(list(known))
+    outcomes: Dict[str, str] = {}
+    for recording_id in due:
+        stored = known.get(recording_id)
+        if stored is None:
+            outcomes[recording_id] = _SOURCE_UNFINGERPRINTED
+            continue
+        state = states.get(recording_id)
+        if state is None:
+            continue
+        path, size, mtime_ns = state
+        if stored[:2] != (size, mtime_ns):
+            try:
+                quick = quick_fingerprint(path)
+            except OSError:
+                continue
+            if quick != stored[2]:
+                stale.add(recording_id)
+                outcomes[recording_id] = _SOURCE_CHANGED
+                continue
+        outcomes[recording_id] = _SOURCE_MATCHES
+    _remember_source_checks(now, outcomes)
+    return stale
+
+
+def source_changed(recording_id: str) -> bool:
+    """Whether the audio of a recording changed since its results were cached.
+
+    Such results are no longer served; see _stale_sources().
+    """
+
+    return bool(_stale_sources([recording_id]))
+
+
+def _check_sources(recording_ids: List[str], adopt: bool = False) -> List[str]:
+    """Drop cached results of recordings whose audio changed.
+
+    Results stay valid through renames and migration to secondary storage:
+    only the content fingerprint is compared, and a recording that was
+    fully hashed (see record_full_fingerprint) must match that hash too.
+    With adopt, recordings without a fingerprint (results are about to be
+    written, or were written before fingerprints existed) get one of their
+    current audio. Recordings whose audio cannot be found are left alone.
+    Returns the recordings whose results were dropped.
+    """
+
+    db = str(_db_path())
+    now = time.monotonic()
+    due: List[str] = []
+    with _source_checks_lock:
+        for recording_id in recording_ids:
+            last = _source_checks.get((db, recording_id))
+            if (
+                last is None
+                or now - last[0] >= SOURCE_CHECK_SECONDS
+                or last[1] == _SOURCE_CHANGED
+                or (adopt and last[1] == _SOURCE_UNFINGERPRINTED)
+            ):
+                due.append(recording_id)
+    if not due:
+        return []
+
+    conn = _get_connection()
+    changed: List[str] = []
+    outcomes: Dict[str, str] = {}
+    try:
+        known = _select_sources(conn, due)
+        states = _audio_states(due if adopt else list(known))
+        for recording_id in due:
+            stored = known.get(recording_id)
+            if stored is None and not adopt:
+                outcomes[recording_id] = _SOURCE_UNFINGERPRINTED
+                continue
+            state = states.get(recording_id)
+            if state is None:
+                continue
+            path, size, mtime_ns = state
+            if stored is not None and stored[:2] == (size, mtime_ns):
+                outcomes[recording_id] = _SOURCE_MATCHES
+                continue
+            try:
+                quick = quick_fingerprint(path)
+                # Renamed, touched or migrated, but the same audio.
+                same = stored is not None and stored[2] == quick and (
+                    stored[3] is None or full_fingerprint(path) == stored[3]
+                )
+            except OSError:
+                continue
+            checked_at = datetime.utcnow().isoformat()
+            if same:
+                conn.execute(
+                    """
+                    UPDATE cache_sources SET size = ?, mtime_ns = ?, checked_at = ?
+                    WHERE recording_id = ?
+                    """,
+                    (size, mtime_ns, checked_at, recording_id),
+                )
+                outcomes[recording_id] = _SOURCE_MATCHES
+                continue
+            if stored is not None:
+                logger.info("Audio of %s changed; dropping its cached results", recording_id)
+                _delete_recordings(conn, [recording_id])
+                changed.append(recording_id)
+                outcomes[recording_id] = _SOURCE_UNFINGERPRINTED
+                if not adopt:
+                    continue
+            outcomes[recording_id] = _SOURCE_MATCHES
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_sources (
+                    recording_id, size, mtime_ns, quick_hash, full_hash, checked_at
+                )
+                VALUES (?, ?, ?, ?, NULL, ?)
+                """,
+                (recording_id, size, mtime_ns, quick, checked_at),
+            )
+        conn.commit()
+    finally:
+        _release(conn)
+        for recording_id in changed:
+            _entry_cache.invalidate(recording_id)
+
+    _remember_source_checks(now, outcomes)
+    return changed
+
+
+def verified_full_fingerprint(
+    recording_id: str, size: int, mtime_ns: int
+) -> Optional[str]:
+    """The full fingerprint of a recording's audio at this size and mtime.
+
+    Only returned while the fingerprint is known to match the file: it was
+    taken (record_full_fingerprint) or confirmed (_check_sources) at that
+    size and mtime. None otherwise, or when the audio was never fully
+    hashed.
+    """
+
+    conn = _get_connection()
+    try:
+        row = conn.execute(
+            """
+            SELECT full_hash FROM cache_sources
+            WHERE recording_id = ? AND size = ? AND mtime_ns = ?
+            """,
+            (recording_id, size, mtime_ns),
+        ).fetchone()
+    finally:
+        _release(conn)
+    return row[0] if row is not None else None
+
+
+def record_full_fingerprint(recording_id: str) -> bool:
+    """Hash the whole recording so identical recordings can share results.
+
+    An identical recording's transcript is copied over when this one has
+    none yet. Returns False when the audio cannot be found.
+    """
+
+    state = _audio_state(recording_id)
+    if state is None:
+        return False
+    path, size, mtime_ns = state
+    full = full_fingerprint(path)
+    _forget_source_checks([recording_id])
+    _check_sources([recording_id], adopt=True)
+    conn = _get_connection()
+    try:
+        # Only if the file has not changed while it was being hashed.
+        hashed = conn.execute(
+            """
+            UPDATE cache_sources SET full_hash = ?
+            WHERE recording_id = ? AND size = ? AND mtime_ns = ?
+            """,
+            (full, recording_id, size, mtime_ns),
+        ).rowcount
+        conn.commit()
+        transcribed = _select_transcript(conn, recording_id) is not None
+    finally:
+        _release(conn)
+    if hashed and not transcribed:
+        twin = _twin_transcript(recording_id)
+        if twin is not None:
+            twin_id, row = twin
+            logger.info("Reusing the transcript of identical recording %s", twin_id)
+            upsert_transcript(
+                recording_id, row[0], row[1], json.loads(_unpack(row[2]))
+            )
+    return True
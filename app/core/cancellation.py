@@ -0,0 +1,105 @@
+"""Request-scoped cancellation for long-running work.
+
+A CancelToken is handed down from whoever owns the work (an HTTP request, a
+queued job) to the code that spawns subprocesses or talks to Whisper. That
+code registers how to stop itself (kill the process, abandon the request)
+with on_cancel(); cancelling the token runs those callbacks right away, so
+the Pi's cores and the VAD lock are freed immediately instead of after the
+current step finishes. Work that has already completed (and been cached)
+is kept.
+"""
+
+import subprocess
+import threading
+from typing import Any, Callable, List, Optional, Sequence
+
+
+class OperationCancelled(Exception):
+    """The operation was cancelled through its CancelToken."""
+
+
+class CancelToken:
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:  # pragma: no cover - best effort
+                pass
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run callback when the token is cancelled (now, if it already is).
+
+        Returns a function that unregisters the callback.
+        """
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                registered = True
+            else:
+                registered = False
+        if not registered:
+            callback()
+
+        def unregister() -> None:
+            with self._lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+
+        return unregister
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+
+def raise_if_cancelled(cancel: Optional[CancelToken]) -> None:
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+
+
+def run_process(
+    cmd: Sequence[str], cancel: Optional[CancelToken] = None, **kwargs: Any
+) -> subprocess.CompletedProcess:
+    """subprocess.run() that kills the process when cancel is cancelled.
+
+    Raises OperationCancelled in that case. check= behaves as it does for
+    subprocess.run().
+    """
+
+    if cancel is None:
+        return subprocess.run(cmd, **kwargs)
+    cancel.raise_if_cancelled()
+    stdin_data = kwargs.pop("input", None)
+    if stdin_data is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    check = kwargs.pop("check", False)
+    with subprocess.Popen(cmd, **kwargs) as proc:
+        unregister = cancel.on_cancel(proc.kill)
+        try:
+            stdout, stderr = proc.communicate(stdin_data)
+        finally:
+            unregister()
+    if cancel.cancelled:
+        raise OperationCancelled()
+    completed = subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+    if check:
+        completed.check_returncode()
+    return completed
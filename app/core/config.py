@@ -21,6 +21,26 @@ class Settings(BaseSettings):
     vad_threads: int = 3
     debug_vad_segments: bool = False
     cache_db_path: str = "cache.db"
+    # Transcription cache entries kept in memory in front of the database.
+    cache_memory_entries: int = 256
+    # Size budget of cache.db, and how long a recording's cached results are
+    # kept without being read (0 disables either limit).
+    cache_max_bytes: int = 128 * 1024 * 1024
+    cache_max_idle_days: float = 0
+    # Mono 16 kHz analysis proxies shared by VAD, segment slicing and the
+    # waveform UI. Defaults to an "analysis" folder next to cache_db_path.
+    analysis_cache_dir: Optional[str] = None
+    analysis_cache_max_bytes: int = 1024 * 1024 * 1024
+    # Background threads running post-recording processing stages.
+    pipeline_workers: int = 2
+    # Worker threads draining the durable transcription job queue.
+    transcription_workers: int = 2
+    # Pooled HTTP client used for every Whisper server call. Timeouts are in
+    # seconds; a read timeout of 0 waits for the server indefinitely.
+    whisper_max_connections: int = 4
+    whisper_keepalive_seconds: float = 60.0
+    whisper_connect_timeout: float = 5.0
+    whisper_read_timeout: float = 30 * 60.0
 
     class Config:
         env_prefix = "RECORDER_"
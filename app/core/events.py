@@ -0,0 +1,91 @@
+"""Latest-state event bus for local consumers such as the hardware services.
+
+Each topic ("recording", "config", "storage") holds its most recent state.
+Publishing a state that differs from the current one bumps a sequence
+number and wakes every subscriber; subscribers ask for the topics that
+changed since the last sequence they saw. Bursts of changes are coalesced
+into the newest state, so a slow subscriber can never fall behind or make
+a publisher wait. GET /events streams this as Server-Sent Events; its
+subscribers wait on the event loop (wait_async), not on a thread each.
+"""
+
+import asyncio
+import contextlib
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+
+TOPIC_RECORDING = "recording"
+TOPIC_CONFIG = "config"
+TOPIC_STORAGE = "storage"
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._state: Dict[str, Tuple[int, Any]] = {}
+        # asyncio subscribers waiting for the next change.
+        self._async_waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def publish(self, topic: str, data: Any) -> bool:
+        """Set a topic's state; returns False when it was already that."""
+
+        with self._cond:
+            current = self._state.get(topic)
+            if current is not None and current[1] == data:
+                return False
+            self._seq += 1
+            self._state[topic] = (self._seq, data)
+            self._cond.notify_all()
+            for loop, woken in self._async_waiters:
+                # The loop may have shut down since the waiter registered.
+                with contextlib.suppress(RuntimeError):
+                    loop.call_soon_threadsafe(woken.set)
+            return True
+
+    def state(self, topic: str) -> Optional[Any]:
+        with self._cond:
+            current = self._state.get(topic)
+        return current[1] if current is not None else None
+
+    def wait(
+        self, after: int = 0, timeout: Optional[float] = None
+    ) -> Tuple[int, List[Tuple[str, Any]]]:
+        """Wait until something changes after sequence number after.
+
+        Returns the current sequence number and the (topic, state) pairs
+        that changed, oldest change first; the list is empty on timeout.
+        after=0 returns every topic's state right away.
+        """
+
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after, timeout)
+            changed = sorted(
+                (seq, topic, data)
+                for topic, (seq, data) in self._state.items()
+                if seq > after
+            )
+            return self._seq, [(topic, data) for _, topic, data in changed]
+
+    async def wait_async(
+        self, after: int = 0, timeout: Optional[float] = None
+    ) -> Tuple[int, List[Tuple[str, Any]]]:
+        """wait() for coroutines: the event loop waits, not a thread."""
+
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            pending = self._seq <= after
+            if pending:
+                self._async_waiters.add(waiter)
+        if pending:
+            try:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(waiter[1].wait(), timeout)
+            finally:
+                with self._cond:
+                    self._async_waiters.discard(waiter)
+        return self.wait(after, timeout=0)
+
+
+events = EventBus()
@@ -0,0 +1,72 @@
+"""Content fingerprints of recordings.
+
+Cached results are tied to the audio they were computed from rather than
+to a file name or modification time, which both change when a recording
+is renamed or migrated to secondary storage.
+
+The quick fingerprint hashes the size, the first 64 KiB (the WAV header and
+the start of the audio) and small blocks sampled evenly through the rest of
+the file; it reads about 130 KiB whatever the recording's length. The full
+fingerprint hashes the whole file and is computed in the background.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+
+HEAD_BYTES = 64 * 1024
+SAMPLE_BYTES = 4 * 1024
+SAMPLES = 16
+
+_READ_BYTES = 1024 * 1024
+
+# Quick fingerprints of recently served files, keyed on their stat().
+MEMO_ENTRIES = 256
+
+_memo: "OrderedDict[Tuple[str, int, int, int, int], str]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def quick_fingerprint(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        digest.update(size.to_bytes(8, "little"))
+        f.seek(0)
+        digest.update(f.read(HEAD_BYTES))
+        if size > HEAD_BYTES:
+            span = size - HEAD_BYTES - SAMPLE_BYTES
+            for n in range(SAMPLES + 1):
+                # Evenly spaced, the last block ending at the end of the file.
+                f.seek(HEAD_BYTES + max(0, span) * n // SAMPLES)
+                digest.update(f.read(SAMPLE_BYTES))
+    return "q:" + digest.hexdigest()
+
+
+def full_fingerprint(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BYTES), b""):
+            digest.update(block)
+    return "f:" + digest.hexdigest()
+
+
+def memoized_quick_fingerprint(path: Path, stat: os.stat_result) -> str:
+    """quick_fingerprint(path), reused while the file's stat() is unchanged."""
+
+    key = (str(path), stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    with _memo_lock:
+        fingerprint = _memo.get(key)
+        if fingerprint is not None:
+            _memo.move_to_end(key)
+            return fingerprint
+    fingerprint = quick_fingerprint(path)
+    with _memo_lock:
+        _memo[key] = fingerprint
+        while len(_memo) > MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return fingerprint
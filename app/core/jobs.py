@@ -0,0 +1,654 @@
+"""Durable transcription job queue.
+
+Transcriptions used to run inside request handlers, so an API restart, a
+closed browser tab or a proxy timeout threw the work away. Every
+transcription is now a row in a SQLite table next to cache.db and is
+executed by a small pool of worker threads. Jobs have a priority (an open
+browser beats the nightly batch), are retried with exponential backoff when
+the Whisper server fails, and can be cancelled.
+
+Progress is per segment: VAD-sequential runs cache each transcribed segment
+(and long whole-file runs each window) as soon as it completes, so a job
+that is retried or resumed after a crash only sends what is still missing.
+Jobs left running by a previous process are put back in the queue on
+start-up.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.app_config import load_app_config
+from app.core.cache import get_cache_entry
+from app.core.cancellation import CancelToken, OperationCancelled
+from app.core.config import settings
+from app.core.recording import get_recording
+from app.core.transcription import (
+    WhisperError,
+    attach_sequential_job,
+    get_sequential_job,
+    transcribe_recording,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+DB_FILENAME = "jobs.db"
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS transcription_jobs (
+        id TEXT PRIMARY KEY,
+        recording_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        response_format TEXT NOT NULL,
+        force INTEGER NOT NULL DEFAULT 0,
+        force_vad INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        not_before REAL NOT NULL DEFAULT 0,
+        total_segments INTEGER,
+        done_segments INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        error_status INTEGER,
+        batch TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        started_at TEXT,
+        finished_at TEXT
+    )
+"""
+
+CREATE_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_transcription_jobs_queue
+    ON transcription_jobs (status, priority, not_before)
+"""
+
+# VAD + Sequential: per-segment transcription with live progress.
+KIND_SEQUENTIAL = "vad_sequential"
+# The whole recording in a single Whisper request.
+KIND_FULL = "full"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+# Lower values run first.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AUTO = 10
+PRIORITY_BATCH = 20
+
+MAX_ATTEMPTS = 4
+RETRY_BASE_SECONDS = 30.0
+IDLE_POLL_SECONDS = 5.0
+
+_COLUMNS = (
+    "id",
+    "recording_id",
+    "kind",
+    "response_format",
+    "force",
+    "force_vad",
+    "status",
+    "priority",
+    "attempts",
+    "not_before",
+    "total_segments",
+    "done_segments",
+    "error",
+    "error_status",
+    "batch",
+    "created_at",
+    "updated_at",
+    "started_at",
+    "finished_at",
+)
+_SELECT_COLUMNS = ", ".join(_COLUMNS)
+
+
+class JobError(Exception):
+    pass
+
+
+class _Retry(Exception):
+    """The attempt failed in a way that may succeed later."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _db_path() -> Path:
+    # Store alongside cache_db_path by default, but in a separate file.
+    base = Path(settings.cache_db_path).parent
+    base.mkdir(parents=True, exist_ok=True)
+    return base / DB_FILENAME
+
+
+def _get_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(_db_path()))
+    conn.execute(CREATE_TABLE_SQL)
+    conn.execute(CREATE_INDEX_SQL)
+    return conn
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _row_to_job(row: Iterable[Any]) -> Dict[str, Any]:
+    job = dict(zip(_COLUMNS, row))
+    job["force"] = bool(job["force"])
+    job["force_vad"] = bool(job["force_vad"])
+    return job
+
+
+def _is_retryable(status_code: int) -> bool:
+    # 4xx means the request itself is wrong (disabled, bad range, ...).
+    return status_code >= 500
+
+
+class TranscriptionQueue:
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self._workers = workers
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        # Cancel tokens of running whole-recording jobs, by job id.
+        self._running: Dict[str, CancelToken] = {}
+
+    def start(self) -> None:
+        """Requeue interrupted jobs and start the worker threads."""
+
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+
+        self.reset_interrupted()
+
+        count = self._workers or max(1, settings.transcription_workers)
+        with self._cond:
+            for idx in range(count):
+                thread = threading.Thread(
+                    target=self._worker, name=f"transcription-{idx}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            self._cond.notify_all()
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def reset_interrupted(self) -> int:
+        """Put jobs left running by a previous process back in the queue."""
+
+        conn = _get_connection()
+        try:
+            cur = conn.execute(
+                "UPDATE transcription_jobs SET status = ?, updated_at = ? "
+                "WHERE status = ?",
+                (STATUS_QUEUED, _now_iso(), STATUS_RUNNING),
+            )
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def submit(
+        self,
+        recording_id: str,
+        kind: str = KIND_SEQUENTIAL,
+        response_format: str = "text",
+        priority: int = PRIORITY_INTERACTIVE,
+        force: bool = False,
+        force_vad: bool = False,
+        batch: Optional[str] = None,
+        not_before: float = 0.0,
+    ) -> Dict[str, Any]:
+        """Queue a transcription and return its job.
+
+        If the same transcription is already queued or running, that job is
+        returned instead, promoted to the more urgent priority and the
+        earlier start time. A forced request only joins a job that is
+        forced as well or still queued (which is then forced): a running
+        unforced job may just return the cached result.
+        """
+
+        if kind not in (KIND_SEQUENTIAL, KIND_FULL):
+            raise JobError(f"Unknown job kind {kind!r}")
+        response_format = (response_format or "text").strip().lower()
+
+        now = _now_iso()
+        with self._cond:
+            conn = _get_connection()
+            try:
+                rows = conn.execute(
+                    f"""
+                    SELECT {_SELECT_COLUMNS} FROM transcription_jobs
+                    WHERE recording_id = ? AND kind = ? AND response_format = ?
+                      AND status IN (?, ?)
+                    ORDER BY created_at
+                    """,
+                    (recording_id, kind, response_format, *ACTIVE_STATUSES),
+                ).fetchall()
+                for row in rows:
+                    job = _row_to_job(row)
+                    weaker = (force and not job["force"]) or (
+                        force_vad and not job["force_vad"]
+                    )
+                    if weaker and job["status"] != STATUS_QUEUED:
+                        continue
+                    if (
+                        weaker
+                        or priority < job["priority"]
+                        or not_before < job["not_before"]
+                    ):
+                        # Asking again also skips a pending retry back-off.
+                        job["priority"] = min(priority, job["priority"])
+                        job["not_before"] = min(not_before, job["not_before"])
+                        job["force"] = job["force"] or force
+                        job["force_vad"] = job["force_vad"] or force_vad
+                        conn.execute(
+                            "UPDATE transcription_jobs SET priority = ?, "
+                            "not_before = ?, force = ?, force_vad = ?, "
+                            "updated_at = ? WHERE id = ?",
+                            (
+                                job["priority"],
+                                job["not_before"],
+                                int(job["force"]),
+                                int(job["force_vad"]),
+                                now,
+                                job["id"],
+                            ),
+                        )
+                        conn.commit()
+                    return job
+
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    """
+                    INSERT INTO transcription_jobs (
+                        id, recording_id, kind, response_format, force, force_vad,
+                        status, priority, not_before, batch, created_at, updated_at
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        job_id,
+                        recording_id,
+                        kind,
+                        response_format,
+                        int(force),
+                        int(force_vad),
+                        STATUS_QUEUED,
+                        priority,
+                        not_before,
+                        batch,
+                        now,
+                        now,
+                    ),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self._cond.notify_all()
+        return self.get(job_id)  # type: ignore[return-value]
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = _get_connection()
+        try:
+            row = conn.execute(
+                f"SELECT {_SELECT_COLUMNS} FROM transcription_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return _row_to_job(row) if row is not None else None
+
+    def list(
+        self,
+        status: Optional[str] = None,
+        batch: Optional[str] = None,
+        recording_id: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (
+            ("status", status),
+            ("batch", batch),
+            ("recording_id", recording_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = _get_connection()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT {_SELECT_COLUMNS} FROM transcription_jobs
+                {where}
+                ORDER BY created_at DESC
+                LIMIT ?
+                """,
+                (*params, max(1, limit)),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [_row_to_job(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cancel a queued or running job.
+
+        A running job stops right away: VAD and ffmpeg processes are killed
+        and Whisper requests in flight are abandoned. Segments and windows
+        whose transcripts already came back stay cached.
+        """
+
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in ACTIVE_STATUSES:
+            now = _now_iso()
+            conn = _get_connection()
+            try:
+                conn.execute(
+                    "UPDATE transcription_jobs SET status = ?, updated_at = ?, "
+                    "finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                    (STATUS_CANCELLED, now, now, job_id, *ACTIVE_STATUSES),
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            if job["kind"] == KIND_SEQUENTIAL:
+                live = get_sequential_job(job["recording_id"])
+                if live is not None:
+                    live.cancel()
+            with self._cond:
+                token = self._running.get(job_id)
+                self._cond.notify_all()
+            if token is not None:
+                token.cancel()
+        return self.get(job_id)
+
+    def wait(
+        self, job_id: str, timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Block until the job has finished (or timeout) and return it."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] not in ACTIVE_STATUSES:
+                return job
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            with self._cond:
+                self._cond.wait(
+                    timeout=IDLE_POLL_SECONDS if remaining is None else min(
+                        remaining, IDLE_POLL_SECONDS
+                    )
+                )
+
+    def run_pending(self) -> int:
+        """Run queued jobs in the calling thread until none are runnable.
+
+        Returns the number of attempts made. Mostly useful for tests and
+        maintenance scripts; the service relies on start().
+        """
+
+        executed = 0
+        while True:
+            job = self._claim()
+            if job is None:
+                return executed
+            self._execute(job)
+            executed += 1
+
+    def _worker(self) -> None:  # pragma: no cover - background thread
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+            try:
+                job = self._claim()
+            except Exception:
+                logger.exception("Failed to claim transcription job")
+                job = None
+            if job is None:
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(timeout=IDLE_POLL_SECONDS)
+                continue
+            self._execute(job)
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            conn = _get_connection()
+            try:
+                while True:
+                    row = conn.execute(
+                        f"""
+                        SELECT {_SELECT_COLUMNS} FROM transcription_jobs
+                        WHERE status = ? AND not_before <= ?
+                          AND recording_id NOT IN (
+                              SELECT recording_id FROM transcription_jobs
+                              WHERE status = ?
+                          )
+                        ORDER BY priority, created_at
+                        LIMIT 1
+                        """,
+                        (STATUS_QUEUED, time.time(), STATUS_RUNNING),
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    job = _row_to_job(row)
+                    now = _now_iso()
+                    # The lock only covers this process: another one sharing
+                    # the database may have claimed or cancelled the job since
+                    # the SELECT, so the UPDATE re-checks what it selected on.
+                    claimed = conn.execute(
+                        """
+                        UPDATE transcription_jobs
+                        SET status = ?, attempts = attempts + 1, updated_at = ?,
+                            started_at = COALESCE(started_at, ?), error = NULL,
+                            error_status = NULL
+                        WHERE id = ? AND status = ?
+                          AND recording_id NOT IN (
+                              SELECT recording_id FROM transcription_jobs
+                              WHERE status = ?
+                          )
+                        """,
+                        (
+                            STATUS_RUNNING,
+                            now,
+                            now,
+                            job["id"],
+                            STATUS_QUEUED,
+                            STATUS_RUNNING,
+                        ),
+                    ).rowcount
+                    conn.commit()
+                    if claimed:
+                        job["status"] = STATUS_RUNNING
+                        job["attempts"] += 1
+                        return job
+            finally:
+                conn.close()
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        status = STATUS_DONE
+        error: Optional[str] = None
+        error_status: Optional[int] = None
+        not_before = 0.0
+        try:
+            self._run(job)
+        except _Retry as exc:
+            error, error_status = exc.detail, exc.status_code
+            if _is_retryable(exc.status_code) and job["attempts"] < MAX_ATTEMPTS:
+                status = STATUS_QUEUED
+                not_before = time.time() + RETRY_BASE_SECONDS * (
+                    2 ** (job["attempts"] - 1)
+                )
+                logger.warning(
+                    "Transcription job %s failed (%s); retrying in %.0fs",
+                    job["id"],
+                    exc.detail,
+                    not_before - time.time(),
+                )
+            else:
+                status = STATUS_FAILED
+        except _Cancelled:
+            status = STATUS_CANCELLED
+        except Exception as exc:
+            logger.exception("Transcription job %s crashed", job["id"])
+            status = STATUS_FAILED
+            error = str(exc) or exc.__class__.__name__
+            error_status = 500
+
+        now = _now_iso()
+        conn = _get_connection()
+        try:
+            # A cancel that arrived while running wins over the outcome.
+            conn.execute(
+                """
+                UPDATE transcription_jobs
+                SET status = CASE WHEN status = ? THEN status ELSE ? END,
+                    error = ?, error_status = ?, not_before = ?, updated_at = ?,
+                    finished_at = CASE WHEN ? IN (?, ?) THEN NULL ELSE ? END,
+                    force = CASE WHEN ? = ? THEN 0 ELSE force END,
+                    force_vad = CASE WHEN ? = ? THEN 0 ELSE force_vad END
+                WHERE id = ?
+                """,
+                (
+                    STATUS_CANCELLED,
+                    status,
+                    error,
+                    error_status,
+                    not_before,
+                    now,
+                    status,
+                    *ACTIVE_STATUSES,
+                    now,
+                    # A retry must not throw away what this attempt cached.
+                    status,
+                    STATUS_QUEUED,
+                    status,
+                    STATUS_QUEUED,
+                    job["id"],
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _set_progress(
+        self, job_id: str, done: Optional[int] = None, total: Optional[int] = None
+    ) -> None:
+        conn = _get_connection()
+        try:
+            conn.execute(
+                """
+                UPDATE transcription_jobs
+                SET done_segments = COALESCE(?, done_segments),
+                    total_segments = COALESCE(?, total_segments),
+                    updated_at = ?
+                WHERE id = ?
+                """,
+                (done, total, _now_iso(), job_id),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        meta = get_recording(job["recording_id"])
+        if meta is None:
+            raise _Retry(404, "Recording not found")
+        cfg = load_app_config()
+
+        if job["kind"] == KIND_FULL:
+            if not job["force"] and get_cache_entry(
+                job["recording_id"], job["response_format"]
+            ):
+                return
+            token = CancelToken()
+            with self._cond:
+                self._running[job["id"]] = token
+            current = self.get(job["id"])
+            if current is not None and current["status"] == STATUS_CANCELLED:
+                # Cancelled between being claimed and getting its token.
+                token.cancel()
+            try:
+                transcribe_recording(
+                    job["recording_id"],
+                    meta.path,
+                    cfg.whisper,
+                    response_format=job["response_format"],
+                    force=job["force"],
+                    on_progress=lambda done, total: self._set_progress(
+                        job["id"], done=done, total=total
+                    ),
+                    cancel=token,
+                )
+            except OperationCancelled as exc:
+                raise _Cancelled() from exc
+            except WhisperError as exc:
+                raise _Retry(exc.status_code, exc.detail) from exc
+            finally:
+                with self._cond:
+                    self._running.pop(job["id"], None)
+            return
+
+        live = attach_sequential_job(job["recording_id"])
+        counts = {"vad": 0, "done": 0}
+
+        def on_event(event: dict) -> None:
+            if event["type"] == "vad_segment":
+                counts["vad"] += 1
+                self._set_progress(job["id"], total=counts["vad"])
+            elif event["type"] == "segment":
+                counts["done"] += 1
+                self._set_progress(job["id"], done=counts["done"])
+
+        live.add_listener(on_event)
+        final = live.run(
+            meta.path,
+            cfg.whisper,
+            getattr(cfg, "vad", None),
+            response_format=job["response_format"],
+            force=job["force"],
+            force_vad=job["force_vad"],
+        )
+        if final["type"] == "cancelled":
+            raise _Cancelled()
+        if final["type"] == "error":
+            raise _Retry(int(final.get("status_code") or 500), final.get("detail", ""))
+        self._set_progress(job["id"], done=counts["done"], total=final.get("count"))
+
+
+transcription_queue = TranscriptionQueue()
@@ -0,0 +1,221 @@
+"""Native PCM WAV slicing, downmixing and resampling.
+
+Cutting a time range out of a recording used to mean starting ffmpeg, which
+costs well over 100 ms per call on the Pi before any audio is processed.
+Recordings are plain PCM WAV, so the samples can be read straight from a
+memory map: the byte range follows from the header, and downmixing plus
+resampling to mono 16 kHz is a handful of vectorised NumPy operations.
+
+NumPy is optional. Without it (or for non-PCM input) can_convert() returns
+False and callers fall back to ffmpeg.
+"""
+
+import math
+import mmap
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from app.core.wav import WavInfo, build_wav_header, read_wav_info
+
+
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+
+# Output samples produced per block when converting whole files; bounds
+# memory use to a few MB regardless of recording length.
+_CONVERT_BLOCK_SAMPLES = 16000 * 30
+
+# Low-pass filter length, in taps per unit of decimation ratio.
+_TAPS_PER_RATIO = 8
+
+
+class PcmConversionError(Exception):
+    pass
+
+
+def can_convert(info: WavInfo) -> bool:
+    """Return True when info describes audio this module can decode."""
+
+    if np is None or info.channels < 1 or info.block_align <= 0:
+        return False
+    if info.is_pcm:
+        return info.bits_per_sample in (8, 16, 24, 32)
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        return info.bits_per_sample == 32
+    return False
+
+
+def _decode_mono(mm: mmap.mmap, info: WavInfo, first: int, last: int) -> "np.ndarray":
+    """Decode frames [first, last) to a mono float32 array in [-1, 1]."""
+
+    count = max(0, last - first) * info.channels
+    offset = info.data_offset + first * info.block_align
+    bits = info.bits_per_sample
+
+    if info.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        samples = np.frombuffer(mm, dtype="<f4", count=count, offset=offset).astype(
+            np.float32
+        )
+    elif bits == 8:
+        raw = np.frombuffer(mm, dtype=np.uint8, count=count, offset=offset)
+        samples = (raw.astype(np.float32) - 128.0) / 128.0
+    elif bits == 16:
+        raw = np.frombuffer(mm, dtype="<i2", count=count, offset=offset)
+        samples = raw.astype(np.float32) / 32768.0
+    elif bits == 24:
+        raw = np.frombuffer(mm, dtype=np.uint8, count=count * 3, offset=offset)
+        b = raw.reshape(-1, 3).astype(np.int32)
+        value = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        value = np.where(value & 0x800000, value - 0x1000000, value)
+        samples = value.astype(np.float32) / 8388608.0
+    else:
+        raw = np.frombuffer(mm, dtype="<i4", count=count, offset=offset)
+        samples = raw.astype(np.float32) / 2147483648.0
+
+    if info.channels == 1:
+        return samples
+    return samples.reshape(-1, info.channels).mean(axis=1, dtype=np.float32)
+
+
+@lru_cache(maxsize=8)
+def _lowpass_kernel(src_rate: int, dst_rate: int) -> "np.ndarray":
+    """Windowed-sinc anti-aliasing filter for decimating src_rate to dst_rate."""
+
+    ratio = src_rate / float(dst_rate)
+    if ratio <= 1.0:
+        return np.ones(1, dtype=np.float32)
+    half = int(math.ceil(_TAPS_PER_RATIO * ratio / 2.0))
+    n = np.arange(-half, half + 1, dtype=np.float64)
+    # Cut off slightly below the target Nyquist frequency.
+    cutoff = 0.5 / ratio * 0.9
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(len(n))
+    kernel /= kernel.sum()
+    return kernel.astype(np.float32)
+
+
+def _render(mm: mmap.mmap, info: WavInfo, first_out: int, last_out: int, rate: int):
+    """Return output samples [first_out, last_out) at rate as float32."""
+
+    total = info.num_frames
+    if last_out <= first_out:
+        return np.zeros(0, dtype=np.float32)
+
+    if info.sample_rate == rate:
+        first = min(first_out, total)
+        last = min(last_out, total)
+        return _decode_mono(mm, info, first, last)
+
+    ratio = info.sample_rate / float(rate)
+    kernel = _lowpass_kernel(info.sample_rate, rate)
+    half = len(kernel) // 2
+
+    pos = np.arange(first_out, last_out, dtype=np.float64) * ratio
+    base = np.floor(pos).astype(np.int64)
+    frac = (pos - base).astype(np.float32)
+
+    # Read the source span needed by the filter, zero-padding past the
+    # ends of the file.
+    src_first = int(base[0]) - half
+    src_last = int(base[-1]) + 2 + half
+    read_first = max(0, src_first)
+    read_last = min(total, src_last)
+    x = np.zeros(src_last - src_first, dtype=np.float32)
+    if read_last > read_first:
+        x[read_first - src_first : read_last - src_first] = _decode_mono(
+            mm, info, read_first, read_last
+        )
+
+    idx = base - src_first
+
+    def filtered(at: "np.ndarray") -> "np.ndarray":
+        # Evaluate the FIR only at the output positions (polyphase style)
+        # instead of convolving the whole input.
+        acc = np.zeros(len(at), dtype=np.float32)
+        for tap, weight in enumerate(kernel):
+            acc += weight * x[at + (tap - half)]
+        return acc
+
+    y0 = filtered(idx)
+    if not frac.any():
+        return y0
+    y1 = filtered(idx + 1)
+    return y0 + (y1 - y0) * frac
+
+
+def _to_pcm16(samples: "np.ndarray") -> bytes:
+    clipped = np.clip(samples * 32768.0, -32768.0, 32767.0)
+    return np.round(clipped).astype("<i2").tobytes()
+
+
+def _output_length(info: WavInfo, rate: int) -> int:
+    return int(math.floor(info.num_frames * rate / float(info.sample_rate)))
+
+
+def read_mono_segment(
+    path: Union[str, Path],
+    start: float,
+    end: float,
+    rate: int = 16000,
+    info: Optional[WavInfo] = None,
+) -> bytes:
+    """Return [start, end) of a WAV as mono 16-bit PCM at rate (no header)."""
+
+    if end <= start:
+        raise ValueError("end must be greater than start")
+
+    path = Path(path)
+    info = info or read_wav_info(path)
+    if not can_convert(info):
+        raise PcmConversionError("Unsupported WAV encoding for native slicing")
+
+    length = _output_length(info, rate)
+    first_out = max(0, int(round(max(0.0, float(start)) * rate)))
+    last_out = min(length, int(round(float(end) * rate)))
+    if last_out <= first_out:
+        return b""
+
+    with path.open("rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        return _to_pcm16(_render(mm, info, first_out, last_out, rate))
+
+
+def slice_wav_mono(
+    path: Union[str, Path], start: float, end: float, rate: int = 16000
+) -> bytes:
+    """Return [start, end) of a WAV as a standalone mono 16-bit WAV file."""
+
+    pcm = read_mono_segment(path, start, end, rate)
+    return build_wav_header(len(pcm), rate) + pcm
+
+
+def convert_to_mono(
+    path: Union[str, Path], out: BinaryIO, rate: int = 16000
+) -> int:
+    """Write the whole recording to out as a mono 16-bit WAV at rate.
+
+    Returns the number of samples written.
+    """
+
+    path = Path(path)
+    info = read_wav_info(path)
+    if not can_convert(info):
+        raise PcmConversionError("Unsupported WAV encoding for native conversion")
+
+    length = _output_length(info, rate)
+    out.write(build_wav_header(length * 2, rate))
+    if length == 0:
+        return 0
+
+    with path.open("rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        for first_out in range(0, length, _CONVERT_BLOCK_SAMPLES):
+            last_out = min(length, first_out + _CONVERT_BLOCK_SAMPLES)
+            out.write(_to_pcm16(_render(mm, info, first_out, last_out, rate)))
+    return length
@@ -0,0 +1,610 @@
+"""Post-recording processing pipeline.
+
+When a recording is stopped or uploaded, the expensive per-recording work
+(analysis proxy, VAD, waveform peaks, the speech-only rendition, a content
+fingerprint, moving cached segment transcripts to the current layout,
+migration to secondary storage and, optionally, queuing a transcription
+job) is queued as a small DAG of stages and executed by a
+bounded pool of background threads.
+By the time someone opens the recording, the results are already cached.
+
+Stage state lives in a SQLite table next to cache.db so the queue survives
+restarts: stages that were running when the process died are simply put back
+to pending on start-up. Each stage has its own concurrency limit and
+priority, and "heavy" stages are held back while a recording is in progress
+so they do not compete with arecord for CPU and I/O.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.analysis import get_analysis_proxy, get_waveform_peaks
+from app.core.app_config import load_app_config
+from app.core.cache import (
+    get_cache_entry,
+    migrate_legacy_segments,
+    record_full_fingerprint,
+)
+from app.core.config import settings
+from app.core.jobs import (
+    KIND_FULL,
+    KIND_SEQUENTIAL,
+    PRIORITY_AUTO,
+    transcription_queue,
+)
+from app.core.recording import manager as recording_manager
+from app.core.speech import (
+    SpeechRenditionError,
+    build_wav_rendition,
+    cached_rendition,
+    opus_available,
+    plan_speech_rendition,
+    stream_opus_rendition,
+)
+from app.core.storage import (
+    get_secondary_root,
+    migrate_recording,
+    resolve_recording_path,
+    scan_filesystem,
+)
+from app.core.vad import (
+    VadBusyError,
+    get_cached_vad_segments,
+    run_vad_segments,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+DB_FILENAME = "pipeline.db"
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS pipeline_stages (
+        recording_id TEXT NOT NULL,
+        stage TEXT NOT NULL,
+        status TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        not_before REAL NOT NULL DEFAULT 0,
+        error TEXT,
+        enqueued_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        PRIMARY KEY (recording_id, stage)
+    )
+"""
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+# A dependency failed, so this stage cannot run until the recording is
+# re-enqueued.
+STATUS_BLOCKED = "blocked"
+
+# Lower values run first. New recordings jump ahead of backfill work queued
+# for older recordings (e.g. from the recordings grid).
+PRIORITY_NEW = 0
+PRIORITY_BACKFILL = 10
+
+MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30.0
+BUSY_RETRY_SECONDS = 15.0
+IDLE_POLL_SECONDS = 5.0
+
+
+class PipelineError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of the processing DAG.
+
+    The handler receives the recording id and returns True when it did its
+    work or False when the stage does not apply (recorded as skipped).
+    """
+
+    name: str
+    handler: Callable[[str], bool]
+    depends_on: Tuple[str, ...] = ()
+    priority: int = 0
+    concurrency: int = 1
+    heavy: bool = False
+
+
+def _db_path() -> Path:
+    # Store alongside cache_db_path by default, but in a separate file.
+    base = Path(settings.cache_db_path).parent
+    base.mkdir(parents=True, exist_ok=True)
+    return base / DB_FILENAME
+
+
+def _get_connection() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(_db_path()))
+    conn.execute(CREATE_TABLE_SQL)
+    return conn
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _recording_path(recording_id: str) -> Path:
+    path = resolve_recording_path(recording_id)
+    if path is None:
+        # The index may not have caught up with a freshly written file yet.
+        scan_filesystem()
+        path = resolve_recording_path(recording_id)
+    if path is None:
+        raise PipelineError("Recording file is not accessible")
+    return path
+
+
+def _stage_index(recording_id: str) -> bool:
+    _recording_path(recording_id)
+    return True
+
+
+def _stage_analysis(recording_id: str) -> bool:
+    get_analysis_proxy(recording_id, _recording_path(recording_id))
+    return True
+
+
+def _stage_vad(recording_id: str) -> bool:
+    if get_cached_vad_segments(recording_id) is not None:
+        return True
+    cfg = load_app_config()
+    run_vad_segments(
+        _recording_path(recording_id),
+        vad_cfg=cfg.vad,
+        whisper_cfg=cfg.whisper,
+        low_priority=True,
+    )
+    return True
+
+
+def _stage_peaks(recording_id: str) -> bool:
+    get_waveform_peaks(recording_id, _recording_path(recording_id))
+    return True
+
+
+def _stage_speech(recording_id: str) -> bool:
+    segments = get_cached_vad_segments(recording_id)
+    if not segments:
+        return False
+    try:
+        plan = plan_speech_rendition(
+            recording_id, _recording_path(recording_id), segments
+        )
+    except SpeechRenditionError:
+        return False
+    if not opus_available():
+        build_wav_rendition(plan)
+    elif cached_rendition(plan, "opus") is None:
+        for _ in stream_opus_rendition(plan):
+            pass
+        if cached_rendition(plan, "opus") is None:
+            raise PipelineError("Failed to encode speech-only rendition")
+    return True
+
+
+def _stage_fingerprint(recording_id: str) -> bool:
+    # Hashed before migration, while the file is still on local storage.
+    _recording_path(recording_id)
+    return record_full_fingerprint(recording_id)
+
+
+def _stage_segments(recording_id: str) -> bool:
+    # Cached VAD-sequential transcripts in the pre-segments-table layout.
+    return migrate_legacy_segments(recording_id)
+
+
+def _stage_migrate(recording_id: str) -> bool:
+    if get_secondary_root() is None:
+        return False
+    if not migrate_recording(recording_id):
+        raise PipelineError("Failed to copy recording to secondary storage")
+    return True
+
+
+def _stage_transcribe(recording_id: str) -> bool:
+    cfg = load_app_config()
+    if not cfg.pipeline.auto_transcribe or not cfg.whisper.enabled:
+        return False
+
+    _recording_path(recording_id)
+    # Hand over to the transcription queue, which retries and resumes on
+    # its own; this stage only needs to make sure the job exists.
+    fmt = (cfg.whisper.response_format or "json").strip().lower()
+    if fmt == "vad_sequential":
+        transcription_queue.submit(
+            recording_id, KIND_SEQUENTIAL, "text", priority=PRIORITY_AUTO
+        )
+    elif get_cache_entry(recording_id, fmt) is None:
+        transcription_queue.submit(recording_id, KIND_FULL, fmt, priority=PRIORITY_AUTO)
+    return True
+
+
+DEFAULT_STAGES: Tuple[Stage, ...] = (
+    Stage("index", _stage_index, priority=0, concurrency=2),
+    Stage("analysis", _stage_analysis, ("index",), priority=1, heavy=True),
+    Stage("vad", _stage_vad, ("analysis",), priority=2, heavy=True),
+    Stage("peaks", _stage_peaks, ("analysis",), priority=3, heavy=True),
+    Stage("speech", _stage_speech, ("vad",), priority=4, heavy=True),
+    Stage("transcribe", _stage_transcribe, ("vad",), priority=5, heavy=True),
+    Stage("fingerprint", _stage_fingerprint, ("index",), priority=6, heavy=True),
+    Stage("segments", _stage_segments, ("index",), priority=7),
+    Stage(
+        "migrate",
+        _stage_migrate,
+        ("analysis", "peaks", "fingerprint"),
+        priority=8,
+    ),
+)
+
+
+class ProcessingPipeline:
+    def __init__(
+        self, stages: Sequence[Stage] = DEFAULT_STAGES, workers: Optional[int] = None
+    ) -> None:
+        self._stages: Dict[str, Stage] = {}
+        for stage in stages:
+            for dep in stage.depends_on:
+                # Declaring dependencies first keeps the DAG acyclic.
+                if dep not in self._stages:
+                    raise ValueError(
+                        f"Stage {stage.name!r} depends on undeclared stage {dep!r}"
+                    )
+            self._stages[stage.name] = stage
+        self._workers = workers
+        self._cond = threading.Condition()
+        self._running: Dict[str, int] = {name: 0 for name in self._stages}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def _stage_priority(self, name: str) -> int:
+        stage = self._stages.get(name)
+        return stage.priority if stage is not None else 1 << 30
+
+    def start(self) -> None:
+        """Resume interrupted work and start the worker threads."""
+
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+
+        self.reset_interrupted()
+
+        count = self._workers or max(1, settings.pipeline_workers)
+        with self._cond:
+            for idx in range(count):
+                thread = threading.Thread(
+                    target=self._worker, name=f"pipeline-{idx}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+
+    def reset_interrupted(self) -> int:
+        """Put stages left running by a previous process back to pending."""
+
+        conn = _get_connection()
+        try:
+            cur = conn.execute(
+                "UPDATE pipeline_stages SET status = ?, updated_at = ? WHERE status = ?",
+                (STATUS_PENDING, _now_iso(), STATUS_RUNNING),
+            )
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._cond:
+            self._stopping = True
+            threads, self._threads = self._threads, []
+            self._cond.notify_all()
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def enqueue(
+        self,
+        recording_ids: Iterable[str],
+        priority: int = PRIORITY_NEW,
+        force: bool = False,
+    ) -> List[str]:
+        """Queue every stage for the given recordings.
+
+        Stages that already exist keep their state unless force is set; a
+        pending stage is promoted if the new priority is more urgent. Returns
+        the ids that were not previously known to the pipeline.
+        """
+
+        ids = list(dict.fromkeys(recording_ids))
+        if not ids:
+            return []
+
+        now = _now_iso()
+        added: List[str] = []
+        conn = _get_connection()
+        try:
+            for recording_id in ids:
+                known = conn.execute(
+                    "SELECT 1 FROM pipeline_stages WHERE recording_id = ? LIMIT 1",
+                    (recording_id,),
+                ).fetchone()
+                if known is None:
+                    added.append(recording_id)
+                for name in self._stages:
+                    if force:
+                        conn.execute(
+                            """
+                            INSERT INTO pipeline_stages (
+                                recording_id, stage, status, priority,
+                                attempts, not_before, error, enqueued_at, updated_at
+                            )
+                            VALUES (?, ?, ?, ?, 0, 0, NULL, ?, ?)
+                            ON CONFLICT(recording_id, stage) DO UPDATE SET
+                                status=excluded.status,
+                                priority=excluded.priority,
+                                attempts=0,
+                                not_before=0,
+                                error=NULL,
+                                enqueued_at=excluded.enqueued_at,
+                                updated_at=excluded.updated_at
+                            WHERE pipeline_stages.status != 'running'
+                            """,
+                            (recording_id, name, STATUS_PENDING, priority, now, now),
+                        )
+                    else:
+                        conn.execute(
+                            """
+                            INSERT INTO pipeline_stages (
+                                recording_id, stage, status, priority,
+                                attempts, not_before, error, enqueued_at, updated_at
+                            )
+                            VALUES (?, ?, ?, ?, 0, 0, NULL, ?, ?)
+                            ON CONFLICT(recording_id, stage) DO UPDATE SET
+                                priority=MIN(pipeline_stages.priority, excluded.priority)
+                            WHERE pipeline_stages.status = 'pending'
+                            """,
+                            (recording_id, name, STATUS_PENDING, priority, now, now),
+                        )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._cond:
+            self._cond.notify_all()
+        return added
+
+    def status(self, recording_id: str) -> List[dict]:
+        """Return per-stage state for a recording in declaration order."""
+
+        conn = _get_connection()
+        try:
+            rows = conn.execute(
+                """
+                SELECT stage, status, attempts, error, updated_at
+                FROM pipeline_stages
+                WHERE recording_id = ?
+                """,
+                (recording_id,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+        by_name = {row[0]: row for row in rows}
+        result: List[dict] = []
+        for name in self._stages:
+            row = by_name.get(name)
+            if row is None:
+                continue
+            result.append(
+                {
+                    "stage": name,
+                    "status": row[1],
+                    "attempts": row[2],
+                    "error": row[3],
+                    "updated_at": row[4],
+                }
+            )
+        return result
+
+    def remove(self, recording_id: str) -> None:
+        conn = _get_connection()
+        try:
+            conn.execute(
+                "DELETE FROM pipeline_stages WHERE recording_id = ? AND status != ?",
+                (recording_id, STATUS_RUNNING),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def run_pending(self) -> int:
+        """Run runnable stages in the calling thread until none are left.
+
+        Returns the number of stages executed. Mostly useful for tests and
+        maintenance scripts; the service relies on start().
+        """
+
+        executed = 0
+        while True:
+            claim = self._claim()
+            if claim is None:
+                return executed
+            self._execute(*claim)
+            executed += 1
+
+    def _worker(self) -> None:  # pragma: no cover - background thread
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+            try:
+                claim = self._claim()
+            except Exception:
+                logger.exception("Failed to claim pipeline work")
+                claim = None
+            if claim is None:
+                with self._cond:
+                    if not self._stopping:
+                        self._cond.wait(timeout=IDLE_POLL_SECONDS)
+                continue
+            self._execute(*claim)
+
+    def _claim(self) -> Optional[Tuple[str, Stage]]:
+        recording_active = recording_manager.current() is not None
+        now = time.time()
+
+        with self._cond:
+            conn = _get_connection()
+            try:
+                pending = conn.execute(
+                    """
+                    SELECT recording_id, stage, priority, enqueued_at
+                    FROM pipeline_stages
+                    WHERE status = ? AND not_before <= ?
+                    """,
+                    (STATUS_PENDING, now),
+                ).fetchall()
+                if not pending:
+                    return None
+
+                states: Dict[str, Dict[str, str]] = {}
+                for recording_id, stage, status in conn.execute(
+                    """
+                    SELECT recording_id, stage, status FROM pipeline_stages
+                    WHERE recording_id IN (
+                        SELECT recording_id FROM pipeline_stages WHERE status = ?
+                    )
+                    """,
+                    (STATUS_PENDING,),
+                ):
+                    states.setdefault(recording_id, {})[stage] = status
+
+                pending.sort(
+                    key=lambda row: (
+                        row[2],
+                        self._stage_priority(row[1]),
+                        row[3],
+                    )
+                )
+
+                for recording_id, name, _, _ in pending:
+                    stage = self._stages.get(name)
+                    if stage is None:
+                        continue
+                    recording_states = states.get(recording_id, {})
+                    dep_states = [
+                        recording_states.get(dep, STATUS_PENDING)
+                        for dep in stage.depends_on
+                    ]
+                    if any(s in (STATUS_FAILED, STATUS_BLOCKED) for s in dep_states):
+                        self._set_status(
+                            conn,
+                            recording_id,
+                            name,
+                            STATUS_BLOCKED,
+                            error="A required earlier stage failed",
+                        )
+                        recording_states[name] = STATUS_BLOCKED
+                        continue
+                    if any(s not in (STATUS_DONE, STATUS_SKIPPED) for s in dep_states):
+                        continue
+                    if stage.heavy and recording_active:
+                        continue
+                    if self._running[name] >= stage.concurrency:
+                        continue
+
+                    self._set_status(conn, recording_id, name, STATUS_RUNNING)
+                    self._running[name] += 1
+                    return recording_id, stage
+                return None
+            finally:
+                conn.commit()
+                conn.close()
+
+    def _execute(self, recording_id: str, stage: Stage) -> None:
+        attempts_delta = 1
+        not_before = 0.0
+        error: Optional[str] = None
+        try:
+            applied = stage.handler(recording_id)
+            status = STATUS_DONE if applied else STATUS_SKIPPED
+        except VadBusyError:
+            # Someone else (e.g. an interactive request) holds the VAD lock;
+            # try again shortly without counting it as a failure.
+            status = STATUS_PENDING
+            attempts_delta = 0
+            not_before = time.time() + BUSY_RETRY_SECONDS
+        except Exception as exc:
+            logger.warning(
+                "Pipeline stage %s failed for %s: %s", stage.name, recording_id, exc
+            )
+            status = STATUS_PENDING
+            error = str(exc) or exc.__class__.__name__
+            not_before = time.time()
+
+        conn = _get_connection()
+        try:
+            row = conn.execute(
+                "SELECT attempts FROM pipeline_stages WHERE recording_id = ? AND stage = ?",
+                (recording_id, stage.name),
+            ).fetchone()
+            attempts = (row[0] if row else 0) + attempts_delta
+            if error is not None:
+                if attempts >= MAX_ATTEMPTS:
+                    status = STATUS_FAILED
+                else:
+                    not_before += RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            self._set_status(
+                conn,
+                recording_id,
+                stage.name,
+                status,
+                error=error,
+                attempts=attempts,
+                not_before=not_before,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+            with self._cond:
+                self._running[stage.name] -= 1
+                self._cond.notify_all()
+
+    @staticmethod
+    def _set_status(
+        conn: sqlite3.Connection,
+        recording_id: str,
+        stage: str,
+        status: str,
+        error: Optional[str] = None,
+        attempts: Optional[int] = None,
+        not_before: Optional[float] = None,
+    ) -> None:
+        conn.execute(
+            """
+            UPDATE pipeline_stages
+            SET status = ?,
+                error = ?,
+                attempts = COALESCE(?, attempts),
+                not_before = COALESCE(?, not_before),
+                updated_at = ?
+            WHERE recording_id = ? AND stage = ?
+            """,
+            (status, error, attempts, not_before, _now_iso(), recording_id, stage),
+        )
+
+
+pipeline = ProcessingPipeline()
@@ -10,7 +10,15 @@ from pathlib import Path
 from typing import List, Optional
 
 from app.core.config import settings
-from app.core.storage import get_local_root, resolve_recording_path, scan_filesystem
+from app.core.events import TOPIC_RECORDING, events
+from app.core.storage import (
+    get_local_root,
+    mark_recording_removed,
+    mark_recording_renamed,
+    resolve_recording_path,
+    scan_filesystem,
+)
+from app.core.usage import local_usage
 
 
 class RecordingError(Exception):
@@ -112,12 +120,13 @@ def list_recordings() -> List[RecordingMetadata]:
     return items
 
 
-def get_recording(recording_id: str) -> Optional[RecordingMetadata]:
+def get_recording(recording_id: str, scan: bool = True) -> Optional[RecordingMetadata]:
     recording_id = _validate_recording_id(recording_id)
 
     # Refresh the storage index before resolving the path so that
     # recordings discovered on disk (local or secondary) are visible.
-    scan_filesystem()
+    if scan:
+        scan_filesystem()
 
     path = resolve_recording_path(recording_id)
     if path is None:
@@ -134,6 +143,8 @@ def delete_recording(recording_id: str) -> bool:
         os.remove(meta.path)
     except FileNotFoundError:
         return False
+    local_usage.discard(meta.path)
+    mark_recording_removed(meta.id, meta.path)
     return True
 
 
@@ -158,6 +169,9 @@ def rename_recording(recording_id: str, new_name: str) -> Optional[RecordingMeta
         meta.path.rename(new_path)
     except OSError as exc:
         raise RecordingError(f"Failed to rename recording: {exc}") from exc
+    local_usage.discard(meta.path)
+    local_usage.note(new_path)
+    mark_recording_renamed(meta.id, new_path)
 
     return _metadata_for_path(new_path)
 
@@ -190,6 +204,10 @@ def enforce_retention() -> None:
             path.unlink()
         except FileNotFoundError:
             continue
+        local_usage.discard(path)
+        recording_id = _parse_recording_id_from_name(path.name)
+        if recording_id:
+            mark_recording_removed(recording_id, path)
 
         current_hours = total_hours(paths)
         if current_hours <= settings.retention_hours:
@@ -285,9 +303,28 @@ class RecordingManager:
             self._process = process
             self._current = info
 
-            return info
+        # arecord also stops on its own (-d duration); report that as soon
+        # as it happens.
+        threading.Thread(
+            target=self._watch,
+            args=(process, info.path),
+            name="arecord-watch",
+            daemon=True,
+        ).start()
+        self.publish_state()
+        return info
 
     def stop(self) -> Optional[RecordingInfo]:
+        info = None
+        try:
+            info = self._stop()
+            return info
+        finally:
+            if info is not None:
+                local_usage.note(info.path)
+            self.publish_state()
+
+    def _stop(self) -> Optional[RecordingInfo]:
         with self._lock:
             if self._process is None or self._process.poll() is not None:
                 self._process = None
@@ -307,6 +344,24 @@ class RecordingManager:
             self._current = None
             return info
 
+    def _watch(self, process: subprocess.Popen, path: Path) -> None:
+        process.wait()
+        local_usage.note(path)
+        self.publish_state()
+
+    def publish_state(self) -> None:
+        """Publish whether a recording is running on the event bus."""
+
+        current = self.current()
+        events.publish(
+            TOPIC_RECORDING,
+            {
+                "active": current is not None,
+                "id": current.id if current else None,
+                "started_at": current.started_at.isoformat() if current else None,
+            },
+        )
+
     def current(self) -> Optional[RecordingInfo]:
         with self._lock:
             if self._process is not None and self._process.poll() is None:
@@ -0,0 +1,118 @@
+"""Keyed single-flight execution for expensive per-recording work.
+
+When two browser tabs (or the card grid and the transcription modal) ask for
+the VAD segments or the transcript of the same recording at the same time,
+only the first caller runs the computation; the others wait for it and get
+the same result, or the same exception. Nothing is cached once the call has
+finished: that is the job of the transcription cache. When the caller that
+runs the computation is cancelled (app.core.cancellation), the others do
+not inherit that: one of them starts the computation again. A waiter whose
+own token is cancelled stops waiting, and the computation carries on for
+the rest.
+
+Results are shared between callers and must be treated as read-only.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, TypeVar
+
+from app.core.cancellation import CancelToken, OperationCancelled
+
+
+T = TypeVar("T")
+
+# How often a waiter checks its own CancelToken while the leader runs.
+CANCEL_POLL_SECONDS = 0.1
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run at most one computation per key at a time."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, int] = {"executed": 0, "shared": 0}
+        _registry.append(self)
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        cancel: Optional[CancelToken] = None,
+    ) -> T:
+        """Return fn(), or the result of the in-flight call with the same key.
+
+        Raises OperationCancelled when cancel is cancelled while waiting for
+        another caller's computation; fn should observe cancel itself.
+        """
+
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._stats["executed"] += 1
+                else:
+                    call.waiters += 1
+                    self._stats["shared"] += 1
+            if leader:
+                break
+            self._wait(call, cancel)
+            if isinstance(call.error, OperationCancelled):
+                with self._lock:
+                    self._stats["shared"] -= 1
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def _wait(self, call: _Call, cancel: Optional[CancelToken]) -> None:
+        if cancel is None:
+            call.done.wait()
+            return
+        while not call.done.wait(CANCEL_POLL_SECONDS):
+            if cancel.cancelled:
+                with self._lock:
+                    call.waiters -= 1
+                    self._stats["shared"] -= 1
+                raise OperationCancelled()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            result = dict(self._stats)
+            result["in_flight"] = len(self._calls)
+            result["waiting"] = sum(call.waiters for call in self._calls.values())
+        return result
+
+
+_registry: List[SingleFlight] = []
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Counters of every SingleFlight, keyed by name.
+
+    "shared" is the number of duplicate computations that were avoided.
+    """
+
+    return {flight.name: flight.stats() for flight in _registry}
@@ -0,0 +1,283 @@
+"""Speech-only renditions of recordings.
+
+Listening to a long recording "without silence" used to mean downloading the
+whole WAV and skipping gaps in the browser. Instead, the VAD segments are cut
+out of the mono analysis proxy, concatenated, and (when ffmpeg is available)
+encoded to Opus. A time map relates every span of the rendition back to the
+original timestamps so the UI can keep its waveform and transcript in sync.
+
+Renditions are cached in the analysis directory next to the proxy, keyed by
+the segments they were built from, and are removed together with the proxy.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.analysis import (
+    ANALYSIS_SAMPLE_WIDTH,
+    AnalysisProxy,
+    get_analysis_dir,
+    get_analysis_proxy,
+    open_proxy_samples,
+)
+from app.core.wav import build_wav_header
+
+
+logger = logging.getLogger(__name__)
+
+
+# format -> (file extension, media type)
+SPEECH_FORMATS: Dict[str, Tuple[str, str]] = {
+    "wav": ("wav", "audio/wav"),
+    "opus": ("ogg", "audio/ogg"),
+}
+
+OPUS_BITRATE = "24k"
+
+_CHUNK_SAMPLES = 256 * 1024
+
+
+class SpeechRenditionError(Exception):
+    pass
+
+
+@dataclass
+class SpeechPlan:
+    recording_id: str
+    proxy: AnalysisProxy
+    # Sample ranges [first, last) of the proxy that make up the rendition.
+    spans: List[Tuple[int, int]]
+    key: str
+    time_map: List[dict] = field(default_factory=list)
+
+    @property
+    def num_samples(self) -> int:
+        return sum(last - first for first, last in self.spans)
+
+    @property
+    def duration_seconds(self) -> float:
+        return float(self.num_samples) / self.proxy.sample_rate
+
+
+def _merge_spans(segments: List[dict], rate: int, limit: int) -> List[Tuple[int, int]]:
+    spans: List[Tuple[int, int]] = []
+    for seg in sorted(segments, key=lambda s: float(s.get("start", 0.0))):
+        try:
+            first = max(0, int(round(float(seg["start"]) * rate)))
+            last = min(limit, int(round(float(seg["end"]) * rate)))
+        except (KeyError, TypeError, ValueError):
+            continue
+        if last <= first:
+            continue
+        # Padded VAD segments may overlap; merge them so no audio repeats.
+        if spans and first <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], last))
+        else:
+            spans.append((first, last))
+    return spans
+
+
+def plan_speech_rendition(
+    recording_id: str, source_path: Path, segments: List[dict]
+) -> SpeechPlan:
+    """Work out which samples go into the rendition and build its time map."""
+
+    proxy = get_analysis_proxy(recording_id, source_path)
+    rate = proxy.sample_rate
+    spans = _merge_spans(segments, rate, proxy.num_samples)
+    if not spans:
+        raise SpeechRenditionError("No speech segments fall inside this recording")
+
+    key_source = json.dumps(
+        {"spans": spans, "num_samples": proxy.num_samples}, separators=(",", ":")
+    )
+    key = hashlib.sha1(key_source.encode("utf-8")).hexdigest()[:16]
+
+    time_map: List[dict] = []
+    offset = 0
+    for first, last in spans:
+        length = last - first
+        time_map.append(
+            {
+                "start": round(offset / rate, 3),
+                "end": round((offset + length) / rate, 3),
+                "source_start": round(first / rate, 3),
+                "source_end": round(last / rate, 3),
+            }
+        )
+        offset += length
+
+    return SpeechPlan(
+        recording_id=recording_id,
+        proxy=proxy,
+        spans=spans,
+        key=key,
+        time_map=time_map,
+    )
+
+
+def opus_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def rendition_path(plan: SpeechPlan, fmt: str) -> Path:
+    ext, _ = SPEECH_FORMATS[fmt]
+    return get_analysis_dir() / f"{plan.recording_id}.speech-{plan.key}.{ext}"
+
+
+def cached_rendition(plan: SpeechPlan, fmt: str) -> Optional[Path]:
+    path = rendition_path(plan, fmt)
+    return path if path.is_file() else None
+
+
+def _replace_rendition(tmp_path: Path, plan: SpeechPlan, fmt: str) -> Path:
+    final_path = rendition_path(plan, fmt)
+    os.replace(tmp_path, final_path)
+    # Drop renditions built from older segment sets.
+    ext, _ = SPEECH_FORMATS[fmt]
+    for stale in final_path.parent.glob(f"{plan.recording_id}.speech-*.{ext}"):
+        if stale != final_path:
+            with contextlib.suppress(FileNotFoundError):
+                stale.unlink()
+    return final_path
+
+
+def iter_speech_pcm(plan: SpeechPlan) -> Iterator[bytes]:
+    """Yield the rendition's raw mono 16-bit PCM in bounded chunks."""
+
+    with open_proxy_samples(plan.proxy) as samples:
+        for first, last in plan.spans:
+            pos = first
+            while pos < last:
+                end = min(last, pos + _CHUNK_SAMPLES)
+                yield bytes(
+                    samples[pos * ANALYSIS_SAMPLE_WIDTH : end * ANALYSIS_SAMPLE_WIDTH]
+                )
+                pos = end
+
+
+def build_wav_rendition(plan: SpeechPlan) -> Path:
+    cached = cached_rendition(plan, "wav")
+    if cached is not None:
+        return cached
+
+    final_path = rendition_path(plan, "wav")
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = final_path.with_name(f"{final_path.name}.{threading.get_ident()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            f.write(
+                build_wav_header(
+                    plan.num_samples * ANALYSIS_SAMPLE_WIDTH, plan.proxy.sample_rate
+                )
+            )
+            for chunk in iter_speech_pcm(plan):
+                f.write(chunk)
+        return _replace_rendition(tmp_path, plan, "wav")
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            tmp_path.unlink()
+
+
+def stream_opus_rendition(plan: SpeechPlan) -> Iterator[bytes]:
+    """Encode the rendition with ffmpeg, yielding Ogg/Opus bytes as produced.
+
+    The output is written to the cache at the same time and only kept if the
+    encoder finishes successfully, so an interrupted download does not leave
+    a truncated rendition behind.
+    """
+
+    final_path = rendition_path(plan, "opus")
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(plan.proxy.sample_rate),
+        "-ac",
+        "1",
+        "-i",
+        "pipe:0",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        OPUS_BITRATE,
+        "-application",
+        "voip",
+        "-f",
+        "ogg",
+        "pipe:1",
+    ]
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError as exc:
+        raise SpeechRenditionError(f"Failed to start ffmpeg: {exc}") from exc
+
+    return _pump_encoder(plan, proc, final_path)
+
+
+def _pump_encoder(
+    plan: SpeechPlan, proc: subprocess.Popen, final_path: Path
+) -> Iterator[bytes]:
+    def feed() -> None:
+        try:
+            for chunk in iter_speech_pcm(plan):
+                proc.stdin.write(chunk)
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+        finally:
+            with contextlib.suppress(OSError):
+                proc.stdin.close()
+
+    writer = threading.Thread(target=feed, name="speech-encoder-feed", daemon=True)
+    writer.start()
+
+    tmp_path = final_path.with_name(f"{final_path.name}.{threading.get_ident()}.tmp")
+    completed = False
+    try:
+        with tmp_path.open("wb") as out:
+            while True:
+                chunk = proc.stdout.read(16 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+                yield chunk
+        completed = proc.wait() == 0
+        if completed:
+            _replace_rendition(tmp_path, plan, "opus")
+        else:
+            logger.warning(
+                "Opus encoding of speech rendition failed for %s", plan.recording_id
+            )
+    finally:
+        if proc.poll() is None:
+            with contextlib.suppress(Exception):
+                proc.kill()
+            with contextlib.suppress(Exception):
+                proc.wait(timeout=5)
+        writer.join(timeout=5)
+        with contextlib.suppress(Exception):
+            proc.stdout.close()
+        if not completed:
+            with contextlib.suppress(FileNotFoundError):
+                tmp_path.unlink()
@@ -1,15 +1,37 @@
 import os
 import shutil
-from pathlib import Path
+import threading
+import time
+from typing import Dict, Tuple
 
 from app.core.config import settings
-from app.core.storage import get_local_root
-from app.core.recording import list_recordings, manager as recording_manager
+from app.core.storage import get_local_root, scan_filesystem
+from app.core.recording import manager as recording_manager
+from app.core.usage import local_usage
 
 
-def _disk_free_bytes(path: str) -> int:
+# Free space changes slowly (at most by the recording rate); re-reading it
+# on every poll is not worth a statvfs() per request.
+DISK_USAGE_TTL_SECONDS = 2.0
+
+_disk_lock = threading.Lock()
+_disk_usage: Dict[str, Tuple[float, int, int]] = {}
+
+
+def _disk_usage_bytes(path: str) -> Tuple[int, int]:
+    """(free, total) bytes of the filesystem holding path, cached briefly."""
+
+    now = time.monotonic()
+    with _disk_lock:
+        cached = _disk_usage.get(path)
+    if cached is not None and now - cached[0] < DISK_USAGE_TTL_SECONDS:
+        return cached[1], cached[2]
+
+    os.makedirs(path, exist_ok=True)
     usage = shutil.disk_usage(path)
-    return usage.free
+    with _disk_lock:
+        _disk_usage[path] = (now, usage.free, usage.total)
+    return usage.free, usage.total
 
 
 def _minutes_remaining(free_bytes: int) -> float:
@@ -22,11 +44,8 @@ def _minutes_remaining(free_bytes: int) -> float:
 
 def get_status() -> dict:
     recording_path = get_local_root()
-    recording_path.mkdir(parents=True, exist_ok=True)
 
-    free_bytes = _disk_free_bytes(str(recording_path))
-    usage = shutil.disk_usage(str(recording_path))
-    total_bytes = usage.total
+    free_bytes, total_bytes = _disk_usage_bytes(str(recording_path))
     minutes_remaining = _minutes_remaining(free_bytes)
 
     card_present = os.path.exists("/proc/asound/card1") or os.path.exists(
@@ -35,9 +54,19 @@ def get_status() -> dict:
 
     current = recording_manager.current()
 
-    recordings = list_recordings()
-    recordings_bytes = sum(r.size_bytes for r in recordings)
-    recordings_count = len(recordings)
+    # Kept up to date by the storage index and the recording manager; only
+    # the first call (or one after the local root changed) walks the tree.
+    if local_usage.root != recording_path:
+        scan_filesystem()
+    recordings_count, recordings_bytes = local_usage.totals()
+    if current is not None:
+        # The recording in progress grows between updates: use its size now.
+        tracked = local_usage.size(current.path)
+        try:
+            recordings_bytes += current.path.stat().st_size - (tracked or 0)
+            recordings_count += 1 if tracked is None else 0
+        except OSError:
+            pass
 
     return {
         "card_present": card_present,
@@ -2,12 +2,25 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import stat
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from app.core.config import settings
+from app.core.usage import local_usage
 
 
 DB_FILENAME = "storage.db"
@@ -25,6 +38,39 @@ CREATE_TABLE_SQL = """
 """
 
 
+# Bumped whenever the index or the files it describes change, so that HTTP
+# clients can revalidate recording listings cheaply (see index_revision()).
+_revision_lock = threading.Lock()
+_revision = 0
+_revision_changed_at = time.time()
+_scan_signature: Optional[Tuple[str, ...]] = None
+_scan_files: FrozenSet[Tuple[str, int, int]] = frozenset()
+_scanned_at = 0.0
+_scan_lock = threading.Lock()
+
+# Requests rescan the filesystem when the last scan is older than this.
+# Changes made through the app bump the revision as they happen, and the
+# background storage worker rescans every minute.
+SCAN_MAX_AGE_SECONDS = 10.0
+
+
+def _bump_revision() -> None:
+    global _revision, _revision_changed_at
+    with _revision_lock:
+        _revision += 1
+        _revision_changed_at = time.time()
+
+
+def index_revision() -> Tuple[int, float]:
+    """(counter, time of the last change) of the storage index.
+
+    The counter starts from zero in every process.
+    """
+
+    with _revision_lock:
+        return _revision, _revision_changed_at
+
+
 def _ensure_schema(conn: sqlite3.Connection) -> None:
     """Ensure the recording_storage table exists with the expected schema.
 
@@ -163,6 +209,33 @@ def get_secondary_root() -> Optional[Path]:
     return root
 
 
+def _is_mount_point(path: Path) -> bool:
+    # /proc/mounts never blocks, unlike stat() on a hung network share.
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            return any(
+                len(parts) >= 2 and parts[1] == str(path)
+                for parts in (line.split() for line in f)
+            )
+    except OSError:
+        return os.path.ismount(path)
+
+
+def secondary_storage_state() -> dict:
+    """Whether secondary storage is enabled, mounted and usable."""
+
+    raw = (settings.recordings_secondary_root or "").strip()
+    mounted = bool(settings.secondary_storage_enabled and raw) and _is_mount_point(
+        Path(raw)
+    )
+    return {
+        "enabled": settings.secondary_storage_enabled,
+        "root": raw,
+        "mounted": mounted,
+        "available": mounted and get_secondary_root() is not None,
+    }
+
+
 def ensure_recording_row(
     recording_id: str,
     relative_path: str,
@@ -201,6 +274,7 @@ def ensure_recording_row(
         conn.commit()
     finally:
         conn.close()
+    _bump_revision()
 
 
 def _row_to_state(row: sqlite3.Row) -> RecordingStorageState:
@@ -237,6 +311,38 @@ def get_storage_state(recording_id: str) -> Optional[RecordingStorageState]:
         conn.close()
 
 
+def get_storage_states(recording_ids: Iterable[str]) -> Dict[str, RecordingStorageState]:
+    """Like get_storage_state() for many recordings, over one connection.
+
+    Unknown ids are absent from the result.
+    """
+
+    ids = list(dict.fromkeys(recording_ids))
+    states: Dict[str, RecordingStorageState] = {}
+    if not ids:
+        return states
+    conn = _get_connection()
+    try:
+        # Stay well below SQLite's default limit on bound parameters.
+        for offset in range(0, len(ids), 500):
+            chunk = ids[offset : offset + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            cur = conn.execute(
+                f"""
+                SELECT recording_id, relative_path, exists_local, exists_secondary,
+                       keep_local, last_seen_local, last_seen_secondary
+                FROM recording_storage
+                WHERE recording_id IN ({placeholders})
+                """,
+                chunk,
+            )
+            for row in cur.fetchall():
+                states[row[0]] = _row_to_state(row)
+    finally:
+        conn.close()
+    return states
+
+
 def all_storage_states() -> List[RecordingStorageState]:
     conn = _get_connection()
     try:
@@ -257,32 +363,37 @@ def update_existence_flags(
     *,
     from_local_paths: Iterable[Path],
     from_secondary_paths: Iterable[Path],
+    stats: Optional[Mapping[Path, os.stat_result]] = None,
 ) -> None:
     """Update existence flags based on a full scan of both roots.
 
     The caller is responsible for providing *all* discovered WAV files from
-    each location as relative paths under their respective roots.
+    each location as relative paths under their respective roots. stats,
+    when given, holds the caller's stat() of those files; a file missing
+    from it is treated as gone.
     """
     local_root = get_local_root()
     secondary_root = get_secondary_root()
+    from_local_paths = list(from_local_paths)
+    from_secondary_paths = list(from_secondary_paths)
+    if stats is None:
+        stats = _stat_files(from_local_paths + from_secondary_paths)
+
+    def seen(root: Path, paths: List[Path]) -> Dict[str, datetime]:
+        found = {}
+        for p in paths:
+            st = stats.get(p)
+            if st is None or not stat.S_ISREG(st.st_mode):
+                continue
+            found[str(p.relative_to(root))] = datetime.fromtimestamp(
+                st.st_mtime, tz=timezone.utc
+            )
+        return found
 
-    local_rel = {
-        str(p.relative_to(local_root)): datetime.fromtimestamp(
-            p.stat().st_mtime, tz=timezone.utc
-        )
-        for p in from_local_paths
-        if p.is_file()
-    }
-
+    local_rel = seen(local_root, from_local_paths)
     secondary_rel = {}
     if secondary_root is not None:
-        for p in from_secondary_paths:
-            if not p.is_file():
-                continue
-            rel = str(p.relative_to(secondary_root))
-            secondary_rel[rel] = datetime.fromtimestamp(
-                p.stat().st_mtime, tz=timezone.utc
-            )
+        secondary_rel = seen(secondary_root, from_secondary_paths)
 
     conn = _get_connection()
     try:
@@ -360,31 +471,121 @@ def _parse_id_from_relative(rel: str) -> Optional[str]:
     return recording_id.lower()
 
 
+def _recording_files(root: Optional[Path]) -> List[Path]:
+    paths: List[Path] = []
+    if root is not None and root.exists():
+        for path in root.rglob("*.wav"):
+            if any(parent.name == "vad_segments" for parent in path.parents):
+                continue
+            paths.append(path)
+    return paths
+
+
+def _stat_files(paths: Iterable[Path]) -> Dict[Path, os.stat_result]:
+    stats: Dict[Path, os.stat_result] = {}
+    for path in paths:
+        try:
+            stats[path] = path.stat()
+        except OSError:
+            continue
+    return stats
+
+
+def _index_signature(local_root: Path, secondary_root: Optional[Path]) -> Tuple[str, ...]:
+    return (str(_db_path()), str(local_root), str(secondary_root))
+
+
+def refresh_index(max_age: Optional[float] = None) -> None:
+    """Run scan_filesystem() unless the last scan is recent enough.
+
+    A scan is recent when it finished less than max_age seconds ago
+    (default SCAN_MAX_AGE_SECONDS) over the same database and storage
+    roots. Concurrent callers share one scan.
+    """
+
+    limit = SCAN_MAX_AGE_SECONDS if max_age is None else max_age
+
+    def fresh() -> bool:
+        signature = _index_signature(get_local_root(), get_secondary_root())
+        with _revision_lock:
+            return (
+                _scan_signature == signature
+                and time.monotonic() - _scanned_at < limit
+            )
+
+    if fresh():
+        return
+    with _scan_lock:
+        if not fresh():
+            scan_filesystem()
+
+
 def scan_filesystem() -> None:
     """Scan both local and secondary storage and sync the database state.
 
     This is idempotent and safe to call periodically from a background task.
     """
-    local_root = get_local_root()
-    local_paths: List[Path] = []
-    if local_root.exists():
-        for path in local_root.rglob("*.wav"):
-            if any(parent.name == "vad_segments" for parent in path.parents):
-                continue
-            local_paths.append(path)
+    global _scan_signature, _scan_files, _scanned_at
 
+    local_root = get_local_root()
     secondary_root = get_secondary_root()
-    secondary_paths: List[Path] = []
-    if secondary_root is not None and secondary_root.exists():
-        for path in secondary_root.rglob("*.wav"):
-            if any(parent.name == "vad_segments" for parent in path.parents):
-                continue
-            secondary_paths.append(path)
-
+    local_paths = _recording_files(local_root)
+    secondary_paths = _recording_files(secondary_root)
+    # One stat() per file serves the database, the usage totals and the
+    # change check below.
+    local_stats = _stat_files(local_paths)
+    stats = dict(local_stats)
+    stats.update(_stat_files(secondary_paths))
     update_existence_flags(
         from_local_paths=local_paths,
         from_secondary_paths=secondary_paths,
+        stats=stats,
+    )
+
+    local_usage.reset(
+        local_root,
+        {
+            path: st.st_size
+            for path, st in local_stats.items()
+            if _parse_id_from_relative(path.name)
+        },
+    )
+
+    signature = _index_signature(local_root, secondary_root)
+    files = frozenset(
+        (str(path), st.st_size, st.st_mtime_ns) for path, st in stats.items()
     )
+    with _revision_lock:
+        changed = signature != _scan_signature or files != _scan_files
+        _scan_signature, _scan_files = signature, files
+        _scanned_at = time.monotonic()
+    if changed:
+        _bump_revision()
+
+
+def present_recording_ids() -> Optional[Set[str]]:
+    """Ids of recordings whose audio exists in local or secondary storage.
+
+    Returns None when a storage root is missing (e.g. secondary storage is
+    enabled but not mounted): its recordings cannot be told apart from
+    deleted ones then.
+    """
+    local_root = get_local_root()
+    if not local_root.is_dir():
+        return None
+    if settings.secondary_storage_enabled and get_secondary_root() is None:
+        return None
+    ids: Set[str] = set()
+    for path in _recording_files(local_root):
+        recording_id = _parse_id_from_relative(str(path.relative_to(local_root)))
+        if recording_id:
+            ids.add(recording_id)
+    secondary_root = get_secondary_root()
+    for path in _recording_files(secondary_root):
+        recording_id = _parse_id_from_relative(str(path.relative_to(secondary_root)))
+        if recording_id:
+            ids.add(recording_id)
+    return ids
 
 
 def resolve_recording_path(recording_id: str) -> Optional[Path]:
@@ -398,10 +599,31 @@ def resolve_recording_path(recording_id: str) -> Optional[Path]:
     state = get_storage_state(recording_id)
     if state is None:
         return None
+    return _accessible_path(state, get_local_root(), get_secondary_root())
+
+
+def resolve_recording_paths(recording_ids: Iterable[str]) -> Dict[str, Path]:
+    """resolve_recording_path() for many recordings with a single query.
 
+    Recordings without an accessible file are absent from the result.
+    """
+
+    states = get_storage_states(recording_ids)
+    if not states:
+        return {}
     local_root = get_local_root()
     secondary_root = get_secondary_root()
+    paths: Dict[str, Path] = {}
+    for recording_id, state in states.items():
+        path = _accessible_path(state, local_root, secondary_root)
+        if path is not None:
+            paths[recording_id] = path
+    return paths
+
 
+def _accessible_path(
+    state: RecordingStorageState, local_root: Path, secondary_root: Optional[Path]
+) -> Optional[Path]:
     if state.exists_local:
         local_path = local_root / state.relative_path
         if local_path.is_file() and os.access(local_path, os.R_OK):
@@ -415,16 +637,18 @@ def resolve_recording_path(recording_id: str) -> Optional[Path]:
     return None
 
 
-def list_unified_recordings() -> List[UnifiedRecording]:
+def list_unified_recordings(scan: bool = True) -> List[UnifiedRecording]:
     """Return a unified list of recordings across all storage locations.
 
     This consults the storage index (kept up to date by the scanner and
     migration worker) and derives per-recording metadata from whichever
-    concrete file is currently accessible.
+    concrete file is currently accessible. Pass scan=False when the caller
+    has just run scan_filesystem() itself.
     """
 
     # Best-effort sync before listing; also keeps existence flags fresh.
-    scan_filesystem()
+    if scan:
+        scan_filesystem()
 
     states = all_storage_states()
     items: List[UnifiedRecording] = []
@@ -455,9 +679,9 @@ def list_unified_recordings() -> List[UnifiedRecording]:
 
         if abs_path is not None:
             try:
-                stat = abs_path.stat()
-                size_bytes = stat.st_size
-                created_at = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                st = abs_path.stat()
+                size_bytes = st.st_size
+                created_at = datetime.fromtimestamp(st.st_mtime, tz=timezone.utc)
                 if bps > 0:
                     duration_seconds = float(size_bytes) / bps
             except OSError:
@@ -498,11 +722,71 @@ def update_keep_local(recording_id: str, keep_local: bool) -> Optional[Recording
         conn.commit()
     finally:
         conn.close()
+    _bump_revision()
 
     state.keep_local = keep_local
     return state
 
 
+def _root_and_relative(path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """("local" or "secondary", path relative to that root) for a file."""
+
+    for location, root in (
+        ("local", get_local_root()),
+        ("secondary", get_secondary_root()),
+    ):
+        if root is not None and root in path.parents:
+            return location, str(path.relative_to(root))
+    return None, None
+
+
+def mark_recording_renamed(recording_id: str, new_path: Path) -> None:
+    """Point the index at a recording file the app has just renamed."""
+
+    _, relative_path = _root_and_relative(new_path)
+    if relative_path is None:
+        return
+    conn = _get_connection()
+    try:
+        conn.execute(
+            "UPDATE recording_storage SET relative_path = ? WHERE recording_id = ?",
+            (relative_path, recording_id),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    _bump_revision()
+
+
+def mark_recording_removed(recording_id: str, path: Path) -> None:
+    """Record that the app has deleted one copy of a recording.
+
+    The row goes away once neither storage location holds the recording.
+    """
+
+    location, _ = _root_and_relative(path)
+    if location is None:
+        return
+    column = "exists_local" if location == "local" else "exists_secondary"
+    conn = _get_connection()
+    try:
+        conn.execute(
+            f"UPDATE recording_storage SET {column} = 0 WHERE recording_id = ?",
+            (recording_id,),
+        )
+        conn.execute(
+            """
+            DELETE FROM recording_storage
+            WHERE recording_id = ? AND exists_local = 0 AND exists_secondary = 0
+            """,
+            (recording_id,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    _bump_revision()
+
+
 def ensure_local_copy(recording_id: str) -> bool:
     state = get_storage_state(recording_id)
     if state is None:
@@ -538,6 +822,7 @@ def ensure_local_copy(recording_id: str) -> bool:
                 f_dst.write(chunk)
     except (FileNotFoundError, OSError):
         return False
+    local_usage.note(local_path)
 
     now = datetime.now(timezone.utc).isoformat()
     conn = _get_connection()
@@ -554,6 +839,7 @@ def ensure_local_copy(recording_id: str) -> bool:
         conn.commit()
     finally:
         conn.close()
+    _bump_revision()
 
     return True
 
@@ -587,75 +873,103 @@ def migrate_to_secondary() -> None:
         conn.close()
 
     for row in rows:
-        state = _row_to_state(row)
-        if not state.exists_local:
-            continue
+        _migrate_state(_row_to_state(row), local_root, secondary_root)
 
-        src = local_root / state.relative_path
-        dst = secondary_root / state.relative_path
 
-        try:
-            dst.parent.mkdir(parents=True, exist_ok=True)
-        except OSError:
-            continue
+def migrate_recording(recording_id: str) -> bool:
+    """Copy a single recording to secondary storage if it is available.
 
+    Returns False when secondary storage is disabled/unmounted, the recording
+    is unknown, or the copy did not succeed.
+    """
+    secondary_root = get_secondary_root()
+    if secondary_root is None:
+        return False
+
+    state = get_storage_state(recording_id)
+    if state is None:
+        return False
+
+    return _migrate_state(state, get_local_root(), secondary_root)
+
+
+def _migrate_state(
+    state: RecordingStorageState, local_root: Path, secondary_root: Path
+) -> bool:
+    if not state.exists_local:
+        return False
+
+    src = local_root / state.relative_path
+    dst = secondary_root / state.relative_path
+
+    try:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return False
+
+    try:
+        # Only copy if either the secondary file is missing or the
+        # local copy is newer.
+        should_copy = True
+        if dst.exists():
+            src_mtime = src.stat().st_mtime
+            dst_mtime = dst.stat().st_mtime
+            should_copy = src_mtime > dst_mtime
+
+        if should_copy:
+            # Use a simple buffered copy; file sizes are modest.
+            with src.open("rb") as f_src, dst.open("wb") as f_dst:
+                while True:
+                    chunk = f_src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    f_dst.write(chunk)
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return False
+
+    # After a successful copy, update DB and optionally remove local file.
+    now = datetime.now(timezone.utc).isoformat()
+    conn2 = _get_connection()
+    try:
+        conn2.execute(
+            """
+            UPDATE recording_storage
+            SET exists_secondary = 1,
+                last_seen_secondary = ?
+            WHERE recording_id = ?
+            """,
+            (now, state.recording_id),
+        )
+        conn2.commit()
+    finally:
+        conn2.close()
+    if should_copy or not state.exists_secondary:
+        _bump_revision()
+
+    if not state.keep_local:
         try:
-            # Only copy if either the secondary file is missing or the
-            # local copy is newer.
-            should_copy = True
-            if dst.exists():
-                src_mtime = src.stat().st_mtime
-                dst_mtime = dst.stat().st_mtime
-                should_copy = src_mtime > dst_mtime
-
-            if should_copy:
-                # Use a simple buffered copy; file sizes are modest.
-                with src.open("rb") as f_src, dst.open("wb") as f_dst:
-                    while True:
-                        chunk = f_src.read(1024 * 1024)
-                        if not chunk:
-                            break
-                        f_dst.write(chunk)
-        except FileNotFoundError:
-            continue
+            if src.exists():
+                src.unlink()
         except OSError:
-            continue
+            return True
+        local_usage.discard(src)
 
-        # After a successful copy, update DB and optionally remove local file.
-        now = datetime.now(timezone.utc).isoformat()
-        conn2 = _get_connection()
+        # Mark local as gone.
+        conn3 = _get_connection()
         try:
-            conn2.execute(
+            conn3.execute(
                 """
                 UPDATE recording_storage
-                SET exists_secondary = 1,
-                    last_seen_secondary = ?
+                SET exists_local = 0
                 WHERE recording_id = ?
                 """,
-                (now, state.recording_id),
+                (state.recording_id,),
             )
-            conn2.commit()
+            conn3.commit()
         finally:
-            conn2.close()
-
-        if not state.keep_local:
-            try:
-                if src.exists():
-                    src.unlink()
-            except OSError:
-                continue
+            conn3.close()
+        _bump_revision()
 
-            # Mark local as gone.
-            conn3 = _get_connection()
-            try:
-                conn3.execute(
-                    """
-                    UPDATE recording_storage
-                    SET exists_local = 0
-                    WHERE recording_id = ?
-                    """,
-                    (state.recording_id,),
-                )
-                conn3.commit()
-            finally:
-                conn3.close()
+    return True
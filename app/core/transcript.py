@@ -0,0 +1,222 @@
+"""Format-independent transcripts and the output formats rendered from them.
+
+A transcript is a plain, JSON-serialisable dict::
+
+    {
+        "text": "full text",
+        "duration": 12.3,          # seconds, or None when unknown
+        "timed": True,             # False when timings are only approximate
+        "segments": [
+            {"start": 0.0, "end": 2.1, "text": "...",
+             "words": [{"word": "...", "start": 0.0, "end": 0.4}, ...]},
+        ],
+    }
+
+Whisper is asked for verbose_json (segments with word timings), the result
+is stored once, and text/json/verbose_json/srt/vtt are rendered on demand,
+so switching output format never needs another inference.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+
+RENDER_FORMATS = ("text", "json", "verbose_json", "srt", "vtt")
+
+# What to ask the Whisper server for: the richest format it offers.
+REQUEST_FORMAT = "verbose_json"
+
+_CUE_TIME = re.compile(
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})\s*-->\s*"
+    r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})"
+)
+
+
+def _clean(text: Any) -> str:
+    return " ".join(str(text or "").split())
+
+
+def _seconds(value: Any, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _cue_seconds(h: Optional[str], m: str, s: str, ms: str) -> float:
+    return int(h or 0) * 3600 + int(m) * 60 + int(s) + int(ms.ljust(3, "0")) / 1000.0
+
+
+def _parse_cues(content: str) -> List[Dict[str, Any]]:
+    segments: List[Dict[str, Any]] = []
+    for block in re.split(r"\r?\n\s*\r?\n", content):
+        lines = block.strip().splitlines()
+        for i, line in enumerate(lines):
+            match = _CUE_TIME.search(line)
+            if match:
+                g = match.groups()
+                segments.append(
+                    {
+                        "start": _cue_seconds(*g[0:4]),
+                        "end": _cue_seconds(*g[4:8]),
+                        "text": _clean(" ".join(lines[i + 1 :])),
+                    }
+                )
+                break
+    return segments
+
+
+def _timed_segments(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    segments: List[Dict[str, Any]] = []
+    for seg in payload.get("segments") or []:
+        if not isinstance(seg, dict):
+            continue
+        item: Dict[str, Any] = {
+            "start": _seconds(seg.get("start")),
+            "end": _seconds(seg.get("end")),
+            "text": _clean(seg.get("text")),
+        }
+        words = [
+            {
+                "word": str(w.get("word") or "").strip(),
+                "start": _seconds(w.get("start")),
+                "end": _seconds(w.get("end")),
+            }
+            for w in seg.get("words") or []
+            if isinstance(w, dict) and str(w.get("word") or "").strip()
+        ]
+        if words:
+            item["words"] = words
+            if not item["text"]:
+                item["text"] = " ".join(w["word"] for w in words)
+        segments.append(item)
+    return segments
+
+
+def parse_whisper_output(
+    fmt: str, content: str, start: float = 0.0, end: Optional[float] = None
+) -> Dict[str, Any]:
+    """Build a transcript from a Whisper response of the given format.
+
+    The response covers [start, end) of the recording; its timings are
+    shifted by start. Responses without timings (text, plain json) become a
+    single segment spanning the whole range, marked as untimed.
+    """
+
+    fmt = (fmt or "").strip().lower()
+    text: Optional[str] = None
+    segments: List[Dict[str, Any]] = []
+    timed = False
+    duration = None if end is None else max(0.0, end - start)
+
+    if fmt in ("json", "verbose_json"):
+        try:
+            payload = json.loads(content)
+        except ValueError:
+            payload = None
+        if isinstance(payload, dict):
+            segments = _timed_segments(payload)
+            timed = bool(segments)
+            text = _clean(payload.get("text"))
+            if duration is None and payload.get("duration") is not None:
+                duration = _seconds(payload.get("duration"))
+        elif payload is None:
+            text = _clean(content)
+    elif fmt in ("srt", "vtt"):
+        segments = _parse_cues(content)
+        timed = bool(segments)
+    if text is None and not segments:
+        text = _clean(content)
+
+    if timed:
+        for seg in segments:
+            seg["start"] += start
+            seg["end"] += start
+            for word in seg.get("words", []):
+                word["start"] += start
+                word["end"] += start
+        if not text:
+            text = " ".join(s["text"] for s in segments if s["text"])
+    elif text:
+        segments = [
+            {"start": start, "end": start + (duration or 0.0), "text": text}
+        ]
+
+    return {
+        "text": text or "",
+        "duration": duration,
+        "timed": timed,
+        "segments": segments,
+    }
+
+
+def concat_transcripts(parts: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join transcripts of consecutive, non-overlapping parts of a recording."""
+
+    parts = list(parts)
+    segments: List[Dict[str, Any]] = []
+    for part in parts:
+        segments.extend(part.get("segments") or [])
+    return {
+        "text": " ".join(p["text"] for p in parts if p.get("text")),
+        "duration": None,
+        "timed": bool(parts) and all(p.get("timed") for p in parts),
+        "segments": segments,
+    }
+
+
+def sequential_transcript(segments: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Transcript of cached VAD-sequential segments (index/start/end/format/content)."""
+
+    return concat_transcripts(
+        parse_whisper_output(
+            s.get("format") or "text",
+            str(s.get("content") or ""),
+            _seconds(s.get("start")),
+            _seconds(s.get("end")),
+        )
+        for s in segments
+    )
+
+
+def _timestamp(seconds: float, sep: str) -> str:
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, rem = divmod(ms, 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def render_transcript(transcript: Dict[str, Any], fmt: str) -> str:
+    """Render a transcript as text, json, verbose_json, srt or vtt."""
+
+    fmt = (fmt or "").strip().lower()
+    text = transcript.get("text") or ""
+    segments = [s for s in transcript.get("segments") or [] if s.get("text")]
+
+    if fmt == "text":
+        return text
+    if fmt == "json":
+        # Same shape as the Whisper server's own json response.
+        return json.dumps({"text": text}, indent=2, ensure_ascii=False)
+    if fmt == "verbose_json":
+        payload: Dict[str, Any] = {"text": text}
+        if transcript.get("duration") is not None:
+            payload["duration"] = transcript["duration"]
+        payload["segments"] = [
+            dict(seg, id=idx) for idx, seg in enumerate(segments)
+        ]
+        return json.dumps(payload, indent=2, ensure_ascii=False)
+    if fmt in ("srt", "vtt"):
+        sep = "," if fmt == "srt" else "."
+        cues = []
+        for idx, seg in enumerate(segments):
+            timing = (
+                f"{_timestamp(seg['start'], sep)} --> {_timestamp(seg['end'], sep)}"
+            )
+            number = f"{idx + 1}\n" if fmt == "srt" else ""
+            cues.append(f"{number}{timing}\n{seg['text']}\n")
+        body = "\n".join(cues)
+        return "WEBVTT\n\n" + body if fmt == "vtt" else body
+    raise ValueError(f"Unsupported transcript format: {fmt}")
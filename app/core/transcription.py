@@ -0,0 +1,1360 @@
+"""Whisper transcription helpers shared by the API and background workers.
+
+Everything here raises WhisperError instead of HTTPException so the same
+code paths can be used from request handlers (which map the error to an HTTP
+response) and from the post-recording pipeline.
+"""
+
+import collections
+import io
+import json
+import logging
+import queue
+import subprocess
+import threading
+import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+from app.core.analysis import (
+    ANALYSIS_SAMPLE_RATE,
+    AnalysisError,
+    AnalysisProxy,
+    find_analysis_proxy,
+    get_analysis_proxy,
+    read_segment_wav,
+)
+from app.core.cache import (
+    aggregate_segment_text,
+    build_config_fingerprint,
+    delete_transcript_chunks,
+    delete_transcript_segments,
+    get_transcript,
+    get_transcript_chunks,
+    get_transcript_segments,
+    upsert_transcript,
+    upsert_transcript_chunk,
+    upsert_transcript_segment,
+)
+from app.core.cancellation import (
+    CancelToken,
+    OperationCancelled,
+    raise_if_cancelled,
+    run_process,
+)
+from app.core.config import settings
+from app.core.pcm import PcmConversionError, slice_wav_mono
+from app.core.singleflight import SingleFlight
+from app.core.transcript import (
+    RENDER_FORMATS,
+    REQUEST_FORMAT,
+    concat_transcripts,
+    parse_whisper_output,
+    render_transcript,
+)
+from app.core.vad import (
+    VadBusyError,
+    VadError,
+    get_cached_vad_segments,
+    iter_vad_segments,
+    recording_id_from_path,
+)
+from app.core.wav import WavFormatError, build_wav_header, read_wav_info
+from app.core.whisper_backends import NoBackendAvailable, backend_pool
+from app.core.whisper_client import whisper_client
+
+
+logger = logging.getLogger(__name__)
+
+
+class WhisperError(Exception):
+    """A transcription request failed; status_code mirrors the HTTP status."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _post_with_failover(
+    data: dict,
+    file_name: str,
+    file_obj,
+    audio_seconds: Optional[float],
+    cancel: Optional[CancelToken] = None,
+) -> httpx.Response:
+    """Send an /inference request, moving on to another backend on failure.
+
+    Unreachable backends, timeouts and 5xx answers are retried on the next
+    healthy backend; any other response is returned to the caller.
+    Cancelling cancel abandons the request and raises OperationCancelled.
+    """
+
+    try:
+        start_pos = file_obj.tell()
+    except (AttributeError, OSError):
+        start_pos = None
+
+    tried: Set[str] = set()
+    failure: Optional[WhisperError] = None
+    while True:
+        if failure is not None and start_pos is None:
+            # The upload cannot be replayed from an unseekable stream.
+            raise failure
+        raise_if_cancelled(cancel)
+        try:
+            backend = backend_pool.acquire(exclude=tried)
+        except NoBackendAvailable as exc:
+            if failure is not None:
+                raise failure
+            raise WhisperError(503, str(exc)) from exc
+
+        if tried:
+            file_obj.seek(start_pos)
+        tried.add(backend.url)
+
+        inference_url = f"{backend.url}/inference"
+        files = {"file": (file_name, file_obj, "audio/wav")}
+        started = time.perf_counter()
+        try:
+            response, _ = whisper_client.post(
+                inference_url, data=data, files=files, cancel=cancel
+            )
+        except OperationCancelled:
+            backend_pool.release(
+                backend, ok=True, elapsed=time.perf_counter() - started
+            )
+            raise
+        except httpx.TimeoutException as exc:
+            logger.error("Whisper API at %s timed out: %s", inference_url, exc)
+            backend_pool.release(
+                backend, ok=False, elapsed=time.perf_counter() - started, error="timeout"
+            )
+            failure = WhisperError(504, "Whisper transcription service timed out")
+            continue
+        except Exception as exc:  # pragma: no cover - network/service specific
+            logger.error("Failed to call Whisper API at %s: %s", inference_url, exc)
+            if isinstance(exc, httpx.ConnectError):
+                backend_pool.mark_down(backend)
+            backend_pool.release(
+                backend, ok=False, elapsed=time.perf_counter() - started, error=str(exc)
+            )
+            failure = WhisperError(502, "Failed to reach Whisper transcription service")
+            continue
+
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 500:
+            backend_pool.release(
+                backend,
+                ok=False,
+                elapsed=elapsed,
+                error=f"HTTP {response.status_code}",
+            )
+            failure = WhisperError(
+                502, f"Whisper transcription failed ({response.status_code})"
+            )
+            logger.warning(
+                "Whisper backend %s answered %s; trying another backend",
+                backend.url,
+                response.status_code,
+            )
+            continue
+
+        backend_pool.release(
+            backend, ok=True, elapsed=elapsed, audio_seconds=audio_seconds
+        )
+        return response
+
+
+def call_whisper_inference(
+    whisper_cfg: Any,
+    file_name: str,
+    file_obj,
+    response_format_override: Optional[str] = None,
+    audio_seconds: Optional[float] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[str, str]:
+    """POST one file to a Whisper server's /inference endpoint.
+
+    The request goes to the least busy configured backend over the shared
+    pooled client, failing over to the others if it cannot be served there.
+    audio_seconds, when known, feeds the per-backend throughput stats.
+    """
+
+    if not whisper_cfg.enabled:
+        raise WhisperError(400, "Whisper integration is disabled in configuration")
+
+    if not backend_pool.sync(whisper_cfg):
+        raise WhisperError(400, "Whisper API URL is not configured")
+
+    mode_raw = (response_format_override or whisper_cfg.response_format or "json")
+    mode = str(mode_raw).strip().lower()
+
+    # "vad_sequential" is a UI mode, not a Whisper response_format.
+    # When configured, fall back to a real format (json) for the server call.
+    if mode == "vad_sequential":
+        requested_fmt = "json"
+    else:
+        requested_fmt = mode
+
+    data = {
+        "response_format": requested_fmt,
+        "temperature": whisper_cfg.temperature,
+        "temperature_inc": whisper_cfg.temperature_inc,
+    }
+    if whisper_cfg.model_path:
+        data["model_path"] = whisper_cfg.model_path
+
+    response = _post_with_failover(
+        data, file_name, file_obj, audio_seconds, cancel=cancel
+    )
+
+    if response.status_code != 200:
+        # Try to surface any error details from the Whisper server
+        detail: str
+        try:
+            body = response.json()
+            detail = body.get("detail") or body.get("error") or response.text
+        except Exception:  # pragma: no cover - defensive
+            detail = response.text
+        logger.warning(
+            "Whisper transcription failed (%s): %s",
+            response.status_code,
+            detail,
+        )
+        raise WhisperError(
+            502, f"Whisper transcription failed ({response.status_code})"
+        )
+
+    fmt = requested_fmt
+    if fmt == "json":
+        try:
+            payload = response.json()
+        except Exception:  # pragma: no cover - defensive
+            payload = response.text
+        if isinstance(payload, (dict, list)):
+            text_content = json.dumps(payload, indent=2, ensure_ascii=False)
+        else:
+            text_content = str(payload)
+    else:
+        # For text, srt, vtt, etc. treat as plain text content.
+        text_content = response.text
+
+    return fmt, text_content
+
+
+def extract_segment_wav(
+    path: Path, start: float, end: float, cancel: Optional[CancelToken] = None
+) -> bytes:
+    if end <= start:
+        raise ValueError("end must be greater than start")
+
+    # Prefer an existing analysis proxy, then slice the PCM source natively;
+    # only build a proxy (or run ffmpeg) for encodings we cannot decode.
+    # None of the fast paths start a subprocess per segment.
+    recording_id = recording_id_from_path(path)
+    proxy = find_analysis_proxy(recording_id, path) if recording_id else None
+    if proxy is None:
+        try:
+            data = slice_wav_mono(path, start, end, ANALYSIS_SAMPLE_RATE)
+        except (PcmConversionError, OSError) as exc:
+            logger.debug("Native slicing unavailable for %s: %s", path.name, exc)
+        else:
+            if len(data) > 44:
+                return data
+            raise ValueError("Segment is outside the recording")
+
+    try:
+        data = _read_proxy_segment(recording_id, path, proxy, start, end)
+    except AnalysisError as exc:
+        logger.warning(
+            "Analysis proxy unavailable for %s; slicing with ffmpeg: %s",
+            path.name,
+            exc,
+        )
+        return _extract_segment_wav_ffmpeg(path, start, end, cancel=cancel)
+    if len(data) > 44:
+        return data
+    raise ValueError("Segment is outside the recording")
+
+
+def _read_proxy_segment(
+    recording_id: Optional[str],
+    path: Path,
+    proxy: Optional[AnalysisProxy],
+    start: float,
+    end: float,
+) -> bytes:
+    if recording_id is None:
+        raise AnalysisError("File name has no recording id")
+    if proxy is None:
+        proxy = get_analysis_proxy(recording_id, path)
+    try:
+        return read_segment_wav(proxy, start, end)
+    except FileNotFoundError:
+        # Evicted between being found and being opened: build it again.
+        pass
+    proxy = get_analysis_proxy(recording_id, path)
+    try:
+        return read_segment_wav(proxy, start, end)
+    except FileNotFoundError as exc:
+        raise AnalysisError(f"Analysis proxy disappeared: {exc}") from exc
+
+
+def _extract_segment_wav_ffmpeg(
+    path: Path, start: float, end: float, cancel: Optional[CancelToken] = None
+) -> bytes:
+    start_sec = max(0.0, float(start))
+    end_sec = float(end)
+
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-ss",
+        f"{start_sec:.3f}",
+        "-to",
+        f"{end_sec:.3f}",
+        "-i",
+        str(path),
+        "-acodec",
+        "pcm_s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(settings.sample_rate),
+        "-f",
+        "wav",
+        "-",
+    ]
+
+    try:
+        proc = run_process(
+            cmd,
+            cancel,
+            check=False,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as exc:  # pragma: no cover - environment specific
+        logger.error("ffmpeg not found while slicing segments")
+        raise RuntimeError("ffmpeg is required for VAD segment extraction") from exc
+    except OSError as exc:  # pragma: no cover - environment specific
+        logger.error("Failed to start ffmpeg for segment extraction: %s", exc)
+        raise RuntimeError("Failed to start ffmpeg for segment extraction") from exc
+
+    if proc.returncode != 0 or not proc.stdout:
+        logger.error(
+            "ffmpeg segment extraction failed (%s): %s",
+            proc.returncode,
+            proc.stderr.decode("utf-8", errors="ignore"),
+        )
+        raise RuntimeError("Failed to extract audio segment with ffmpeg")
+
+    return proc.stdout
+
+
+def debug_save_segment_wav(
+    recording_path: Path,
+    segment_index: Optional[int],
+    start: float,
+    end: float,
+    data: bytes,
+) -> None:
+    if not getattr(settings, "debug_vad_segments", False):
+        return
+
+    try:
+        out_dir = recording_path.parent / "vad_segments"
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        idx = segment_index if segment_index is not None and segment_index >= 0 else 0
+        fname = (
+            f"{recording_path.stem}_seg_{idx:03d}_"
+            f"{start:.2f}s_{end:.2f}s.wav"
+        )
+        out_path = out_dir / fname
+        out_path.write_bytes(data)
+        logger.info("Saved VAD debug segment to %s", out_path)
+    except Exception as exc:  # pragma: no cover - debug only
+        logger.warning("Failed to save VAD debug segment: %s", exc)
+
+
+# Identical segment requests in flight at the same time (e.g. the modal and
+# a queued job) share one Whisper call.
+segment_flight = SingleFlight("whisper_segment")
+
+
+def transcribe_segment(
+    recording_path: Path,
+    whisper_cfg: Any,
+    start: float,
+    end: float,
+    segment_index: Optional[int] = None,
+    response_format: Optional[str] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[str, str]:
+    """Slice [start, end) out of a recording and send it to Whisper.
+
+    Raises ValueError for an invalid or empty range, and OperationCancelled
+    when cancel is cancelled first.
+    """
+
+    config_hash, _ = build_config_fingerprint(whisper_cfg=whisper_cfg, vad_cfg=None)
+    key = (
+        str(recording_path),
+        round(start, 3),
+        round(end, 3),
+        str(response_format or whisper_cfg.response_format or "json").strip().lower(),
+        config_hash,
+    )
+    return segment_flight.do(
+        key,
+        lambda: _transcribe_segment(
+            recording_path,
+            whisper_cfg,
+            start,
+            end,
+            segment_index,
+            response_format,
+            cancel,
+        ),
+        cancel,
+    )
+
+
+def _transcribe_segment(
+    recording_path: Path,
+    whisper_cfg: Any,
+    start: float,
+    end: float,
+    segment_index: Optional[int],
+    response_format: Optional[str],
+    cancel: Optional[CancelToken],
+) -> Tuple[str, str]:
+    segment_bytes = extract_segment_wav(recording_path, start, end, cancel=cancel)
+
+    debug_save_segment_wav(
+        recording_path=recording_path,
+        segment_index=segment_index,
+        start=start,
+        end=end,
+        data=segment_bytes,
+    )
+
+    if segment_index is not None and segment_index >= 0:
+        file_name = f"segment_{segment_index:03d}.wav"
+    else:
+        file_name = recording_path.name
+
+    return call_whisper_inference(
+        whisper_cfg=whisper_cfg,
+        file_name=file_name,
+        file_obj=io.BytesIO(segment_bytes),
+        response_format_override=response_format,
+        audio_seconds=end - start,
+        cancel=cancel,
+    )
+
+
+# Response formats whose per-segment content can be rebuilt from a packed
+# request's timestamps. srt/vtt and verbose_json carry timings relative to
+# the request, so those segments are always sent on their own.
+PACKABLE_FORMATS = ("text", "json")
+
+
+class _PackingUnsupported(Exception):
+    pass
+
+
+def _wav_frames(data: bytes) -> Tuple[int, bytes]:
+    with wave.open(io.BytesIO(data), "rb") as w:
+        if w.getnchannels() != 1 or w.getsampwidth() != 2:
+            raise _PackingUnsupported("Segment audio is not mono 16-bit")
+        return w.getframerate(), w.readframes(w.getnframes())
+
+
+def build_packed_wav(
+    recording_path: Path,
+    spans: List[Tuple[int, float, float]],
+    gap_seconds: float,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[bytes, List[Tuple[int, float, float]]]:
+    """Concatenate segments, separated by silence, into one mono WAV.
+
+    Returns the WAV and, for every segment that lies inside the recording,
+    (index, start, end) of where it ended up in the packed audio.
+    """
+
+    rate = 0
+    pcm = bytearray()
+    layout: List[Tuple[int, float, float]] = []
+    for index, start, end in spans:
+        try:
+            data = extract_segment_wav(recording_path, start, end, cancel=cancel)
+        except ValueError:
+            continue
+        seg_rate, frames = _wav_frames(data)
+        if rate and seg_rate != rate:
+            raise _PackingUnsupported("Segments have different sample rates")
+        rate = seg_rate
+        if pcm:
+            pcm.extend(b"\x00\x00" * int(round(gap_seconds * rate)))
+        offset = len(pcm) / 2.0 / rate
+        pcm.extend(frames)
+        layout.append((index, offset, len(pcm) / 2.0 / rate))
+    if not layout:
+        return b"", layout
+    return build_wav_header(len(pcm), rate) + bytes(pcm), layout
+
+
+def _split_packed_response(
+    payload: Any, layout: List[Tuple[int, float, float]]
+) -> Dict[int, str]:
+    """Assign the words of a verbose_json response to segments.
+
+    Each word goes to the packed segment nearest its midpoint. Whisper
+    segments span several packed segments, so a response without word
+    timings cannot be split and raises _PackingUnsupported. Segments no
+    word was assigned to get "".
+    """
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("segments"), list):
+        raise _PackingUnsupported("Response has no timed segments")
+
+    pieces: List[Tuple[float, str]] = []
+    for seg in payload["segments"]:
+        if not isinstance(seg, dict):
+            continue
+        words = seg.get("words")
+        if not isinstance(words, list) or not words:
+            if str(seg.get("text") or "").strip():
+                raise _PackingUnsupported("Response has no word timings")
+            continue
+        for word in words:
+            text = str(word.get("word") or "")
+            mid = (float(word.get("start", 0)) + float(word.get("end", 0))) / 2
+            pieces.append((mid, text))
+
+    parts: Dict[int, List[str]] = {index: [] for index, _, _ in layout}
+    for mid, text in pieces:
+        index = min(
+            layout, key=lambda item: max(item[1] - mid, 0.0, mid - item[2])
+        )[0]
+        parts[index].append(text)
+
+    texts: Dict[int, str] = {}
+    for index, items in parts.items():
+        # Word tokens usually carry their own leading space.
+        if any(text.startswith(" ") for text in items):
+            joined = "".join(items)
+        else:
+            joined = " ".join(items)
+        texts[index] = " ".join(joined.split())
+    return texts
+
+
+def _format_packed_text(text: str, fmt: str) -> str:
+    if fmt == "json":
+        # Same shape as the Whisper server's own json response.
+        return json.dumps({"text": text}, indent=2, ensure_ascii=False)
+    return text
+
+
+def transcribe_packed_segments(
+    recording_path: Path,
+    whisper_cfg: Any,
+    spans: List[Tuple[int, float, float]],
+    response_format: str = "text",
+    gap_seconds: float = 0.5,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[int, Tuple[str, str]]:
+    """Transcribe several segments with as few Whisper requests as possible.
+
+    The segments are packed into one request and the returned word
+    timestamps are mapped back onto them. A single segment, or a server
+    that does not return word timestamps, falls back to one request per
+    segment; so does every packed segment no word was assigned to, as its
+    text may have gone to a neighbour. Segments outside the recording are
+    left out of the result.
+    """
+
+    fmt = (response_format or "text").strip().lower()
+    results: Dict[int, Tuple[str, str]] = {}
+    remaining = spans
+    if len(spans) > 1 and fmt in PACKABLE_FORMATS:
+        try:
+            data, layout = build_packed_wav(
+                recording_path, spans, gap_seconds, cancel=cancel
+            )
+            if not layout:
+                return {}
+            _, raw = call_whisper_inference(
+                whisper_cfg=whisper_cfg,
+                file_name=f"segments_{spans[0][0]:03d}-{spans[-1][0]:03d}.wav",
+                file_obj=io.BytesIO(data),
+                response_format_override="verbose_json",
+                audio_seconds=sum(end - start for _, start, end in layout),
+                cancel=cancel,
+            )
+            try:
+                payload = json.loads(raw)
+            except ValueError as exc:
+                raise _PackingUnsupported("Response is not JSON") from exc
+            texts = _split_packed_response(payload, layout)
+            # Empty text from a split is never taken (and cached) as a
+            # segment's transcript.
+            results = {
+                index: (fmt, _format_packed_text(text, fmt))
+                for index, text in texts.items()
+                if text
+            }
+            remaining = [span for span in spans if texts.get(span[0]) == ""]
+        except _PackingUnsupported as exc:
+            logger.info(
+                "Packed transcription unavailable for %s (%s); sending segments "
+                "one by one",
+                recording_path.name,
+                exc,
+            )
+
+    for index, start, end in remaining:
+        try:
+            results[index] = transcribe_segment(
+                recording_path,
+                whisper_cfg,
+                start,
+                end,
+                segment_index=index,
+                response_format=response_format,
+                cancel=cancel,
+            )
+        except ValueError:
+            # Segment falls outside the audio (e.g. padded past the end).
+            continue
+    return results
+
+
+def _cached_sequential_segments(
+    recording_id: str, config_hash: Optional[str] = None
+) -> List[dict]:
+    return get_transcript_segments(recording_id, config_hash=config_hash)
+
+
+def store_sequential_segment(
+    recording_id: str, whisper_cfg: Any, vad_cfg: Any, entry: dict
+) -> None:
+    """Store one VAD-sequential segment transcript in the cache."""
+
+    config_hash, config_json = build_config_fingerprint(
+        whisper_cfg=whisper_cfg, vad_cfg=vad_cfg
+    )
+    upsert_transcript_segment(recording_id, config_hash, config_json, entry)
+
+
+# Words at the end of one window / start of the next that are compared
+# when removing the text both windows transcribed.
+_STITCH_WINDOW_WORDS = 60
+_STITCH_MIN_MATCH = 2
+
+
+def plan_chunks(
+    duration: float, chunk_seconds: float, overlap_seconds: float
+) -> List[Tuple[float, float]]:
+    """Split [0, duration) into windows of chunk_seconds overlapping by overlap."""
+
+    if chunk_seconds <= 0 or duration <= chunk_seconds + overlap_seconds:
+        return [(0.0, duration)]
+    overlap = min(overlap_seconds, chunk_seconds / 2.0)
+    step = chunk_seconds - overlap
+    windows: List[Tuple[float, float]] = []
+    start = 0.0
+    while True:
+        end = min(duration, start + chunk_seconds)
+        # Fold a short remainder into the last window.
+        if duration - end <= overlap + 1.0:
+            windows.append((start, duration))
+            return windows
+        windows.append((start, end))
+        start += step
+
+
+def _stitch_word(word: str) -> str:
+    return "".join(ch for ch in word.lower() if ch.isalnum())
+
+
+def stitch_overlapping_text(left: str, right: str) -> str:
+    """Join the transcripts of two overlapping windows.
+
+    The overlap is transcribed twice. The longest run of words that the
+    end of left and the start of right have in common (ignoring case and
+    punctuation) is kept once; left is cut after it and right resumes
+    after it. Without such a run the texts are simply concatenated.
+    """
+
+    a = left.split()
+    b = right.split()
+    if not a or not b:
+        return " ".join(a + b)
+    tail_offset = max(0, len(a) - _STITCH_WINDOW_WORDS)
+    tail = [_stitch_word(w) for w in a[tail_offset:]]
+    head = [_stitch_word(w) for w in b[:_STITCH_WINDOW_WORDS]]
+
+    best_len, best_i, best_j = 0, 0, 0
+    previous = [0] * (len(head) + 1)
+    for i in range(1, len(tail) + 1):
+        current = [0] * (len(head) + 1)
+        for j in range(1, len(head) + 1):
+            if tail[i - 1] and tail[i - 1] == head[j - 1]:
+                current[j] = previous[j - 1] + 1
+                if current[j] > best_len:
+                    best_len, best_i, best_j = current[j], i, j
+        previous = current
+
+    if best_len < _STITCH_MIN_MATCH:
+        return " ".join(a + b)
+    return " ".join(a[: tail_offset + best_i] + b[best_j:])
+
+
+def _stitch_windows(
+    parts: List[Dict[str, Any]], windows: List[Tuple[float, float]]
+) -> Dict[str, Any]:
+    """Merge the transcripts of overlapping windows into one.
+
+    With timings, each overlap is split at its middle and every segment is
+    kept from the window whose side of the split its midpoint falls on.
+    Without them the texts are stitched by their common words.
+    """
+
+    duration = windows[-1][1]
+    if not all(part["timed"] for part in parts):
+        text = ""
+        for idx, part in enumerate(parts):
+            text = stitch_overlapping_text(text, part["text"]) if idx else part["text"]
+        text = text.strip()
+        return {
+            "text": text,
+            "duration": duration,
+            "timed": False,
+            "segments": [{"start": 0.0, "end": duration, "text": text}] if text else [],
+        }
+
+    kept: List[Dict[str, Any]] = []
+    for idx, part in enumerate(parts):
+        low = (windows[idx - 1][1] + windows[idx][0]) / 2 if idx else float("-inf")
+        high = (
+            (windows[idx][1] + windows[idx + 1][0]) / 2
+            if idx + 1 < len(windows)
+            else float("inf")
+        )
+        segments = [
+            seg
+            for seg in part["segments"]
+            if low <= (seg["start"] + seg["end"]) / 2 < high
+        ]
+        kept.append(
+            {
+                "text": " ".join(seg["text"] for seg in segments if seg["text"]),
+                "timed": True,
+                "segments": segments,
+            }
+        )
+    merged = concat_transcripts(kept)
+    merged["duration"] = duration
+    return merged
+
+
+def _transcribe_chunked(
+    recording_id: str,
+    recording_path: Path,
+    whisper_cfg: Any,
+    windows: List[Tuple[float, float]],
+    config_hash: str,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Dict[str, Any]:
+    cached = get_transcript_chunks(recording_id, REQUEST_FORMAT, config_hash)
+    parts: Dict[int, Dict[str, Any]] = {}
+    todo: List[int] = []
+    for idx, (start, end) in enumerate(windows):
+        key = (int(round(start * 1000)), int(round(end * 1000)))
+        if key in cached:
+            parts[idx] = parse_whisper_output(REQUEST_FORMAT, cached[key], start, end)
+        else:
+            todo.append(idx)
+
+    def report() -> None:
+        if on_progress is not None:
+            on_progress(len(parts), len(windows))
+
+    report()
+    if todo:
+        workers = min(len(todo), backend_pool.capacity(whisper_cfg))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="whisper-chunk"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    transcribe_segment,
+                    recording_path,
+                    whisper_cfg,
+                    windows[idx][0],
+                    windows[idx][1],
+                    segment_index=idx,
+                    response_format=REQUEST_FORMAT,
+                    cancel=cancel,
+                ): idx
+                for idx in todo
+            }
+
+            def store(future: Any) -> None:
+                idx = futures[future]
+                fmt, content = future.result()
+                start, end = windows[idx]
+                upsert_transcript_chunk(
+                    recording_id,
+                    REQUEST_FORMAT,
+                    config_hash,
+                    int(round(start * 1000)),
+                    int(round(end * 1000)),
+                    content,
+                )
+                parts[idx] = parse_whisper_output(fmt, content, start, end)
+                report()
+
+            try:
+                for future in as_completed(futures):
+                    store(future)
+            except OperationCancelled:
+                # Windows that finished before the cancel are kept for the
+                # next run.
+                for future in futures:
+                    if (
+                        futures[future] not in parts
+                        and future.done()
+                        and not future.cancelled()
+                        and future.exception() is None
+                    ):
+                        store(future)
+                raise
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    return _stitch_windows([parts[idx] for idx in range(len(windows))], windows)
+
+
+def transcribe_recording(
+    recording_id: str,
+    recording_path: Path,
+    whisper_cfg: Any,
+    response_format: Optional[str] = None,
+    force: bool = False,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Tuple[str, str]:
+    """Transcribe a whole recording without VAD and cache the result.
+
+    Whisper is asked for verbose_json and the structured transcript is
+    stored once (see app.core.transcript); the requested response_format is
+    rendered from it, and from the stored transcript on later calls unless
+    force is set, so other formats never need another inference.
+
+    Recordings longer than whisper_cfg.chunk_seconds are cut into windows
+    that overlap by chunk_overlap_seconds. The windows are transcribed in
+    parallel (across all configured backends), cached one by one so an
+    interrupted run resumes, and merged by splitting each overlap at its
+    middle (or, without timings, by dropping the words transcribed twice).
+    on_progress(done, total) reports finished windows. Cancelling cancel
+    abandons the requests in flight and raises OperationCancelled; windows
+    that already finished stay cached.
+    """
+
+    config_hash, config_json = build_config_fingerprint(
+        whisper_cfg=whisper_cfg, vad_cfg=None
+    )
+
+    mode = str(response_format or whisper_cfg.response_format or "json").strip().lower()
+    fmt = "json" if mode == "vad_sequential" else mode
+    if fmt not in RENDER_FORMATS:
+        raise WhisperError(400, f"Unsupported response format: {fmt}")
+
+    if force:
+        delete_transcript_chunks(recording_id)
+    else:
+        stored = get_transcript(recording_id)
+        if stored is not None and stored["config_hash"] == config_hash:
+            return fmt, render_transcript(stored["transcript"], fmt)
+
+    try:
+        duration = read_wav_info(recording_path).duration_seconds
+    except (WavFormatError, OSError):
+        duration = 0.0
+    windows: List[Tuple[float, float]] = []
+    if duration > 0:
+        windows = plan_chunks(
+            duration,
+            float(getattr(whisper_cfg, "chunk_seconds", 0.0) or 0.0),
+            float(getattr(whisper_cfg, "chunk_overlap_seconds", 0.0) or 0.0),
+        )
+
+    if len(windows) > 1:
+        transcript = _transcribe_chunked(
+            recording_id,
+            recording_path,
+            whisper_cfg,
+            windows,
+            config_hash,
+            on_progress=on_progress,
+            cancel=cancel,
+        )
+    else:
+        with open(recording_path, "rb") as f:
+            returned_fmt, content = call_whisper_inference(
+                whisper_cfg=whisper_cfg,
+                file_name=recording_path.name,
+                file_obj=f,
+                response_format_override=REQUEST_FORMAT,
+                audio_seconds=duration or None,
+                cancel=cancel,
+            )
+        transcript = parse_whisper_output(
+            returned_fmt, content, 0.0, duration if duration > 0 else None
+        )
+
+    upsert_transcript(recording_id, config_hash, config_json, transcript)
+    return fmt, render_transcript(transcript, fmt)
+
+
+def _same_span(entry: dict, start: float, end: float) -> bool:
+    try:
+        return (
+            abs(float(entry["start"]) - start) < 1e-3
+            and abs(float(entry["end"]) - end) < 1e-3
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def transcribe_recording_sequential(
+    recording_id: str,
+    recording_path: Path,
+    segments: Iterable[dict],
+    whisper_cfg: Any,
+    vad_cfg: Any,
+    response_format: str = "text",
+    force: bool = False,
+    on_segment: Optional[Callable[[dict], None]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> int:
+    """Transcribe VAD segments one by one, skipping those already cached.
+
+    segments may be a generator that is still producing (streamed VAD).
+    Each finished segment is written to the cache straight away, so an
+    interrupted run resumes where it stopped; force discards cached
+    transcripts instead. on_segment receives every segment entry in order,
+    with "cached" telling whether Whisper was called for it. Cancelling
+    cancel abandons the requests in flight and raises OperationCancelled;
+    segments whose transcripts already came back are still cached.
+
+    Returns the number of segments sent to Whisper.
+    """
+
+    config_hash, config_json = build_config_fingerprint(
+        whisper_cfg=whisper_cfg, vad_cfg=vad_cfg
+    )
+
+    # Transcripts made under another configuration are not reused.
+    merged: Dict[int, dict] = {}
+    if force:
+        delete_transcript_segments(recording_id)
+    else:
+        for entry in _cached_sequential_segments(recording_id, config_hash):
+            if isinstance(entry.get("index"), int) and entry.get("content") is not None:
+                merged[entry["index"]] = entry
+
+    # Segments are sent to as many backends in parallel as the
+    # configuration allows, but results are cached and reported strictly in
+    # segment order. Runs of adjacent uncached segments are packed into
+    # requests of up to pack_max_seconds of audio.
+    workers = backend_pool.capacity(whisper_cfg)
+    fmt_key = (response_format or "text").strip().lower()
+    pack_limit = float(getattr(whisper_cfg, "pack_max_seconds", 0.0) or 0.0)
+    if fmt_key not in PACKABLE_FORMATS:
+        pack_limit = 0.0
+    gap = max(0, int(getattr(whisper_cfg, "pack_gap_ms", 0) or 0)) / 1000.0
+    pending: "collections.deque[Tuple[int, float, float, Any]]" = collections.deque()
+    batch: List[Tuple[int, float, float]] = []
+    counts = {"seen": 0, "transcribed": 0}
+    stopped = False
+
+    def finish(index: int, start: float, end: float, outcome: Any) -> None:
+        if outcome is None:
+            previous = merged[index]
+            if on_segment is not None:
+                on_segment(dict(previous, cached=True))
+            return
+        result = outcome.result().get(index)
+        if result is None:
+            # Segment falls outside the audio (e.g. padded past the end).
+            if merged.pop(index, None) is not None:
+                delete_transcript_segments(recording_id, [index])
+            return
+        fmt, text_content = result
+        merged[index] = {
+            "index": index,
+            "start": start,
+            "end": end,
+            "format": fmt,
+            "content": text_content,
+        }
+        upsert_transcript_segment(recording_id, config_hash, config_json, merged[index])
+        counts["transcribed"] += 1
+        if on_segment is not None:
+            on_segment(dict(merged[index], cached=False))
+
+    def drain(block: bool) -> None:
+        while pending:
+            outcome = pending[0][3]
+            if outcome is not None and not outcome.done() and not block:
+                return
+            finish(*pending.popleft())
+
+    def packed_seconds(extra: float = 0.0) -> float:
+        audio = sum(end - start for _, start, end in batch) + extra
+        return audio + gap * max(0, len(batch) - (0 if extra else 1))
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="whisper-segment"
+    ) as executor:
+
+        def flush() -> None:
+            if not batch:
+                return
+            spans = list(batch)
+            batch.clear()
+            future = executor.submit(
+                transcribe_packed_segments,
+                recording_path,
+                whisper_cfg,
+                spans,
+                response_format=response_format,
+                gap_seconds=gap,
+                cancel=cancel,
+            )
+            for index, start, end in spans:
+                pending.append((index, start, end, future))
+
+        try:
+            for index, seg in enumerate(segments):
+                if cancel is not None and cancel.cancelled:
+                    stopped = True
+                    break
+                counts["seen"] = index + 1
+                start, end = float(seg["start"]), float(seg["end"])
+                previous = merged.get(index)
+                if previous is not None and _same_span(previous, start, end):
+                    # Packs only ever hold neighbouring segments.
+                    flush()
+                    pending.append((index, start, end, None))
+                else:
+                    if batch and packed_seconds(end - start) > pack_limit:
+                        flush()
+                    batch.append((index, start, end))
+                    if packed_seconds() >= pack_limit:
+                        flush()
+                drain(block=False)
+                # Keep a bounded number of requests in flight.
+                in_flight = {
+                    outcome
+                    for _, _, _, outcome in pending
+                    if outcome is not None and not outcome.done()
+                }
+                if len(in_flight) >= workers:
+                    wait(in_flight, return_when=FIRST_COMPLETED)
+                    drain(block=False)
+            if not stopped:
+                flush()
+            drain(block=True)
+        except OperationCancelled:
+            # Requests that came back before the cancel are still cached,
+            # even if an earlier segment's request was abandoned.
+            for index, start, end, outcome in list(pending):
+                if (
+                    outcome is not None
+                    and outcome.done()
+                    and not outcome.cancelled()
+                    and outcome.exception() is None
+                ):
+                    finish(index, start, end, outcome)
+            raise
+        finally:
+            for _, _, _, outcome in pending:
+                if outcome is not None:
+                    outcome.cancel()
+    if stopped:
+        raise OperationCancelled()
+
+    seen = counts["seen"]
+    transcribed = counts["transcribed"]
+
+    # Drop transcripts left over from an older, longer segmentation.
+    stale = [index for index in merged if index >= seen]
+    if stale:
+        for index in stale:
+            del merged[index]
+        delete_transcript_segments(recording_id, stale)
+    return transcribed
+
+
+class TranscriptionCancelled(OperationCancelled):
+    pass
+
+
+class SequentialTranscriptionJob:
+    """Live progress of a VAD-sequential transcription.
+
+    The durable job queue (app.core.jobs) decides when a transcription runs;
+    this object is the in-memory channel its progress is published on.
+    Events are kept in a list so any number of clients can follow the run
+    and a client that reconnects replays what it missed. Nobody has to be
+    listening: every finished segment is cached as it completes.
+
+    Events are dicts with a "type" of "vad_segment" (a segment was detected),
+    "segment" (a segment was transcribed or found in the cache), "done",
+    "error" or "cancelled".
+    """
+
+    def __init__(self, recording_id: str) -> None:
+        self.recording_id = recording_id
+        self.events: List[dict] = []
+        self.started = False
+        self.finished = False
+        self._cond = threading.Condition()
+        self._cancel = CancelToken()
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        with self._cond:
+            self._listeners.append(listener)
+
+    def _emit(self, event: dict) -> None:
+        with self._cond:
+            self.events.append(event)
+            listeners = list(self._listeners)
+            self._cond.notify_all()
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:  # pragma: no cover - defensive
+                logger.exception("Transcription progress listener failed")
+
+    def cancel(self) -> None:
+        """Stop now: VAD is killed and Whisper requests in flight abandoned.
+
+        Segments whose transcripts already came back stay cached.
+        """
+
+        self._cancel.cancel()
+        with self._cond:
+            idle = not self.started and not self.finished
+        if idle:
+            # Never picked up by a worker: nothing else will close the stream.
+            self._emit({"type": "cancelled"})
+            self._finish()
+
+    def _finish(self) -> None:
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+        with _jobs_lock:
+            if _jobs.get(self.recording_id) is self:
+                del _jobs[self.recording_id]
+
+    def _segments(
+        self, recording_path: Path, whisper_cfg: Any, vad_cfg: Any, force_vad: bool
+    ) -> Iterator[dict]:
+        if not force_vad:
+            cached = get_cached_vad_segments(self.recording_id)
+            if cached is not None:
+                for index, seg in enumerate(cached):
+                    self._emit(
+                        {
+                            "type": "vad_segment",
+                            "index": index,
+                            "start": seg["start"],
+                            "end": seg["end"],
+                        }
+                    )
+                return iter(cached)
+
+        source = iter_vad_segments(
+            recording_path,
+            vad_cfg=vad_cfg,
+            whisper_cfg=whisper_cfg,
+            force=force_vad,
+            cancel=self._cancel,
+        )
+        return self._prefetch(source)
+
+    def _prefetch(self, source: Iterator[dict]) -> Iterator[dict]:
+        # Drain the detector on its own thread so segments show up on the
+        # timeline as soon as they are found, not when Whisper gets to them.
+        items: "queue.Queue[Any]" = queue.Queue()
+        finished = object()
+
+        def pump() -> None:
+            try:
+                for index, seg in enumerate(source):
+                    self._emit(
+                        {
+                            "type": "vad_segment",
+                            "index": index,
+                            "start": seg["start"],
+                            "end": seg["end"],
+                        }
+                    )
+                    items.put(seg)
+            except BaseException as exc:  # re-raised on the job thread
+                items.put(exc)
+            else:
+                items.put(finished)
+
+        threading.Thread(
+            target=pump, name=f"vad-{self.recording_id[:8]}", daemon=True
+        ).start()
+
+        while True:
+            item = items.get()
+            if item is finished:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def run(
+        self,
+        recording_path: Path,
+        whisper_cfg: Any,
+        vad_cfg: Any,
+        response_format: str = "text",
+        force: bool = False,
+        force_vad: bool = False,
+    ) -> dict:
+        """Run the transcription in the calling thread.
+
+        Returns the final event, which is also published to followers.
+        """
+
+        with self._cond:
+            self.started = True
+        entries: List[dict] = []
+
+        def on_segment(entry: dict) -> None:
+            entries.append(entry)
+            self._emit(dict(entry, type="segment"))
+
+        final: dict
+        try:
+            transcribed = transcribe_recording_sequential(
+                self.recording_id,
+                recording_path,
+                self._segments(recording_path, whisper_cfg, vad_cfg, force_vad),
+                whisper_cfg,
+                vad_cfg,
+                response_format=response_format,
+                force=force,
+                on_segment=on_segment,
+                cancel=self._cancel,
+            )
+            if self._cancel.cancelled:
+                raise TranscriptionCancelled()
+            final = {
+                "type": "done",
+                "count": len(entries),
+                "transcribed": transcribed,
+                "content": aggregate_segment_text(entries),
+            }
+        except OperationCancelled:
+            final = {"type": "cancelled", "count": len(entries)}
+        except WhisperError as exc:
+            final = {
+                "type": "error",
+                "status_code": exc.status_code,
+                "detail": exc.detail,
+            }
+        except VadBusyError:
+            final = {
+                "type": "error",
+                "status_code": 503,
+                "detail": "VAD segmentation is currently busy; please retry later",
+            }
+        except VadError as exc:
+            final = {"type": "error", "status_code": 500, "detail": str(exc)}
+        except Exception:
+            logger.exception(
+                "Sequential transcription failed for %s", self.recording_id
+            )
+            final = {
+                "type": "error",
+                "status_code": 500,
+                "detail": "Error processing transcription segments",
+            }
+        try:
+            self._emit(final)
+        finally:
+            self._finish()
+        return final
+
+    def follow(self, after: int = 0, heartbeat: float = 15.0) -> Iterator[dict]:
+        """Yield events from index after onwards until the job finishes.
+
+        A {"type": "ping"} event is yielded when nothing happened for
+        heartbeat seconds, which lets streaming responses notice that their
+        client has gone away.
+        """
+
+        pos = max(0, after)
+        while True:
+            with self._cond:
+                if pos >= len(self.events) and not self.finished:
+                    self._cond.wait(timeout=heartbeat)
+                pending = self.events[pos:]
+                finished = self.finished
+            if not pending and not finished:
+                yield {"type": "ping"}
+                continue
+            for event in pending:
+                yield event
+            pos += len(pending)
+            if finished and pos >= len(self.events):
+                return
+
+
+_jobs: Dict[str, SequentialTranscriptionJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def attach_sequential_job(recording_id: str) -> SequentialTranscriptionJob:
+    """Return the live progress channel for a recording, creating it if needed.
+
+    There is at most one per recording; it is dropped once its run ends.
+    """
+
+    with _jobs_lock:
+        job = _jobs.get(recording_id)
+        if job is None:
+            job = SequentialTranscriptionJob(recording_id)
+            _jobs[recording_id] = job
+        return job
+
+
+def get_sequential_job(recording_id: str) -> Optional[SequentialTranscriptionJob]:
+    with _jobs_lock:
+        return _jobs.get(recording_id)
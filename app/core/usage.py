@@ -0,0 +1,76 @@
+"""Running totals of the recordings kept in local storage.
+
+GET /status reports how many recordings the local root holds and how many
+bytes they take. Walking and stat()ing the whole archive for that on every
+poll gets slower as the archive grows, so the totals are kept here instead:
+rebuilt from the walk scan_filesystem() does anyway, and updated in between
+by the code that creates, renames, copies or removes a local recording.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+
+class LocalUsage:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._root: Optional[Path] = None
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    @property
+    def root(self) -> Optional[Path]:
+        """The local root the totals were last rebuilt for, if any."""
+
+        with self._lock:
+            return self._root
+
+    def reset(self, root: Path, sizes_by_path: Mapping[Path, int]) -> None:
+        """Replace the totals with the recordings found by a full walk."""
+
+        sizes = {str(path): size for path, size in sizes_by_path.items()}
+        with self._lock:
+            self._root = root
+            self._sizes = sizes
+            self._bytes = sum(sizes.values())
+
+    def note(self, path: Path) -> None:
+        """Record that a local recording was written or changed size."""
+
+        size = _size(path)
+        if size is None:
+            self.discard(path)
+            return
+        with self._lock:
+            if self._root is None or self._root not in path.parents:
+                return
+            key = str(path)
+            self._bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+
+    def discard(self, path: Path) -> None:
+        """Record that a local recording was removed or moved away."""
+
+        with self._lock:
+            self._bytes -= self._sizes.pop(str(path), 0)
+
+    def totals(self) -> Tuple[int, int]:
+        """(count, bytes) of the local recordings."""
+
+        with self._lock:
+            return len(self._sizes), self._bytes
+
+    def size(self, path: Path) -> Optional[int]:
+        with self._lock:
+            return self._sizes.get(str(path))
+
+
+def _size(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return None
+
+
+local_usage = LocalUsage()
@@ -0,0 +1,500 @@
+"""Voice activity detection via the whisper.cpp ``vad-speech-segments`` tool.
+
+Only one VAD process may run at a time on the Pi, which is enforced with a
+PID lock file shared across API workers. Segments are parsed from the tool's
+stdout as they are printed so callers can start working on the first speech
+segment long before the whole recording has been analysed.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.analysis import AnalysisError, get_analysis_proxy
+from app.core.cache import (
+    build_config_fingerprint,
+    get_cache_entries,
+    get_cache_entry,
+    upsert_cache_entry,
+)
+from app.core.cancellation import CancelToken, OperationCancelled
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+
+VAD_LOCK_PATH = Path(os.getenv("RECORDER_VAD_LOCK_PATH", settings.cache_db_path + ".vad.lock"))
+
+VAD_CACHE_FORMAT = "vad_sequential"
+
+# Concurrent run_vad_segments() calls for one recording share a single run.
+vad_flight = SingleFlight("vad")
+
+_PATTERN_VAD = re.compile(
+    r"VAD segment\s+\d+:\s*start\s*=\s*([0-9.]+),\s*end\s*=\s*([0-9.]+)"
+)
+_PATTERN_SPEECH = re.compile(
+    r"Speech segment\s+\d+:\s*start\s*=\s*([0-9.]+),\s*end\s*=\s*([0-9.]+)"
+)
+
+
+class VadError(Exception):
+    pass
+
+
+class VadBusyError(VadError):
+    pass
+
+
+def _pid_exists(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "posix":
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        else:
+            return True
+    return True
+
+
+def acquire_vad_lock(
+    timeout: float = 600.0,
+    poll_interval: float = 0.5,
+    cancel: Optional[CancelToken] = None,
+) -> None:
+    start = time.monotonic()
+    pid_str = str(os.getpid()).encode("ascii", errors="ignore")
+    while True:
+        try:
+            fd = os.open(str(VAD_LOCK_PATH), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                raw = VAD_LOCK_PATH.read_text(encoding="utf-8").strip()
+                existing_pid = int(raw.split()[0]) if raw else -1
+            except Exception:
+                existing_pid = -1
+
+            stale = existing_pid > 0 and not _pid_exists(existing_pid)
+            if stale:
+                with contextlib.suppress(Exception):
+                    VAD_LOCK_PATH.unlink()
+                continue
+
+            if time.monotonic() - start >= timeout:
+                raise VadBusyError("Timed out waiting for VAD segmentation lock")
+
+            if cancel is None:
+                time.sleep(poll_interval)
+            elif cancel.wait(poll_interval):
+                raise OperationCancelled()
+            continue
+
+        try:
+            os.write(fd, pid_str)
+        finally:
+            os.close(fd)
+        return
+
+
+def release_vad_lock() -> None:
+    with contextlib.suppress(FileNotFoundError):
+        VAD_LOCK_PATH.unlink()
+
+
+def parse_vad_segment_line(line: str) -> Optional[Tuple[str, dict]]:
+    """Parse one line of VAD output into (kind, segment), or None.
+
+    kind is "vad" for "VAD segment" lines (seconds) and "speech" for
+    "Speech segment" lines, which some builds print in centiseconds.
+    """
+
+    line = line.strip()
+    if not line:
+        return None
+
+    m_vad = _PATTERN_VAD.search(line)
+    if m_vad:
+        start = float(m_vad.group(1))
+        end = float(m_vad.group(2))
+        if end > start:
+            return "vad", {"start": start, "end": end}
+        return None
+
+    m_speech = _PATTERN_SPEECH.search(line)
+    if m_speech:
+        start = float(m_speech.group(1)) / 100.0
+        end = float(m_speech.group(2)) / 100.0
+        if end > start:
+            return "speech", {"start": start, "end": end}
+    return None
+
+
+def parse_vad_segments_output(output: str) -> List[dict]:
+    vad_segments: List[dict] = []
+    speech_segments: List[dict] = []
+
+    for line in output.splitlines():
+        parsed = parse_vad_segment_line(line)
+        if parsed is None:
+            continue
+        kind, segment = parsed
+        if kind == "vad":
+            vad_segments.append(segment)
+        else:
+            speech_segments.append(segment)
+
+    if vad_segments:
+        return vad_segments
+    return speech_segments
+
+
+def recording_id_from_path(audio_path: Path) -> Optional[str]:
+    """The id in a recording's file name (<timestamp>_<id>[_slug].wav).
+
+    None when the name does not follow that scheme.
+    """
+
+    parts = audio_path.stem.split("_", 2)
+    if len(parts) < 2 or not re.fullmatch(r"[0-9a-fA-F]{32}", parts[1]):
+        return None
+    return parts[1].lower()
+
+
+def vad_input_path(audio_path: Path) -> Path:
+    """Return the mono 16 kHz analysis proxy for a recording when available.
+
+    Falls back to the original file if the proxy cannot be built so VAD keeps
+    working on hosts without ffmpeg.
+    """
+
+    recording_id = recording_id_from_path(audio_path)
+    if recording_id is None:
+        return audio_path
+    try:
+        return get_analysis_proxy(recording_id, audio_path).path
+    except AnalysisError as exc:
+        logger.warning(
+            "Analysis proxy unavailable for %s; using original file: %s",
+            audio_path.name,
+            exc,
+        )
+        return audio_path
+
+
+def build_vad_command(input_path: Path, vad_cfg: Optional[Any]) -> List[str]:
+    cmd = [
+        settings.vad_binary,
+        "--vad-model",
+        settings.vad_model_path,
+        "--file",
+        str(input_path),
+        "--threads",
+        str(settings.vad_threads),
+        "--no-prints",
+    ]
+
+    if vad_cfg is not None:
+        cmd.extend(
+            [
+                "--vad-threshold",
+                f"{vad_cfg.threshold:.3f}",
+                "--vad-min-silence-duration-ms",
+                str(vad_cfg.min_silence_duration_ms),
+                "--vad-max-speech-duration-s",
+                f"{vad_cfg.max_speech_duration_s:.3f}",
+                "--vad-speech-pad-ms",
+                str(vad_cfg.speech_pad_ms),
+                "--vad-samples-overlap",
+                f"{vad_cfg.samples_overlap_s:.3f}",
+            ]
+        )
+
+    # The tool writes with C stdio, which block-buffers when stdout is a
+    # pipe. Force line buffering so segments arrive as they are detected.
+    stdbuf = shutil.which("stdbuf")
+    if stdbuf:
+        cmd = [stdbuf, "-oL"] + cmd
+    return cmd
+
+
+def get_cached_vad_segments(recording_id: str) -> Optional[List[dict]]:
+    cached = get_cache_entry(recording_id, VAD_CACHE_FORMAT)
+    if cached is None:
+        return None
+    raw = cached.get("vad_segments_json")
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except Exception:  # pragma: no cover - defensive
+        return None
+
+
+def get_cached_vad_segments_bulk(recording_ids: Iterable[str]) -> Dict[str, List[dict]]:
+    """Return cached VAD segments for every id that has them, in one query."""
+
+    results: Dict[str, List[dict]] = {}
+    for recording_id, entry in get_cache_entries(recording_ids, VAD_CACHE_FORMAT).items():
+        raw = entry.get("vad_segments_json")
+        if not raw:
+            continue
+        try:
+            results[recording_id] = json.loads(raw)
+        except Exception:  # pragma: no cover - defensive
+            continue
+    return results
+
+
+def _lower_priority() -> None:  # pragma: no cover - runs in the child process
+    with contextlib.suppress(Exception):
+        os.nice(10)
+
+
+def iter_vad_segments(
+    audio_path: Path,
+    vad_cfg: Optional[Any],
+    whisper_cfg: Optional[Any],
+    force: bool = False,
+    low_priority: bool = False,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[dict]:
+    """Start VAD for a recording and return an iterator over its segments.
+
+    Configuration errors, lock contention and process start-up failures are
+    raised immediately; segments are then yielded as the tool prints them.
+    The full list is cached once the process exits successfully. Closing the
+    iterator early, or cancelling cancel, kills the process and releases the
+    VAD lock; iteration then raises OperationCancelled and nothing is
+    cached. The returned VadSegmentStream must be closed even when it is
+    never iterated (e.g. the client left before a response started).
+    Background callers pass low_priority to run the detector at a higher
+    nice level.
+    """
+
+    if not settings.vad_binary:
+        raise VadError("VAD binary is not configured")
+    if not settings.vad_model_path:
+        raise VadError("VAD model path is not configured")
+
+    recording_id = recording_id_from_path(audio_path)
+    if recording_id is None:
+        raise VadError(f"Not a recording file name: {audio_path.name}")
+
+    if not force:
+        segments = get_cached_vad_segments(recording_id)
+        if segments is not None:
+            logger.info(
+                "Using cached VAD segments (%d) for %s",
+                len(segments),
+                audio_path.name,
+            )
+            return iter(segments)
+
+    config_hash, config_json = build_config_fingerprint(
+        whisper_cfg=whisper_cfg, vad_cfg=vad_cfg
+    )
+
+    acquire_vad_lock(cancel=cancel)
+
+    stderr_file = None
+    try:
+        cmd = build_vad_command(vad_input_path(audio_path), vad_cfg)
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                text=True,
+                bufsize=1,
+                preexec_fn=_lower_priority if low_priority and os.name == "posix" else None,
+            )
+        except FileNotFoundError as exc:  # pragma: no cover - environment specific
+            logger.error("VAD binary not found: %s", settings.vad_binary)
+            raise VadError("VAD binary is not available on this server") from exc
+        except OSError as exc:  # pragma: no cover - environment specific
+            logger.error("Failed to start VAD process %s: %s", cmd, exc)
+            raise VadError("Failed to start VAD process") from exc
+    except BaseException:
+        if stderr_file is not None:
+            stderr_file.close()
+        release_vad_lock()
+        raise
+
+    return VadSegmentStream(
+        proc,
+        stderr_file,
+        audio_path=audio_path,
+        recording_id=recording_id,
+        config_hash=config_hash,
+        config_json=config_json,
+        cancel=cancel,
+    )
+
+
+class _VadProcess:
+    """A started VAD process, its stderr file and the VAD lock it holds."""
+
+    def __init__(self, proc: subprocess.Popen, stderr_file) -> None:
+        self.proc = proc
+        self.stderr_file = stderr_file
+        self._lock = threading.Lock()
+        self.released = False
+
+    def release(self) -> None:
+        """Kill the process if needed and release the VAD lock, once."""
+
+        with self._lock:
+            if self.released:
+                return
+            self.released = True
+        if self.proc.poll() is None:
+            with contextlib.suppress(Exception):
+                self.proc.kill()
+            with contextlib.suppress(Exception):
+                self.proc.wait(timeout=5)
+        if self.proc.stdout is not None:
+            with contextlib.suppress(Exception):
+                self.proc.stdout.close()
+        self.stderr_file.close()
+        release_vad_lock()
+
+
+class VadSegmentStream:
+    """Segments of a running VAD process.
+
+    Owns the process and the VAD lock from the moment it is created, not
+    from the first next(): close() kills the process and releases the lock
+    whether or not iteration ever started, and is safe to call twice.
+    """
+
+    def __init__(self, proc: subprocess.Popen, stderr_file, **kwargs: Any) -> None:
+        self._process = _VadProcess(proc, stderr_file)
+        self._segments = _stream_vad_process(self._process, **kwargs)
+
+    def __iter__(self) -> "VadSegmentStream":
+        return self
+
+    def __next__(self) -> dict:
+        return next(self._segments)
+
+    def close(self) -> None:
+        try:
+            # Runs the generator's own clean-up when it has started.
+            self._segments.close()
+        except ValueError:
+            # Being iterated on another thread: stop the process, the
+            # generator then finishes by itself.
+            with contextlib.suppress(Exception):
+                self._process.proc.kill()
+        self._process.release()
+
+    def __del__(self) -> None:
+        # Last resort for a stream nobody closed.
+        with contextlib.suppress(Exception):
+            if not self._process.released:
+                self.close()
+
+
+def _stream_vad_process(
+    process: _VadProcess,
+    *,
+    audio_path: Path,
+    recording_id: str,
+    config_hash: str,
+    config_json: str,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[dict]:
+    proc, stderr_file = process.proc, process.stderr_file
+    segments: List[dict] = []
+    kind_in_use: Optional[str] = None
+    unregister = cancel.on_cancel(proc.kill) if cancel is not None else None
+    try:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            parsed = parse_vad_segment_line(line)
+            if parsed is None:
+                continue
+            kind, segment = parsed
+            # Builds print either "VAD segment" lines or "Speech segment"
+            # lines; stick with whichever kind shows up first.
+            if kind_in_use is None:
+                kind_in_use = kind
+            elif kind != kind_in_use:
+                continue
+            segments.append(segment)
+            yield segment
+
+        returncode = proc.wait()
+        if cancel is not None and cancel.cancelled:
+            logger.info("VAD for %s cancelled", audio_path.name)
+            raise OperationCancelled()
+        if returncode != 0:
+            stderr_file.seek(0)
+            logger.error(
+                "VAD process failed (%s): stderr=%s",
+                returncode,
+                stderr_file.read().decode("utf-8", errors="ignore"),
+            )
+            raise VadError("VAD segmentation failed for this recording")
+
+        logger.info(
+            "VAD detected %d speech segments for %s", len(segments), audio_path.name
+        )
+        upsert_cache_entry(
+            recording_id=recording_id,
+            response_format=VAD_CACHE_FORMAT,
+            config_hash=config_hash,
+            config_json=config_json,
+            vad_segments_json=json.dumps(segments),
+        )
+    finally:
+        if unregister is not None:
+            unregister()
+        process.release()
+
+
+def run_vad_segments(
+    audio_path: Path,
+    vad_cfg: Optional[Any],
+    whisper_cfg: Optional[Any],
+    force: bool = False,
+    low_priority: bool = False,
+    cancel: Optional[CancelToken] = None,
+) -> List[dict]:
+    """Run VAD to completion and return every segment.
+
+    Callers asking for the same recording while a run is in progress get
+    that run's result instead of queueing for the lock behind it.
+    """
+
+    return vad_flight.do(
+        ("vad", recording_id_from_path(audio_path) or str(audio_path), force),
+        lambda: list(
+            iter_vad_segments(
+                audio_path,
+                vad_cfg,
+                whisper_cfg,
+                force=force,
+                low_priority=low_priority,
+                cancel=cancel,
+            )
+        ),
+        cancel,
+    )
+
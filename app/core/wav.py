@@ -0,0 +1,129 @@
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Union
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavFormatError(Exception):
+    pass
+
+
+@dataclass
+class WavInfo:
+    """Layout of a RIFF/WAVE file as needed for direct sample access.
+
+    data_offset and data_size describe the raw sample bytes of the "data"
+    chunk so callers can slice or memory-map them without decoding.
+    """
+
+    format_tag: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def is_pcm(self) -> bool:
+        return self.format_tag == WAVE_FORMAT_PCM
+
+    @property
+    def num_frames(self) -> int:
+        if self.block_align <= 0:
+            return 0
+        return self.data_size // self.block_align
+
+    @property
+    def duration_seconds(self) -> float:
+        if self.sample_rate <= 0:
+            return 0.0
+        return float(self.num_frames) / self.sample_rate
+
+
+def _read_wav_info(f: BinaryIO, file_size: int) -> WavInfo:
+    header = f.read(12)
+    if len(header) < 12 or header[0:4] != b"RIFF" or header[8:12] != b"WAVE":
+        raise WavFormatError("Not a RIFF/WAVE file")
+
+    fmt = None
+    offset = 12
+    while True:
+        f.seek(offset)
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id = chunk_header[0:4]
+        chunk_size = struct.unpack("<I", chunk_header[4:8])[0]
+        body_offset = offset + 8
+
+        if chunk_id == b"fmt ":
+            body = f.read(min(chunk_size, 40))
+            if len(body) < 16:
+                raise WavFormatError("Truncated fmt chunk")
+            format_tag, channels, sample_rate, _, block_align, bits = struct.unpack(
+                "<HHIIHH", body[:16]
+            )
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # The real format tag is the first two bytes of the sub-format GUID.
+                format_tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (format_tag, channels, sample_rate, bits, block_align)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("data chunk precedes fmt chunk")
+            # Recordings that are still being written (or were cut off) can
+            # carry a bogus size; clamp to what is actually on disk.
+            data_size = min(chunk_size, max(0, file_size - body_offset))
+            format_tag, channels, sample_rate, bits, block_align = fmt
+            return WavInfo(
+                format_tag=format_tag,
+                channels=channels,
+                sample_rate=sample_rate,
+                bits_per_sample=bits,
+                block_align=block_align,
+                data_offset=body_offset,
+                data_size=data_size,
+            )
+
+        # Chunks are word aligned.
+        offset = body_offset + chunk_size + (chunk_size & 1)
+
+    raise WavFormatError("No data chunk found")
+
+
+def read_wav_info(path: Union[str, Path]) -> WavInfo:
+    """Parse the RIFF header of a WAV file without reading its samples."""
+
+    path = Path(path)
+    file_size = path.stat().st_size
+    with path.open("rb") as f:
+        return _read_wav_info(f, file_size)
+
+
+def build_wav_header(
+    data_size: int, sample_rate: int, channels: int = 1, bits_per_sample: int = 16
+) -> bytes:
+    """Return a canonical 44-byte PCM WAV header for data_size sample bytes."""
+
+    block_align = channels * bits_per_sample // 8
+    byte_rate = sample_rate * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        WAVE_FORMAT_PCM,
+        channels,
+        sample_rate,
+        byte_rate,
+        block_align,
+        bits_per_sample,
+        b"data",
+        data_size,
+    )
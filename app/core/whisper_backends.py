@@ -0,0 +1,254 @@
+"""Balancing Whisper requests across several servers.
+
+whisper.cpp on the Pi itself is slow, so transcription can be spread over
+servers on other machines. Each backend has a weight and a maximum number of
+concurrent requests; a request goes to the healthy backend with the fewest
+outstanding requests relative to its weight. Backends that fail to answer
+are taken out of rotation and probed again after a cool-down.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+from app.core.whisper_client import WhisperClient, whisper_client
+
+
+logger = logging.getLogger(__name__)
+
+
+# Consecutive failures after which a backend is taken out of rotation.
+FAILURE_THRESHOLD = 2
+# Seconds before an unhealthy backend is probed again.
+RETRY_AFTER_SECONDS = 30.0
+HEALTH_TIMEOUT_SECONDS = 3.0
+
+# Health probes have their own small client, so they never wait for a
+# connection behind the transcriptions occupying the shared one.
+probe_client = WhisperClient(max_connections=2)
+
+
+class NoBackendAvailable(Exception):
+    pass
+
+
+@dataclass
+class Backend:
+    url: str
+    weight: float = 1.0
+    max_concurrency: int = 1
+    outstanding: int = 0
+    healthy: bool = True
+    failures: int = 0
+    retry_at: float = 0.0
+    requests: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    audio_seconds: float = 0.0
+    last_error: Optional[str] = field(default=None, repr=False)
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "outstanding": self.outstanding,
+            "healthy": self.healthy,
+            "requests": self.requests,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "audio_seconds": round(self.audio_seconds, 3),
+            # Seconds of audio transcribed per second spent waiting on the
+            # server; above 1 means faster than real time.
+            "realtime_factor": (
+                round(self.audio_seconds / self.busy_seconds, 3)
+                if self.busy_seconds > 0
+                else None
+            ),
+            "last_error": self.last_error,
+        }
+
+
+def configured_backends(whisper_cfg: Any) -> List[Dict[str, Any]]:
+    """Return the backend list from WhisperConfig, defaulting to api_url."""
+
+    entries = []
+    for backend in getattr(whisper_cfg, "backends", None) or []:
+        url = (backend.url or "").strip().rstrip("/")
+        if url:
+            entries.append(
+                {
+                    "url": url,
+                    "weight": backend.weight,
+                    "max_concurrency": backend.max_concurrency,
+                }
+            )
+    if not entries:
+        url = (whisper_cfg.api_url or "").strip().rstrip("/")
+        if url:
+            entries.append({"url": url, "weight": 1.0, "max_concurrency": 1})
+    return entries
+
+
+class BackendPool:
+    def __init__(self) -> None:
+        self._backends: Dict[str, Backend] = {}
+        # A plain lock: _recover() drops it while probing.
+        self._cond = threading.Condition(threading.Lock())
+
+    def sync(self, whisper_cfg: Any) -> List[Backend]:
+        """Bring the pool in line with the configuration.
+
+        Counters of backends that stay configured are kept; requests still
+        running on removed backends finish normally.
+        """
+
+        entries = configured_backends(whisper_cfg)
+        with self._cond:
+            current: Dict[str, Backend] = {}
+            for entry in entries:
+                backend = self._backends.get(entry["url"]) or Backend(url=entry["url"])
+                backend.weight = float(entry["weight"])
+                backend.max_concurrency = int(entry["max_concurrency"])
+                current[backend.url] = backend
+            self._backends = current
+            self._cond.notify_all()
+        # The shared client must have a connection for every slot.
+        whisper_client.ensure_capacity(sum(b.max_concurrency for b in current.values()))
+        return list(current.values())
+
+    def capacity(self, whisper_cfg: Any) -> int:
+        """Number of requests the configured backends can run at once."""
+
+        return max(1, sum(b.max_concurrency for b in self.sync(whisper_cfg)))
+
+    def _probe(self, backend: Backend) -> bool:
+        try:
+            response, _ = probe_client.get(
+                f"{backend.url}/health", timeout=HEALTH_TIMEOUT_SECONDS
+            )
+        except httpx.HTTPError as exc:
+            backend.last_error = str(exc) or exc.__class__.__name__
+            return False
+        # Older whisper.cpp servers have no /health route; any answer that
+        # is not a server error means the process is up.
+        return response.status_code < 500
+
+    def _recover(self, now: float, skip: Set[str], force: bool = False) -> None:
+        due = [
+            b
+            for b in self._backends.values()
+            if not b.healthy
+            and b.url not in skip
+            and (force or b.retry_at <= now)
+            and b.outstanding == 0
+        ]
+        for backend in due:
+            # Reserve the probe so concurrent callers do not repeat it.
+            backend.retry_at = now + RETRY_AFTER_SECONDS
+            self._cond.release()
+            try:
+                alive = self._probe(backend)
+            finally:
+                self._cond.acquire()
+            if alive:
+                logger.info("Whisper backend %s is reachable again", backend.url)
+                backend.healthy = True
+                backend.failures = 0
+
+    def acquire(
+        self, exclude: Iterable[str] = (), timeout: Optional[float] = None
+    ) -> Backend:
+        """Reserve a slot on the least-loaded healthy backend.
+
+        Blocks while every healthy backend is at its concurrency limit.
+        Raises NoBackendAvailable when no backend outside exclude is healthy.
+        """
+
+        skip: Set[str] = set(exclude)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        probed_all = False
+        with self._cond:
+            while True:
+                self._recover(time.time(), skip)
+                candidates = [
+                    b
+                    for b in self._backends.values()
+                    if b.healthy and b.url not in skip
+                ]
+                if not candidates and not probed_all:
+                    # Everything is marked down: check right away rather than
+                    # failing until the cool-down ends (e.g. a single server
+                    # that has just been restarted).
+                    probed_all = True
+                    self._recover(time.time(), skip, force=True)
+                    continue
+                if not candidates:
+                    raise NoBackendAvailable("No healthy Whisper backend is available")
+                free = [b for b in candidates if b.outstanding < b.max_concurrency]
+                if free:
+                    backend = min(free, key=lambda b: (b.load(), b.outstanding))
+                    backend.outstanding += 1
+                    return backend
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise NoBackendAvailable("Timed out waiting for a Whisper backend")
+                # Wake up periodically so unhealthy backends get re-probed.
+                wait = RETRY_AFTER_SECONDS if remaining is None else remaining
+                self._cond.wait(timeout=min(wait, RETRY_AFTER_SECONDS))
+
+    def release(
+        self,
+        backend: Backend,
+        ok: bool,
+        elapsed: float = 0.0,
+        audio_seconds: Optional[float] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Return a slot; ok=False counts towards taking the backend offline."""
+
+        with self._cond:
+            backend.outstanding = max(0, backend.outstanding - 1)
+            backend.requests += 1
+            backend.busy_seconds += elapsed
+            if ok:
+                backend.failures = 0
+                if audio_seconds:
+                    backend.audio_seconds += audio_seconds
+            else:
+                backend.errors += 1
+                backend.failures += 1
+                backend.last_error = error
+                if backend.healthy and backend.failures >= FAILURE_THRESHOLD:
+                    logger.warning(
+                        "Taking Whisper backend %s out of rotation: %s",
+                        backend.url,
+                        error,
+                    )
+                    backend.healthy = False
+                    backend.retry_at = time.time() + RETRY_AFTER_SECONDS
+            self._cond.notify_all()
+
+    def mark_down(self, backend: Backend) -> None:
+        """Take a backend out of rotation immediately (e.g. refused connection)."""
+
+        with self._cond:
+            backend.healthy = False
+            backend.retry_at = time.time() + RETRY_AFTER_SECONDS
+            self._cond.notify_all()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [b.snapshot() for b in self._backends.values()]
+
+
+backend_pool = BackendPool()
@@ -0,0 +1,468 @@
+"""Process-wide HTTP client for the Whisper server.
+
+Every Whisper call used to open its own httpx.Client, paying a TCP (and
+possibly TLS) handshake per segment and never reusing a connection across a
+long VAD-sequential run. A single pooled client keeps connections alive
+between requests and bounds how many are open at once: at least as many as
+the backend pool can use (see ensure_capacity).
+
+Each request is timed through httpcore's trace hooks, split into connect,
+upload, server and download phases, so slow transcriptions can be
+attributed to the network or to the model.
+
+Requests made with a CancelToken are aborted as soon as it is cancelled:
+the socket of the connection they are using is shut down, which ends an
+upload or the wait for the server's answer right away and frees the pooled
+connection. The caller gets OperationCancelled once the request has
+actually stopped.
+"""
+
+import logging
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+from app.core.cancellation import CancelToken, OperationCancelled
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestTimings:
+    """Seconds spent in each phase of one request."""
+
+    connect: float = 0.0
+    upload: float = 0.0
+    server: float = 0.0
+    download: float = 0.0
+    total: float = 0.0
+    # False when the request had to open a new connection.
+    reused_connection: bool = True
+    bytes_sent: int = 0
+
+
+class _Trace:
+    """Collect httpcore trace events into RequestTimings."""
+
+    def __init__(self) -> None:
+        self.marks: Dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        # Event names look like "connection.connect_tcp.started" or
+        # "http11.send_request_body.complete"; keep the first occurrence.
+        self.marks.setdefault(event_name, time.perf_counter())
+
+    def _span(self, prefix: str, start: str, end: str) -> float:
+        began = self.marks.get(f"{prefix}.{start}")
+        ended = self.marks.get(f"{prefix}.{end}")
+        if began is None or ended is None:
+            return 0.0
+        return max(0.0, ended - began)
+
+    def timings(self, total: float) -> RequestTimings:
+        connect = self._span(
+            "connection.connect_tcp", "started", "complete"
+        ) + self._span("connection.start_tls", "started", "complete")
+        upload = self._span("http11.send_request_headers", "started", "complete")
+        upload += self._span("http11.send_request_body", "started", "complete")
+        server = 0.0
+        sent = self.marks.get("http11.send_request_body.complete")
+        headers = self.marks.get("http11.receive_response_headers.complete")
+        if sent is not None and headers is not None:
+            server = max(0.0, headers - sent)
+        download = self._span("http11.receive_response_body", "started", "complete")
+        return RequestTimings(
+            connect=connect,
+            upload=upload,
+            server=server,
+            download=download,
+            total=total,
+            reused_connection="connection.connect_tcp.started" not in self.marks,
+        )
+
+
+# How long a cancelled request may take to stop after its socket was shut
+# down (or while it is still connecting) before the caller stops waiting.
+ABORT_WAIT_SECONDS = 10.0
+
+
+class _Connections:
+    """Which connection each thread is using, so its request can be aborted."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._by_thread: Dict[int, "_TrackedStream"] = {}
+
+    def claim(self, stream: "_TrackedStream") -> None:
+        thread = threading.get_ident()
+        with self._lock:
+            stream.owner = thread
+            self._by_thread[thread] = stream
+
+    def forget_thread(self) -> None:
+        with self._lock:
+            self._by_thread.pop(threading.get_ident(), None)
+
+    def abort(self, thread: Optional[int]) -> bool:
+        """Shut down the connection the thread is using; False if none."""
+
+        with self._lock:
+            stream = self._by_thread.get(thread) if thread is not None else None
+            if stream is None or stream.owner != thread:
+                return False
+        stream.abort()
+        return True
+
+
+class _TrackedStream(httpcore.NetworkStream):
+    def __init__(self, stream: httpcore.NetworkStream, connections: _Connections) -> None:
+        self._stream = stream
+        self._connections = connections
+        self.owner: Optional[int] = None
+
+    def read(self, max_bytes: int, timeout: Optional[float] = None) -> bytes:
+        self._connections.claim(self)
+        return self._stream.read(max_bytes, timeout)
+
+    def write(self, buffer: bytes, timeout: Optional[float] = None) -> None:
+        self._connections.claim(self)
+        self._stream.write(buffer, timeout)
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def start_tls(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+        return _TrackedStream(self._stream.start_tls(*args, **kwargs), self._connections)
+
+    def get_extra_info(self, info: str) -> Any:
+        return self._stream.get_extra_info(info)
+
+    def abort(self) -> None:
+        sock = self._stream.get_extra_info("socket")
+        if sock is not None:
+            # Unlike close(), wakes up a thread blocked in recv() or send().
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _TrackingBackend(httpcore.NetworkBackend):
+    def __init__(self, connections: _Connections) -> None:
+        self._backend = httpcore.SyncBackend()
+        self._connections = connections
+
+    def connect_tcp(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+        return _TrackedStream(self._backend.connect_tcp(*args, **kwargs), self._connections)
+
+    def connect_unix_socket(self, *args: Any, **kwargs: Any) -> httpcore.NetworkStream:
+        return _TrackedStream(
+            self._backend.connect_unix_socket(*args, **kwargs), self._connections
+        )
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+
+class _AbortableTransport(httpx.HTTPTransport):
+    """httpx's transport, over sockets that _Connections can shut down."""
+
+    def __init__(self, limits: httpx.Limits, connections: _Connections) -> None:
+        super().__init__(limits=limits)
+        # httpx has no option for the network backend; build the same
+        # connection pool it would, with ours.
+        self._pool = httpcore.ConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=_TrackingBackend(connections),
+        )
+
+
+# Connections allowed beyond what the Whisper backends can run at once, so
+# a request made outside the backend pool does not queue behind
+# transcriptions for a pooled connection.
+CONNECTION_HEADROOM = 2
+
+
+class WhisperClient:
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
+        self._max_connections = max_connections
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._transport = transport
+        self._connections = _Connections()
+        self._client: Optional[httpx.Client] = None
+        self._client_limit = 0
+        # Clients replaced by a larger one; requests may still be using them.
+        self._retired: List[httpx.Client] = []
+        self._capacity = 0
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "requests": 0,
+            "errors": 0,
+            "new_connections": 0,
+            "connect_seconds": 0.0,
+            "upload_seconds": 0.0,
+            "server_seconds": 0.0,
+            "download_seconds": 0.0,
+            "total_seconds": 0.0,
+        }
+        self._last: Optional[RequestTimings] = None
+
+    def _timeout(self) -> httpx.Timeout:
+        connect = (
+            self._connect_timeout
+            if self._connect_timeout is not None
+            else settings.whisper_connect_timeout
+        )
+        read = (
+            self._read_timeout
+            if self._read_timeout is not None
+            else settings.whisper_read_timeout
+        )
+        read_or_none = read if read and read > 0 else None
+        # Uploads and waiting for a pooled connection are bounded like reads.
+        return httpx.Timeout(
+            connect=connect, read=read_or_none, write=read_or_none, pool=read_or_none
+        )
+
+    def _connection_limit(self) -> int:
+        configured = self._max_connections or settings.whisper_max_connections
+        if not self._capacity:
+            return configured
+        return max(configured, self._capacity + CONNECTION_HEADROOM)
+
+    def ensure_capacity(self, requests: int) -> None:
+        """Allow at least this many requests at once, plus some headroom.
+
+        The backend pool hands out as many slots as its backends' summed
+        max_concurrency; with fewer connections than that, requests would
+        wait for a pooled connection and time out. A client that is too
+        small is replaced; requests already using it finish on it.
+        """
+
+        with self._lock:
+            if requests <= self._capacity:
+                return
+            self._capacity = requests
+            client = self._client
+            if client is not None and self._client_limit < self._connection_limit():
+                self._retired.append(client)
+                self._client = None
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                max_connections = self._connection_limit()
+                self._client_limit = max_connections
+                limits = httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=settings.whisper_keepalive_seconds,
+                )
+                self._client = httpx.Client(
+                    timeout=self._timeout(),
+                    limits=limits,
+                    transport=self._transport
+                    or _AbortableTransport(limits, self._connections),
+                )
+            return self._client
+
+    def post(
+        self,
+        url: str,
+        *,
+        data: Optional[Dict[str, Any]] = None,
+        files: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Tuple[httpx.Response, RequestTimings]:
+        """POST to the Whisper server over a pooled connection.
+
+        File objects in files are streamed from their current position
+        rather than read into memory first. timeout overrides the read
+        timeout for this request only. httpx errors propagate to the caller;
+        OperationCancelled is raised when cancel is cancelled.
+        """
+
+        if cancel is not None:
+            files = {
+                name: _cancellable_file(value, cancel)
+                for name, value in (files or {}).items()
+            }
+            return self._send_cancellable(
+                "POST", url, timeout, cancel, data=data, files=files
+            )
+        return self._send("POST", url, timeout, data=data, files=files)
+
+    def get(
+        self, url: str, *, timeout: Optional[float] = None
+    ) -> Tuple[httpx.Response, RequestTimings]:
+        return self._send("GET", url, timeout)
+
+    def _send_cancellable(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[float],
+        cancel: CancelToken,
+        **kwargs: Any,
+    ) -> Tuple[httpx.Response, RequestTimings]:
+        # A blocking httpx call cannot be interrupted from another thread,
+        # so it runs on its own thread; on cancel its connection is shut
+        # down, which makes the call fail, and whatever it returns is
+        # discarded.
+        state: Dict[str, Any] = {}
+        lock = threading.Lock()
+        finished = threading.Event()
+
+        def run() -> None:
+            try:
+                outcome: Any = self._send(method, url, timeout, **kwargs)
+            except BaseException as exc:
+                outcome = exc
+            finally:
+                self._connections.forget_thread()
+            with lock:
+                state["outcome"] = outcome
+                abandoned = state.get("abandoned", False)
+            finished.set()
+            if abandoned and isinstance(outcome, tuple):
+                outcome[0].close()
+
+        cancel.raise_if_cancelled()
+        thread = threading.Thread(target=run, name="whisper-request", daemon=True)
+        thread.start()
+        unregister = cancel.on_cancel(finished.set)
+        try:
+            finished.wait()
+        finally:
+            unregister()
+        with lock:
+            abandoned = "outcome" not in state
+            if abandoned:
+                state["abandoned"] = True
+            else:
+                outcome = state["outcome"]
+        if abandoned:
+            # The caller keeps its backend slot until the request is gone.
+            # Retried: the request may still be connecting.
+            deadline = time.monotonic() + ABORT_WAIT_SECONDS
+            while thread.is_alive() and time.monotonic() < deadline:
+                self._connections.abort(thread.ident)
+                thread.join(0.1)
+            if thread.is_alive():
+                logger.warning("Cancelled Whisper request to %s is still running", url)
+            raise OperationCancelled()
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def _send(
+        self, method: str, url: str, timeout: Optional[float], **kwargs: Any
+    ) -> Tuple[httpx.Response, RequestTimings]:
+        client = self._get_client()
+        trace = _Trace()
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(
+                timeout, connect=min(timeout, self._timeout().connect or timeout)
+            )
+
+        request = client.build_request(
+            method, url, extensions={"trace": trace}, **kwargs
+        )
+        started = time.perf_counter()
+        try:
+            response = client.send(request)
+        except httpx.HTTPError:
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["errors"] += 1
+            raise
+
+        timings = trace.timings(time.perf_counter() - started)
+        timings.bytes_sent = int(request.headers.get("content-length") or 0)
+        self._record(timings)
+        logger.debug(
+            "Whisper %s %s -> %s in %.3fs (connect %.3f, upload %.3f, "
+            "server %.3f, download %.3f)",
+            method,
+            url,
+            response.status_code,
+            timings.total,
+            timings.connect,
+            timings.upload,
+            timings.server,
+            timings.download,
+        )
+        return response, timings
+
+    def _record(self, timings: RequestTimings) -> None:
+        with self._lock:
+            stats = self._stats
+            stats["requests"] += 1
+            if not timings.reused_connection:
+                stats["new_connections"] += 1
+            stats["connect_seconds"] += timings.connect
+            stats["upload_seconds"] += timings.upload
+            stats["server_seconds"] += timings.server
+            stats["download_seconds"] += timings.download
+            stats["total_seconds"] += timings.total
+            self._last = timings
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            result: Dict[str, Any] = dict(self._stats)
+            result["last"] = asdict(self._last) if self._last is not None else None
+        for key in ("requests", "errors", "new_connections"):
+            result[key] = int(result[key])
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            clients = [self._client, *self._retired]
+            self._client, self._retired = None, []
+        for client in clients:
+            if client is not None:
+                client.close()
+
+
+class _CancellableReader:
+    """File wrapper whose reads fail once the token is cancelled."""
+
+    def __init__(self, file_obj: Any, cancel: CancelToken) -> None:
+        self._file = file_obj
+        self._cancel = cancel
+
+    def read(self, *args: Any) -> Any:
+        self._cancel.raise_if_cancelled()
+        return self._file.read(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+def _cancellable_file(value: Any, cancel: CancelToken) -> Any:
+    if isinstance(value, tuple) and len(value) >= 2 and hasattr(value[1], "read"):
+        return (value[0], _CancellableReader(value[1], cancel)) + value[2:]
+    if hasattr(value, "read"):
+        return _CancellableReader(value, cancel)
+    return value
+
+
+whisper_client = WhisperClient()
@@ -5,7 +5,21 @@ from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from app.api import router as api_router
-from app.core.storage import get_secondary_root, migrate_to_secondary, scan_filesystem
+from app.core.app_config import app_config_version
+from app.core.cache import maintain_cache
+from app.core.events import TOPIC_STORAGE, events
+from app.core.jobs import transcription_queue
+from app.core.pipeline import pipeline
+from app.core.recording import manager as recording_manager
+from app.core.storage import (
+    get_secondary_root,
+    migrate_to_secondary,
+    present_recording_ids,
+    scan_filesystem,
+    secondary_storage_state,
+)
+from app.core.whisper_backends import probe_client
+from app.core.whisper_client import whisper_client
 
 
 logger = logging.getLogger(__name__)
@@ -13,6 +27,10 @@ logger = logging.getLogger(__name__)
 
 async def _storage_worker_loop() -> None:
     interval_seconds = 60
+    # Cache eviction and vacuuming run once at start-up, then hourly.
+    cache_interval_seconds = 60 * 60
+    next_cache_maintenance = 0.0
+    loop = asyncio.get_running_loop()
     while True:
         try:
             # Always keep the storage index in sync with the filesystem.
@@ -25,6 +43,36 @@ async def _storage_worker_loop() -> None:
         except Exception:  # pragma: no cover - defensive background task
             logger.exception("Background storage worker failed")
 
+        if loop.time() >= next_cache_maintenance:
+            next_cache_maintenance = loop.time() + cache_interval_seconds
+            try:
+                await asyncio.to_thread(maintain_cache, present_recording_ids())
+            except Exception:  # pragma: no cover - defensive background task
+                logger.exception("Transcription cache maintenance failed")
+
+        await asyncio.sleep(interval_seconds)
+
+
+def _publish_local_state() -> None:
+    # Publishes a config event when config.json changed on disk.
+    app_config_version()
+    events.publish(TOPIC_STORAGE, secondary_storage_state())
+
+
+async def _event_monitor_loop() -> None:
+    """Publish state that nothing else reports when it changes.
+
+    Recording starts and stops are published as they happen; config file
+    edits and (un)mounting of secondary storage are picked up here.
+    """
+
+    interval_seconds = 1.0
+    recording_manager.publish_state()
+    while True:
+        try:
+            await asyncio.to_thread(_publish_local_state)
+        except Exception:  # pragma: no cover - defensive background task
+            logger.exception("Event monitor failed")
         await asyncio.sleep(interval_seconds)
 
 
@@ -40,6 +88,31 @@ def create_app() -> FastAPI:
         except Exception:  # pragma: no cover - defensive
             logger.exception("Failed to start storage worker")
 
+    @app.on_event("startup")
+    async def _start_event_monitor() -> None:  # pragma: no cover - wiring
+        try:
+            asyncio.create_task(_event_monitor_loop())
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("Failed to start event monitor")
+
+    @app.on_event("startup")
+    async def _start_pipeline() -> None:  # pragma: no cover - wiring
+        try:
+            pipeline.start()
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("Failed to start processing pipeline")
+        try:
+            transcription_queue.start()
+        except Exception:  # pragma: no cover - defensive
+            logger.exception("Failed to start transcription queue")
+
+    @app.on_event("shutdown")
+    async def _stop_pipeline() -> None:  # pragma: no cover - wiring
+        pipeline.stop()
+        transcription_queue.stop()
+        whisper_client.close()
+        probe_client.close()
+
     return app
 
 
@@ -21,6 +21,11 @@ const defaultConfig = {
     temperature: 0.0,
     temperature_inc: 0.2,
     model_path: "",
+    backends: [],
+    pack_max_seconds: 25.0,
+    pack_gap_ms: 500,
+    chunk_seconds: 300.0,
+    chunk_overlap_seconds: 5.0,
   },
   vad: {
     threshold: 0.5,
@@ -140,6 +145,42 @@ function applyWhisper(config) {
   temperatureEl.value = temp;
   temperatureIncEl.value = tempInc;
   modelPathEl.value = cfg.model_path || "";
+
+  const backendsEl = document.getElementById("whisper-backends");
+  if (backendsEl) {
+    backendsEl.value = (cfg.backends || [])
+      .map((b) => `${b.url} ${b.weight ?? 1} ${b.max_concurrency ?? 1}`)
+      .join("\n");
+  }
+
+  const packMaxEl = document.getElementById("whisper-pack-max-seconds");
+  const packGapEl = document.getElementById("whisper-pack-gap-ms");
+  if (packMaxEl) packMaxEl.value = cfg.pack_max_seconds;
+  if (packGapEl) packGapEl.value = cfg.pack_gap_ms;
+
+  const chunkEl = document.getElementById("whisper-chunk-seconds");
+  const chunkOverlapEl = document.getElementById("whisper-chunk-overlap-seconds");
+  if (chunkEl) chunkEl.value = cfg.chunk_seconds;
+  if (chunkOverlapEl) chunkOverlapEl.value = cfg.chunk_overlap_seconds;
+}
+
+function parseWhisperBackends(text) {
+  const backends = [];
+  for (const rawLine of (text || "").split("\n")) {
+    const parts = rawLine.trim().split(/\s+/).filter(Boolean);
+    if (!parts.length) continue;
+    const weight = Number.parseFloat(parts[1]);
+    const maxConcurrency = Number.parseInt(parts[2], 10);
+    backends.push({
+      url: parts[0],
+      weight: Number.isFinite(weight) && weight > 0 ? weight : 1,
+      max_concurrency:
+        Number.isFinite(maxConcurrency) && maxConcurrency > 0
+          ? maxConcurrency
+          : 1,
+    });
+  }
+  return backends;
 }
 
 function applyVad(config) {
@@ -269,6 +310,10 @@ function applyDebug(config) {
   vadSegmentsEl.checked = !!cfg.vad_segments;
 }
 
+// Last configuration returned by the server. Saving merges the form values
+// over it so sections without UI controls (e.g. pipeline) are preserved.
+let loadedConfig = {};
+
 async function loadConfig() {
   try {
     const res = await fetch("/ui/config");
@@ -285,6 +330,7 @@ async function loadConfig() {
       return;
     }
     const data = await res.json();
+    loadedConfig = data || {};
     applyRecordingLight(data || {});
     applyWhisper(data || {});
     applyVad(data || {});
@@ -438,6 +484,13 @@ async function saveConfig(e) {
     "whisper-temperature-inc",
   );
   const whisperModelPathEl = document.getElementById("whisper-model-path");
+  const whisperBackendsEl = document.getElementById("whisper-backends");
+  const whisperPackMaxEl = document.getElementById("whisper-pack-max-seconds");
+  const whisperPackGapEl = document.getElementById("whisper-pack-gap-ms");
+  const whisperChunkEl = document.getElementById("whisper-chunk-seconds");
+  const whisperChunkOverlapEl = document.getElementById(
+    "whisper-chunk-overlap-seconds",
+  );
   const vadThresholdEl = document.getElementById("vad-threshold");
   const vadMinSilenceEl = document.getElementById("vad-min-silence-ms");
   const vadMaxSpeechEl = document.getElementById("vad-max-speech-seconds");
@@ -485,6 +538,18 @@ async function saveConfig(e) {
   const rawTemperatureInc = Number.parseFloat(
     (whisperTemperatureIncEl.value || "").trim(),
   );
+  const rawPackMax = whisperPackMaxEl
+    ? Number.parseFloat((whisperPackMaxEl.value || "").trim())
+    : Number.NaN;
+  const rawPackGap = whisperPackGapEl
+    ? Number.parseInt((whisperPackGapEl.value || "").trim(), 10)
+    : Number.NaN;
+  const rawChunk = whisperChunkEl
+    ? Number.parseFloat((whisperChunkEl.value || "").trim())
+    : Number.NaN;
+  const rawChunkOverlap = whisperChunkOverlapEl
+    ? Number.parseFloat((whisperChunkOverlapEl.value || "").trim())
+    : Number.NaN;
 
   const rawVadThreshold = Number.parseFloat(
     (vadThresholdEl.value || "").trim(),
@@ -509,12 +574,14 @@ async function saveConfig(e) {
   );
 
   const payload = {
+    ...loadedConfig,
     recording_light: {
       enabled: enabledEl.checked,
       brightness: uiValueToBrightness(brightnessEl.value),
       color: colorEl.value,
     },
     whisper: {
+      ...(loadedConfig.whisper || {}),
       enabled: whisperEnabledEl.checked,
       api_url: apiUrl,
       response_format: whisperResponseFormatEl.value || "json",
@@ -525,6 +592,25 @@ async function saveConfig(e) {
         ? rawTemperatureInc
         : defaultConfig.whisper.temperature_inc,
       model_path: whisperModelPathEl.value.trim(),
+      backends: whisperBackendsEl
+        ? parseWhisperBackends(whisperBackendsEl.value)
+        : (loadedConfig.whisper || {}).backends || [],
+      pack_max_seconds: Number.isFinite(rawPackMax)
+        ? rawPackMax
+        : (loadedConfig.whisper || {}).pack_max_seconds ??
+          defaultConfig.whisper.pack_max_seconds,
+      pack_gap_ms: Number.isFinite(rawPackGap)
+        ? rawPackGap
+        : (loadedConfig.whisper || {}).pack_gap_ms ??
+          defaultConfig.whisper.pack_gap_ms,
+      chunk_seconds: Number.isFinite(rawChunk)
+        ? rawChunk
+        : (loadedConfig.whisper || {}).chunk_seconds ??
+          defaultConfig.whisper.chunk_seconds,
+      chunk_overlap_seconds: Number.isFinite(rawChunkOverlap)
+        ? rawChunkOverlap
+        : (loadedConfig.whisper || {}).chunk_overlap_seconds ??
+          defaultConfig.whisper.chunk_overlap_seconds,
     },
     vad: {
       threshold: Number.isFinite(rawVadThreshold)
@@ -592,6 +678,7 @@ async function saveConfig(e) {
       setConfigMessage(message, "danger");
       return;
     }
+    loadedConfig = payload;
     setConfigMessage("Configuration saved", "success");
     // Refresh model dropdowns and VAD status based on the newly saved config
     populateWhisperModels(payload);
@@ -23,6 +23,9 @@ let transcriptSkipSilenceMode = false;
 let transcriptWaveTimeupdateUnsub = null;
 let transcriptWaveformMarkerEl = null;
 let transcriptActiveRegionId = null;
+// Server-built speech-only rendition used by "play without silence":
+// { recordingId, audio, timeMap }.
+let transcriptSpeechPlayer = null;
 
 let allRecordings = [];
 
@@ -103,13 +106,6 @@ let transcriptWaveformTimelineEl = null;
 
 if (typeof window !== "undefined") {
   window.addEventListener("beforeunload", () => {
-    for (const url of transcriptAudioUrlCache.values()) {
-      try {
-        URL.revokeObjectURL(url);
-      } catch (err) {
-        console.error("Failed to revoke audio object URL", err);
-      }
-    }
     transcriptAudioUrlCache.clear();
     transcriptAudioUrlPromises.clear();
     transcriptVadSegmentsCache.clear();
@@ -185,7 +181,11 @@ function getTranscriptAudioStreamUrl(recordingId) {
   return `/recordings/${recordingId}/stream`;
 }
 
-async function ensureTranscriptAudioUrl(recordingId) {
+// Resolves to { url, peaks, duration } for the transcript waveform. The
+// audio is not downloaded up front: with server-side peaks WaveSurfer can
+// draw right away, and the media element streams the WAV with Range
+// requests. stream_url is versioned by content, so the browser caches it.
+async function ensureTranscriptAudioSource(recordingId) {
   if (transcriptAudioUrlCache.has(recordingId)) {
     return transcriptAudioUrlCache.get(recordingId);
   }
@@ -194,18 +194,23 @@ async function ensureTranscriptAudioUrl(recordingId) {
     return transcriptAudioUrlPromises.get(recordingId);
   }
 
-  const streamUrl = getTranscriptAudioStreamUrl(recordingId);
-
   const promise = (async () => {
     try {
-      const res = await fetch(streamUrl);
-      if (!res.ok) {
-        throw new Error(`Failed to fetch audio stream (${res.status})`);
+      const source = { url: getTranscriptAudioStreamUrl(recordingId), peaks: null, duration: null };
+      try {
+        const res = await fetch(`/recordings/${recordingId}/peaks`);
+        const data = res.ok ? await res.json() : null;
+        if (data && Array.isArray(data.peaks) && data.peaks.length > 0 && data.duration_seconds > 0) {
+          source.peaks = data.peaks;
+          source.duration = data.duration_seconds;
+          source.url = data.stream_url || source.url;
+        }
+      } catch (err) {
+        // WaveSurfer falls back to decoding the audio itself.
+        console.warn("Waveform peaks unavailable", err);
       }
-      const blob = await res.blob();
-      const objectUrl = URL.createObjectURL(blob);
-      transcriptAudioUrlCache.set(recordingId, objectUrl);
-      return objectUrl;
+      transcriptAudioUrlCache.set(recordingId, source);
+      return source;
     } finally {
       transcriptAudioUrlPromises.delete(recordingId);
     }
@@ -335,6 +340,7 @@ function playTranscriptSegment(segmentIndex) {
 
   const seg = transcriptSegments[segmentIndex];
   if (!seg) return false;
+  pauseTranscriptSpeech();
 
   const start = Math.max(0, seg.start);
   const end = Math.max(start, seg.end);
@@ -606,6 +612,7 @@ function destroyTranscriptWaveform() {
   const waveformEl = document.getElementById("transcript-waveform");
 
   transcriptSkipSilenceMode = false;
+  teardownTranscriptSpeechPlayer();
   setActiveTranscriptRegion(null);
 
   if (transcriptWavesurfer && typeof transcriptWavesurfer.destroy === "function") {
@@ -641,6 +648,8 @@ function initTranscriptWaveform(recordingId, segments) {
   // Normalize segments into our internal representation (may be empty).
   transcriptSegments = normalizeTranscriptSegments(segments);
   renderTranscriptTimelineSegments();
+  // Segments may have changed, so any speech-only rendition is stale.
+  teardownTranscriptSpeechPlayer();
 
   // Reset any existing waveform instance but keep the container visible.
   if (transcriptWavesurfer && typeof transcriptWavesurfer.destroy === "function") {
@@ -655,8 +664,8 @@ function initTranscriptWaveform(recordingId, segments) {
   }
   const wsOwnerId = recordingId;
 
-  ensureTranscriptAudioUrl(recordingId)
-    .then((audioUrl) => {
+  ensureTranscriptAudioSource(recordingId)
+    .then((audioSource) => {
       // If the user has switched recordings while this was loading,
       // do not attach a new waveform instance.
       if (currentTranscriptRecordingId && currentTranscriptRecordingId !== wsOwnerId) {
@@ -689,7 +698,10 @@ function initTranscriptWaveform(recordingId, segments) {
         barRadius: 2,
         responsive: true,
         plugins: regions ? [regions] : [],
-        url: audioUrl || getTranscriptAudioStreamUrl(recordingId),
+        url: audioSource.url,
+        ...(audioSource.peaks
+          ? { peaks: [audioSource.peaks], duration: audioSource.duration }
+          : {}),
       });
 
       const ws = transcriptWavesurfer;
@@ -807,8 +819,87 @@ function initTranscriptWaveform(recordingId, segments) {
     });
 }
 
+function speechTimeToSourceTime(timeMap, t) {
+  if (!Array.isArray(timeMap) || !timeMap.length) return t;
+  for (const entry of timeMap) {
+    if (t < entry.end) {
+      return entry.source_start + Math.max(0, t - entry.start);
+    }
+  }
+  return timeMap[timeMap.length - 1].source_end;
+}
+
+function sourceTimeToSpeechTime(timeMap, t) {
+  if (!Array.isArray(timeMap) || !timeMap.length) return 0;
+  for (const entry of timeMap) {
+    if (t < entry.source_end) {
+      return entry.start + Math.max(0, t - entry.source_start);
+    }
+  }
+  return 0;
+}
+
+function teardownTranscriptSpeechPlayer() {
+  if (!transcriptSpeechPlayer) return;
+  const { audio } = transcriptSpeechPlayer;
+  transcriptSpeechPlayer = null;
+  audio.pause();
+  audio.removeAttribute("src");
+  audio.load();
+}
+
+function isTranscriptSpeechPlaying() {
+  return !!(transcriptSpeechPlayer && !transcriptSpeechPlayer.audio.paused);
+}
+
+function pauseTranscriptSpeech() {
+  if (transcriptSpeechPlayer) {
+    transcriptSpeechPlayer.audio.pause();
+  }
+}
+
+async function ensureTranscriptSpeechPlayer(recordingId) {
+  if (transcriptSpeechPlayer && transcriptSpeechPlayer.recordingId === recordingId) {
+    return transcriptSpeechPlayer;
+  }
+  teardownTranscriptSpeechPlayer();
+
+  const res = await fetch(`/recordings/${recordingId}/speech/map?format=opus`);
+  if (!res.ok) {
+    throw new Error(`Failed to prepare speech-only audio (${res.status})`);
+  }
+  const data = await res.json();
+
+  const audio = new Audio();
+  audio.preload = "auto";
+  audio.src = data.url;
+  const speedSelect = document.getElementById("transcript-audio-speed");
+  const rate = speedSelect ? Number.parseFloat(speedSelect.value) : NaN;
+  if (Number.isFinite(rate) && rate > 0) {
+    audio.playbackRate = rate;
+  }
+
+  const player = {
+    recordingId,
+    audio,
+    timeMap: Array.isArray(data.time_map) ? data.time_map : [],
+  };
+  // Mirror the rendition's position onto the original-timeline waveform so
+  // the marker and transcript highlight keep working.
+  audio.addEventListener("timeupdate", () => {
+    if (!transcriptWavesurfer || transcriptSpeechPlayer !== player) return;
+    transcriptWavesurfer.setTime(
+      speechTimeToSourceTime(player.timeMap, audio.currentTime),
+    );
+  });
+
+  transcriptSpeechPlayer = player;
+  return player;
+}
+
 function playTranscriptAll() {
   if (!transcriptWavesurfer) return;
+  pauseTranscriptSpeech();
   transcriptSkipSilenceMode = false;
   if (typeof transcriptWavesurfer.setTime === "function") {
     transcriptWavesurfer.setTime(0);
@@ -816,12 +907,8 @@ function playTranscriptAll() {
   transcriptWavesurfer.play().catch(() => {});
 }
 
-function playTranscriptWithoutSilence() {
+function playTranscriptWithoutSilenceLocally() {
   if (!transcriptWavesurfer) return;
-  if (!Array.isArray(transcriptSegments) || !transcriptSegments.length) {
-    playTranscriptAll();
-    return;
-  }
   transcriptSkipSilenceMode = true;
   const first = transcriptSegments[0];
   if (first && typeof first.start === "number") {
@@ -830,12 +917,49 @@ function playTranscriptWithoutSilence() {
   transcriptWavesurfer.play().catch(() => {});
 }
 
+async function playTranscriptWithoutSilence() {
+  const recordingId = currentTranscriptRecordingId;
+  if (!recordingId) return;
+  if (!Array.isArray(transcriptSegments) || !transcriptSegments.length) {
+    playTranscriptAll();
+    return;
+  }
+
+  transcriptSkipSilenceMode = false;
+  if (transcriptWavesurfer) {
+    transcriptWavesurfer.pause();
+  }
+
+  try {
+    const player = await ensureTranscriptSpeechPlayer(recordingId);
+    if (currentTranscriptRecordingId !== recordingId) return;
+    const { audio } = player;
+    if (audio.ended || audio.currentTime === 0) {
+      // Start from the waveform position if the user moved it.
+      const sourceTime =
+        transcriptWavesurfer && typeof transcriptWavesurfer.getCurrentTime === "function"
+          ? transcriptWavesurfer.getCurrentTime()
+          : 0;
+      audio.currentTime = sourceTimeToSpeechTime(player.timeMap, sourceTime);
+    }
+    await audio.play();
+  } catch (err) {
+    console.error("Speech-only playback unavailable; skipping silence locally", err);
+    playTranscriptWithoutSilenceLocally();
+  }
+}
+
 function pauseTranscriptAudio() {
+  pauseTranscriptSpeech();
   if (!transcriptWavesurfer) return;
   transcriptWavesurfer.pause();
 }
 
 function stopTranscriptAudio() {
+  if (transcriptSpeechPlayer) {
+    transcriptSpeechPlayer.audio.pause();
+    transcriptSpeechPlayer.audio.currentTime = 0;
+  }
   if (!transcriptWavesurfer) return;
   transcriptSkipSilenceMode = false;
   if (typeof transcriptWavesurfer.stop === "function") {
@@ -847,6 +971,11 @@ function stopTranscriptAudio() {
 }
 
 function skipTranscriptAudio(seconds) {
+  if (isTranscriptSpeechPlaying()) {
+    const { audio } = transcriptSpeechPlayer;
+    audio.currentTime = Math.max(0, audio.currentTime + seconds);
+    return;
+  }
   if (!transcriptWavesurfer) return;
   if (typeof transcriptWavesurfer.skip === "function") {
     transcriptWavesurfer.skip(seconds);
@@ -1140,6 +1269,8 @@ function renderRecordings(recordings) {
 
   document.getElementById("recordings-empty").style.display = "none";
 
+  const waveformCards = new Map();
+
   for (const item of recordings) {
     const card = createRecordingCard(item);
     grid.appendChild(card);
@@ -1148,7 +1279,7 @@ function renderRecordings(recordings) {
     // accessible for playback. This avoids repeated 404s for entries
     // whose files are offline or on an unmounted backend.
     if (item.accessible !== false) {
-      loadCardWaveform(item.id, card);
+      waveformCards.set(item.id, card);
     }
     
     const checkbox = card.querySelector(".recording-card-checkbox");
@@ -1168,6 +1299,8 @@ function renderRecordings(recordings) {
       });
     }
   }
+
+  loadCardWaveforms(waveformCards);
 }
 
 function createRecordingCard(item) {
@@ -1286,36 +1419,55 @@ function formatFileSize(bytes) {
   return `${mb.toFixed(2)} MB`;
 }
 
-async function loadCardWaveform(recordingId, cardElement) {
-  const waveformContainer = cardElement.querySelector(`#waveform-${recordingId}`);
-  if (!waveformContainer) return;
-
-  try {
+// Render card waveforms for every card that has VAD segments. Segments
+// already held in memory are used directly; the rest are looked up with a
+// single batch request that only returns cached results and asks the server
+// to compute missing ones in the background.
+async function loadCardWaveforms(cardsById) {
+  const missing = [];
+  for (const [recordingId, cardElement] of cardsById) {
     const cachedVad = getCachedVadSegments(recordingId);
     if (cachedVad && cachedVad.length > 0) {
-      renderCardWaveform(waveformContainer, recordingId, cachedVad);
-      return;
+      renderCardWaveformForCard(cardElement, recordingId, cachedVad);
+    } else {
+      missing.push(recordingId);
     }
+  }
 
-    const vadRes = await fetch(`/recordings/${recordingId}/vad_segments`, {
-      method: 'POST',
+  if (!missing.length) return;
+
+  try {
+    const res = await fetch("/recordings/vad_segments/batch", {
+      method: "POST",
       headers: {
-        'Content-Type': 'application/json'
-      }
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify({ ids: missing, enqueue_missing: true }),
     });
-    
-    if (vadRes.ok) {
-      const vadData = await vadRes.json();
-      if (vadData.segments && vadData.segments.length > 0) {
-        setCachedVadSegments(recordingId, vadData.segments);
-        renderCardWaveform(waveformContainer, recordingId, vadData.segments);
+    if (!res.ok) return;
+
+    const data = await res.json();
+    const items = (data && data.items) || {};
+    for (const [recordingId, entry] of Object.entries(items)) {
+      const segments = entry && Array.isArray(entry.segments) ? entry.segments : [];
+      if (!segments.length) continue;
+      setCachedVadSegments(recordingId, segments);
+      const cardElement = cardsById.get(recordingId);
+      if (cardElement) {
+        renderCardWaveformForCard(cardElement, recordingId, segments);
       }
     }
   } catch (err) {
-    console.error("Failed to load waveform for card", err);
+    console.error("Failed to load waveforms for cards", err);
   }
 }
 
+function renderCardWaveformForCard(cardElement, recordingId, vadSegments) {
+  const waveformContainer = cardElement.querySelector(`#waveform-${recordingId}`);
+  if (!waveformContainer) return;
+  renderCardWaveform(waveformContainer, recordingId, vadSegments);
+}
+
 function renderCardWaveform(container, recordingId, vadSegments) {
   if (!container || !vadSegments || vadSegments.length === 0) return;
 
@@ -1328,7 +1480,10 @@ function renderCardWaveform(container, recordingId, vadSegments) {
   }));
 
   const wavesurferEl = document.createElement('wavesurfer');
-  wavesurferEl.setAttribute('data-url', `/recordings/${recordingId}/stream`);
+  // Cards only draw a waveform: use precomputed peaks, falling back to the
+  // smaller mono analysis proxy.
+  wavesurferEl.setAttribute('data-peaks-url', `/recordings/${recordingId}/peaks`);
+  wavesurferEl.setAttribute('data-url', `/recordings/${recordingId}/analysis_audio`);
   wavesurferEl.setAttribute('data-height', '80');
   wavesurferEl.setAttribute('data-wave-color', 'rgba(255, 255, 255, 0.5)');
   wavesurferEl.setAttribute('data-progress-color', 'rgba(255, 255, 255, 0.8)');
@@ -1494,7 +1649,137 @@ async function regenerateVadSegments(id) {
   }
 }
 
-async function transcribeRecordingVadSequential(id, forceVad) {
+const TRANSCRIPTION_JOB_POLL_MS = 2000;
+
+// Polls a queued transcription job until it is no longer queued or running.
+async function waitForTranscriptionJob(jobId) {
+  while (true) {
+    await new Promise((resolve) =>
+      setTimeout(resolve, TRANSCRIPTION_JOB_POLL_MS)
+    );
+    const res = await fetch(`/transcription/jobs/${jobId}`);
+    if (!res.ok) {
+      return { status: "failed", error: `Transcription job lost (${res.status})` };
+    }
+    const job = await res.json();
+    if (job.status !== "queued" && job.status !== "running") {
+      return job;
+    }
+  }
+}
+
+// Aborts the fetch that follows a server-side VAD-sequential job. Aborting
+// only stops listening; the job keeps running and caching on the server.
+let transcriptSequentialStreamController = null;
+// Queue id of the job being followed (X-Transcription-Job), used to cancel it.
+let transcriptSequentialJobId = null;
+
+async function cancelSequentialTranscription() {
+  const jobId = transcriptSequentialJobId;
+  if (!jobId) return;
+  try {
+    await fetch(`/transcription/jobs/${jobId}/cancel`, { method: "POST" });
+  } catch (err) {
+    console.warn("Failed to cancel transcription job", err);
+  }
+}
+
+async function followSequentialTranscription(id, options, onEvent) {
+  const controller = new AbortController();
+  transcriptSequentialStreamController = controller;
+
+  // Events already handled; sent as ?after= when a dropped stream is resumed.
+  let received = 0;
+  let attempts = 0;
+
+  try {
+    while (true) {
+      const params = new URLSearchParams();
+      params.set("response_format", options.responseFormat || "text");
+      if (options.force && received === 0) {
+        params.set("force", "true");
+      }
+      if (received > 0) {
+        params.set("after", String(received));
+      }
+      const url = `/recordings/${id}/transcribe_sequential?${params.toString()}`;
+
+      let finished = false;
+      try {
+        const res = await fetch(url, {
+          method: "POST",
+          signal: controller.signal,
+        });
+        if (!res.ok || !res.body) {
+          const body = await res.json().catch(() => ({}));
+          throw Object.assign(
+            new Error(body.detail || `Failed to start transcription (${res.status})`),
+            { fatal: true },
+          );
+        }
+        transcriptSequentialJobId =
+          res.headers.get("X-Transcription-Job") || transcriptSequentialJobId;
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (!finished) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+
+          let newlineIdx = buffer.indexOf("\n");
+          while (newlineIdx >= 0) {
+            const line = buffer.slice(0, newlineIdx).trim();
+            buffer = buffer.slice(newlineIdx + 1);
+            newlineIdx = buffer.indexOf("\n");
+            if (!line) continue;
+
+            const msg = JSON.parse(line);
+            if (msg.type === "ping") continue;
+            received += 1;
+            attempts = 0;
+            if (msg.type === "error") {
+              throw Object.assign(
+                new Error(msg.detail || "Error processing transcription segments"),
+                { fatal: true },
+              );
+            }
+            if (msg.type === "cancelled") {
+              throw Object.assign(new Error("Transcription cancelled"), {
+                fatal: true,
+              });
+            }
+            onEvent(msg);
+            if (msg.type === "done") {
+              finished = true;
+              break;
+            }
+          }
+        }
+      } catch (err) {
+        if (err.fatal || controller.signal.aborted || attempts >= 3) {
+          throw err;
+        }
+        console.warn("Transcription stream dropped; resuming", err);
+      }
+
+      if (finished) return;
+      // The connection ended before the job did: reattach and continue
+      // from the last event we saw.
+      attempts += 1;
+      await new Promise((resolve) => setTimeout(resolve, 1000 * attempts));
+    }
+  } finally {
+    if (transcriptSequentialStreamController === controller) {
+      transcriptSequentialStreamController = null;
+      transcriptSequentialJobId = null;
+    }
+  }
+}
+
+async function transcribeRecordingVadSequential(id, force) {
   const loadingEl = document.getElementById("transcript-loading");
   const contentEl = document.getElementById("transcript-content");
   const retryBtn = document.getElementById("transcript-retry-btn");
@@ -1535,162 +1820,117 @@ async function transcribeRecordingVadSequential(id, forceVad) {
     retryBtn.disabled = true;
   }
 
-  // Check for cached VAD segments first, unless forceVad is true
-  let segments = [];
-  if (!forceVad) {
-    const cachedSegments = getCachedVadSegments(id);
-    if (cachedSegments && cachedSegments.length > 0) {
-      segments = cachedSegments;
-      console.log(`Using ${segments.length} cached VAD segments`);
-    }
-  }
-
-  // If no cached segments or forceVad is true, fetch from API
-  if (segments.length === 0) {
-    setTranscriptLoading(loadingEl, true);
-    setTranscriptStatusText("Detecting speech segments in audio file...");
+  // Segments come from the server job: cached VAD segments are replayed
+  // straight away, otherwise they arrive while the detector is running.
+  const segments = [];
+  let vadDone = false;
+  let completed = 0;
+  let progressShown = false;
 
-    try {
-      const vadUrl = forceVad
-        ? `/recordings/${id}/vad_segments?force=true`
-        : `/recordings/${id}/vad_segments`;
-      const vadRes = await fetch(vadUrl, { method: "POST" });
-      if (!vadRes.ok) {
-        const body = await vadRes.json().catch(() => ({}));
-        errorMessage =
-          body.detail ||
-          `Failed to detect speech segments (${vadRes.status})`;
-        setRecordingsMessage(errorMessage, "danger");
-        return;
-      }
-
-      const vadData = await vadRes.json();
-      segments = Array.isArray(vadData.segments)
-        ? vadData.segments
-        : [];
-      
-      // Cache the segments for future use
-      if (segments.length > 0) {
-        setCachedVadSegments(id, segments);
-      }
-    } catch (err) {
-      console.error(err);
-      errorMessage = "Error detecting speech segments";
-      setRecordingsMessage(errorMessage, "danger");
-      return;
-    }
+  setTranscriptLoading(loadingEl, true);
+  setTranscriptStatusText("Detecting speech segments in audio file...");
+  if (!transcriptWavesurfer) {
+    initTranscriptWaveform(id, []);
+  } else {
+    transcriptSegments = [];
+    renderTranscriptTimelineSegments();
   }
 
-  try {
+  const onVadSegment = (msg) => {
+    segments[msg.index] = { start: msg.start, end: msg.end };
+    transcriptSegments.push({
+      index: msg.index,
+      start: msg.start,
+      end: msg.end,
+      content: "",
+    });
+    renderTranscriptTimelineSegments();
+    syncTranscriptRegionsFromSegments();
+  };
 
-    if (!segments.length) {
-      errorMessage =
-        "No speech segments were detected in the audio file.";
-      setTranscriptStatusText(errorMessage);
+  const onSegment = (msg) => {
+    if (!progressShown) {
+      showTranscriptProgress(segments.length);
       setTranscriptLoading(loadingEl, false);
-      return;
-    }
-
-    // Only reinitialize waveform if it doesn't exist or segments changed
-    // This preserves the timeline annotations when using cached segments
-    if (!transcriptWavesurfer || transcriptSegments.length !== segments.length) {
-      initTranscriptWaveform(id, segments);
-    } else {
-      // Waveform exists with same segments, just ensure they're set
-      transcriptSegments = normalizeTranscriptSegments(segments);
+      progressShown = true;
     }
 
-    showTranscriptProgress(segments.length);
-    setTranscriptLoading(loadingEl, false);
-    setTranscriptStatusText(
-      `Processing segments (0 of ${segments.length} completed)...`,
-    );
-
-    let completed = 0;
-
-    for (let i = 0; i < segments.length; i += 1) {
-      if (transcriptAbortRequested) {
-        resetTranscriptProgressUI();
-        setTranscriptStatusText("Transcription cancelled.");
-        break;
-      }
-
-      const seg = segments[i];
-      if (
-        !seg ||
-        typeof seg.start !== "number" ||
-        typeof seg.end !== "number"
-      ) {
-        continue;
-      }
-
-      const params = new URLSearchParams();
-      params.set("start", String(seg.start));
-      params.set("end", String(seg.end));
-      params.set("segment_index", String(i));
-      // ui_format tells the backend that this run is using the
-      // VAD + Sequential UI mode so that it can store and reuse
-      // cached segment transcriptions under the 'vad_sequential'
-      // cache key.
-      params.set("ui_format", "vad_sequential");
-      if (segmentResponseFormat) {
-        params.set("response_format", segmentResponseFormat);
-      }
-
-      const url = `/recordings/${id}/transcribe_segment?${params.toString()}`;
-      const res = await fetch(url, { method: "POST" });
-      if (!res.ok) {
-        const body = await res.json().catch(() => ({}));
-        errorMessage =
-          body.detail ||
-          `Failed to transcribe segment ${i + 1} (${res.status})`;
-        setRecordingsMessage(errorMessage, "danger");
-        break;
-      }
+    const segIndex = msg.index;
+    const content = typeof msg.content === "string" ? msg.content : "";
 
-      const data = await res.json();
-      const content =
-        data && typeof data.content === "string" ? data.content : "";
-
-      const newlinePerResponse = shouldUseNewlinePerResponse();
-      if (newlinePerResponse) {
-        appendTranscriptChatMessage(content, i, seg.start, seg.end);
-        updateTranscriptSegmentContent(i, content);
-      } else {
-        contentEl.style.display = "block";
-        contentEl.classList.add("border", "rounded", "px-2", "py-1", "bg-light");
-        const existing = contentEl.textContent || "";
-        let addition = content || "";
-        // In paragraph mode, collapse all whitespace (including newlines)
-        // into single spaces so the text reads as one flowing paragraph.
-        addition = addition.replace(/\s+/g, " ").trim();
-        if (!addition) {
-          continue;
-        }
+    const newlinePerResponse = shouldUseNewlinePerResponse();
+    if (newlinePerResponse) {
+      appendTranscriptChatMessage(content, segIndex, msg.start, msg.end);
+      updateTranscriptSegmentContent(segIndex, content);
+    } else {
+      contentEl.style.display = "block";
+      contentEl.classList.add("border", "rounded", "px-2", "py-1", "bg-light");
+      const existing = contentEl.textContent || "";
+      let addition = content || "";
+      // In paragraph mode, collapse all whitespace (including newlines)
+      // into single spaces so the text reads as one flowing paragraph.
+      addition = addition.replace(/\s+/g, " ").trim();
+      if (addition) {
         const needsSpace =
           existing && !existing.endsWith(" ") && !addition.startsWith(" ");
         contentEl.textContent = existing
           ? `${existing}${needsSpace ? " " : ""}${addition}`
           : addition;
-        updateTranscriptSegmentContent(i, addition);
+        updateTranscriptSegmentContent(segIndex, addition);
       }
+    }
+
+    completed += 1;
+    transcriptCompletedSegments = completed;
+    transcriptTotalSegments = segments.length;
+    updateTranscriptProgress(completed, segments.length);
+    setTranscriptStatusText(
+      vadDone
+        ? `Processing segments (${completed} of ${segments.length} completed)...`
+        : `Processing segments (${completed} of ${segments.length}+ detected so far)...`,
+    );
+  };
 
-      completed += 1;
-      transcriptCompletedSegments = completed;
-      updateTranscriptProgress(completed, segments.length);
+  try {
+    await followSequentialTranscription(
+      id,
+      { responseFormat: segmentResponseFormat, force },
+      (msg) => {
+        if (msg.type === "vad_segment") {
+          onVadSegment(msg);
+        } else if (msg.type === "segment") {
+          onSegment(msg);
+        } else if (msg.type === "done") {
+          vadDone = true;
+        }
+      },
+    );
+
+    vadDone = true;
+    if (segments.length > 0) {
+      setCachedVadSegments(id, segments);
+    }
+
+    if (!segments.length) {
       setTranscriptStatusText(
-        `Processing segments (${completed} of ${segments.length} completed)...`,
+        "No speech segments were detected in the audio file.",
       );
+      return;
     }
 
-    if (!errorMessage && transcriptCompletedSegments === segments.length) {
+    if (transcriptCompletedSegments === segments.length) {
       resetTranscriptProgressUI();
       setTranscriptStatusText("");
     }
   } catch (err) {
-    console.error(err);
-    errorMessage = "Error processing transcription segments";
-    setRecordingsMessage(errorMessage, "danger");
+    if (transcriptAbortRequested) {
+      resetTranscriptProgressUI();
+      setTranscriptStatusText("Transcription cancelled.");
+    } else {
+      console.error(err);
+      errorMessage = err.message || "Error processing transcription segments";
+      setRecordingsMessage(errorMessage, "danger");
+    }
   } finally {
     if (retryBtn) {
       retryBtn.disabled = false;
@@ -1761,7 +2001,7 @@ async function transcribeRecording(id, overrideFormat, forceFresh) {
   }
 
   if (normalizedFormat === "vad_sequential") {
-    await transcribeRecordingVadSequential(id, false);
+    await transcribeRecordingVadSequential(id, Boolean(forceFresh));
     return;
   }
 
@@ -1784,9 +2024,31 @@ async function transcribeRecording(id, overrideFormat, forceFresh) {
         ? `/recordings/${id}/transcribe?${params.toString()}`
         : `/recordings/${id}/transcribe`;
 
-    const res = await fetch(url, {
+    let res = await fetch(url, {
       method: "POST",
     });
+    // 202: the job outlived the request. Once it is done, asking again
+    // without force returns its cached result.
+    while (res.status === 202) {
+      const pending = await res.json();
+      const job = await waitForTranscriptionJob(pending.job_id);
+      if (job.status !== "done") {
+        errorMessage =
+          job.error ||
+          (job.status === "cancelled"
+            ? "Transcription was cancelled"
+            : "Transcription failed");
+        setRecordingsMessage(errorMessage, "danger");
+        return;
+      }
+      params.delete("force");
+      res = await fetch(
+        params.toString().length > 0
+          ? `/recordings/${id}/transcribe?${params.toString()}`
+          : `/recordings/${id}/transcribe`,
+        { method: "POST" }
+      );
+    }
     if (!res.ok) {
       const body = await res.json().catch(() => ({}));
       errorMessage =
@@ -1972,6 +2234,10 @@ window.addEventListener("DOMContentLoaded", () => {
     stopBtn.addEventListener("click", (event) => {
       event.preventDefault();
       transcriptAbortRequested = true;
+      cancelSequentialTranscription();
+      if (transcriptSequentialStreamController) {
+        transcriptSequentialStreamController.abort();
+      }
     });
   }
   const newlineEl = document.getElementById("transcript-per-response-newline");
@@ -2139,12 +2405,15 @@ window.addEventListener("DOMContentLoaded", () => {
   const speedSelect = document.getElementById("transcript-audio-speed");
   if (speedSelect) {
     speedSelect.addEventListener("change", () => {
-      if (!transcriptWavesurfer) return;
       const raw = speedSelect.value;
       const rate = Number.parseFloat(raw);
       if (!Number.isFinite(rate) || rate <= 0) {
         return;
       }
+      if (transcriptSpeechPlayer) {
+        transcriptSpeechPlayer.audio.playbackRate = rate;
+      }
+      if (!transcriptWavesurfer) return;
       if (typeof transcriptWavesurfer.setPlaybackRate === "function") {
         transcriptWavesurfer.setPlaybackRate(rate, true);
       }
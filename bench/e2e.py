@@ -0,0 +1,289 @@
+"""End-to-end throughput of the recorder API against hermetic stand-ins.
+
+Usage: python -m bench.e2e [--recordings 3] [--seconds 120] [--latency 0.3]
+       [--per-second 0.05] [--jitter 0.1] [--parallel 1]
+       [--scenarios upload,pipeline,vad,sequential,full]
+
+Nothing external is needed: bench/fakes/bin (ffmpeg, arecord and
+vad-speech-segments stubs) is put first on PATH, a fake Whisper server
+(bench.fakes.whisper_server) runs in-process, and every database, config
+file and recording lives in a temporary directory. The real application
+is driven through its HTTP API (FastAPI TestClient, startup hooks
+included), one scenario after the other for every synthetic recording:
+
+  upload      POST /recordings/upload of a stereo 48 kHz speech-like WAV
+  pipeline    background processing after the upload, until it is idle
+  vad         POST /recordings/{id}/vad_segments?force=true
+  sequential  VAD + Sequential transcription, streamed, force=true
+  full        POST /recordings/{id}/transcribe?force=true (json)
+
+For each scenario the report gives throughput (audio seconds processed
+per wall-clock second), p50/p95 latency, and a breakdown of where the
+time went: Whisper connect/upload/server/download totals from the pooled
+client, and for sequential runs the time until VAD finished and until the
+first transcript arrived.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import wave
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+
+FAKES_BIN = Path(__file__).resolve().parent / "fakes" / "bin"
+SCENARIOS = ("upload", "pipeline", "vad", "sequential", "full")
+WHISPER_STAGES = ("connect", "upload", "server", "download")
+
+
+def _speech_wav(seconds: float, rate: int = 48000, seed: int = 0) -> bytes:
+    """Stereo 16-bit WAV of 1-3 s tone bursts separated by 0.3-2 s of silence."""
+
+    rng = random.Random(seed)
+    tone = [int(4000 * math.sin(2 * math.pi * 220 * n / rate)) for n in range(rate)]
+    frames = bytearray()
+    total = int(seconds * rate)
+    done = 0
+    speaking = False
+    while done < total:
+        length = rng.uniform(1.0, 3.0) if speaking else rng.uniform(0.3, 2.0)
+        n = min(total - done, int(length * rate))
+        if speaking:
+            burst = [tone[k % rate] for k in range(n)]
+            frames += struct.pack(f"<{2 * n}h", *(s for s in burst for _ in (0, 1)))
+        else:
+            frames += b"\x00" * (4 * n)
+        done += n
+        speaking = not speaking
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Recorder:
+    """Collects per-scenario latencies and stage timings."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.audio: Dict[str, float] = defaultdict(float)
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def add(self, scenario: str, seconds: float, audio_seconds: float) -> None:
+        self.latencies[scenario].append(seconds)
+        self.audio[scenario] += audio_seconds
+
+    def add_stages(self, scenario: str, stages: Dict[str, float]) -> None:
+        for name, value in stages.items():
+            self.stages[scenario][name] += value
+
+    def report(self) -> None:
+        print(
+            f"\n{'scenario':<11s} {'n':>3s} {'audio x':>8s} {'p50 s':>8s}"
+            f" {'p95 s':>8s}  breakdown (totals, s)"
+        )
+        for scenario in SCENARIOS:
+            values = self.latencies.get(scenario)
+            if not values:
+                continue
+            wall = sum(values)
+            speed = self.audio[scenario] / wall if wall > 0 else 0.0
+            stages = ", ".join(
+                f"{name} {value:.2f}"
+                for name, value in self.stages.get(scenario, {}).items()
+                if value > 0
+            )
+            print(
+                f"{scenario:<11s} {len(values):3d} {speed:8.1f}"
+                f" {statistics.median(values):8.3f} {_percentile(values, 0.95):8.3f}"
+                f"  {stages or '-'}"
+            )
+
+
+def _whisper_totals(client) -> Dict[str, float]:
+    stats = client.get("/ui/whisper-stats").json()
+    totals = {name: float(stats.get(f"{name}_seconds", 0.0)) for name in WHISPER_STAGES}
+    totals["requests"] = float(stats.get("requests", 0))
+    return totals
+
+
+def _diff(after: Dict[str, float], before: Dict[str, float]) -> Dict[str, float]:
+    return {f"whisper {k}": after[k] - before[k] for k in after}
+
+
+def _wait_for_pipeline(client, recording_id: str, timeout: float = 600.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stages = client.get(f"/recordings/{recording_id}/pipeline").json()["stages"]
+        if stages and all(s["status"] not in ("pending", "running") for s in stages):
+            return
+        time.sleep(0.05)
+    raise RuntimeError(f"pipeline for {recording_id} did not finish")
+
+
+def _run_sequential(client, recording_id: str) -> Dict[str, float]:
+    began = time.perf_counter()
+    first = last_vad = None
+    segments = 0
+    with client.stream(
+        "POST",
+        f"/recordings/{recording_id}/transcribe_sequential",
+        params={"force": "true", "force_vad": "true"},
+    ) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            now = time.perf_counter() - began
+            if event["type"] == "vad_segment":
+                last_vad = now
+            elif event["type"] == "segment":
+                segments += 1
+                if first is None:
+                    first = now
+            elif event["type"] == "error":
+                raise RuntimeError(event.get("detail"))
+            elif event["type"] == "done":
+                break
+    return {
+        "segments": float(segments),
+        "until last vad segment": last_vad or 0.0,
+        "until first transcript": first or 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recordings", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--per-second", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    args = parser.parse_args()
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.TemporaryDirectory()
+    root = Path(tmp.name)
+    (root / "vad-model.bin").write_bytes(b"fake")
+    # Settings are read when app.core.config is first imported.
+    os.environ["PATH"] = f"{FAKES_BIN}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ.update(
+        {
+            "RECORDER_CACHE_DB_PATH": str(root / "db" / "cache.db"),
+            "RECORDER_RECORDINGS_LOCAL_ROOT": str(root / "recordings"),
+            "RECORDER_CONFIG_PATH": str(root / "config.json"),
+            "RECORDER_VAD_BINARY": str(FAKES_BIN / "vad-speech-segments"),
+            "RECORDER_VAD_MODEL_PATH": str(root / "vad-model.bin"),
+        }
+    )
+    if "app.core.config" in sys.modules:
+        raise SystemExit("run as a fresh process: python -m bench.e2e")
+
+    from fastapi.testclient import TestClient
+
+    from app.core.app_config import AppConfig, save_app_config
+    from app.main import app
+    from bench.fakes.whisper_server import FakeWhisperServer
+
+    server = FakeWhisperServer(
+        ("127.0.0.1", 0),
+        latency=args.latency,
+        per_second=args.per_second,
+        jitter=args.jitter,
+        parallel=args.parallel,
+        seed=0,
+    ).start()
+    cfg = AppConfig()
+    cfg.whisper.enabled = True
+    cfg.whisper.api_url = server.url
+    cfg.whisper.response_format = "json"
+    save_app_config(cfg)
+
+    results = Recorder()
+    print(
+        f"{args.recordings} recording(s) of {args.seconds:.0f} s; fake Whisper"
+        f" latency {args.latency} s + {args.per_second} s/audio s"
+        f" (+/-{args.jitter:.0%}), {args.parallel} parallel"
+    )
+    with TestClient(app) as client:
+        for n in range(args.recordings):
+            wav = _speech_wav(args.seconds, seed=n)
+            began = time.perf_counter()
+            response = client.post(
+                "/recordings/upload",
+                files={"file": (f"bench_{n}.wav", wav, "audio/wav")},
+            )
+            response.raise_for_status()
+            elapsed = time.perf_counter() - began
+            recording_id = response.json()["id"]
+            if "upload" in selected:
+                results.add("upload", elapsed, args.seconds)
+
+            began = time.perf_counter()
+            _wait_for_pipeline(client, recording_id)
+            if "pipeline" in selected:
+                results.add("pipeline", time.perf_counter() - began, args.seconds)
+
+            if "vad" in selected:
+                began = time.perf_counter()
+                client.post(
+                    f"/recordings/{recording_id}/vad_segments", params={"force": "true"}
+                ).raise_for_status()
+                results.add("vad", time.perf_counter() - began, args.seconds)
+
+            if "sequential" in selected:
+                before = _whisper_totals(client)
+                began = time.perf_counter()
+                stages = _run_sequential(client, recording_id)
+                results.add("sequential", time.perf_counter() - began, args.seconds)
+                results.add_stages("sequential", stages)
+                results.add_stages(
+                    "sequential", _diff(_whisper_totals(client), before)
+                )
+
+            if "full" in selected:
+                before = _whisper_totals(client)
+                began = time.perf_counter()
+                client.post(
+                    f"/recordings/{recording_id}/transcribe",
+                    params={"force": "true", "response_format": "json"},
+                ).raise_for_status()
+                results.add("full", time.perf_counter() - began, args.seconds)
+                results.add_stages("full", _diff(_whisper_totals(client), before))
+            print(f"  recording {n + 1}/{args.recordings} done", flush=True)
+
+    results.report()
+    print(
+        f"\nfake Whisper served {server.requests} request(s),"
+        f" {server.audio_seconds:.0f} s of audio"
+    )
+    server.shutdown()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Stand-in for a whisper.cpp server, for benchmarks and local testing.
+
+Usage: python -m bench.fakes.whisper_server [--port 8093] [--latency 0.3]
+       [--per-second 0.05] [--jitter 0.1] [--parallel 1]
+
+Answers POST /inference with plausible output in every response format
+(text, json, verbose_json with word timings, srt, vtt), POST /load and
+GET /health. Each inference takes latency + per_second * audio seconds,
+varied by up to +/- jitter (a fraction), and at most --parallel requests
+are processed at once (whisper.cpp handles one at a time by default).
+"""
+
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+WORDS = (
+    "the recorder picked up a short conversation about the weather the garden "
+    "and what to cook for dinner tonight"
+).split()
+WORDS_PER_SECOND = 2.5
+
+
+def _parse_multipart(body: bytes, content_type: str) -> Dict[str, bytes]:
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not match:
+        return {}
+    boundary = b"--" + match.group(1).encode("latin-1")
+    fields: Dict[str, bytes] = {}
+    for part in body.split(boundary):
+        head, sep, value = part.partition(b"\r\n\r\n")
+        if not sep:
+            continue
+        name = re.search(rb'name="([^"]+)"', head)
+        if name:
+            if value.endswith(b"\r\n"):
+                value = value[:-2]
+            fields[name.group(1).decode("latin-1")] = value
+    return fields
+
+
+def _audio_seconds(data: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(data), "rb") as w:
+            return w.getnframes() / float(w.getframerate() or 1)
+    except (wave.Error, EOFError):
+        # Not a WAV we can read; assume 16 kHz mono 16-bit.
+        return max(0.0, (len(data) - 44) / 32000.0)
+
+
+def _timestamp(seconds: float, sep: str) -> str:
+    ms = int(round(seconds * 1000))
+    h, rem = divmod(ms, 3600000)
+    m, rem = divmod(rem, 60000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def render_transcript(seconds: float, fmt: str) -> Tuple[str, str]:
+    """Return (content type, body) for a transcript of seconds of audio."""
+
+    count = max(1, int(seconds * WORDS_PER_SECOND))
+    words = [
+        {
+            "word": " " + WORDS[i % len(WORDS)],
+            "start": round(i * seconds / count, 3),
+            "end": round((i + 1) * seconds / count, 3),
+        }
+        for i in range(count)
+    ]
+    text = "".join(w["word"] for w in words).strip()
+    # One timed segment per ~5 seconds, like whisper's own output.
+    segments = []
+    per_segment = max(1, int(5 * WORDS_PER_SECOND))
+    for i in range(0, count, per_segment):
+        chunk = words[i : i + per_segment]
+        segments.append(
+            {
+                "id": len(segments),
+                "start": chunk[0]["start"],
+                "end": chunk[-1]["end"],
+                "text": "".join(w["word"] for w in chunk),
+                "words": chunk,
+            }
+        )
+
+    if fmt == "text":
+        return "text/plain", text + "\n"
+    if fmt == "verbose_json":
+        payload = {"task": "transcribe", "duration": seconds, "text": text}
+        payload["segments"] = segments
+        return "application/json", json.dumps(payload)
+    if fmt in ("srt", "vtt"):
+        sep = "," if fmt == "srt" else "."
+        cues = []
+        for seg in segments:
+            start = _timestamp(seg["start"], sep)
+            end = _timestamp(seg["end"], sep)
+            cue = f"{start} --> {end}\n{seg['text'].strip()}\n"
+            cues.append(f"{seg['id'] + 1}\n{cue}" if fmt == "srt" else cue)
+        body = "\n".join(cues)
+        return "text/plain", ("WEBVTT\n\n" + body) if fmt == "vtt" else body
+    return "application/json", json.dumps({"text": text})
+
+
+class FakeWhisperServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        latency: float = 0.3,
+        per_second: float = 0.05,
+        jitter: float = 0.1,
+        parallel: int = 1,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.per_second = per_second
+        self.jitter = jitter
+        self.slots = threading.BoundedSemaphore(max(1, parallel))
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.audio_seconds = 0.0
+        self.model = "ggml-base.en.bin"
+
+    def delay(self, seconds: float) -> float:
+        with self.lock:
+            factor = 1.0 + self.random.uniform(-self.jitter, self.jitter)
+        return max(0.0, (self.latency + self.per_second * seconds) * factor)
+
+    def start(self) -> "FakeWhisperServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeWhisperServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _reply(self, status: int, content_type: str, body: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/health":
+            self._reply(200, "application/json", json.dumps({"status": "ok"}))
+        else:
+            self._reply(404, "application/json", json.dumps({"error": "not found"}))
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        fields = _parse_multipart(body, self.headers.get("Content-Type", ""))
+        path = self.path.rstrip("/")
+
+        if path == "/load":
+            model = fields.get("model", b"").decode("utf-8", errors="ignore")
+            self.server.model = model or self.server.model
+            self._reply(200, "text/plain", "Load was successful!")
+            return
+        if path != "/inference":
+            self._reply(404, "application/json", json.dumps({"error": "not found"}))
+            return
+        if "file" not in fields:
+            self._reply(400, "application/json", json.dumps({"error": "no file"}))
+            return
+
+        fmt = fields.get("response_format", b"json").decode("utf-8").strip() or "json"
+        seconds = _audio_seconds(fields["file"])
+        with self.server.slots:
+            time.sleep(self.server.delay(seconds))
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.audio_seconds += seconds
+        content_type, text = render_transcript(seconds, fmt)
+        self._reply(200, content_type, text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8093)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--per-second", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--parallel", type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeWhisperServer(
+        (args.host, args.port),
+        latency=args.latency,
+        per_second=args.per_second,
+        jitter=args.jitter,
+        parallel=args.parallel,
+    )
+    print(f"Fake Whisper server listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""End-to-end VAD-sequential transcription time with and without packing.
+
+Usage: python -m bench.segment_packing [--counts 25,100,300] [--overhead 0.25]
+
+A local HTTP server stands in for whisper.cpp. Each request costs a fixed
+overhead (model warm-up, encoder pass over a padded 30 s window) plus a
+per-second decoding cost, scaled down so the run finishes quickly. For each
+segment count a synthetic recording with that many 1-3 s speech segments is
+transcribed through the real pipeline (slicing, HTTP upload, caching) once
+with packing disabled and once with the default pack size.
+"""
+
+import argparse
+import json
+import random
+import struct
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from app.core import transcription
+from app.core.app_config import VadConfig, WhisperConfig
+from app.core.config import settings
+
+
+def _fake_server(overhead: float, per_second: float) -> ThreadingHTTPServer:
+    state = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):  # keep the output readable
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            state["requests"] += 1
+            # 16 kHz mono 16-bit: 32000 bytes per second of audio.
+            seconds = len(body) / 32000.0
+            time.sleep(overhead + per_second * seconds)
+            payload = json.dumps(
+                {
+                    "text": "words",
+                    "segments": [{"start": 0.0, "end": seconds, "text": "words"}],
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.state = state  # type: ignore[attr-defined]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _write_recording(path: Path, count: int, rng: random.Random):
+    segments = []
+    cursor = 0.5
+    for _ in range(count):
+        length = rng.uniform(1.0, 3.0)
+        segments.append({"start": round(cursor, 3), "end": round(cursor + length, 3)})
+        cursor += length + rng.uniform(0.3, 2.0)
+    frames = int((cursor + 0.5) * 16000)
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(struct.pack("<h", 600) * frames)
+    return segments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", default="25,100,300")
+    parser.add_argument("--overhead", type=float, default=0.25)
+    parser.add_argument("--per-second", type=float, default=0.01)
+    parser.add_argument("--pack-seconds", type=float, default=25.0)
+    args = parser.parse_args()
+
+    server = _fake_server(args.overhead, args.per_second)
+    url = f"http://127.0.0.1:{server.server_port}"
+    rng = random.Random(0)
+
+    print(f"{'segments':>8s} {'packing':>8s} {'requests':>8s} {'seconds':>8s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.cache_db_path = str(Path(tmp) / "cache.db")
+        settings.analysis_cache_dir = str(Path(tmp) / "analysis")
+        for count in (int(c) for c in args.counts.split(",")):
+            recording_id = f"{count:032x}"
+            path = Path(tmp) / f"bench_{recording_id}.wav"
+            segments = _write_recording(path, count, rng)
+            for pack in (0.0, args.pack_seconds):
+                whisper_cfg = WhisperConfig(
+                    enabled=True, api_url=url, pack_max_seconds=pack
+                )
+                before = server.state["requests"]
+                began = time.perf_counter()
+                transcription.transcribe_recording_sequential(
+                    recording_id,
+                    path,
+                    segments,
+                    whisper_cfg,
+                    VadConfig(),
+                    force=True,
+                )
+                elapsed = time.perf_counter() - began
+                print(
+                    f"{count:8d} {('off' if not pack else f'{pack:.0f} s'):>8s}"
+                    f" {server.state['requests'] - before:8d} {elapsed:8.2f}"
+                )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare per-segment slicing latency: native NumPy path vs ffmpeg.
+
+Usage: python -m bench.segment_slicing [--seconds 600] [--segments 50]
+
+A synthetic stereo 48 kHz 16-bit recording is written to a temporary
+directory and random segments are cut out of it with both implementations.
+The ffmpeg path is skipped when ffmpeg is not installed.
+"""
+
+import argparse
+import random
+import shutil
+import statistics
+import struct
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from app.core import pcm
+from app.core.transcription import _extract_segment_wav_ffmpeg
+from app.core.wav import read_wav_info
+
+
+def _write_recording(path: Path, seconds: int, rate: int) -> None:
+    block = struct.pack("<hh", 1200, -800) * rate
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        for _ in range(seconds):
+            w.writeframes(block)
+
+
+def _time(fn, ranges):
+    timings = []
+    for start, end in ranges:
+        began = time.perf_counter()
+        fn(start, end)
+        timings.append((time.perf_counter() - began) * 1000.0)
+    return timings
+
+
+def _report(label: str, timings) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(
+        f"{label:8s} n={len(ordered):4d}  p50={statistics.median(ordered):8.2f} ms"
+        f"  p95={p95:8.2f} ms  max={ordered[-1]:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=600)
+    parser.add_argument("--segments", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=48000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ranges = []
+    for _ in range(args.segments):
+        start = rng.uniform(0, args.seconds - 15)
+        ranges.append((start, start + rng.uniform(1.0, 15.0)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.wav"
+        _write_recording(path, args.seconds, args.rate)
+
+        if not pcm.can_convert(read_wav_info(path)):
+            print("native   skipped (numpy not installed)")
+        else:
+            _report("native", _time(lambda s, e: pcm.slice_wav_mono(path, s, e), ranges))
+
+        if shutil.which("ffmpeg") is None:
+            print("ffmpeg   skipped (ffmpeg not installed)")
+        else:
+            _report(
+                "ffmpeg",
+                _time(lambda s, e: _extract_segment_wav_ffmpeg(path, s, e), ranges),
+            )
+
+
+if __name__ == "__main__":
+    main()
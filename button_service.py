@@ -8,6 +8,8 @@ from typing import Optional
 
 import httpx
 
+from recorder_events import EventStream
+
 try:
     import RPi.GPIO as GPIO
 except ImportError:  # pragma: no cover - only used on the Pi
@@ -28,6 +30,9 @@ logger = logging.getLogger("button_service")
 
 _last_press_time: Optional[float] = None
 
+# Recording state pushed by the API; see main().
+_events: Optional[EventStream] = None
+
 
 def _should_handle_press(now: Optional[float] = None) -> bool:
     """
@@ -124,6 +129,11 @@ def _stop_recording() -> None:
 
 def _get_recording_active() -> Optional[bool]:
     """Return True if a recording is active, False if not, or None on error."""
+    recording = _events.get("recording") if _events is not None else None
+    if recording is not None:
+        return bool(recording.get("active"))
+
+    # Event stream down: ask the API.
     url = f"{API_BASE_URL.rstrip('/')}/status"
     try:
         with httpx.Client(timeout=5.0) as client:
@@ -179,6 +189,8 @@ def _cleanup(signum=None, frame=None) -> None:  # pragma: no cover - signal hand
 
 
 def main() -> None:
+    global _events
+
     if GPIO is None:
         logger.error(
             "RPi.GPIO is not available. This script must run on a Raspberry Pi "
@@ -198,6 +210,8 @@ def main() -> None:
     signal.signal(signal.SIGINT, _cleanup)
     signal.signal(signal.SIGTERM, _cleanup)
 
+    _events = EventStream(API_BASE_URL).start()
+
     logger.info(
         "Button service started. Monitoring GPIO %s and posting to %s/recordings/start",
         BUTTON_GPIO,
@@ -11,6 +11,8 @@ from typing import Any, Dict, Optional
 
 import httpx
 
+from recorder_events import EventStream
+
 try:
     from pixel_ring import pixel_ring
 except ImportError:  # pragma: no cover - only used on the Pi
@@ -18,6 +20,9 @@ except ImportError:  # pragma: no cover - only used on the Pi
 
 
 API_BASE_URL = os.getenv("RECORDER_API_BASE_URL", "http://127.0.0.1:8000")
+# Recording state, config and secondary storage state are pushed by the API
+# (GET /events); polling at these intervals is only the fallback while the
+# event stream is down. Service health is always polled (systemctl).
 POLL_INTERVAL = float(os.getenv("RECORDER_RING_POLL_INTERVAL", "1.0"))
 DEFAULT_BRIGHTNESS = int(os.getenv("RECORDER_RING_BRIGHTNESS", "20"))
 # Systemd units whose health we reflect on the second LED
@@ -308,13 +313,14 @@ def main() -> None:
     signal.signal(signal.SIGTERM, _cleanup)
 
     logger.info(
-        "Pixel ring service started. Polling %s/status every %ss (config=%s, slot_interval=%ss)",
+        "Pixel ring service started. Subscribing to %s/events (config=%s, slot_interval=%ss)",
         API_BASE_URL,
-        POLL_INTERVAL,
         CONFIG_FILE_PATH,
         SLOT_INTERVAL_SEC,
     )
 
+    stream = EventStream(API_BASE_URL).start()
+
     # Cached state updated on their own cadences.
     recording_active = False
     services_healthy = False
@@ -322,6 +328,7 @@ def main() -> None:
     cfg: Dict[str, Any] = _load_config()
 
     last_status_poll = 0.0
+    last_health_poll = 0.0
     last_secondary_poll = 0.0
     last_config_poll = 0.0
     last_slot_switch = time.monotonic()
@@ -330,24 +337,33 @@ def main() -> None:
     while True:
         now = time.monotonic()
 
-        # Refresh recording + service health.
-        if now - last_status_poll >= POLL_INTERVAL:
+        recording = stream.get("recording")
+        config_event = stream.get("config")
+        storage = stream.get("storage")
+
+        # Recording state: pushed, or polled while the stream is down.
+        if recording is not None:
+            recording_active = bool(recording.get("active"))
+        elif now - last_status_poll >= POLL_INTERVAL:
             try:
                 recording_active = _fetch_recording_active()
             except Exception as exc:  # pragma: no cover - network specific
                 logger.error("Failed to fetch recording status: %s", exc)
                 recording_active = False
+            last_status_poll = now
 
+        if now - last_health_poll >= POLL_INTERVAL:
             try:
                 services_healthy = _check_services_healthy()
             except Exception as exc:  # pragma: no cover - systemd specific
                 logger.error("Failed to check service health: %s", exc)
                 services_healthy = False
+            last_health_poll = now
 
-            last_status_poll = now
-
-        # Refresh secondary storage presence less frequently.
-        if now - last_secondary_poll >= SECONDARY_POLL_INTERVAL:
+        # Secondary storage presence.
+        if storage is not None:
+            secondary_present = bool(storage.get("mounted"))
+        elif now - last_secondary_poll >= SECONDARY_POLL_INTERVAL:
             try:
                 secondary_present = _check_secondary_storage_present()
             except Exception as exc:  # pragma: no cover - defensive
@@ -355,8 +371,13 @@ def main() -> None:
                 secondary_present = False
             last_secondary_poll = now
 
-        # Reload config occasionally so changes take effect without restart.
-        if now - last_config_poll >= max(POLL_INTERVAL, 5.0):
+        # Config: pushed when saved, otherwise reloaded occasionally so
+        # changes take effect without restart.
+        if config_event is not None:
+            # The event only carries the sections this service needs; keep
+            # the rest of the last loaded config.
+            cfg = dict(cfg, recording_light=config_event.get("recording_light") or {})
+        elif now - last_config_poll >= max(POLL_INTERVAL, 5.0):
             try:
                 cfg = _load_config()
             except Exception as exc:  # pragma: no cover - defensive
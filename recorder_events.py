@@ -0,0 +1,101 @@
+"""Client for the recorder API's GET /events stream, shared by the
+stand-alone hardware services (button_service.py, pixel_ring_service.py).
+
+An EventStream runs a background thread that keeps one Server-Sent Events
+connection open and remembers the latest state of each topic ("recording",
+"config", "storage"). It reconnects with backoff when the API restarts;
+while it is disconnected, `connected` is False and callers fall back to
+asking the API (or the filesystem) directly.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import httpx
+
+
+logger = logging.getLogger(__name__)
+
+# The API sends a keepalive comment every 15 s.
+READ_TIMEOUT_SECONDS = 40.0
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def iter_sse(lines: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+    """Yield (event, data) pairs from the lines of an SSE stream."""
+
+    event = "message"
+    data = []
+    for line in lines:
+        if not line:
+            if data:
+                try:
+                    yield event, json.loads("\n".join(data))
+                except ValueError:
+                    logger.warning("Ignoring malformed %s event", event)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+class EventStream:
+    def __init__(
+        self,
+        api_base_url: str,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+    ) -> None:
+        self.url = f"{api_base_url.rstrip('/')}/events"
+        self._on_event = on_event
+        self._lock = threading.Lock()
+        self._state: Dict[str, Any] = {}
+        self._connected = False
+
+    @property
+    def connected(self) -> bool:
+        with self._lock:
+            return self._connected
+
+    def get(self, topic: str) -> Optional[Any]:
+        """Latest state of a topic, or None while disconnected."""
+
+        with self._lock:
+            return self._state.get(topic) if self._connected else None
+
+    def start(self) -> "EventStream":
+        threading.Thread(target=self._run, name="recorder-events", daemon=True).start()
+        return self
+
+    def _set_connected(self, connected: bool) -> None:
+        with self._lock:
+            self._connected = connected
+            if not connected:
+                self._state.clear()
+
+    def _run(self) -> None:  # pragma: no cover - background thread
+        backoff = 1.0
+        timeout = httpx.Timeout(5.0, read=READ_TIMEOUT_SECONDS)
+        while True:
+            try:
+                with httpx.Client(timeout=timeout) as client:
+                    with client.stream("GET", self.url) as response:
+                        response.raise_for_status()
+                        logger.info("Subscribed to %s", self.url)
+                        backoff = 1.0
+                        for topic, data in iter_sse(response.iter_lines()):
+                            with self._lock:
+                                self._state[topic] = data
+                                self._connected = True
+                            if self._on_event is not None:
+                                self._on_event(topic, data)
+            except Exception as exc:
+                logger.warning("Event stream %s unavailable: %s", self.url, exc)
+            self._set_connected(False)
+            time.sleep(backoff)
+            backoff = min(MAX_BACKOFF_SECONDS, backoff * 2)
@@ -0,0 +1,114 @@
+import os
+import struct
+import wave
+
+from app.core import analysis
+from app.core.config import settings
+from app.core.wav import read_wav_info
+
+
+def _write_mono_wav(path, samples, rate=16000):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def _use_tmp_cache(tmp_path, monkeypatch, max_bytes=1024 * 1024):
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+    monkeypatch.setattr(settings, "analysis_cache_max_bytes", max_bytes)
+
+
+def test_proxy_slices_segments_from_mapped_samples(tmp_path, monkeypatch):
+    _use_tmp_cache(tmp_path, monkeypatch)
+    src = tmp_path / "rec.wav"
+    _write_mono_wav(src, list(range(16000)))
+
+    proxy = analysis.get_analysis_proxy("a" * 32, src)
+    assert proxy.num_samples == 16000
+    assert read_wav_info(proxy.path).data_offset == 44
+
+    data = analysis.read_segment_wav(proxy, 0.5, 0.75)
+    samples = struct.unpack("<4000h", data[44:])
+    assert samples[0] == 8000
+    assert samples[-1] == 11999
+
+
+def test_proxy_rebuilt_when_source_changes(tmp_path, monkeypatch):
+    _use_tmp_cache(tmp_path, monkeypatch)
+    src = tmp_path / "rec.wav"
+    _write_mono_wav(src, [1] * 1600)
+
+    first = analysis.get_analysis_proxy("b" * 32, src)
+    assert first.num_samples == 1600
+
+    _write_mono_wav(src, [2] * 3200)
+    stat = src.stat()
+    os.utime(src, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    second = analysis.get_analysis_proxy("b" * 32, src)
+    assert second.num_samples == 3200
+
+
+def test_eviction_removes_least_recently_used(tmp_path, monkeypatch):
+    # Each proxy is 44 + 2 * 1600 bytes; allow room for roughly two.
+    _use_tmp_cache(tmp_path, monkeypatch, max_bytes=7000)
+
+    ids = ["c" * 32, "d" * 32, "e" * 32]
+    for idx, recording_id in enumerate(ids):
+        src = tmp_path / f"{recording_id}.wav"
+        _write_mono_wav(src, [idx] * 1600)
+        proxy = analysis.get_analysis_proxy(recording_id, src)
+        # Make access order explicit regardless of filesystem timestamp
+        # granularity.
+        os.utime(proxy.path, (1000 + idx, 1000 + idx))
+
+    analysis.evict_analysis_cache()
+
+    remaining = sorted(p.stem for p in analysis.get_analysis_dir().glob("*.wav"))
+    assert remaining == ids[1:]
+
+
+def test_waveform_peaks_follow_signal_envelope(tmp_path, monkeypatch):
+    _use_tmp_cache(tmp_path, monkeypatch)
+    src = tmp_path / "rec.wav"
+    _write_mono_wav(src, [0] * 8000 + [16384, -32767] * 4000)
+
+    data = analysis.get_waveform_peaks("f" * 32, src)
+    assert data["duration_seconds"] == 1.0
+    peaks = data["peaks"]
+    assert len(peaks) == analysis.WAVEFORM_PEAKS
+    assert max(peaks[:500]) == 0.0
+    assert min(peaks[500:]) == 1.0
+    assert analysis.get_waveform_peaks("f" * 32, src) == data
+
+
+def test_segment_read_rebuilds_a_proxy_evicted_after_lookup(tmp_path, monkeypatch):
+    from app.core import transcription
+
+    _use_tmp_cache(tmp_path, monkeypatch)
+    recording_id = "f" * 32
+    src = tmp_path / f"20250101T120000_{recording_id.upper()}.wav"
+    _write_mono_wav(src, list(range(16000)))
+    analysis.get_analysis_proxy(recording_id, src)
+
+    def find_then_evict(found_id, path):
+        proxy = analysis.find_analysis_proxy(found_id, path)
+        analysis.invalidate_analysis_proxy(found_id)
+        return proxy
+
+    monkeypatch.setattr(transcription, "find_analysis_proxy", find_then_evict)
+    data = transcription.extract_segment_wav(src, 0.5, 0.75)
+    assert struct.unpack("<4000h", data[44:])[0] == 8000
+    assert analysis.find_analysis_proxy(recording_id, src) is not None
+
+
+def test_proxy_metadata_is_replaced_atomically(tmp_path, monkeypatch):
+    _use_tmp_cache(tmp_path, monkeypatch)
+    src = tmp_path / "rec.wav"
+    _write_mono_wav(src, [1] * 1600)
+    analysis.get_analysis_proxy("a" * 32, src)
+    analysis.get_waveform_peaks("a" * 32, src)
+    names = sorted(p.name for p in (tmp_path / "analysis").iterdir())
+    assert names == [f"{'a' * 32}.json", f"{'a' * 32}.peaks.json", f"{'a' * 32}.wav"]
@@ -0,0 +1,50 @@
+import json
+
+from app.core import app_config
+from app.core.app_config import (
+    AppConfig,
+    app_config_version,
+    load_app_config,
+    save_app_config,
+)
+
+
+def test_config_is_parsed_once_and_reloaded_when_the_file_changes(
+    tmp_path, monkeypatch
+):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(app_config, "CONFIG_FILE_PATH", path)
+    path.write_text(json.dumps({"whisper": {"api_url": "http://a"}}))
+
+    first = load_app_config()
+    version = app_config_version()
+    assert first.whisper.api_url == "http://a"
+    assert load_app_config() is first
+    assert app_config_version() == version
+
+    # Another process rewrites the file.
+    path.write_text(json.dumps({"whisper": {"api_url": "http://other"}}))
+    assert load_app_config().whisper.api_url == "http://other"
+    assert app_config_version() > version
+
+
+def test_save_replaces_the_file_and_updates_the_cache(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(app_config, "CONFIG_FILE_PATH", path)
+    path.write_text("{}")
+    inode = path.stat().st_ino
+    version = app_config_version()
+
+    cfg = AppConfig()
+    cfg.whisper.api_url = "http://saved"
+    save_app_config(cfg)
+
+    assert path.stat().st_ino != inode
+    assert json.loads(path.read_text())["whisper"]["api_url"] == "http://saved"
+    assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
+    assert app_config_version() > version
+    cached = load_app_config()
+    assert cached.whisper.api_url == "http://saved"
+    # The cache holds its own copy of what was saved.
+    cfg.whisper.api_url = "http://changed-later"
+    assert load_app_config().whisper.api_url == "http://saved"
@@ -0,0 +1,282 @@
+import json
+import sqlite3
+
+from app.core import cache
+from app.core.config import settings
+
+
+def _store(recording_id, text):
+    cache.upsert_transcript(
+        recording_id,
+        "h",
+        "{}",
+        {"text": text, "duration": 1.0, "timed": False, "segments": []},
+    )
+    cache.upsert_cache_entry(
+        recording_id,
+        "vad",
+        "h",
+        "{}",
+        vad_segments_json=json.dumps([{"start": 0.0, "end": 1.0}]),
+    )
+
+
+def _recordings():
+    conn = sqlite3.connect(settings.cache_db_path)
+    try:
+        rows = conn.execute(
+            "SELECT recording_id FROM transcripts UNION "
+            "SELECT recording_id FROM transcription_cache"
+        ).fetchall()
+    finally:
+        conn.close()
+    return {row[0] for row in rows}
+
+
+def test_maintenance_evicts_orphans_then_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    old, read, new, gone = "1" * 32, "2" * 32, "3" * 32, "4" * 32
+    for recording_id in (old, read, new, gone):
+        _store(recording_id, "word " * 100)
+    # Reading an entry makes it recently used again.
+    assert cache.get_cache_entry(read, "text")["aggregated_text"].startswith("word")
+
+    summary = cache.maintain_cache(present_ids={old, read, new}, max_bytes=0)
+    assert summary["orphaned"] == 1
+    assert _recordings() == {old, read, new}
+    assert cache.get_cache_entry(gone, "vad") is None
+
+    per_recording = summary["bytes"] // 3
+    summary = cache.maintain_cache(max_bytes=per_recording * 2 + 1)
+    assert summary["over_budget"] == 1
+    assert _recordings() == {read, new}
+    assert cache.get_cache_entry(old, "text") is None
+
+
+def test_stats_report_entries_bytes_and_hit_rates(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    recording_id = "5" * 32
+    _store(recording_id, "hello")
+
+    before = cache.cache_stats()["formats"].get("json", {})
+    assert cache.get_cache_entry(recording_id, "json") is not None
+    assert cache.get_cache_entry(recording_id, "json") is not None
+    assert cache.get_cache_entry("6" * 32, "json") is None
+
+    stats = cache.cache_stats()
+    assert stats["recordings"] == 1
+    assert stats["formats"]["transcript"]["entries"] == 1
+    assert stats["formats"]["vad"]["bytes"] > 0
+    json_stats = stats["formats"]["json"]
+    assert json_stats["hits"] - before.get("hits", 0) == 1
+    assert json_stats["memory_hits"] - before.get("memory_hits", 0) == 1
+    assert json_stats["misses"] - before.get("misses", 0) == 1
+
+    cache.delete_recording_cache(recording_id)
+    assert cache.cache_stats()["recordings"] == 0
+
+
+def test_results_follow_audio_content_not_file_name(tmp_path, monkeypatch):
+    import os
+
+    from app.core.storage import scan_filesystem
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    monkeypatch.setattr(cache, "SOURCE_CHECK_SECONDS", 0.0)
+    day = tmp_path / "rec" / "2025" / "01" / "01"
+    day.mkdir(parents=True)
+    audio = os.urandom(300 * 1024)
+
+    recording_id, twin_id = "7" * 32, "8" * 32
+    path = day / f"20250101T120000_{recording_id}.wav"
+    path.write_bytes(audio)
+    scan_filesystem()
+    _store(recording_id, "hello")
+
+    # Renamed and touched: same audio, so the results stay.
+    renamed = day / f"20250101T120000_{recording_id}_meeting.wav"
+    path.rename(renamed)
+    os.utime(renamed, (1, 1))
+    scan_filesystem()
+    assert cache.get_cache_entry(recording_id, "text")["aggregated_text"] == "hello"
+
+    # An identical recording reuses the transcript once both are fully hashed.
+    (day / f"20250102T120000_{twin_id}.wav").write_bytes(audio)
+    scan_filesystem()
+    assert cache.record_full_fingerprint(recording_id)
+    assert cache.record_full_fingerprint(twin_id)
+    assert cache.get_transcript(twin_id)["transcript"]["text"] == "hello"
+
+    # Repaired audio invalidates everything derived from the old file.
+    renamed.write_bytes(b"RIFF" + audio[4:])
+    assert cache.get_cache_entry(recording_id, "text") is None
+    assert cache.get_cache_entry(recording_id, "vad") is None
+    assert cache.get_transcript(twin_id) is not None
+
+
+def test_reading_a_twin_transcript_does_not_store_it(tmp_path, monkeypatch):
+    import os
+
+    from app.core.storage import scan_filesystem
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    day = tmp_path / "rec" / "2025" / "01" / "01"
+    day.mkdir(parents=True)
+    audio = os.urandom(300 * 1024)
+    recording_id, twin_id = "5" * 32, "6" * 32
+    (day / f"20250101T120000_{recording_id}.wav").write_bytes(audio)
+    (day / f"20250102T120000_{twin_id}.wav").write_bytes(audio)
+    scan_filesystem()
+    assert cache.record_full_fingerprint(recording_id)
+    assert cache.record_full_fingerprint(twin_id)
+
+    # Transcribed after both were hashed: the twin reads it, but only the
+    # next record_full_fingerprint() stores a copy.
+    _store(recording_id, "hello")
+    assert cache.get_transcript(twin_id)["transcript"]["text"] == "hello"
+
+    def stored():
+        conn = sqlite3.connect(settings.cache_db_path)
+        try:
+            rows = conn.execute("SELECT recording_id FROM transcripts")
+            return sorted(row[0] for row in rows)
+        finally:
+            conn.close()
+
+    assert stored() == [recording_id]
+    assert cache.record_full_fingerprint(twin_id)
+    assert stored() == [recording_id, twin_id]
+
+
+def test_reads_hide_changed_audio_and_maintenance_drops_it(tmp_path, monkeypatch):
+    import os
+
+    from app.core.storage import scan_filesystem
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    monkeypatch.setattr(cache, "SOURCE_CHECK_SECONDS", 0.0)
+    day = tmp_path / "rec" / "2025" / "01" / "01"
+    day.mkdir(parents=True)
+    audio = bytearray(os.urandom(300 * 1024))
+
+    edited, replaced = "a" * 32, "b" * 32
+    paths = {}
+    for recording_id in (edited, replaced):
+        paths[recording_id] = day / f"20250101T120000_{recording_id}.wav"
+        paths[recording_id].write_bytes(audio)
+    scan_filesystem()
+    for recording_id in (edited, replaced):
+        _store(recording_id, "hello")
+    assert cache.record_full_fingerprint(edited)
+
+    # Same size, and only bytes the quick fingerprint does not sample.
+    audio[70 * 1024] ^= 0xFF
+    paths[edited].write_bytes(audio)
+    paths[replaced].write_bytes(os.urandom(300 * 1024))
+
+    entries = cache.get_cache_entries([edited, replaced], "text")
+    assert set(entries) == {edited}
+    assert _recordings() == {edited, replaced}
+
+    summary = cache.maintain_cache()
+    assert summary["changed"] == 2
+    assert _recordings() == set()
+    assert cache.get_cache_entries([edited, replaced], "text") == {}
+
+
+def test_connections_are_per_thread_and_survive_a_deleted_database(
+    tmp_path, monkeypatch
+):
+    import threading
+
+    db = tmp_path / "cache.db"
+    monkeypatch.setattr(settings, "cache_db_path", str(db))
+    conn = cache._get_connection()
+    assert cache._get_connection() is conn
+    other = []
+    thread = threading.Thread(target=lambda: other.append(cache._get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    _store("9" * 32, "hello")
+    db.unlink()
+    assert cache.get_transcript("9" * 32) is None
+    _store("9" * 32, "again")
+    assert cache.get_transcript("9" * 32)["transcript"]["text"] == "again"
+
+
+def test_sequential_entries_only_use_segments_of_their_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    recording_id = "c" * 32
+    segment = {"index": 0, "start": 0.0, "end": 1.0, "format": "text"}
+    cache.upsert_transcript_segment(
+        recording_id, "old", "{}", dict(segment, content="old model")
+    )
+    entry = cache.get_cache_entry(recording_id, cache.SEQUENTIAL_FORMAT)
+    assert entry["aggregated_text"] == "old model"
+    assert cache.get_cache_entry(
+        recording_id, cache.SEQUENTIAL_FORMAT, config_hash="new"
+    ) is None
+
+    # A stray row from another configuration is never attached.
+    conn = sqlite3.connect(settings.cache_db_path)
+    conn.execute(
+        "INSERT INTO transcription_segments VALUES (?, 'new', 1000, 2000, 1, "
+        "'text', 'new model', '')",
+        (recording_id,),
+    )
+    conn.commit()
+    conn.close()
+    cache._entry_cache.clear()
+    entry = cache.get_cache_entry(recording_id, cache.SEQUENTIAL_FORMAT)
+    assert entry["aggregated_text"] == "old model"
+
+    cache.upsert_transcript_segment(
+        recording_id, "new", "{}", dict(segment, content="new model")
+    )
+    entry = cache.get_cache_entry(recording_id, cache.SEQUENTIAL_FORMAT, "new")
+    assert entry["config_hash"] == "new"
+    assert json.loads(entry["segments_json"])[0]["content"] == "new model"
+
+
+def test_legacy_segments_are_read_as_stored_and_migrated_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    recording_id = "d" * 32
+    segments = [
+        {"index": 1, "start": 1.0, "end": 2.0, "format": "text", "content": "b"},
+        {"index": 0, "start": 0.0, "end": 1.0, "format": "text", "content": "a"},
+    ]
+    cache.upsert_cache_entry(
+        recording_id,
+        cache.SEQUENTIAL_FORMAT,
+        "h",
+        "{}",
+        segments_json=json.dumps(segments),
+        aggregated_text="a b",
+    )
+
+    def segment_rows():
+        conn = sqlite3.connect(settings.cache_db_path)
+        try:
+            row = conn.execute("SELECT COUNT(*) FROM transcription_segments")
+            return row.fetchone()[0]
+        finally:
+            conn.close()
+
+    read = cache.get_transcript_segments(recording_id, config_hash="h")
+    assert [s["content"] for s in read] == ["a", "b"]
+    assert cache.get_transcript_segments(recording_id, config_hash="other") == []
+    assert segment_rows() == 0
+
+    assert cache.migrate_legacy_segments(recording_id)
+    assert segment_rows() == 2
+    assert not cache.migrate_legacy_segments(recording_id)
+    read = cache.get_transcript_segments(recording_id, config_hash="h")
+    assert [s["content"] for s in read] == ["a", "b"]
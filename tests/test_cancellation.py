@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+import pytest
+
+from app.core.cancellation import CancelToken, run_process
+
+
+FAIL = [sys.executable, "-c", "import sys; sys.exit(3)"]
+
+
+@pytest.mark.parametrize("cancel", [None, CancelToken()])
+def test_run_process_honours_check(cancel):
+    assert run_process(FAIL, cancel).returncode == 3
+    with pytest.raises(subprocess.CalledProcessError) as info:
+        run_process(FAIL, cancel, check=True)
+    assert info.value.returncode == 3
@@ -2,6 +2,7 @@ import io
 
 from fastapi.testclient import TestClient
 
+from app.core.config import settings
 from app.main import app
 import app.api.routes as routes
 
@@ -15,7 +16,9 @@ def test_healthz():
     assert response.json() == {"status": "ok"}
 
 
-def test_status_basic_fields():
+def test_status_basic_fields(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
     response = client.get("/status")
     assert response.status_code == 200
     data = response.json()
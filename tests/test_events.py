@@ -0,0 +1,68 @@
+import threading
+
+from app.core.events import EventBus
+from recorder_events import iter_sse
+
+
+def test_bus_coalesces_changes_and_skips_repeats():
+    bus = EventBus()
+    assert bus.publish("recording", {"active": False})
+    assert not bus.publish("recording", {"active": False})
+    bus.publish("config", {"version": 1})
+
+    seq, changed = bus.wait(0, timeout=0)
+    assert changed == [("recording", {"active": False}), ("config", {"version": 1})]
+
+    # Two changes to the same topic reach a slow subscriber as one.
+    bus.publish("recording", {"active": True})
+    bus.publish("recording", {"active": False, "id": "x"})
+    seq, changed = bus.wait(seq, timeout=0)
+    assert changed == [("recording", {"active": False, "id": "x"})]
+
+    assert bus.wait(seq, timeout=0) == (seq, [])
+
+
+def test_waiting_subscriber_wakes_on_publish():
+    bus = EventBus()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(bus.wait(0, timeout=5)))
+    waiter.start()
+    bus.publish("storage", {"mounted": True})
+    waiter.join(timeout=5)
+    assert result == [(1, [("storage", {"mounted": True})])]
+
+
+def test_sse_parser_yields_json_events_and_skips_comments():
+    lines = [
+        ": keepalive",
+        "",
+        "id: 3",
+        "event: recording",
+        'data: {"active": true}',
+        "",
+        "event: config",
+        "data: not json",
+        "",
+    ]
+    assert list(iter_sse(lines)) == [("recording", {"active": True})]
+
+
+def test_async_subscriber_wakes_on_publish_from_another_thread():
+    import asyncio
+
+    bus = EventBus()
+
+    async def subscribe():
+        timer = threading.Timer(0.1, bus.publish, ("config", {"version": 2}))
+        timer.start()
+        try:
+            first = await bus.wait_async(0, timeout=5)
+            idle = await bus.wait_async(first[0], timeout=0.05)
+        finally:
+            timer.cancel()
+        return first, idle
+
+    first, idle = asyncio.run(subscribe())
+    assert first == (1, [("config", {"version": 2})])
+    assert idle == (1, [])
+    assert not bus._async_waiters
@@ -0,0 +1,152 @@
+import struct
+import time
+import wave
+
+from app.core import jobs, transcription
+from app.core.app_config import AppConfig
+from app.core.config import settings
+
+
+RECORDING_ID = "f" * 32
+
+
+def _setup(tmp_path, monkeypatch, whisper):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+
+    src = tmp_path / f"20250101T120000_{RECORDING_ID}.wav"
+    with wave.open(str(src), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(struct.pack("<16000h", *([0] * 16000)))
+
+    cfg = AppConfig()
+    cfg.whisper.enabled = True
+
+    class Meta:
+        id = RECORDING_ID
+        path = src
+
+    monkeypatch.setattr(jobs, "get_recording", lambda rid: Meta)
+    monkeypatch.setattr(jobs, "load_app_config", lambda: cfg)
+    monkeypatch.setattr(transcription, "call_whisper_inference", whisper)
+    return jobs.TranscriptionQueue(workers=1)
+
+
+def test_submit_reuses_active_job_and_promotes_priority(tmp_path, monkeypatch):
+    queue = _setup(tmp_path, monkeypatch, lambda *a, **k: ("text", "hi"))
+
+    first = queue.submit(
+        RECORDING_ID, jobs.KIND_FULL, "text", priority=jobs.PRIORITY_BATCH
+    )
+    again = queue.submit(
+        RECORDING_ID, jobs.KIND_FULL, "text", priority=jobs.PRIORITY_INTERACTIVE
+    )
+    assert again["id"] == first["id"]
+    assert queue.get(first["id"])["priority"] == jobs.PRIORITY_INTERACTIVE
+
+    assert queue.run_pending() == 1
+    assert queue.get(first["id"])["status"] == jobs.STATUS_DONE
+
+    # Finished jobs are not reused, but the cached result makes a rerun free.
+    rerun = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")
+    assert rerun["id"] != first["id"]
+
+
+def test_server_errors_are_retried_with_backoff(tmp_path, monkeypatch):
+    calls = []
+
+    def failing(*args, **kwargs):
+        calls.append(1)
+        raise transcription.WhisperError(503, "busy")
+
+    queue = _setup(tmp_path, monkeypatch, failing)
+    job = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")
+
+    assert queue.run_pending() == 1
+    job = queue.get(job["id"])
+    assert job["status"] == jobs.STATUS_QUEUED
+    assert job["error_status"] == 503
+    assert job["not_before"] >= time.time() + jobs.RETRY_BASE_SECONDS - 5
+
+    # Not due yet.
+    assert queue.run_pending() == 0
+
+    monkeypatch.setattr(jobs, "RETRY_BASE_SECONDS", 0.0)
+    queue.submit(RECORDING_ID, jobs.KIND_FULL, "text", not_before=0.0)
+    queue.run_pending()
+    job = queue.get(job["id"])
+    assert job["status"] == jobs.STATUS_FAILED
+    assert job["attempts"] == jobs.MAX_ATTEMPTS
+    assert len(calls) == jobs.MAX_ATTEMPTS
+
+
+def test_cancelled_jobs_are_not_run(tmp_path, monkeypatch):
+    calls = []
+
+    def whisper(*args, **kwargs):
+        calls.append(1)
+        return "text", "hi"
+
+    queue = _setup(tmp_path, monkeypatch, whisper)
+    job = queue.submit(RECORDING_ID, jobs.KIND_SEQUENTIAL, "text")
+    live = transcription.attach_sequential_job(RECORDING_ID)
+
+    job = queue.cancel(job["id"])
+    assert job["status"] == jobs.STATUS_CANCELLED
+    assert live.finished and live.events[-1] == {"type": "cancelled"}
+
+    assert queue.run_pending() == 0
+    assert calls == []
+
+
+def test_claim_skips_job_claimed_by_another_process(tmp_path, monkeypatch):
+    queue = _setup(tmp_path, monkeypatch, lambda *a, **k: ("text", "hi"))
+    job = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")
+
+    # Another process claims the job between this one's SELECT and UPDATE.
+    row_to_job = jobs._row_to_job
+
+    def claimed_elsewhere(row):
+        claimed = row_to_job(row)
+        conn = jobs._get_connection()
+        conn.execute(
+            "UPDATE transcription_jobs SET status = ?, attempts = 1 WHERE id = ?",
+            (jobs.STATUS_RUNNING, claimed["id"]),
+        )
+        conn.commit()
+        conn.close()
+        return claimed
+
+    monkeypatch.setattr(jobs, "_row_to_job", claimed_elsewhere)
+    assert queue._claim() is None
+    monkeypatch.setattr(jobs, "_row_to_job", row_to_job)
+
+    assert queue.get(job["id"])["attempts"] == 1
+
+
+def test_forced_submit_does_not_join_an_unforced_running_job(tmp_path, monkeypatch):
+    queue = _setup(tmp_path, monkeypatch, lambda *a, **k: ("text", "hi"))
+
+    queued = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")
+    forced = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text", force=True)
+    assert forced["id"] == queued["id"]
+    assert queue.get(queued["id"])["force"] is True
+
+    running = queue._claim()
+    assert running["id"] == queued["id"]
+    assert queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")["id"] == running["id"]
+    queue._execute(running)
+
+    unforced = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text")
+    running = queue._claim()
+    forced = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text", force=True)
+    assert forced["id"] != unforced["id"]
+    assert forced["force"] is True and forced["status"] == jobs.STATUS_QUEUED
+    # Later forced requests share the new job.
+    again = queue.submit(RECORDING_ID, jobs.KIND_FULL, "text", force=True)
+    assert again["id"] == forced["id"]
+    queue._execute(running)
+    assert queue.run_pending() == 1
+    assert queue.get(forced["id"])["status"] == jobs.STATUS_DONE
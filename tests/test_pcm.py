@@ -0,0 +1,82 @@
+import math
+import struct
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.core import analysis, pcm, transcription  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+def _write_wav(path, frames, rate, channels=1, width=2):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(frames)
+
+
+def _pcm16(data):
+    return struct.unpack(f"<{len(data) // 2}h", data)
+
+
+def test_stereo_48k_is_downmixed_and_resampled(tmp_path):
+    path = tmp_path / "stereo.wav"
+    frames = struct.pack("<hh", 1000, 3000) * 48000
+    _write_wav(path, frames, 48000, channels=2)
+
+    data = pcm.slice_wav_mono(path, 0.25, 0.5)
+    assert data[:4] == b"RIFF"
+    samples = _pcm16(data[44:])
+    assert len(samples) == 4000
+    assert set(samples) == {2000}
+
+
+def test_24bit_mono_at_target_rate_is_sliced_exactly(tmp_path):
+    path = tmp_path / "mono24.wav"
+    values = [((i * 37) % 20000 - 10000) * 256 for i in range(16000)]
+    raw = b"".join(struct.pack("<i", v)[:3] for v in values)
+    _write_wav(path, raw, 16000, width=3)
+
+    samples = _pcm16(pcm.read_mono_segment(path, 0.5, 0.75))
+    assert list(samples) == [v >> 8 for v in values[8000:12000]]
+
+
+def test_resampling_keeps_speech_band_and_rejects_aliases(tmp_path):
+    rate = 48000
+    t = np.arange(rate) / rate
+
+    def rms_after(freq):
+        path = tmp_path / f"tone_{freq}.wav"
+        tone = (np.sin(2 * math.pi * freq * t) * 16000).astype("<i2")
+        _write_wav(path, tone.tobytes(), rate)
+        out = np.array(_pcm16(pcm.read_mono_segment(path, 0.2, 0.8)), dtype=float)
+        return np.sqrt(np.mean(out ** 2)) / (16000 / math.sqrt(2))
+
+    assert rms_after(440) == pytest.approx(1.0, abs=0.02)
+    # 12 kHz would alias to 4 kHz after decimation without filtering.
+    assert rms_after(12000) < 0.05
+
+
+def test_segment_extraction_and_proxy_build_avoid_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("ffmpeg should not be started for PCM input")
+
+    monkeypatch.setattr(analysis.subprocess, "run", no_subprocess)
+    monkeypatch.setattr(transcription.subprocess, "run", no_subprocess)
+
+    recording_id = "d" * 32
+    path = tmp_path / f"20250101T120000_{recording_id}.wav"
+    _write_wav(path, struct.pack("<hh", 100, 300) * 44100, 44100, channels=2)
+
+    data = transcription.extract_segment_wav(path, 0.1, 0.2)
+    assert len(_pcm16(data[44:])) == 1600
+    assert analysis.find_analysis_proxy(recording_id, path) is None
+
+    proxy = analysis.get_analysis_proxy(recording_id, path)
+    assert proxy.num_samples == 16000
+    assert analysis.read_segment_wav(proxy, 0.1, 0.2) == data
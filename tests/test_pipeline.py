@@ -0,0 +1,89 @@
+from app.core import pipeline as pipeline_module
+from app.core.config import settings
+from app.core.pipeline import ProcessingPipeline, Stage
+
+
+def _use_tmp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(pipeline_module.recording_manager, "current", lambda: None)
+
+
+def _statuses(p, recording_id):
+    return {row["stage"]: row["status"] for row in p.status(recording_id)}
+
+
+def test_stages_run_in_dependency_order(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    calls = []
+
+    def handler(name, applies=True):
+        def run(recording_id):
+            calls.append((name, recording_id))
+            return applies
+
+        return run
+
+    p = ProcessingPipeline(
+        [
+            Stage("index", handler("index")),
+            Stage("vad", handler("vad"), ("index",), heavy=True),
+            Stage("migrate", handler("migrate", applies=False), ("vad",)),
+        ]
+    )
+    assert p.enqueue(["a" * 32]) == ["a" * 32]
+    assert p.enqueue(["a" * 32]) == []
+
+    # Heavy stages wait while a recording is in progress.
+    monkeypatch.setattr(pipeline_module.recording_manager, "current", lambda: object())
+    assert p.run_pending() == 1
+    assert _statuses(p, "a" * 32)["vad"] == "pending"
+
+    monkeypatch.setattr(pipeline_module.recording_manager, "current", lambda: None)
+    assert p.run_pending() == 2
+    assert [name for name, _ in calls] == ["index", "vad", "migrate"]
+    assert _statuses(p, "a" * 32) == {
+        "index": "done",
+        "vad": "done",
+        "migrate": "skipped",
+    }
+
+
+def test_failed_stage_retries_then_blocks_dependents(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(pipeline_module, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(pipeline_module, "RETRY_BASE_SECONDS", 0.0)
+
+    def boom(recording_id):
+        raise RuntimeError("no audio")
+
+    p = ProcessingPipeline(
+        [Stage("analysis", boom), Stage("peaks", lambda rid: True, ("analysis",))]
+    )
+    p.enqueue(["b" * 32])
+
+    p.run_pending()
+    rows = {row["stage"]: row for row in p.status("b" * 32)}
+    assert rows["analysis"]["status"] == "failed"
+    assert rows["analysis"]["attempts"] == 2
+    assert rows["analysis"]["error"] == "no audio"
+    assert rows["peaks"]["status"] == "blocked"
+
+    # Re-enqueueing with force starts over.
+    p.enqueue(["b" * 32], force=True)
+    assert set(_statuses(p, "b" * 32).values()) == {"pending"}
+
+
+def test_interrupted_stages_resume_after_restart(tmp_path, monkeypatch):
+    _use_tmp_db(tmp_path, monkeypatch)
+    stages = [Stage("index", lambda rid: True)]
+
+    first = ProcessingPipeline(stages)
+    first.enqueue(["c" * 32])
+    # Claim the stage but "crash" before it finishes.
+    assert first._claim() is not None
+    assert _statuses(first, "c" * 32) == {"index": "running"}
+
+    second = ProcessingPipeline(stages)
+    assert second.reset_interrupted() == 1
+    assert second.run_pending() == 1
+    assert _statuses(second, "c" * 32) == {"index": "done"}
@@ -3,6 +3,7 @@ from pathlib import Path
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.app_config import load_app_config
 from app.core.config import settings
 
 
@@ -12,6 +13,7 @@ client = TestClient(app)
 def test_recordings_unified_list_includes_storage_metadata(tmp_path, monkeypatch):
     # Point local recordings root at a temporary directory so we do not
     # depend on any real recordings on disk.
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
     monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path))
     monkeypatch.setattr(settings, "secondary_storage_enabled", False)
 
@@ -41,3 +43,237 @@ def test_recordings_unified_list_includes_storage_metadata(tmp_path, monkeypatch
     assert "relative_path" in match
     assert "keep_local" in match
     assert isinstance(match["keep_local"], bool)
+
+
+def test_listing_and_transcript_answer_conditional_requests(tmp_path, monkeypatch):
+    from app.core import cache, storage
+
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    recordings_dir = Path(settings.get_local_recordings_root())
+    recordings_dir.mkdir(parents=True)
+    recording_id = "1" * 32
+    (recordings_dir / f"20250101T120000_{recording_id}.wav").write_bytes(b"0" * 640)
+
+    first = client.get("/recordings")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert client.get("/recordings", headers={"If-None-Match": etag}).status_code == 304
+    since = {"If-Modified-Since": first.headers["last-modified"]}
+    assert client.get("/recordings", headers=since).status_code == 304
+
+    # A new recording on disk changes the validator once the index is
+    # rescanned: by the background worker, or when the last scan is too old.
+    (recordings_dir / f"20250101T130000_{'2' * 32}.wav").write_bytes(b"0" * 640)
+    assert client.get("/recordings", headers={"If-None-Match": etag}).status_code == 304
+    monkeypatch.setattr(storage, "SCAN_MAX_AGE_SECONDS", 0.0)
+    second = client.get("/recordings", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json()["total"] == 2
+
+    cache.upsert_transcript(
+        recording_id,
+        "h",
+        "{}",
+        {"text": "hi", "duration": 1.0, "timed": False, "segments": []},
+    )
+    url = f"/recordings/{recording_id}/transcript"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    cache.upsert_transcript(
+        recording_id,
+        "h",
+        "{}",
+        {"text": "bye", "duration": 1.0, "timed": False, "segments": []},
+    )
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.text.strip() == "bye"
+
+
+def test_rename_and_delete_change_listing_validators(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    recordings_dir = Path(settings.get_local_recordings_root())
+    recordings_dir.mkdir(parents=True)
+    recording_id = "5" * 32
+    (recordings_dir / f"20250101T120000_{recording_id}.wav").write_bytes(b"0" * 640)
+    url = f"/recordings/{recording_id}"
+
+    listing_etag = client.get("/recordings").headers["etag"]
+    item_etag = client.get(url).headers["etag"]
+
+    assert client.patch(url, json={"name": "meeting"}).status_code == 200
+    renamed = f"20250101T120000_{recording_id}_meeting.wav"
+    listing = client.get("/recordings", headers={"If-None-Match": listing_etag})
+    assert listing.status_code == 200
+    (item,) = listing.json()["items"]
+    assert item["relative_path"] == renamed
+    assert item["accessible"] is True
+    assert item["size_bytes"] == 640
+    assert client.get("/recordings").json()["items"] == [item]
+    item = client.get(url, headers={"If-None-Match": item_etag})
+    assert item.status_code == 200
+    assert item.json()["name"] == "meeting.wav"
+
+    listing_etag = listing.headers["etag"]
+    item_etag = item.headers["etag"]
+    assert client.delete(url).status_code == 200
+    listing = client.get("/recordings", headers={"If-None-Match": listing_etag})
+    assert listing.status_code == 200
+    assert listing.json()["items"] == []
+    assert client.get("/recordings").json()["items"] == []
+    assert client.get(url, headers={"If-None-Match": item_etag}).status_code == 404
+    assert client.get(url).status_code == 404
+
+
+def test_retention_removes_recordings_from_the_listing(tmp_path, monkeypatch):
+    from app.core.recording import enforce_retention
+
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    monkeypatch.setattr(settings, "retention_hours", 0)
+    recordings_dir = Path(settings.get_local_recordings_root())
+    recordings_dir.mkdir(parents=True)
+    (recordings_dir / f"20250101T120000_{'6' * 32}.wav").write_bytes(b"0" * 640)
+
+    etag = client.get("/recordings").headers["etag"]
+    enforce_retention()
+    listing = client.get("/recordings", headers={"If-None-Match": etag})
+    assert listing.status_code == 200
+    assert listing.json()["items"] == []
+
+
+def test_stream_serves_ranges_with_content_etag(tmp_path, monkeypatch):
+    import os
+
+    from app.core import cache
+    from app.core.storage import scan_filesystem
+
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    recordings_dir = Path(settings.get_local_recordings_root())
+    recordings_dir.mkdir(parents=True)
+    recording_id = "3" * 32
+    audio = os.urandom(200 * 1024)
+    path = recordings_dir / f"20250101T120000_{recording_id}.wav"
+    path.write_bytes(audio)
+    scan_filesystem()
+
+    url = f"/recordings/{recording_id}/stream"
+    part = client.get(url, headers={"Range": "bytes=1000-1999"})
+    assert part.status_code == 206
+    assert part.content == audio[1000:2000]
+    assert part.headers["content-range"] == f"bytes 1000-1999/{len(audio)}"
+    etag = part.headers["etag"]
+    assert not etag.startswith("W/")
+    assert part.headers["cache-control"] == "no-cache"
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    # Not a content hash yet, so not cacheable for good.
+    tag = etag.strip('"')
+    versioned = client.get(url, params={"v": tag}, headers={"Range": "bytes=0-9"})
+    assert versioned.headers["cache-control"] == "no-cache"
+
+    # A same-size edit the sampled quick fingerprint does not see.
+    edited = bytearray(audio)
+    edited[70 * 1024] ^= 0xFF
+    audio = bytes(edited)
+    path.write_bytes(audio)
+    os.utime(path, (2_000_000_000, 2_000_000_000))
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    # Once fully hashed, the tag is the content hash.
+    assert cache.record_full_fingerprint(recording_id)
+    etag = client.get(url, headers={"Range": "bytes=0-9"}).headers["etag"]
+    tag = etag.strip('"')
+    versioned = client.get(url, params={"v": tag}, headers={"Range": "bytes=0-9"})
+    assert "immutable" in versioned.headers["cache-control"]
+
+    # Renaming keeps the content identity, and the index finds the new path.
+    renamed = path.with_name(f"20250101T120000_{recording_id}_meeting.wav")
+    path.rename(renamed)
+    scan_filesystem()
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    stale = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200
+    assert len(stale.content) == len(audio)
+
+
+def test_cached_transcription_is_not_revalidated_after_audio_changes(
+    tmp_path, monkeypatch
+):
+    from app.core import cache
+    from app.core.storage import scan_filesystem
+
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    monkeypatch.setattr(cache, "SOURCE_CHECK_SECONDS", 0.0)
+    recordings_dir = Path(settings.get_local_recordings_root())
+    recordings_dir.mkdir(parents=True)
+    recording_id = "4" * 32
+    path = recordings_dir / f"20250101T120000_{recording_id}.wav"
+    path.write_bytes(b"0" * 640)
+    scan_filesystem()
+    config_hash, config_json = cache.build_config_fingerprint(
+        load_app_config().whisper, None
+    )
+    cache.upsert_transcript(
+        recording_id,
+        config_hash,
+        config_json,
+        {"text": "hi", "duration": 1.0, "timed": False, "segments": []},
+    )
+
+    url = f"/recordings/{recording_id}/transcription_cached"
+    params = {"response_format": "text"}
+    first = client.get(url, params=params)
+    assert first.json()["content"] == "hi"
+    etag = first.headers["etag"]
+    assert client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    path.write_bytes(b"1" * 640)
+    changed = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == {"cached": False}
+
+
+def test_cached_transcription_validators_follow_the_configuration(
+    tmp_path, monkeypatch
+):
+    from app.core import app_config, cache
+    from app.core.app_config import save_app_config
+
+    monkeypatch.setattr(app_config, "CONFIG_FILE_PATH", tmp_path / "config.json")
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    recording_id = "7" * 32
+    cfg = load_app_config()
+    config_hash, config_json = cache.build_config_fingerprint(cfg.whisper, None)
+    cache.upsert_transcript(
+        recording_id,
+        config_hash,
+        config_json,
+        {"text": "hi", "duration": 1.0, "timed": False, "segments": []},
+    )
+
+    url = f"/recordings/{recording_id}/transcription_cached"
+    params = {"response_format": "text"}
+    first = client.get(url, params=params)
+    assert first.json()["content"] == "hi"
+    etag = first.headers["etag"]
+    assert client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    # A transcript made under the previous model is not current any more.
+    changed_cfg = cfg.model_copy(deep=True)
+    changed_cfg.whisper.model_path = "other-model.bin"
+    save_app_config(changed_cfg)
+    changed = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json() == {"cached": False}
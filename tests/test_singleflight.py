@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from app.core.singleflight import SingleFlight, single_flight_stats
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test-share")
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return ["segments"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("a", compute)))
+    leader.start()
+    assert started.wait(5)
+
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("a", compute)))
+        for _ in range(3)
+    ]
+    for t in followers:
+        t.start()
+    # A different key is not held up by the one in flight.
+    assert flight.do("b", lambda: "other") == "other"
+    while flight.stats()["waiting"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(runs) == 1
+    assert results == [["segments"]] * 4
+    assert results[0] is results[1]
+    assert flight.stats() == {"executed": 2, "shared": 3, "in_flight": 0, "waiting": 0}
+    assert single_flight_stats()["test-share"]["shared"] == 3
+
+    # Finished calls are not remembered.
+    assert flight.do("a", lambda: "again") == "again"
+
+
+def test_errors_are_shared_with_waiters():
+    flight = SingleFlight("test-errors")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("VAD failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("a", fail)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    assert started.wait(5)
+    follower = threading.Thread(target=call)
+    follower.start()
+    while flight.stats()["waiting"] < 1:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["VAD failed", "VAD failed"]
+    with pytest.raises(ValueError):
+        flight.do("a", lambda: int("x"))
+
+
+def test_cancelled_waiter_stops_waiting_for_the_leader():
+    from app.core.cancellation import CancelToken, OperationCancelled
+
+    flight = SingleFlight("test-cancel-waiter")
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("a", compute)))
+    leader.start()
+    assert started.wait(5)
+
+    token = CancelToken()
+    threading.Timer(0.05, token.cancel).start()
+    with pytest.raises(OperationCancelled):
+        flight.do("a", compute, token)
+    assert flight.stats()["waiting"] == 0
+
+    # The leader is unaffected.
+    release.set()
+    leader.join(5)
+    assert results == ["done"]
+    assert flight.stats()["shared"] == 0
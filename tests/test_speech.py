@@ -0,0 +1,86 @@
+import struct
+import wave
+
+from fastapi.testclient import TestClient
+
+import app.api.routes as routes
+from app.core import speech
+from app.core.config import settings
+from app.main import app
+
+
+def _write_mono_wav(path, samples, rate=16000):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+    src = tmp_path / ("20250101T120000_" + "a" * 32 + ".wav")
+    _write_mono_wav(src, [i % 1000 for i in range(32000)])
+    return src
+
+
+def test_plan_merges_overlaps_and_maps_times(tmp_path, monkeypatch):
+    src = _setup(tmp_path, monkeypatch)
+    segments = [
+        {"start": 1.5, "end": 1.75},
+        {"start": 0.25, "end": 0.5},
+        {"start": 0.45, "end": 0.75},
+    ]
+
+    plan = speech.plan_speech_rendition("a" * 32, src, segments)
+
+    assert plan.spans == [(4000, 12000), (24000, 28000)]
+    assert plan.duration_seconds == 0.75
+    assert plan.time_map == [
+        {"start": 0.0, "end": 0.5, "source_start": 0.25, "source_end": 0.75},
+        {"start": 0.5, "end": 0.75, "source_start": 1.5, "source_end": 1.75},
+    ]
+
+
+def test_wav_rendition_concatenates_speech_samples(tmp_path, monkeypatch):
+    src = _setup(tmp_path, monkeypatch)
+    plan = speech.plan_speech_rendition(
+        "a" * 32, src, [{"start": 0.0, "end": 0.1}, {"start": 1.0, "end": 1.1}]
+    )
+
+    path = speech.build_wav_rendition(plan)
+    assert speech.cached_rendition(plan, "wav") == path
+    with wave.open(str(path), "rb") as w:
+        frames = w.readframes(w.getnframes())
+    samples = struct.unpack(f"<{len(frames) // 2}h", frames)
+    expected = [i % 1000 for i in range(1600)] + [
+        i % 1000 for i in range(16000, 17600)
+    ]
+    assert list(samples) == expected
+
+
+def test_speech_endpoints_require_cached_vad(tmp_path, monkeypatch):
+    src = _setup(tmp_path, monkeypatch)
+
+    class Meta:
+        id = "a" * 32
+        path = src
+
+    monkeypatch.setattr(routes, "get_recording", lambda rid: Meta)
+    monkeypatch.setattr(routes, "opus_available", lambda: False)
+    segments = {}
+    monkeypatch.setattr(routes, "get_cached_vad_segments", lambda rid: segments.get(rid))
+
+    client = TestClient(app)
+    assert client.get(f"/recordings/{Meta.id}/speech/map").status_code == 409
+
+    segments[Meta.id] = [{"start": 0.5, "end": 1.0}]
+    data = client.get(f"/recordings/{Meta.id}/speech/map").json()
+    assert data["format"] == "wav"
+    assert data["duration_seconds"] == 0.5
+    assert data["time_map"][0]["source_start"] == 0.5
+
+    audio = client.get(data["url"])
+    assert audio.status_code == 200
+    assert audio.headers["content-type"] == "audio/wav"
+    assert len(audio.content) == 44 + 8000 * 2
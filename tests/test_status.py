@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from app.core import recording, status, storage
+from app.core.config import settings
+
+
+def test_status_totals_follow_changes_without_walking_the_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    day = tmp_path / "rec" / "2025" / "01" / "01"
+    day.mkdir(parents=True)
+    first, second = "a" * 32, "b" * 32
+    (day / f"20250101T120000_{first}.wav").write_bytes(b"0" * 1000)
+    (day / "notes.wav").write_bytes(b"0" * 7)
+
+    data = status.get_status()
+    assert (data["recordings_count"], data["recordings_bytes"]) == (1, 1000)
+
+    walks = []
+    real_files = storage._recording_files
+    monkeypatch.setattr(
+        storage, "_recording_files", lambda root: walks.append(root) or real_files(root)
+    )
+    for _ in range(3):
+        status.get_status()
+    assert walks == []
+
+    # Renames and deletions update the totals in place.
+    assert recording.rename_recording(first, "meeting") is not None
+    (day / f"20250101T130000_{second}.wav").write_bytes(b"0" * 500)
+    storage.scan_filesystem()
+    data = status.get_status()
+    assert (data["recordings_count"], data["recordings_bytes"]) == (2, 1500)
+
+    walks.clear()
+    assert recording.delete_recording(second)
+    monkeypatch.setattr(storage, "_recording_files", lambda root: walks.append(root) or [])
+    data = status.get_status()
+    assert (data["recordings_count"], data["recordings_bytes"]) == (1, 1000)
+
+
+def test_scan_stats_each_recording_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "db" / "cache.db"))
+    monkeypatch.setattr(settings, "recordings_local_root", str(tmp_path / "rec"))
+    monkeypatch.setattr(settings, "secondary_storage_enabled", False)
+    day = tmp_path / "rec" / "2025" / "01" / "01"
+    day.mkdir(parents=True)
+    wav = day / f"20250101T120000_{'c' * 32}.wav"
+    wav.write_bytes(b"0" * 300)
+
+    stats = []
+    real_stat = Path.stat
+
+    def counting_stat(self, *args, **kwargs):
+        if self.suffix == ".wav":
+            stats.append(self)
+        return real_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", counting_stat)
+    storage.scan_filesystem()
+    assert stats == [wav]
+    assert storage.get_storage_state("c" * 32).exists_local
+    data = status.get_status()
+    assert (data["recordings_count"], data["recordings_bytes"]) == (1, 300)
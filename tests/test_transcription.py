@@ -0,0 +1,445 @@
+import json
+import struct
+import wave
+
+from fastapi.testclient import TestClient
+
+import app.api.routes as routes
+from app.core import jobs, transcription
+from app.core.app_config import AppConfig
+from app.core.cache import build_config_fingerprint, upsert_cache_entry
+from app.core.config import settings
+from app.main import app
+
+
+RECORDING_ID = "e" * 32
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+
+    src = tmp_path / f"20250101T120000_{RECORDING_ID}.wav"
+    with wave.open(str(src), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(struct.pack("<32000h", *([0] * 32000)))
+
+    cfg = AppConfig()
+    cfg.whisper.enabled = True
+    # One request per segment keeps the expected Whisper calls simple.
+    cfg.whisper.pack_max_seconds = 0
+
+    class Meta:
+        id = RECORDING_ID
+        path = src
+
+    for module in (routes, jobs):
+        monkeypatch.setattr(module, "get_recording", lambda rid: Meta)
+        monkeypatch.setattr(module, "load_app_config", lambda: cfg)
+
+    calls = []
+
+    def fake_whisper(whisper_cfg, file_name, file_obj, **kwargs):
+        calls.append(file_name)
+        return "text", f"words for {file_name}"
+
+    monkeypatch.setattr(transcription, "call_whisper_inference", fake_whisper)
+    return cfg, calls
+
+
+def test_sequential_job_resumes_from_cached_segments(tmp_path, monkeypatch):
+    cfg, calls = _setup(tmp_path, monkeypatch)
+
+    config_hash, config_json = build_config_fingerprint(cfg.whisper, cfg.vad)
+    upsert_cache_entry(
+        recording_id=RECORDING_ID,
+        response_format="vad_sequential",
+        config_hash=config_hash,
+        config_json=config_json,
+        vad_segments_json=json.dumps(
+            [{"start": 0.0, "end": 0.5}, {"start": 1.0, "end": 1.5}]
+        ),
+        segments_json=json.dumps(
+            [{"index": 0, "start": 0.0, "end": 0.5, "format": "text", "content": "hello"}]
+        ),
+    )
+
+    jobs.transcription_queue.start()
+    try:
+        client = TestClient(app)
+        response = client.post(f"/recordings/{RECORDING_ID}/transcribe_sequential")
+        assert response.status_code == 200
+        job_id = response.headers["X-Transcription-Job"]
+
+        # A second run has nothing left to do; SSE replays the same events.
+        replay = client.post(
+            f"/recordings/{RECORDING_ID}/transcribe_sequential?stream=sse"
+        )
+    finally:
+        jobs.transcription_queue.stop()
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [e["type"] for e in events] == [
+        "vad_segment",
+        "vad_segment",
+        "segment",
+        "segment",
+        "done",
+    ]
+    assert events[2]["cached"] is True and events[2]["content"] == "hello"
+    assert events[3]["cached"] is False
+    assert events[4]["transcribed"] == 1
+    assert events[4]["content"] == "hello words for segment_001.wav"
+
+    # Only the missing segment reached Whisper.
+    assert calls == ["segment_001.wav"]
+
+    cached = transcription._cached_sequential_segments(RECORDING_ID)
+    assert [s["index"] for s in cached] == [0, 1]
+
+    job = jobs.transcription_queue.get(job_id)
+    assert job["status"] == jobs.STATUS_DONE
+    assert (job["done_segments"], job["total_segments"]) == (2, 2)
+
+    assert replay.headers["content-type"].startswith("text/event-stream")
+    assert "event: done" in replay.text
+    assert len(calls) == 1
+
+
+def test_sequential_transcription_drops_segments_from_older_vad_runs(
+    tmp_path, monkeypatch
+):
+    cfg, calls = _setup(tmp_path, monkeypatch)
+    src = routes.get_recording(RECORDING_ID).path
+
+    transcription.transcribe_recording_sequential(
+        RECORDING_ID,
+        src,
+        [{"start": 0.0, "end": 0.5}, {"start": 1.0, "end": 1.5}],
+        cfg.whisper,
+        cfg.vad,
+    )
+    assert len(calls) == 2
+
+    # Re-segmented: index 0 moved, index 1 no longer exists.
+    sent = transcription.transcribe_recording_sequential(
+        RECORDING_ID, src, [{"start": 0.2, "end": 0.6}], cfg.whisper, cfg.vad
+    )
+    assert sent == 1
+    cached = transcription._cached_sequential_segments(RECORDING_ID)
+    assert [(s["index"], s["start"]) for s in cached] == [(0, 0.2)]
+
+
+def test_segment_transcripts_are_stored_per_row(tmp_path, monkeypatch):
+    from app.core import cache
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+
+    # Entries written as a JSON array are moved into the table on first use.
+    upsert_cache_entry(
+        recording_id=RECORDING_ID,
+        response_format="vad_sequential",
+        config_hash="a",
+        config_json="{}",
+        segments_json=json.dumps(
+            [{"index": 0, "start": 0.0, "end": 0.5, "format": "text", "content": "one"}]
+        ),
+    )
+    assert [s["content"] for s in cache.get_transcript_segments(RECORDING_ID)] == [
+        "one"
+    ]
+
+    cache.upsert_transcript_segment(
+        RECORDING_ID,
+        "a",
+        "{}",
+        {"index": 1, "start": 1.0, "end": 1.5, "format": "text", "content": "two"},
+    )
+    entry = cache.get_cache_entry(RECORDING_ID, "vad_sequential")
+    assert entry["aggregated_text"] == "one two"
+    assert [s["index"] for s in json.loads(entry["segments_json"])] == [0, 1]
+
+    # A new span for an existing index replaces the old transcript.
+    cache.upsert_transcript_segment(
+        RECORDING_ID,
+        "a",
+        "{}",
+        {"index": 1, "start": 1.2, "end": 1.6, "format": "text", "content": "TWO"},
+    )
+    assert [
+        (s["start"], s["content"]) for s in cache.get_transcript_segments(RECORDING_ID)
+    ] == [(0.0, "one"), (1.2, "TWO")]
+
+    # Transcripts from another configuration are not mixed in.
+    cache.upsert_transcript_segment(
+        RECORDING_ID,
+        "b",
+        "{}",
+        {"index": 0, "start": 0.0, "end": 0.5, "format": "text", "content": "uno"},
+    )
+    assert cache.get_transcript_segments(RECORDING_ID, config_hash="a") == []
+    assert cache.get_cache_entry(RECORDING_ID, "vad_sequential")[
+        "aggregated_text"
+    ] == "uno"
+
+
+def test_cache_upsert_keeps_fields_and_compresses_large_values(tmp_path, monkeypatch):
+    import sqlite3
+
+    from app.core import cache
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    vad_json = json.dumps([{"start": i, "end": i + 0.5} for i in range(200)])
+    upsert_cache_entry(RECORDING_ID, "vad", "a", "{}", vad_segments_json=vad_json)
+    assert cache.get_cache_entry(RECORDING_ID, "vad")["vad_segments_json"] == vad_json
+
+    # Fields left as None keep their value; the in-memory copy is refreshed.
+    upsert_cache_entry(RECORDING_ID, "vad", "b", "{}", aggregated_text="hi")
+    entry = cache.get_cache_entry(RECORDING_ID, "vad")
+    assert (entry["config_hash"], entry["aggregated_text"]) == ("b", "hi")
+    assert entry["vad_segments_json"] == vad_json
+
+    conn = sqlite3.connect(settings.cache_db_path)
+    stored, text = conn.execute(
+        "SELECT vad_segments_json, aggregated_text FROM transcription_cache"
+    ).fetchone()
+    conn.close()
+    assert isinstance(stored, bytes) and len(stored) < len(vad_json)
+    assert text == "hi"
+
+
+def test_short_segments_are_packed_into_one_request(tmp_path, monkeypatch):
+    cfg, _ = _setup(tmp_path, monkeypatch)
+    cfg.whisper.pack_max_seconds = 25
+    cfg.whisper.pack_gap_ms = 500
+    src = routes.get_recording(RECORDING_ID).path
+
+    requests = []
+
+    def fake_whisper(whisper_cfg, file_name, file_obj, **kwargs):
+        requests.append((file_name, kwargs.get("response_format_override")))
+        with wave.open(file_obj, "rb") as w:
+            seconds = w.getnframes() / w.getframerate()
+        # Three 0.4 s segments with 0.5 s of silence between them.
+        assert abs(seconds - 2.2) < 0.01
+        words = [
+            {"word": " alpha", "start": 0.1, "end": 0.3},
+            {"word": " beta", "start": 1.0, "end": 1.2},
+            {"word": " gamma", "start": 1.9, "end": 2.0},
+            {"word": " delta", "start": 2.0, "end": 2.1},
+        ]
+        return "verbose_json", json.dumps({"segments": [{"words": words}]})
+
+    monkeypatch.setattr(transcription, "call_whisper_inference", fake_whisper)
+
+    sent = transcription.transcribe_recording_sequential(
+        RECORDING_ID,
+        src,
+        [
+            {"start": 0.0, "end": 0.4},
+            {"start": 0.6, "end": 1.0},
+            {"start": 1.2, "end": 1.6},
+        ],
+        cfg.whisper,
+        cfg.vad,
+    )
+
+    assert sent == 3
+    assert requests == [("segments_000-002.wav", "verbose_json")]
+    cached = transcription._cached_sequential_segments(RECORDING_ID)
+    assert [s["content"] for s in cached] == ["alpha", "beta", "gamma delta"]
+
+
+def test_packed_split_falls_back_for_segments_it_cannot_fill(tmp_path, monkeypatch):
+    cfg, _ = _setup(tmp_path, monkeypatch)
+    src = routes.get_recording(RECORDING_ID).path
+    spans = [(0, 0.0, 0.4), (1, 0.6, 1.0), (2, 1.2, 1.6)]
+    packed = {}
+    requests = []
+
+    def fake_whisper(whisper_cfg, file_name, file_obj, **kwargs):
+        requests.append(file_name)
+        if file_name.startswith("segments_"):
+            return "verbose_json", json.dumps(packed)
+        return "text", f"alone {file_name}"
+
+    monkeypatch.setattr(transcription, "call_whisper_inference", fake_whisper)
+
+    # No word timings: the segment text cannot be split at all.
+    packed.update(segments=[{"start": 0.0, "end": 2.2, "text": "alpha beta gamma"}])
+    results = transcription.transcribe_packed_segments(src, cfg.whisper, spans)
+    assert len(requests) == 4
+    assert results[1] == ("text", "alone segment_001.wav")
+
+    # No word landed on the middle segment: only it is sent again.
+    requests.clear()
+    words = [
+        {"word": " alpha", "start": 0.1, "end": 0.3},
+        {"word": " gamma", "start": 1.9, "end": 2.0},
+    ]
+    packed.update(segments=[{"text": "alpha gamma", "words": words}])
+    results = transcription.transcribe_packed_segments(src, cfg.whisper, spans)
+    assert requests == ["segments_000-002.wav", "segment_001.wav"]
+    assert [results[i][1] for i in range(3)] == [
+        "alpha",
+        "alone segment_001.wav",
+        "gamma",
+    ]
+
+
+def test_long_recordings_are_transcribed_in_overlapping_windows(
+    tmp_path, monkeypatch
+):
+    cfg, _ = _setup(tmp_path, monkeypatch)
+    cfg.whisper.chunk_seconds = 10
+    cfg.whisper.chunk_overlap_seconds = 2
+
+    src = tmp_path / f"20250101T130000_{RECORDING_ID}.wav"
+    with wave.open(str(src), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\x00\x00" * 16000 * 25)
+
+    assert transcription.plan_chunks(25.0, 10.0, 2.0) == [
+        (0.0, 10.0),
+        (8.0, 18.0),
+        (16.0, 25.0),
+    ]
+
+    windows = {
+        "segment_000.wav": "the quick brown fox jumps",
+        "segment_001.wav": "Fox jumps over the lazy",
+        "segment_002.wav": "the lazy dog.",
+    }
+    calls = []
+
+    def fake_whisper(whisper_cfg, file_name, file_obj, **kwargs):
+        calls.append(file_name)
+        return "json", json.dumps({"text": windows[file_name]})
+
+    monkeypatch.setattr(transcription, "call_whisper_inference", fake_whisper)
+
+    progress = []
+    fmt, content = transcription.transcribe_recording(
+        RECORDING_ID,
+        src,
+        cfg.whisper,
+        response_format="json",
+        on_progress=lambda done, total: progress.append((done, total)),
+    )
+    assert fmt == "json"
+    assert json.loads(content) == {
+        "text": "the quick brown fox jumps over the lazy dog."
+    }
+    assert sorted(calls) == sorted(windows)
+    assert progress[-1] == (3, 3)
+
+    # Windows are cached individually; a rerun sends nothing.
+    calls.clear()
+    transcription.transcribe_recording(
+        RECORDING_ID, src, cfg.whisper, response_format="json"
+    )
+    assert calls == []
+
+
+def test_transcripts_are_stored_once_and_rendered_per_format(tmp_path, monkeypatch):
+    cfg, _ = _setup(tmp_path, monkeypatch)
+    calls = []
+
+    def fake_whisper(whisper_cfg, file_name, file_obj, **kwargs):
+        calls.append(kwargs.get("response_format_override"))
+        payload = {
+            "text": " Hello there. General Kenobi.",
+            "segments": [
+                {
+                    "start": 0.0,
+                    "end": 0.8,
+                    "text": " Hello there.",
+                    "words": [
+                        {"word": " Hello", "start": 0.0, "end": 0.4},
+                        {"word": " there.", "start": 0.4, "end": 0.8},
+                    ],
+                },
+                {"start": 1.0, "end": 1.9, "text": " General Kenobi."},
+            ],
+        }
+        return "verbose_json", json.dumps(payload)
+
+    monkeypatch.setattr(transcription, "call_whisper_inference", fake_whisper)
+
+    jobs.transcription_queue.start()
+    try:
+        client = TestClient(app)
+        first = client.post(
+            f"/recordings/{RECORDING_ID}/transcribe", params={"response_format": "json"}
+        )
+        srt = client.post(
+            f"/recordings/{RECORDING_ID}/transcribe", params={"response_format": "srt"}
+        )
+    finally:
+        jobs.transcription_queue.stop()
+
+    assert json.loads(first.json()["content"]) == {
+        "text": "Hello there. General Kenobi."
+    }
+    assert srt.json()["cached"] is True
+    assert srt.json()["content"] == (
+        "1\n00:00:00,000 --> 00:00:00,800\nHello there.\n\n"
+        "2\n00:00:01,000 --> 00:00:01,900\nGeneral Kenobi.\n"
+    )
+    assert calls == ["verbose_json"]
+
+    vtt = client.get(
+        f"/recordings/{RECORDING_ID}/transcript", params={"response_format": "vtt"}
+    )
+    assert vtt.headers["content-type"].startswith("text/vtt")
+    assert vtt.text.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:00.800\n")
+    verbose = client.get(
+        f"/recordings/{RECORDING_ID}/transcript",
+        params={"response_format": "verbose_json"},
+    ).json()
+    assert verbose["segments"][0]["words"][1] == {
+        "word": "there.",
+        "start": 0.4,
+        "end": 0.8,
+    }
+
+    # VAD-sequential segments render the same way, shifted to the recording.
+    transcription.store_sequential_segment(
+        RECORDING_ID,
+        cfg.whisper,
+        cfg.vad,
+        {"index": 0, "start": 1.5, "end": 2.0, "format": "text", "content": "hi"},
+    )
+    sequential = client.get(
+        f"/recordings/{RECORDING_ID}/transcript",
+        params={"response_format": "srt", "source": "vad_sequential"},
+    )
+    assert sequential.text == "1\n00:00:01,500 --> 00:00:02,000\nhi\n"
+    assert calls == ["verbose_json"]
+
+
+def test_transcribe_answers_202_while_the_job_is_pending(tmp_path, monkeypatch):
+    _setup(tmp_path, monkeypatch)
+    monkeypatch.setattr(routes, "TRANSCRIBE_WAIT_SECONDS", 0.05)
+
+    # No workers are running, so the job is still queued when the wait ends.
+    client = TestClient(app)
+    response = client.post(
+        f"/recordings/{RECORDING_ID}/transcribe?response_format=text"
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert jobs.transcription_queue.get(job_id)["status"] == jobs.STATUS_QUEUED
+
+    jobs.transcription_queue.run_pending()
+    assert jobs.transcription_queue.get(job_id)["status"] == jobs.STATUS_DONE
+
+    response = client.post(
+        f"/recordings/{RECORDING_ID}/transcribe?response_format=text"
+    )
+    assert response.status_code == 200
+    assert response.json()["content"]
@@ -0,0 +1,173 @@
+import json
+import struct
+import sys
+import wave
+from pathlib import Path
+
+from app.core import vad
+from app.core.cache import get_cache_entry
+from app.core.config import settings
+
+
+STUB_VAD = """\
+import os, sys, time
+release = sys.argv[sys.argv.index("--file") + 1] + ".release"
+print("VAD segment 0: start = 0.10, end = 0.50", flush=True)
+deadline = time.time() + 10
+while not os.path.exists(release) and time.time() < deadline:
+    time.sleep(0.01)
+print("VAD segment 1: start = 0.70, end = 0.90", flush=True)
+"""
+
+
+def _setup(tmp_path, monkeypatch):
+    script = tmp_path / "vad_stub.py"
+    script.write_text(STUB_VAD, encoding="utf-8")
+    launcher = tmp_path / "vad-speech-segments"
+    launcher.write_text(f"#!/bin/sh\nexec {sys.executable} {script} \"$@\"\n")
+    launcher.chmod(0o755)
+
+    monkeypatch.setattr(settings, "vad_binary", str(launcher))
+    monkeypatch.setattr(settings, "vad_model_path", "model.bin")
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+    monkeypatch.setattr(vad, "VAD_LOCK_PATH", tmp_path / "vad.lock")
+
+    recording_id = "f" * 32
+    audio = tmp_path / f"20250101T120000_{recording_id}.wav"
+    with wave.open(str(audio), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(struct.pack("<16000h", *([0] * 16000)))
+    return recording_id, audio
+
+
+def test_parse_prefers_vad_lines_over_speech_lines():
+    output = "\n".join(
+        [
+            "Speech segment 0: start = 10, end = 50",
+            "VAD segment 0: start = 0.20, end = 0.60",
+        ]
+    )
+    assert vad.parse_vad_segments_output(output) == [{"start": 0.2, "end": 0.6}]
+    assert vad.parse_vad_segments_output(output.splitlines()[0]) == [
+        {"start": 0.1, "end": 0.5}
+    ]
+
+
+def test_recording_id_from_path_rejects_other_names():
+    recording_id = "AB" * 16
+    assert vad.recording_id_from_path(
+        Path(f"20250101T120000_{recording_id}_meeting.wav")
+    ) == recording_id.lower()
+    assert vad.recording_id_from_path(Path("upload.wav")) is None
+    assert vad.recording_id_from_path(Path("20250101T120000_notanid.wav")) is None
+
+
+def test_segments_are_yielded_before_vad_process_exits(tmp_path, monkeypatch):
+    recording_id, audio = _setup(tmp_path, monkeypatch)
+
+    segments = vad.iter_vad_segments(audio, vad_cfg=None, whisper_cfg=None)
+    first = next(segments)
+    assert first == {"start": 0.1, "end": 0.5}
+    # Nothing is cached until the process has finished successfully.
+    assert get_cache_entry(recording_id, "vad_sequential") is None
+
+    proxy_path = vad.vad_input_path(audio)
+    (proxy_path.parent / (proxy_path.name + ".release")).write_text("")
+    rest = list(segments)
+    assert rest == [{"start": 0.7, "end": 0.9}]
+
+    cached = get_cache_entry(recording_id, "vad_sequential")
+    assert json.loads(cached["vad_segments_json"]) == [first] + rest
+    assert not vad.VAD_LOCK_PATH.exists()
+
+
+def test_closing_iterator_early_releases_lock(tmp_path, monkeypatch):
+    _, audio = _setup(tmp_path, monkeypatch)
+
+    segments = vad.iter_vad_segments(audio, vad_cfg=None, whisper_cfg=None)
+    next(segments)
+    assert vad.VAD_LOCK_PATH.exists()
+    segments.close()
+    assert not vad.VAD_LOCK_PATH.exists()
+
+
+def test_closing_a_stream_that_was_never_iterated_releases_lock(tmp_path, monkeypatch):
+    _, audio = _setup(tmp_path, monkeypatch)
+
+    segments = vad.iter_vad_segments(audio, vad_cfg=None, whisper_cfg=None)
+    proc = segments._process.proc
+    assert vad.VAD_LOCK_PATH.exists()
+    segments.close()
+    assert not vad.VAD_LOCK_PATH.exists()
+    assert proc.poll() is not None
+    segments.close()
+
+    # A stream dropped without close() does not leave the lock behind either.
+    vad.iter_vad_segments(audio, vad_cfg=None, whisper_cfg=None)
+    assert not vad.VAD_LOCK_PATH.exists()
+
+
+def test_cancelling_kills_vad_process_and_caches_nothing(tmp_path, monkeypatch):
+    import threading
+
+    import pytest
+
+    from app.core.cancellation import CancelToken, OperationCancelled
+
+    recording_id, audio = _setup(tmp_path, monkeypatch)
+    cancel = CancelToken()
+
+    segments = vad.iter_vad_segments(
+        audio, vad_cfg=None, whisper_cfg=None, cancel=cancel
+    )
+    next(segments)
+    # The stub would block for 10 s waiting for its release file.
+    timer = threading.Timer(0.2, cancel.cancel)
+    timer.start()
+    with pytest.raises(OperationCancelled):
+        list(segments)
+    timer.join()
+
+    assert get_cache_entry(recording_id, "vad_sequential") is None
+    assert not vad.VAD_LOCK_PATH.exists()
+
+
+def test_batch_lookup_returns_cached_segments_only(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import app.api.routes as routes
+    from app.core.cache import upsert_cache_entry
+    from app.main import app
+
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    enqueued = []
+    monkeypatch.setattr(
+        routes.processing_pipeline,
+        "enqueue",
+        lambda ids, priority=0: enqueued.extend(ids) or list(ids),
+    )
+
+    cached_id, missing_id = "1" * 32, "2" * 32
+    upsert_cache_entry(
+        recording_id=cached_id,
+        response_format="vad_sequential",
+        config_hash="h",
+        config_json="{}",
+        vad_segments_json=json.dumps([{"start": 0.0, "end": 1.0}]),
+    )
+
+    client = TestClient(app)
+    response = client.post(
+        "/recordings/vad_segments/batch",
+        json={"ids": [cached_id, missing_id, "not-an-id"], "enqueue_missing": True},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["items"] == {
+        cached_id: {"count": 1, "segments": [{"start": 0.0, "end": 1.0}]}
+    }
+    assert data["missing"] == [missing_id]
+    assert enqueued == [missing_id]
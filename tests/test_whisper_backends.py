@@ -0,0 +1,135 @@
+import socket
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.core import transcription
+from app.core.app_config import WhisperBackend, WhisperConfig
+from app.core.config import settings
+from app.core.whisper_backends import BackendPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # noqa: N802 - http.server API
+        self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        time.sleep(0.1)
+        with server.lock:
+            server.active -= 1
+            server.handled += 1
+        body = server.name.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def servers():
+    started = []
+    for name in ("a", "b"):
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        httpd.name = name
+        httpd.lock = threading.Lock()
+        httpd.active = httpd.peak = httpd.handled = 0
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        started.append(httpd)
+    yield started
+    for httpd in started:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "cache_db_path", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(settings, "analysis_cache_dir", str(tmp_path / "analysis"))
+    monkeypatch.setattr(transcription, "backend_pool", BackendPool())
+    recording_id = "b" * 32
+    src = tmp_path / f"20250101T120000_{recording_id}.wav"
+    with wave.open(str(src), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(struct.pack("<160000h", *([0] * 160000)))
+    segments = [{"start": float(i), "end": i + 0.5} for i in range(8)]
+    return recording_id, src, segments
+
+
+def test_segments_are_spread_over_backends_in_order(tmp_path, monkeypatch, servers):
+    recording_id, src, segments = _setup(tmp_path, monkeypatch)
+    whisper_cfg = WhisperConfig(
+        enabled=True,
+        pack_max_seconds=0,
+        backends=[
+            WhisperBackend(url=f"http://127.0.0.1:{s.server_port}", max_concurrency=2)
+            for s in servers
+        ],
+    )
+
+    seen = []
+    started = time.perf_counter()
+    sent = transcription.transcribe_recording_sequential(
+        recording_id,
+        src,
+        segments,
+        whisper_cfg,
+        None,
+        on_segment=lambda entry: seen.append(entry["index"]),
+    )
+    elapsed = time.perf_counter() - started
+
+    assert sent == 8
+    assert seen == list(range(8))
+    assert all(s.handled > 0 for s in servers)
+    assert all(s.peak <= 2 for s in servers)
+    # Eight 0.1 s requests over four slots.
+    assert elapsed < 0.6
+
+    stats = {b["url"]: b for b in transcription.backend_pool.stats()}
+    assert sum(b["requests"] for b in stats.values()) == 8
+    assert all(b["audio_seconds"] > 0 for b in stats.values())
+
+
+def test_unreachable_backend_fails_over(tmp_path, monkeypatch, servers):
+    recording_id, src, segments = _setup(tmp_path, monkeypatch)
+    dead = f"http://127.0.0.1:{_free_port()}"
+    alive = f"http://127.0.0.1:{servers[0].server_port}"
+    whisper_cfg = WhisperConfig(
+        enabled=True,
+        pack_max_seconds=0,
+        backends=[
+            WhisperBackend(url=dead, weight=10.0),
+            WhisperBackend(url=alive),
+        ],
+    )
+
+    sent = transcription.transcribe_recording_sequential(
+        recording_id, src, segments[:3], whisper_cfg, None
+    )
+    assert sent == 3
+    assert servers[0].handled == 3
+
+    stats = {b["url"]: b for b in transcription.backend_pool.stats()}
+    assert stats[dead]["healthy"] is False
+    assert stats[dead]["errors"] == 1
+    cached = transcription._cached_sequential_segments(recording_id)
+    assert [s["content"] for s in cached] == ["a", "a", "a"]
@@ -0,0 +1,126 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.core.whisper_client import WhisperClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):  # noqa: N802 - http.server API
+        length = int(self.headers["Content-Length"])
+        self.rfile.read(length)
+        time.sleep(float(self.server.delay))
+        body = json.dumps({"text": "ok", "received": length}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.delay = 0.05
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_connections_are_reused_and_phases_timed(server):
+    client = WhisperClient(max_connections=2, connect_timeout=2, read_timeout=5)
+    url = f"http://127.0.0.1:{server.server_port}/inference"
+    payload = b"\0" * 200_000
+    try:
+        for _ in range(3):
+            response, timings = client.post(
+                url,
+                data={"response_format": "json"},
+                files={"file": ("a.wav", io.BytesIO(payload), "audio/wav")},
+            )
+            assert response.json()["received"] > len(payload)
+            assert timings.server >= 0.05
+            assert timings.bytes_sent > len(payload)
+    finally:
+        client.close()
+
+    stats = client.stats()
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["last"]["reused_connection"] is True
+    assert stats["server_seconds"] >= 0.15
+
+
+def test_read_timeout_is_enforced(server):
+    server.delay = 0.5
+    client = WhisperClient(connect_timeout=2, read_timeout=0.1)
+    url = f"http://127.0.0.1:{server.server_port}/inference"
+    try:
+        with pytest.raises(httpx.ReadTimeout):
+            client.post(url, data={"a": "b"})
+    finally:
+        client.close()
+    assert client.stats()["errors"] == 1
+
+
+def test_cancel_aborts_the_request_and_frees_the_connection(server):
+    from app.core.cancellation import CancelToken, OperationCancelled
+
+    server.delay = 5
+    client = WhisperClient(max_connections=1, connect_timeout=2, read_timeout=30)
+    url = f"http://127.0.0.1:{server.server_port}/inference"
+    cancel = CancelToken()
+    threading.Timer(0.3, cancel.cancel).start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(OperationCancelled):
+            client.post(url, data={"a": "b"}, cancel=cancel)
+        # The request stopped rather than being left to finish in the
+        # background, so the only pooled connection is free again.
+        assert time.monotonic() - started < 2
+        server.delay = 0
+        response, _ = client.post(url, data={"a": "b"}, timeout=2)
+        assert response.status_code == 200
+    finally:
+        client.close()
+
+
+def test_connection_limit_grows_with_backend_capacity(server):
+    server.delay = 0.5
+    client = WhisperClient(max_connections=1, connect_timeout=2, read_timeout=5)
+    url = f"http://127.0.0.1:{server.server_port}/inference"
+    client.post(url, data={"a": "b"})
+    # The backend pool can now run three requests at once.
+    client.ensure_capacity(3)
+    errors = []
+
+    def post():
+        try:
+            client.post(url, data={"a": "b"})
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    started = time.monotonic()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        client.close()
+    assert errors == []
+    # In parallel rather than one after another over a single connection.
+    assert time.monotonic() - started < 1.2